@@ -1,6 +1,8 @@
 import lex
+from array import array
 from ir3 import *
-from typing import List, Set, Dict, Tuple, Optional, Callable, Optional, Any, Union, Type
+from types import GeneratorType
+from typing import List, Set, Dict, Tuple, Optional, Callable, Optional, Any, Union, Type, Iterator, Iterable, Sequence
 
 ######################################################################
 ######################## ABSTRACT SYNTAX TREE ########################
@@ -79,7 +81,44 @@ string_literals = []
 def get_string_literals():
     return string_literals
 
+# Runs a visit over a tree with an explicit stack of suspended visits instead of Python
+# recursion, so trees of any depth can be walked. A visit method either returns its result,
+# or is a generator that yields the visit of each child it needs, node.visit_x(...), and is
+# sent back that child's result.
+def walk(visit: Union[Iterator, Any]) -> Any:
+    stack = [] # the suspended visits of every ancestor of the current one
+    result = None
+    while type(visit) is GeneratorType:
+        try:
+            child = visit.send(result)
+        except StopIteration as done:
+            result = done.value
+            if not stack:
+                return result
+            visit = stack.pop()
+            continue
+        if type(child) is GeneratorType:
+            stack.append(visit)
+            visit = child
+            result = None
+        else:
+            result = child # a leaf, its result is already computed
+    return visit
+
+# except the first letter, uppercase letters are not distinguished from lowercase
+def cname_token(tok: lex.Token) -> lex.Token:
+    tok.value = lex.intern(tok.value.lower().capitalize())
+    return tok
+
+def id_token(tok: lex.Token) -> lex.Token:
+    tok.value = lex.intern(tok.value.lower())
+    return tok
+
 class AstNode:
+    # nodes are allocated once per token/production, so keep them small: no instance
+    # __dict__, children in an immutable tuple, and any annotation a pass caches on a
+    # node declared as a slot by its subclass
+    __slots__ = ("name", "value", "children")
 
     @classmethod
     def epsilon(cls) -> 'AstNode':
@@ -256,15 +295,11 @@ class AstNode:
 
     @classmethod
     def make_cname(cls, tok: lex.Token) -> 'Cname':
-        # except the first letter, uppercase letters are not distinguished from lowercase
-        tok.value = tok.value.lower().capitalize()
-        return Cname(tok)
+        return Cname(cname_token(tok))
 
     @classmethod
     def make_id(cls, tok: lex.Token) -> 'Id':
-        # except the first letter, uppercase letters are not distinguished from lowercase
-        tok.value = tok.value.lower()
-        return Id(tok)
+        return Id(id_token(tok))
 
     @classmethod
     def make_true(cls, tok: lex.Token) -> 'TrueLit':
@@ -290,31 +325,47 @@ class AstNode:
     def make_null(cls, tok: lex.Token) -> 'Null':
         return Null(tok)
 
-    def __init__(self, name: str, value: lex.Token=None, children=None):
-        if children is None:
-            children = []
+    def __init__(self, name: str, value: lex.Token=None, children: Iterable['AstNode']=None):
         self.name = name
         self.value = value
-        self.children = children
+        self.children = tuple(children) if children else ()
 
     def set_left_child(self, node: 'AstNode'):
         if len(self.children) != 2:
             raise AssertionError("set_left_child")
-        self.children[0] = node
+        self.children = (node, self.children[1])
 
     def set_right_child(self, node: 'AstNode'):
         if len(self.children) != 2:
             raise AssertionError("set_right_child")
-        self.children[1] = node
+        self.children = (self.children[0], node)
 
-    # must be overriden
+    # type checks the tree, returning its type
     def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
+        return walk(self.visit_static_check(type_env, metadata))
+
+    # generates ir3, appending statements to context["code"] and returning the node's value
+    def ir3(self, context: Dict[str, Any]):
+        return walk(self.visit_ir3(context))
+
+    # type checks and generates ir3 in a single traversal, raising the same errors as
+    # static_check followed by ir3. Returns the program's ir3.
+    def check_ir3(self, type_env: 'TypeEnvironment' = None, metadata=None, context: Dict[str, Any] = None):
+        return walk(self.visit_check_ir3(type_env, metadata, context))
+
+    # must be overriden
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
         raise RuntimeError("static_check not defined on AstNode")
 
     # must be overriden
-    def ir3(self, context: Dict[str, Any]):
+    def visit_ir3(self, context: Dict[str, Any]):
         raise NotImplementedError("ir3 not defined on AstNode")
 
+    # must be overriden by nodes inside a program. Statements and expressions return (type, value),
+    # declarations return their ir3 node
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]):
+        raise NotImplementedError("check_ir3 not defined on AstNode")
+
     def __repr__(self):
         if self.value:
             return f"AstNode({self.name}, {self.value})"
@@ -323,9 +374,48 @@ class AstNode:
     def __str__(self):
         return print_tree(self, 0)
 
+##################### SHARED BY STATIC_CHECK AND IR3 #####################
+
+# assigns exp3 to a new temporary at the end of the current method's code, returning the temporary
+def assign_temporary(context: Dict[str, Any], exp3: 'IR3Node', type3: 'JLiteType') -> str:
+    temporary = IR3Node.new_temporary()
+    context["code"].append(Stmt3Assignment(temporary, exp3, type3))
+    return temporary
+
+# the ir3 data of class cid, i.e its fields
+def class_data3(type_env: 'TypeEnvironment', cid: str) -> CData3:
+    field_decls = type_env.class_lookup(cid)[0]
+    return CData3(cid, [VarDecl3(type3, id3) for id3, type3 in field_decls.items()])
+
+# opens the environment of the body of class cid: its fields, 'this' and its methods.
+# 'this' is also added to the class's field decls until close_class_env
+def open_class_env(type_env: 'TypeEnvironment', cid: str) -> 'TypeEnvironment':
+    field_decls, mtd_sigs = type_env.class_lookup(cid)
+    field_decls["this"] = JClass(cid)
+
+    child_env = type_env.child_env()
+    child_env.augment_symbols(type_env.field_symbols(cid))
+    child_env.augment_symbol(Symbol("this", field_decls["this"], SYMBOL_PARAM, 0, cid))
+    child_env.augment_msigs(mtd_sigs)
+    return child_env
+
+def close_class_env(type_env: 'TypeEnvironment', cid: str):
+    del type_env.class_lookup(cid)[0]["this"]
+
+# resets the annotations that static_check saved for ir3 on the nodes of the tree rooted at node
+def clear_annotations(node: AstNode):
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        for name in type(node).__slots__:
+            setattr(node, name, None)
+        stack.extend(node.children)
+
 ########################### NONTERMINAL AST NODES ###########################
 
 class Program(AstNode):
+    __slots__ = ("type_env",)
+
     def __init__(self, mainclass: 'MainClass', classdecls: 'ClassDecls'):
         super().__init__(name=AST_PROGRAM, children=[mainclass,classdecls])
         # persist the type env for ir3 later
@@ -339,76 +429,56 @@ class Program(AstNode):
     def classdecls(self) -> 'ClassDecls':
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
         # distinct name-checking done during initialization
-        self.type_env = TypeEnvironment.initialize(self.mainclass, self.classdecls)
+        self.type_env = TypeEnvironment.initialize(unpack_classes(self.mainclass, self.classdecls))
         # print(type_env)
 
         # type check
-        self.mainclass.static_check(self.type_env, metadata)
-        self.classdecls.static_check(self.type_env, metadata)
+        yield self.mainclass.visit_static_check(self.type_env, metadata)
+        yield self.classdecls.visit_static_check(self.type_env, metadata)
 
-    def ir3(self, context: Dict[str, Any]) -> Program3:
+    def visit_ir3(self, context: Dict[str, Any]) -> Program3:
         cdata3_list = []
         cmtd3_list = []
-
-        # fill in main class
-        main_class: MainClass = self.mainclass
-        main_classname = main_class.cname.class_name
-        # pass classname down to child nodes (e.g method call nodes need to mangle names too)
-        context["classname"] = main_classname
-        main_md: MdDecl = main_class.mainmd
-
-        # fill in cdata3 of main class
-        fds, msigs = self.type_env.class_lookup(main_classname)
-        vardecls = [VarDecl3(type3, id3) for id3, type3 in fds.items()]
-        cdata3_list.append(CData3(main_classname, vardecls))
-
-        # fill in cmtd3 of main class
-        for mname, msig in msigs.items():
-            fmllist, rettype = msig
-            fmllist3: FmlList3 = FmlList3(main_classname, [Fml3(JClass(main_classname), "this")] + [Fml3(type3, id3) for id3, type3 in fmllist])
-            context["parameters"] = fmllist3.fml3_list
-            context["localvars"] = main_md.mdbody.vardecls.vardecl_list
-            # generate ir3 for a single method
-            mdbody3: MdBody3 = main_md.mdbody.ir3(context)
-            # generate mangled method name, e.g %Functional_f(a, b)
-            mangled_mname = IR3Node.mangle_method_name(context["classname"], mname)
-            cmtd3 = CMtd3(rettype, mangled_mname, fmllist3, mdbody3)
-            cmtd3_list.append(cmtd3)
-
-        # fill in class decls (and their methods)
-        class_decls: ClassDecls = self.classdecls
-        for class_decl_node in class_decls.classdecls:
-            classname = class_decl_node.cname.class_name
+        for class_node in (self.mainclass,) + self.classdecls.classdecls:
+            cid = class_node.cname.class_name
             # pass classname down to child nodes (e.g method call nodes need to mangle names too)
-            context["classname"] = classname
-            md_decls: MdDecls = class_decl_node.mddecls
+            context["classname"] = cid
 
             # fill in cdata3 of current class
-            fds, msigs = self.type_env.class_lookup(classname)
-            vardecls = [VarDecl3(type3, id3) for id3, type3 in fds.items()]
-            cdata3_list.append(CData3(classname, vardecls))
+            cdata3_list.append(class_data3(self.type_env, cid))
 
             # fill in cmtd3 of current class
-            for md_decl_node in md_decls.mddecl_list:
-                md_name = md_decl_node.id_node.id_name
-                md_sig = msigs[md_name]
-                md_fml_list, md_ret_type = md_sig
-                fmllist3: FmlList3 = FmlList3(classname, [Fml3(JClass(classname), "this")] + [Fml3(type3, id3) for id3, type3 in md_fml_list])
-                # fill in local variables (to handle "this")
-                context["parameters"] = fmllist3.fml3_list
-                context["localvars"] = md_decl_node.mdbody.vardecls.vardecl_list
+            msigs = self.type_env.class_lookup(cid)[1]
+            for md_decl_node in class_node.methods:
+                mid = md_decl_node.id_node.id_name
+                msig = msigs[mid]
+                fmllist3 = md_decl_node.enter_ir3(cid, msig, context, md_decl_node.mdbody.vardecls.vardecl_list)
                 # generate ir3 for a single method
-                mdbody3: MdBody3 = md_decl_node.mdbody.ir3(context)
-                # generate mangled method name, e.g %Functional_f(a, b)
-                mangled_mdname = IR3Node.mangle_method_name(context["classname"], md_name)
-                cmtd3 = CMtd3(md_ret_type, mangled_mdname, fmllist3, mdbody3)
-                cmtd3_list.append(cmtd3)
+                mdbody3: MdBody3 = yield md_decl_node.mdbody.visit_ir3(context)
+                cmtd3_list.append(md_decl_node.make_cmtd3(cid, mid, msig, fmllist3, mdbody3))
+
+        return Program3(cdata3_list, cmtd3_list)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Program3:
+        # distinct name-checking done during initialization, the env is not kept on the node
+        type_env = TypeEnvironment.initialize(unpack_classes(self.mainclass, self.classdecls))
+
+        # each class is checked and lowered before moving on to the next one
+        cdata3_list = []
+        cmtd3_list = []
+        for class_node in (self.mainclass,) + self.classdecls.classdecls:
+            cdata3, cmtd3s = yield class_node.visit_check_ir3(type_env, metadata, context)
+            cdata3_list.append(cdata3)
+            cmtd3_list.extend(cmtd3s)
 
         return Program3(cdata3_list, cmtd3_list)
 
+
 class MainClass(AstNode):
+    __slots__ = ()
+
     def __init__(self, cname: 'Cname', mainmd: 'MdDecl'):
         super().__init__(name=AST_MAINCLASS, children=[cname,mainmd])
 
@@ -420,42 +490,56 @@ class MainClass(AstNode):
     def mainmd(self) -> 'MdDecl':
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
-        # retrieve details for current class
-        cid = self.cname.class_name
-        field_decls, mtd_sigs = type_env.class_lookup(cid)
-        field_decls["this"] = JClass(cid)
+    @property
+    def methods(self) -> Tuple['MdDecl', ...]:
+        return (self.mainmd,)
 
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
         # fill a local environment with main method (basically follow the appendix)
-        child_env = type_env.child_env()
-        child_env.augment_fields(field_decls)
-        child_env.augment_msigs(mtd_sigs)
+        cid = self.cname.class_name
+        child_env = open_class_env(type_env, cid)
 
         # then type check the main method
-        self.mainmd.static_check(child_env, cid)
+        yield self.mainmd.visit_static_check(child_env, cid)
 
-        # cleanup
-        del field_decls["this"]
+        close_class_env(type_env, cid)
 
-    def ir3(self, context: Dict[str, Any]):
+    def visit_ir3(self, context: Dict[str, Any]):
         raise NotImplementedError()
 
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple[CData3, List[CMtd3]]:
+        cid = self.cname.class_name
+        # pass classname down to child nodes (e.g method call nodes need to mangle names too)
+        context["classname"] = cid
+        cdata3 = class_data3(type_env, cid)
+        child_env = open_class_env(type_env, cid)
+
+        # then check and lower the main method
+        cmtd3 = yield self.mainmd.visit_check_ir3(child_env, cid, context)
+
+        close_class_env(type_env, cid)
+        return cdata3, [cmtd3]
+
 class ClassDecls(AstNode):
+    __slots__ = ()
+
     def __init__(self, classdecls: List['ClassDecl']):
         super().__init__(name=AST_CLASSDECLS, children=classdecls)
 
     @property
-    def classdecls(self) -> List['ClassDecl']:
+    def classdecls(self) -> Tuple['ClassDecl', ...]:
         return self.children
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
         for classdecl in self.classdecls:
-            classdecl.static_check(type_env, metadata)
+            yield classdecl.visit_static_check(type_env, metadata)
 
-    def ir3(self, context: Dict[str, Any]):
+    def visit_ir3(self, context: Dict[str, Any]):
         raise NotImplementedError()
 
 class ClassDecl(AstNode):
+    __slots__ = ()
+
     def __init__(self, cname: 'Cname', vardecls: 'VarDecls', mddecls: 'MdDecls'):
         super().__init__(name=AST_CLASSDECL, children=[cname,vardecls,mddecls])
 
@@ -471,42 +555,60 @@ class ClassDecl(AstNode):
     def mddecls(self) -> 'MdDecls':
         return self.children[2]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
-        # retrieve details for current class
-        cid = self.cname.class_name
-        field_decls, mtd_sigs = type_env.class_lookup(cid)
-        field_decls["this"] = JClass(cid)
+    @property
+    def methods(self) -> Tuple['MdDecl', ...]:
+        return self.mddecls.mddecl_list
 
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
         # create a new local environment for child class (has block)
-        child_env = type_env.child_env()
-        child_env.augment_fields(field_decls)
-        child_env.augment_msigs(mtd_sigs)
+        cid = self.cname.class_name
+        child_env = open_class_env(type_env, cid)
 
         # check all methods are OK in the current environment
-        self.mddecls.static_check(child_env, cid)
+        yield self.mddecls.visit_static_check(child_env, cid)
 
-        # cleanup
-        del field_decls["this"]
+        close_class_env(type_env, cid)
 
-    def ir3(self, context: Dict[str, Any]):
+    def visit_ir3(self, context: Dict[str, Any]):
         raise NotImplementedError()
 
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple[CData3, List[CMtd3]]:
+        cid = self.cname.class_name
+        # pass classname down to child nodes (e.g method call nodes need to mangle names too)
+        context["classname"] = cid
+        cdata3 = class_data3(type_env, cid)
+        child_env = open_class_env(type_env, cid)
+
+        # then check and lower each method
+        cmtd3_list = []
+        for mddecl in self.methods:
+            cmtd3 = yield mddecl.visit_check_ir3(child_env, cid, context)
+            cmtd3_list.append(cmtd3)
+
+        close_class_env(type_env, cid)
+        return cdata3, cmtd3_list
+
+
 class MdDecls(AstNode):
+    __slots__ = ()
+
     def __init__(self, mddecls: List['MdDecl']):
         super().__init__(name=AST_MDDECLS, children=mddecls)
 
     @property
-    def mddecl_list(self) -> List['MdDecl']:
+    def mddecl_list(self) -> Tuple['MdDecl', ...]:
         return self.children
 
-    def static_check(self, type_env: 'TypeEnvironment'=None, cid=None):
+    def visit_static_check(self, type_env: 'TypeEnvironment'=None, cid=None):
         for mddecl in self.mddecl_list:
-            mddecl.static_check(type_env, cid)
+            yield mddecl.visit_static_check(type_env, cid)
 
-    def ir3(self, context: Dict[str, Any]):
+    def visit_ir3(self, context: Dict[str, Any]):
         raise NotImplementedError()
 
 class MdDecl(AstNode):
+    __slots__ = ("_type_env",)
+
     def __init__(self, type_node: 'AstType',
                  id_node: 'Id',
                  fmllist: 'FmlList',
@@ -530,51 +632,96 @@ class MdDecl(AstNode):
     def mdbody(self) -> 'MdBody':
         return self.children[3]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, cid=None):
-        # augment a new env with params and return type of method
+    # names and declared types of the local variables
+    @property
+    def localvars(self) -> List[Tuple[str, 'JLiteType']]:
+        return unpack_vars(self.mdbody.vardecls.vardecl_list)
+
+    # augments a new env with the params, local variables and return type of method mid
+    @staticmethod
+    def method_env(type_env: 'TypeEnvironment', cid: str, mid: str, localvars: List[Tuple[str, 'JLiteType']]) -> Tuple['TypeEnvironment', 'MethodSignature']:
         stuff = type_env.class_lookup(cid)
         if not stuff:
             raise TypeCheckError(f"unexpected cname '{cid}' in Mddecl")
 
         msigs: Dict[str, MethodSignature] = stuff[1]
-        mid = self.id_node.id_name
-        params_list, ret_type = msigs[mid]
+        msig = msigs[mid]
+        params_list, ret_type = msig.params, msig.ret_type
 
         # add params and the special return type before checking MDecl
         child_env = type_env.child_env()
         child_env.augment_field("Ret", ret_type)
-        for param_name, param_type in params_list:
-            child_env.augment_field(param_name, param_type)
+        for idx, (param_name, param_type) in enumerate(params_list, 1): # this is param 0
+            child_env.augment_symbol(Symbol(param_name, param_type, SYMBOL_PARAM, idx, cid))
 
         # add local variable declarations before checking method body
-        for vardecl_node in self.mdbody.vardecls.vardecl_list:
-            localvar_type: JLiteType = node_to_type(vardecl_node.type_node)
-            localvar_id = vardecl_node.id_node.id_name
-            child_env.augment_field(localvar_id, localvar_type)
+        for idx, (localvar_id, localvar_type) in enumerate(localvars):
+            child_env.augment_symbol(Symbol(localvar_id, localvar_type, SYMBOL_LOCAL, idx, cid))
 
-        # type-check the method body block
-        mdbody_type = self.mdbody.static_check(child_env, cid)
+        return child_env, msig
+
+    # the method body must have the method's return type
+    @staticmethod
+    def check_body_type(cid: str, mid: str, msig: 'MethodSignature', mdbody_type: 'JLiteType'):
+        ret_type = msig.ret_type
         if mdbody_type != ret_type:
             raise TypeCheckError(f"types {mdbody_type} and {ret_type} must match for class {cid} method {mid}")
 
-    def ir3(self, context: Dict[str, Any]):
+    # passes the params and local variables of the method down to its body, returning the params
+    @staticmethod
+    def enter_ir3(cid: str, msig: 'MethodSignature', context: Dict[str, Any], localvars) -> FmlList3:
+        fmllist3 = FmlList3(cid, [Fml3(JClass(cid), "this")] + [Fml3(type3, id3) for id3, type3 in msig.params])
+        context["parameters"] = fmllist3.fml3_list
+        context["localvars"] = localvars
+        return fmllist3
+
+    @staticmethod
+    def make_cmtd3(cid: str, mid: str, msig: 'MethodSignature', fmllist3: FmlList3, mdbody3: 'MdBody3') -> CMtd3:
+        # generate mangled method name, e.g %Functional_f(a, b)
+        mangled_mid = IR3Node.mangle_method_name(cid, mid)
+        return CMtd3(msig.ret_type, mangled_mid, fmllist3, mdbody3)
+
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, cid=None):
+        mid = self.id_node.id_name
+        child_env, msig = self.method_env(type_env, cid, mid, self.localvars)
+
+        # type-check the method body block
+        mdbody_type = yield self.mdbody.visit_static_check(child_env, cid)
+        self.check_body_type(cid, mid, msig, mdbody_type)
+
+    def visit_ir3(self, context: Dict[str, Any]):
         raise NotImplementedError()
 
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', cid, context: Dict[str, Any]) -> CMtd3:
+        mid = self.id_node.id_name
+        child_env, msig = self.method_env(type_env, cid, mid, self.localvars)
+        fmllist3 = self.enter_ir3(cid, msig, context, self.mdbody.vardecls.vardecl_list)
+
+        # type-check the method body block while generating its ir3
+        mdbody_type, mdbody3 = yield self.mdbody.visit_check_ir3(child_env, cid, context)
+        self.check_body_type(cid, mid, msig, mdbody_type)
+
+        return self.make_cmtd3(cid, mid, msig, fmllist3, mdbody3)
+
 class FmlList(AstNode):
+    __slots__ = ()
+
     def __init__(self, fmls: List['Fml']):
         super().__init__(name=AST_FMLLIST, children=fmls)
 
     @property
-    def fmls(self) -> List['Fml']:
+    def fmls(self) -> Tuple['Fml', ...]:
         return self.children
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
         pass
 
-    def ir3(self, context: Dict[str, Any]):
+    def visit_ir3(self, context: Dict[str, Any]):
         raise NotImplementedError()
 
 class Fml(AstNode):
+    __slots__ = ()
+
     def __init__(self, type_node: 'AstType', id_node: AstNode):
         super().__init__(name=AST_FML, children=[type_node, id_node])
 
@@ -586,16 +733,18 @@ class Fml(AstNode):
     def id_node(self) -> 'Id':
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
         pass
 
-    def ir3(self, context: Dict[str, Any]):
+    def visit_ir3(self, context: Dict[str, Any]):
         raise NotImplementedError()
 
 class MdBody(AstNode):
+    __slots__ = ("vardecl_types",)
+
     def __init__(self, vardecls: 'VarDecls', stmts: 'Stmts'):
         super().__init__(name=AST_MDBODY, children=[vardecls,stmts])
-        self._type_env = None
+        self.vardecl_types: Optional[List[JLiteType]] = None # types of the local variables, saved for ir3
 
     @property
     def vardecls(self) -> 'VarDecls':
@@ -606,27 +755,21 @@ class MdBody(AstNode):
         return self.children[1]
 
     @property
-    def type_env(self) -> 'TypeEnvironment':
-        return self._type_env
+    def vardecl_names(self) -> List[str]:
+        return [x.id_node.id_name for x in self.vardecls.vardecl_list]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
-        self._type_env = type_env
-        return self.stmts.static_check(type_env, metadata)
+    # the types of the local variables, as declared in the method's environment
+    @staticmethod
+    def local_types(type_env: 'TypeEnvironment', var_ids: List[str]) -> List['JLiteType']:
+        return [type_env.field_lookup(var_id) for var_id in var_ids]
 
-    def ir3(self, context: Dict[str, Any]) -> 'MdBody3':
-        vardecl3_lst = []
-        stmt3s_lst = []
+    # the method's code, once every statement has been appended to stmt3s_lst
+    @staticmethod
+    def make_mdbody3(context: Dict[str, Any], stmt3s_lst: List['IR3Node'], var_ids: List[str], var_types: List['JLiteType']) -> 'MdBody3':
+        del context["code"]
 
         # load var decls
-        for var_decl_node in self.vardecls.vardecl_list:
-            var_id: str = var_decl_node.id_node.id_name
-            var_type: JLiteType = self.type_env.field_lookup(var_id)
-            vardecl3 = VarDecl3(var_type, var_id)
-            vardecl3_lst.append(vardecl3)
-
-        # load stmts (ir3 representation)
-        stmts_code, _ = self.stmts.ir3(context)
-        stmt3s_lst.extend(stmts_code)
+        vardecl3_lst = [VarDecl3(var_type, var_id) for var_id, var_type in zip(var_ids, var_types)]
 
         # add return type declaration (if any)
         if "return" in context:
@@ -636,21 +779,44 @@ class MdBody(AstNode):
 
         return MdBody3(vardecl3_lst, stmt3s_lst)
 
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
+        self.vardecl_types = self.local_types(type_env, self.vardecl_names) # saved for ir3
+        return (yield self.stmts.visit_static_check(type_env, metadata))
+
+    def visit_ir3(self, context: Dict[str, Any]) -> 'MdBody3':
+        # load stmts (ir3 representation), every statement is appended to this method's buffer
+        stmt3s_lst = context["code"] = []
+        yield self.stmts.visit_ir3(context)
+        return self.make_mdbody3(context, stmt3s_lst, self.vardecl_names, self.vardecl_types)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', 'MdBody3']:
+        var_ids = self.vardecl_names
+        var_types = self.local_types(type_env, var_ids)
+        # load stmts, checking each one and appending its ir3 to this method's buffer
+        stmt3s_lst = context["code"] = []
+        mdbody_type, _ = yield self.stmts.visit_check_ir3(type_env, metadata, context)
+        return mdbody_type, self.make_mdbody3(context, stmt3s_lst, var_ids, var_types)
+
+
 class VarDecls(AstNode):
+    __slots__ = ()
+
     def __init__(self, vardecls: List['VarDecl']):
         super().__init__(name=AST_VARDECLS, children=vardecls)
 
     @property
-    def vardecl_list(self) -> List['VarDecl']:
+    def vardecl_list(self) -> Tuple['VarDecl', ...]:
         return self.children
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
         pass
 
-    def ir3(self, context: Dict[str, Any]):
+    def visit_ir3(self, context: Dict[str, Any]):
         raise NotImplementedError()
 
 class VarDecl(AstNode):
+    __slots__ = ()
+
     def __init__(self, type_node: 'AstType', id_node: 'Id'):
         super().__init__(name=AST_VARDECL, children=[type_node, id_node])
 
@@ -662,41 +828,51 @@ class VarDecl(AstNode):
     def id_node(self) -> 'Id':
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
         pass
 
-    def ir3(self, context: Dict[str, Any]):
+    def visit_ir3(self, context: Dict[str, Any]):
         raise NotImplementedError()
 
 class Stmts(AstNode):
+    __slots__ = ()
+
     def __init__(self, stmts: List[AstNode]):
         super().__init__(name=AST_STMTS, children=stmts)
 
     @property
-    def stmts(self) -> List['AstNode']:
+    def stmts(self) -> Tuple['AstNode', ...]:
         return self.children
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
         if len(self.stmts) == 0:
-            return JVoid()
+            return VOID_TYPE
 
         # the type of a bunch of statements is the last statement
         last_type = None
 
         # children are atoms, etc..
         for ast_node in self.stmts:
-            last_type = ast_node.static_check(type_env, metadata)
+            last_type = yield ast_node.visit_static_check(type_env, metadata)
 
         return last_type
 
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
-        code = []
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        for stmt in self.stmts:
+            yield stmt.visit_ir3(context)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        # the type of a bunch of statements is the last statement
+        last_type = VOID_TYPE
         for stmt in self.stmts:
-            tmp_code, _ = stmt.ir3(context)
-            code.extend(tmp_code)
-        return code, None
+            last_type, _ = yield stmt.visit_check_ir3(type_env, metadata, context)
+
+        return last_type, None
+
 
 class IfStatement(AstNode):
+    __slots__ = ()
+
     def __init__(self, conditional: 'Exp', if_body: 'Stmts', else_body: 'Stmts'):
         super().__init__(name=AST_IF_STATEMENT, children=[conditional,if_body,else_body])
 
@@ -712,23 +888,21 @@ class IfStatement(AstNode):
     def else_body(self) -> 'Stmts':
         return self.children[2]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
-        # conditional should be bool type
-        cond_type = self.conditional.static_check(type_env, metadata)
-        if cond_type != JBool():
+    # conditional should be bool type
+    @staticmethod
+    def check_conditional(cond_type: 'JLiteType'):
+        if cond_type is not BOOL_TYPE:
             raise TypeCheckError(f"expected type {JBool} in 'if' conditional, got {cond_type}")
 
-        # if body and else body should match types
-        if_env = type_env.child_env()
-        if_type = self.if_body.static_check(if_env, metadata)
-        else_env = type_env.child_env()
-        else_type = self.else_body.static_check(else_env, metadata)
+    # if body and else body should match types
+    @staticmethod
+    def check_bodies(if_type: 'JLiteType', else_type: 'JLiteType') -> 'JLiteType':
         if if_type != else_type:
             raise TypeCheckError(f"expected if body type {if_type} to match else body type {else_type}")
-
         return if_type
 
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(code: List['IR3Node'], labels: Tuple[str, str], b_temp: IR3Value, s1_code: List['IR3Node'], s2_code: List['IR3Node']):
         """
         if (B) S1 else S2
         B.true = newlabel()
@@ -741,14 +915,7 @@ class IfStatement(AstNode):
                     S1.code ||
                     B.next ||
         """
-        b_true = IR3Node.new_label()
-        b_next = IR3Node.new_label()
-        b_code, b_temp = self.conditional.ir3(context)
-        s1_code, _ = self.if_body.ir3(context) # anchor should be None
-        s2_code, _ = self.else_body.ir3(context) # anchor should be None
-
-        code = []
-        code.extend(b_code)
+        b_true, b_next = labels
         code.append(Stmt3IfGoto(b_temp, b_true))
         code.extend(s2_code)
         code.append(Stmt3GotoLabel(b_next))
@@ -756,9 +923,53 @@ class IfStatement(AstNode):
         code.extend(s1_code)
         code.append(Stmt3LabelSemicolon(b_next))
 
-        return code, None
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+        cond_type = yield self.conditional.visit_static_check(type_env, metadata)
+        self.check_conditional(cond_type)
+
+        if_env = type_env.child_env()
+        if_type = yield self.if_body.visit_static_check(if_env, metadata)
+        else_env = type_env.child_env()
+        else_type = yield self.else_body.visit_static_check(else_env, metadata)
+        return self.check_bodies(if_type, else_type)
+
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        labels = IR3Node.new_label(), IR3Node.new_label()
+        b_temp = yield self.conditional.visit_ir3(context)
+
+        # each body gets a buffer of its own, placed after the jump on B
+        code = context["code"]
+        s1_code = context["code"] = []
+        yield self.if_body.visit_ir3(context)
+        s2_code = context["code"] = []
+        yield self.else_body.visit_ir3(context)
+        context["code"] = code
+
+        self.emit_ir3(code, labels, b_temp, s1_code, s2_code)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        labels = IR3Node.new_label(), IR3Node.new_label()
+        cond_type, b_temp = yield self.conditional.visit_check_ir3(type_env, metadata, context)
+        self.check_conditional(cond_type)
+
+        # each body gets a buffer of its own, placed after the jump on B
+        code = context["code"]
+        s1_code = context["code"] = []
+        if_env = type_env.child_env()
+        if_type, _ = yield self.if_body.visit_check_ir3(if_env, metadata, context)
+        s2_code = context["code"] = []
+        else_env = type_env.child_env()
+        else_type, _ = yield self.else_body.visit_check_ir3(else_env, metadata, context)
+        context["code"] = code
+
+        if_type = self.check_bodies(if_type, else_type)
+        self.emit_ir3(code, labels, b_temp, s1_code, s2_code)
+        return if_type, None
+
 
 class WhileStatement(AstNode):
+    __slots__ = ()
+
     def __init__(self, conditional: AstNode, while_body: AstNode):
         super().__init__(name=AST_WHILE, children=[conditional,while_body])
 
@@ -770,19 +981,14 @@ class WhileStatement(AstNode):
     def while_body(self):
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
-        # conditional should be bool type
-        cond_type = self.conditional.static_check(type_env, metadata)
-        if type(cond_type) != JBool:
+    # conditional should be bool type
+    @staticmethod
+    def check_conditional(cond_type: 'JLiteType'):
+        if cond_type is not BOOL_TYPE:
             raise TypeCheckError(f"expected type {JBool} in 'while' conditional, got {cond_type}")
 
-        # while body is final type
-        while_env = type_env.child_env()
-        while_type = self.while_body.static_check(while_env, metadata)
-
-        return while_type
-
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(code: List['IR3Node'], labels: Tuple[str, str, str], b_temp: IR3Value, b_code: List['IR3Node'], s1_code: List['IR3Node']):
         """
         while (B) { S1 }
         B.temporary = new temporary()
@@ -797,13 +1003,7 @@ class WhileStatement(AstNode):
             goto B.begin
         B.next:
         """
-        b_begin = IR3Node.new_label()
-        b_next = IR3Node.new_label()
-        b_true = IR3Node.new_label()
-        b_code, b_temp = self.conditional.ir3(context)
-        s1_code, _ = self.while_body.ir3(context) # anchor should be None
-
-        code = []
+        b_begin, b_next, b_true = labels
         code.append(Stmt3LabelSemicolon(b_begin))
         code.extend(b_code)
         code.append(Stmt3IfGoto(b_temp, b_true))
@@ -813,9 +1013,47 @@ class WhileStatement(AstNode):
         code.append(Stmt3GotoLabel(b_begin))
         code.append(Stmt3LabelSemicolon(b_next))
 
-        return code, None
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+        cond_type = yield self.conditional.visit_static_check(type_env, metadata)
+        self.check_conditional(cond_type)
+
+        # while body is final type
+        while_env = type_env.child_env()
+        return (yield self.while_body.visit_static_check(while_env, metadata))
+
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        labels = IR3Node.new_label(), IR3Node.new_label(), IR3Node.new_label()
+
+        # B and S1 get buffers of their own, placed around the jumps of the loop
+        code = context["code"]
+        b_code = context["code"] = []
+        b_temp = yield self.conditional.visit_ir3(context)
+        s1_code = context["code"] = []
+        yield self.while_body.visit_ir3(context)
+        context["code"] = code
+
+        self.emit_ir3(code, labels, b_temp, b_code, s1_code)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        labels = IR3Node.new_label(), IR3Node.new_label(), IR3Node.new_label()
+
+        # B and S1 get buffers of their own, placed around the jumps of the loop
+        code = context["code"]
+        b_code = context["code"] = []
+        cond_type, b_temp = yield self.conditional.visit_check_ir3(type_env, metadata, context)
+        self.check_conditional(cond_type)
+        s1_code = context["code"] = []
+        while_env = type_env.child_env()
+        while_type, _ = yield self.while_body.visit_check_ir3(while_env, metadata, context)
+        context["code"] = code
+
+        self.emit_ir3(code, labels, b_temp, b_code, s1_code)
+        return while_type, None
+
 
 class Exp(AstNode):
+    __slots__ = ()
+
     def __init__(self, actual_exp: AstNode):
         super().__init__(name=AST_EXP, children=[actual_exp])
 
@@ -823,31 +1061,39 @@ class Exp(AstNode):
     def actual_exp(self):
         return self.children[0]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
-        return self.actual_exp.static_check(type_env, metadata)
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
+        return (yield self.actual_exp.visit_static_check(type_env, metadata))
 
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
         # need use temporary if it exists, pass to BExp/AExp/SExp
-        return self.actual_exp.ir3(context)
+        return (yield self.actual_exp.visit_ir3(context))
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        return (yield self.actual_exp.visit_check_ir3(type_env, metadata, context))
+
 
 class ExpList(AstNode):
+    __slots__ = ()
+
     def __init__(self, exps: List['Exp']):
         super().__init__(name=AST_EXPLIST, children=exps)
 
     @property
-    def exps(self) -> List['Exp']:
+    def exps(self) -> Tuple['Exp', ...]:
         return self.children
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
         # just make sure each expression is checked
         for node in self.exps:
-            node.static_check(type_env, metadata)
+            yield node.visit_static_check(type_env, metadata)
 
-    def ir3(self, context: Dict[str, Any]):
+    def visit_ir3(self, context: Dict[str, Any]):
         raise NotImplementedError()
 
 
 class Complement(AstNode):
+    __slots__ = ()
+
     def __init__(self, bgrd_atom_true_false: AstNode):
         super().__init__(name=AST_NEGATE, children=[bgrd_atom_true_false])
 
@@ -855,32 +1101,38 @@ class Complement(AstNode):
     def bgrd_atom_true_false(self):
         return self.children[0]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JBool':
-        child_type = self.bgrd_atom_true_false.static_check(type_env, metadata)
-        if type(child_type) != JBool:
+    @staticmethod
+    def check_operand(child_type: 'JLiteType'):
+        if child_type is not BOOL_TYPE:
             raise TypeCheckError(f"expected type Bool in complement, got {child_type}")
-        return child_type
 
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], b_temp: IR3Value) -> IR3Value:
         """
         ! B
         b_temp = new temporary()  // pass to B to use
         B.code
         ! b_temp
         """
-        b_code, b_temp = self.bgrd_atom_true_false.ir3(context)
+        return assign_temporary(context, Exp3Uop(Uop3.complement(), Idc3(b_temp)), BOOL_TYPE)
 
-        code = []
-        code.extend(b_code)
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JBool':
+        child_type = yield self.bgrd_atom_true_false.visit_static_check(type_env, metadata)
+        self.check_operand(child_type)
+        return child_type
 
-        # if a temporary is given, assign it to the result of this operation
-        temporary = IR3Node.new_temporary()
-        exp3 = Exp3Uop(Uop3.complement(), Idc3(b_temp))
-        code.append(Stmt3Assignment(temporary, exp3, JBool()))
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        b_temp = yield self.bgrd_atom_true_false.visit_ir3(context)
+        return self.emit_ir3(context, b_temp)
 
-        return code, temporary
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        child_type, b_temp = yield self.bgrd_atom_true_false.visit_check_ir3(type_env, metadata, context)
+        self.check_operand(child_type)
+        return child_type, self.emit_ir3(context, b_temp)
 
 class AndOp(AstNode):
+    __slots__ = ()
+
     def __init__(self, left: AstNode, right: AstNode):
         super().__init__(name=AST_AND, children=[left, right])
 
@@ -892,18 +1144,18 @@ class AndOp(AstNode):
     def right(self):
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JBool':
-        left_type = self.left.static_check(type_env, metadata)
-        if type(left_type) != JBool:
+    @staticmethod
+    def check_left(left_type: 'JLiteType'):
+        if left_type is not BOOL_TYPE:
             raise TypeCheckError(f"expected type Bool in '&&' LHS, got {left_type}")
 
-        right_type = self.right.static_check(type_env, metadata)
-        if type(right_type) != JBool:
+    @staticmethod
+    def check_right(right_type: 'JLiteType'):
+        if right_type is not BOOL_TYPE:
             raise TypeCheckError(f"expected type Bool in '&&' RHS, got {right_type}")
 
-        return left_type
-
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], a_temp: IR3Value, b_temp: IR3Value) -> IR3Value:
         """
         A && B
         a_temp = new temp()
@@ -912,20 +1164,30 @@ class AndOp(AstNode):
         B.code // get b_temp
         a_temp && b_temp
         """
-        a_code, a_temp = self.left.ir3(context)
-        b_code, b_temp = self.right.ir3(context)
+        return assign_temporary(context, Exp3Bop(Idc3(a_temp), Bop3.and_op(), Idc3(b_temp)), BOOL_TYPE)
 
-        code = []
-        code.extend(a_code)
-        code.extend(b_code)
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JBool':
+        left_type = yield self.left.visit_static_check(type_env, metadata)
+        self.check_left(left_type)
+        right_type = yield self.right.visit_static_check(type_env, metadata)
+        self.check_right(right_type)
+        return left_type
 
-        temporary = IR3Node.new_temporary()
-        exp3 = Exp3Bop(Idc3(a_temp), Bop3.and_op(), Idc3(b_temp))
-        code.append(Stmt3Assignment(temporary, exp3, JBool()))
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        a_temp = yield self.left.visit_ir3(context)
+        b_temp = yield self.right.visit_ir3(context)
+        return self.emit_ir3(context, a_temp, b_temp)
 
-        return code, temporary
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        left_type, a_temp = yield self.left.visit_check_ir3(type_env, metadata, context)
+        self.check_left(left_type)
+        right_type, b_temp = yield self.right.visit_check_ir3(type_env, metadata, context)
+        self.check_right(right_type)
+        return left_type, self.emit_ir3(context, a_temp, b_temp)
 
 class OrOp(AstNode):
+    __slots__ = ()
+
     def __init__(self, left: AstNode, right: AstNode):
         super().__init__(name=AST_OR, children=[left,right])
 
@@ -937,18 +1199,18 @@ class OrOp(AstNode):
     def right(self):
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JBool':
-        left_type = self.left.static_check(type_env, metadata)
-        if type(left_type) != JBool:
+    @staticmethod
+    def check_left(left_type: 'JLiteType'):
+        if left_type is not BOOL_TYPE:
             raise TypeCheckError(f"expected type Bool in '||' LHS, got {left_type}")
 
-        right_type = self.right.static_check(type_env, metadata)
-        if type(right_type) != JBool:
+    @staticmethod
+    def check_right(right_type: 'JLiteType'):
+        if right_type is not BOOL_TYPE:
             raise TypeCheckError(f"expected type Bool in '||' RHS, got {right_type}")
 
-        return left_type
-
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], a_temp: IR3Value, b_temp: IR3Value) -> IR3Value:
         """
         A || B
         a_temp = new temp()
@@ -957,20 +1219,30 @@ class OrOp(AstNode):
         B.code // get b_temp
         a_temp || b_temp
         """
-        a_code, a_temp = self.left.ir3(context)
-        b_code, b_temp = self.right.ir3(context)
+        return assign_temporary(context, Exp3Bop(Idc3(a_temp), Bop3.or_op(), Idc3(b_temp)), BOOL_TYPE)
 
-        code = []
-        code.extend(a_code)
-        code.extend(b_code)
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JBool':
+        left_type = yield self.left.visit_static_check(type_env, metadata)
+        self.check_left(left_type)
+        right_type = yield self.right.visit_static_check(type_env, metadata)
+        self.check_right(right_type)
+        return left_type
 
-        temporary = IR3Node.new_temporary()
-        exp3 = Exp3Bop(Idc3(a_temp), Bop3.or_op(), Idc3(b_temp))
-        code.append(Stmt3Assignment(temporary, exp3, JBool()))
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        a_temp = yield self.left.visit_ir3(context)
+        b_temp = yield self.right.visit_ir3(context)
+        return self.emit_ir3(context, a_temp, b_temp)
 
-        return code, temporary
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        left_type, a_temp = yield self.left.visit_check_ir3(type_env, metadata, context)
+        self.check_left(left_type)
+        right_type, b_temp = yield self.right.visit_check_ir3(type_env, metadata, context)
+        self.check_right(right_type)
+        return left_type, self.emit_ir3(context, a_temp, b_temp)
 
 class PlusOp(AstNode):
+    __slots__ = ()
+
     def __init__(self, left: AstNode, right: AstNode):
         super().__init__(name=AST_PLUS, children=[left,right])
 
@@ -982,20 +1254,19 @@ class PlusOp(AstNode):
     def right(self):
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
-        # left, right types should be Int (Arith) or both String (String)
-        left_type = self.left.static_check(type_env, metadata)
-        right_type = self.right.static_check(type_env, metadata)
-
-        if type(left_type) in (JNull, JString) and type(right_type) in (JNull, JString):
-            return JString()
+    # left, right types should be Int (Arith) or both String (String)
+    @staticmethod
+    def check_operands(left_type: 'JLiteType', right_type: 'JLiteType') -> 'JLiteType':
+        if left_type in STRING_OPERAND_TYPES and right_type in STRING_OPERAND_TYPES:
+            return STRING_TYPE
 
-        if type(left_type) == JInt and type(right_type) == JInt:
-            return JInt()
+        if left_type is INT_TYPE and right_type is INT_TYPE:
+            return INT_TYPE
 
         raise TypeCheckError(f"expected lhs and rhs to be both Int or both String/Null in '+', got {left_type} and {right_type}")
 
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], a_temp: IR3Value, b_temp: IR3Value) -> IR3Value:
         """
         A + B
         a_temp = new temp()
@@ -1004,20 +1275,29 @@ class PlusOp(AstNode):
         B.code // get b_temp
         a_temp + b_temp
         """
-        a_code, a_temp = self.left.ir3(context)
-        b_code, b_temp = self.right.ir3(context)
+        exp3 = Exp3Bop(Idc3(a_temp), Bop3.plus_op(), Idc3(b_temp))
+        return assign_temporary(context, exp3, INT_TYPE) # JInt since we disallow string concatenation...
 
-        code = []
-        code.extend(a_code)
-        code.extend(b_code)
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+        left_type = yield self.left.visit_static_check(type_env, metadata)
+        right_type = yield self.right.visit_static_check(type_env, metadata)
+        return self.check_operands(left_type, right_type)
 
-        temporary = IR3Node.new_temporary()
-        exp3 = Exp3Bop(Idc3(a_temp), Bop3.plus_op(), Idc3(b_temp))
-        code.append(Stmt3Assignment(temporary, exp3, JInt())) # JInt since we disallow string concatenation...
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        a_temp = yield self.left.visit_ir3(context)
+        b_temp = yield self.right.visit_ir3(context)
+        return self.emit_ir3(context, a_temp, b_temp)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        left_type, a_temp = yield self.left.visit_check_ir3(type_env, metadata, context)
+        right_type, b_temp = yield self.right.visit_check_ir3(type_env, metadata, context)
+        plus_type = self.check_operands(left_type, right_type)
+        return plus_type, self.emit_ir3(context, a_temp, b_temp)
 
-        return code, temporary
 
 class MinusOp(AstNode):
+    __slots__ = ()
+
     def __init__(self, left: AstNode, right: AstNode):
         super().__init__(name=AST_MINUS, children=[left,right])
 
@@ -1029,19 +1309,18 @@ class MinusOp(AstNode):
     def right(self):
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JInt':
-        # left, right types should be Int
-        left_type = self.left.static_check(type_env, metadata)
-        if type(left_type) != JInt:
+    @staticmethod
+    def check_left(left_type: 'JLiteType'):
+        if left_type is not INT_TYPE:
             raise TypeCheckError(f"expected type Int in '-' LHS, got {left_type}")
 
-        right_type = self.right.static_check(type_env, metadata)
-        if type(right_type) != JInt:
+    @staticmethod
+    def check_right(right_type: 'JLiteType'):
+        if right_type is not INT_TYPE:
             raise TypeCheckError(f"expected type Int in '-' RHS, got {right_type}")
 
-        return left_type
-
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], a_temp: IR3Value, b_temp: IR3Value) -> IR3Value:
         """
         A - B
         a_temp = new temp()
@@ -1050,20 +1329,32 @@ class MinusOp(AstNode):
         B.code // get b_temp
         a_temp - b_temp
         """
-        a_code, a_temp = self.left.ir3(context)
-        b_code, b_temp = self.right.ir3(context)
+        return assign_temporary(context, Exp3Bop(Idc3(a_temp), Bop3.minus_op(), Idc3(b_temp)), INT_TYPE)
 
-        code = []
-        code.extend(a_code)
-        code.extend(b_code)
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JInt':
+        # left, right types should be Int
+        left_type = yield self.left.visit_static_check(type_env, metadata)
+        self.check_left(left_type)
+        right_type = yield self.right.visit_static_check(type_env, metadata)
+        self.check_right(right_type)
+        return left_type
 
-        temporary = IR3Node.new_temporary()
-        exp3 = Exp3Bop(Idc3(a_temp), Bop3.minus_op(), Idc3(b_temp))
-        code.append(Stmt3Assignment(temporary, exp3, JInt()))
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        a_temp = yield self.left.visit_ir3(context)
+        b_temp = yield self.right.visit_ir3(context)
+        return self.emit_ir3(context, a_temp, b_temp)
 
-        return code, temporary
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        # left, right types should be Int
+        left_type, a_temp = yield self.left.visit_check_ir3(type_env, metadata, context)
+        self.check_left(left_type)
+        right_type, b_temp = yield self.right.visit_check_ir3(type_env, metadata, context)
+        self.check_right(right_type)
+        return left_type, self.emit_ir3(context, a_temp, b_temp)
 
 class MultOp(AstNode):
+    __slots__ = ()
+
     def __init__(self, left: AstNode, right: AstNode):
         super().__init__(name=AST_MULT, children=[left,right])
 
@@ -1075,19 +1366,18 @@ class MultOp(AstNode):
     def right(self):
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JInt':
-        # left, right types should be Int
-        left_type = self.left.static_check(type_env, metadata)
-        if type(left_type) != JInt:
+    @staticmethod
+    def check_left(left_type: 'JLiteType'):
+        if left_type is not INT_TYPE:
             raise TypeCheckError(f"expected type Int in '*' LHS, got {left_type}")
 
-        right_type = self.right.static_check(type_env, metadata)
-        if type(right_type) != JInt:
+    @staticmethod
+    def check_right(right_type: 'JLiteType'):
+        if right_type is not INT_TYPE:
             raise TypeCheckError(f"expected type Int in '*' RHS, got {right_type}")
 
-        return left_type
-
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], a_temp: IR3Value, b_temp: IR3Value) -> IR3Value:
         """
         A * B
         a_temp = new temp()
@@ -1096,20 +1386,32 @@ class MultOp(AstNode):
         B.code // get b_temp
         a_temp * b_temp
         """
-        a_code, a_temp = self.left.ir3(context)
-        b_code, b_temp = self.right.ir3(context)
+        return assign_temporary(context, Exp3Bop(Idc3(a_temp), Bop3.mult_op(), Idc3(b_temp)), INT_TYPE)
 
-        code = []
-        code.extend(a_code)
-        code.extend(b_code)
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JInt':
+        # left, right types should be Int
+        left_type = yield self.left.visit_static_check(type_env, metadata)
+        self.check_left(left_type)
+        right_type = yield self.right.visit_static_check(type_env, metadata)
+        self.check_right(right_type)
+        return left_type
 
-        temporary = IR3Node.new_temporary()
-        exp3 = Exp3Bop(Idc3(a_temp), Bop3.mult_op(), Idc3(b_temp))
-        code.append(Stmt3Assignment(temporary, exp3, JInt()))
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        a_temp = yield self.left.visit_ir3(context)
+        b_temp = yield self.right.visit_ir3(context)
+        return self.emit_ir3(context, a_temp, b_temp)
 
-        return code, temporary
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        # left, right types should be Int
+        left_type, a_temp = yield self.left.visit_check_ir3(type_env, metadata, context)
+        self.check_left(left_type)
+        right_type, b_temp = yield self.right.visit_check_ir3(type_env, metadata, context)
+        self.check_right(right_type)
+        return left_type, self.emit_ir3(context, a_temp, b_temp)
 
 class DivOp(AstNode):
+    __slots__ = ()
+
     def __init__(self, left: AstNode, right: AstNode):
         super().__init__(name=AST_DIV, children=[left,right])
 
@@ -1121,19 +1423,18 @@ class DivOp(AstNode):
     def right(self):
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JInt':
-        # left, right types should be Int
-        left_type = self.left.static_check(type_env, metadata)
-        if type(left_type) != JInt:
+    @staticmethod
+    def check_left(left_type: 'JLiteType'):
+        if left_type is not INT_TYPE:
             raise TypeCheckError(f"expected type Int in '/' LHS, got {left_type}")
 
-        right_type = self.right.static_check(type_env, metadata)
-        if type(right_type) != JInt:
+    @staticmethod
+    def check_right(right_type: 'JLiteType'):
+        if right_type is not INT_TYPE:
             raise TypeCheckError(f"expected type Int in '/' RHS, got {right_type}")
 
-        return left_type
-
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], a_temp: IR3Value, b_temp: IR3Value) -> IR3Value:
         """
         A / B
         a_temp = new temp()
@@ -1142,20 +1443,32 @@ class DivOp(AstNode):
         B.code // get b_temp
         a_temp / b_temp
         """
-        a_code, a_temp = self.left.ir3(context)
-        b_code, b_temp = self.right.ir3(context)
+        return assign_temporary(context, Exp3Bop(Idc3(a_temp), Bop3.div_op(), Idc3(b_temp)), INT_TYPE)
 
-        code = []
-        code.extend(a_code)
-        code.extend(b_code)
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JInt':
+        # left, right types should be Int
+        left_type = yield self.left.visit_static_check(type_env, metadata)
+        self.check_left(left_type)
+        right_type = yield self.right.visit_static_check(type_env, metadata)
+        self.check_right(right_type)
+        return left_type
 
-        temporary = IR3Node.new_temporary()
-        exp3 = Exp3Bop(Idc3(a_temp), Bop3.div_op(), Idc3(b_temp))
-        code.append(Stmt3Assignment(temporary, exp3, JInt()))
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        a_temp = yield self.left.visit_ir3(context)
+        b_temp = yield self.right.visit_ir3(context)
+        return self.emit_ir3(context, a_temp, b_temp)
 
-        return code, temporary
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        # left, right types should be Int
+        left_type, a_temp = yield self.left.visit_check_ir3(type_env, metadata, context)
+        self.check_left(left_type)
+        right_type, b_temp = yield self.right.visit_check_ir3(type_env, metadata, context)
+        self.check_right(right_type)
+        return left_type, self.emit_ir3(context, a_temp, b_temp)
 
 class Unegative(AstNode):
+    __slots__ = ()
+
     def __init__(self, factor: AstNode):
         super().__init__(name=AST_UNEGATIVE, children=[factor])
 
@@ -1163,31 +1476,38 @@ class Unegative(AstNode):
     def factor(self):
         return self.children[0]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JInt':
-        child_type = self.factor.static_check(type_env, metadata)
-        if type(child_type) != JInt:
+    @staticmethod
+    def check_operand(child_type: 'JLiteType'):
+        if child_type is not INT_TYPE:
             raise TypeCheckError(f"expected type Int in 'Negation', got {child_type}")
-        return child_type
 
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], a_temp: IR3Value) -> IR3Value:
         """
         - A
         a_temp = new temp()
         A.code  // pass a_temp
         - a_temp
         """
-        a_code, a_temp = self.factor.ir3(context)
+        return assign_temporary(context, Exp3Uop(Uop3.unegative(), Idc3(a_temp)), INT_TYPE)
 
-        code = []
-        code.extend(a_code)
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JInt':
+        child_type = yield self.factor.visit_static_check(type_env, metadata)
+        self.check_operand(child_type)
+        return child_type
 
-        temporary = IR3Node.new_temporary()
-        exp3 = Exp3Uop(Uop3.unegative(), Idc3(a_temp))
-        code.append(Stmt3Assignment(temporary, exp3, JInt()))
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        a_temp = yield self.factor.visit_ir3(context)
+        return self.emit_ir3(context, a_temp)
 
-        return code, temporary
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        child_type, a_temp = yield self.factor.visit_check_ir3(type_env, metadata, context)
+        self.check_operand(child_type)
+        return child_type, self.emit_ir3(context, a_temp)
 
 class ClassInstanceCreation(AstNode):
+    __slots__ = ()
+
     def __init__(self, cname: 'Cname'):
         super().__init__(name=AST_CLASS_INSTANCE_CREATION, children=[cname])
 
@@ -1195,29 +1515,41 @@ class ClassInstanceCreation(AstNode):
     def cname(self) -> 'Cname':
         return self.children[0]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JClass':
-        # class exists in class descriptor
-        cid = self.cname.class_name
+    # class exists in class descriptor
+    @staticmethod
+    def check_class(type_env: 'TypeEnvironment', cid: str) -> 'JClass':
         if type_env.class_lookup(cid) is None:
             raise TypeCheckError(f"expected cname {cid} to exist when creating instance")
         return JClass(cid)
 
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], cid: str) -> IR3Value:
         """
         new <Cname3>()
         """
-        code = []
+        code = context["code"]
 
         temporary = IR3Node.new_temporary()
-        exp3 = Exp3ClassInstanceCreation(self.cname.class_name)
-        code.append(Stmt3Assignment(temporary, exp3, JClass(self.cname.class_name)))
+        exp3 = Exp3ClassInstanceCreation(cid)
+        code.append(Stmt3Assignment(temporary, exp3, JClass(cid)))
+
+        return temporary
+
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JClass':
+        return self.check_class(type_env, self.cname.class_name)
+
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        return self.emit_ir3(context, self.cname.class_name)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        return self.visit_static_check(type_env, metadata), self.visit_ir3(context)
 
-        return code, temporary
 
 class FieldAccess(AstNode):
+    __slots__ = ("left_type",)
+
     def __init__(self, left: AstNode, id_node: 'Id'):
         super().__init__(name=AST_FIELD_ACCESS, children=[left, id_node])
-        self.type_env = None
         self.left_type: Optional[JLiteType] = None
 
     @property
@@ -1228,53 +1560,51 @@ class FieldAccess(AstNode):
     def id_node(self) -> 'Id':
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, parent_type=None) -> Union['JLiteType', 'MethodSignature']:
-        # must be a field of the given class (left) - check class descriptor
-        ctype: JClass = self.left.static_check(type_env, None)
+    # symbol if the id on the left resolved to an instance variable of this, e.g spouse in spouse.name, else None
+    @staticmethod
+    def this_field(symbol: Optional['Symbol']) -> Optional['Symbol']:
+        return symbol if symbol is not None and symbol.kind == SYMBOL_FIELD else None
+
+    # looks up member nid in the class descriptor of ctype, returning the member, the type of the access
+    # and the symbol of the member if it is a field
+    @staticmethod
+    def lookup_member(type_env: 'TypeEnvironment', ctype: 'JClass', parent_type, nid: str) -> Tuple[Union['JLiteType', 'MethodSignature'], 'JLiteType', Optional['Symbol']]:
         cid = ctype.cname
         class_info = type_env.class_lookup(cid)
-
-        self.type_env = type_env
-
         if class_info is None:
             raise TypeCheckError(f"accessing non-existent class of type '{cid}'")
 
         # could be e.a() (msig) or e.a (field_decl)
-        nid = self.id_node.id_name
         if parent_type == MethodCall:
             msigs: MethodSignatures = class_info[1]
             if nid not in msigs:
                 raise TypeCheckError(f"accessing non-existent method '{nid}' in class of type {cid}")
 
-            self.left_type = msigs[nid][1] # LHS type is return type of method
-
-            # return type is method signature
-            return msigs[nid]
+            # member is the method signature, LHS type is return type of method
+            return msigs[nid], msigs[nid].ret_type, None
 
         else:
             field_decls: FieldDeclarations = class_info[0]
             if nid not in field_decls:
                 raise TypeCheckError(f"accessing non-existent field '{nid}' in class of type {cid}")
 
-            self.left_type = field_decls[nid] # LHS type is type of field being accessed
+            # member is the type of the field as in class descriptor, and so is the LHS type
+            return field_decls[nid], field_decls[nid], type_env.field_symbols(cid)[nid]
 
-            # return type is type of the field as in class descriptor
-            return field_decls[nid]
-
-    def ir3(self, context: Dict[str, Any]):
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], a_temp: IR3Value, left_type: 'JLiteType', symbol: 'Symbol', left_field: Optional['Symbol']) -> IR3Value:
         """
         A.b
         a_temp = new temp()
         A.code // get a_temp
         a_temp.b
         """
-        a_code, a_temp = self.left.ir3(context)
-        code = []
+        code = context["code"] # the id on the left of an instance variable emits no code
         temporary = IR3Node.new_temporary()
 
-        if type(self.left) == Id and not self.type_env.in_current_local_env(self.left.id_name):
+        if left_field is not None:
             """
-            if the current id is not in the current environment, it must be an instance variable, e.g
+            if the current id resolved to a field, it is an instance variable, e.g
             class Person {
                 String name;
                 Person spouse;
@@ -1284,18 +1614,42 @@ class FieldAccess(AstNode):
             }
             """
             this_temp = IR3Node.new_temporary()
-            this_exp3 = Exp3FieldAccess("this", self.left.id_name)
-            code.append(Stmt3Assignment(this_temp, this_exp3, self.left_type))
-            exp3 = Exp3FieldAccess(this_temp, self.id_node.id_name)
-            code.append(Stmt3Assignment(temporary, exp3, self.left_type))
+            this_exp3 = Exp3FieldAccess("this", left_field.name, left_field.index)
+            code.append(Stmt3Assignment(this_temp, this_exp3, left_type))
+            exp3 = Exp3FieldAccess(this_temp, symbol.name, symbol.index)
+            code.append(Stmt3Assignment(temporary, exp3, left_type))
         else:
-            code.extend(a_code)
-            exp3 = Exp3FieldAccess(a_temp, self.id_node.id_name)
-            code.append(Stmt3Assignment(temporary, exp3, self.left_type))
+            exp3 = Exp3FieldAccess(a_temp, symbol.name, symbol.index)
+            code.append(Stmt3Assignment(temporary, exp3, left_type))
+
+        return temporary
+
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, parent_type=None) -> Union['JLiteType', 'MethodSignature']:
+        # must be a field of the given class (left) - check class descriptor
+        ctype: JClass = yield self.left.visit_static_check(type_env, None)
+        member, self.left_type, self.id_node.symbol = self.lookup_member(type_env, ctype, parent_type, self.id_node.id_name)
+        return member
+
+    def visit_ir3(self, context: Dict[str, Any]):
+        a_temp = yield self.left.visit_ir3(context)
+        left_field = self.this_field(self.left.symbol) if isinstance(self.left, Id) else None
+        return self.emit_ir3(context, a_temp, self.left_type, self.id_node.symbol, left_field)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', parent_type, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        left_field = None
+        if isinstance(self.left, Id):
+            # an id emits no code, but its symbol tells whether it is a field of this
+            symbol = type_env.symbol_lookup(self.left.id_name)
+            ctype, a_temp, left_field = Id.symbol_type(symbol), self.left.id_name, self.this_field(symbol)
+        else:
+            ctype, a_temp = yield self.left.visit_check_ir3(type_env, None, context)
+        member, left_type, symbol = self.lookup_member(type_env, ctype, parent_type, self.id_node.id_name)
+        return member, self.emit_ir3(context, a_temp, left_type, symbol, left_field)
 
-        return code, temporary
 
 class MethodCall(AstNode):
+    __slots__ = ("left_type", "cname", "ret_type")
+
     def __init__(self, left: AstNode, explist: 'ExpList'):
         super().__init__(name=AST_METHOD_CALL, children=[left,explist])
         self.left_type = None
@@ -1310,172 +1664,223 @@ class MethodCall(AstNode):
     def explist(self) -> 'ExpList':
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+    # the signature of a local call, e.g f(1, 2)
+    @staticmethod
+    def local_msig(type_env: 'TypeEnvironment', mid: str) -> 'MethodSignature':
+        msig: MethodSignature = type_env.msig_lookup(mid)
+        if msig is None:
+            raise TypeCheckError(f"unexpected id {mid} in 'MethodCall'")
+        return msig
+
+    # the signature of a global call, e.g a.f(1, 2), is what the checked left child evaluates to
+    @staticmethod
+    def check_global_msig(msig: Union['MethodSignature', 'JLiteType'], left_class: type) -> 'MethodSignature':
+        # a left that isn't a method name, e.g (a.b)(), evaluates to a type instead
+        if not isinstance(msig, MethodSignature):
+            raise TypeCheckError(f"Left child {left_class} has no method in 'MethodCall'")
+        return msig
+
+    # number of args must match number of params, local_mid names the method of a local call
+    @staticmethod
+    def check_arg_count(msig: 'MethodSignature', n_args: int, local_mid: Optional[str]):
+        n_params = len(msig.params)
+        if n_args != n_params:
+            if local_mid is not None:
+                raise TypeCheckError(f"{local_mid}: expected {n_args} args, got {n_params}")
+            raise TypeCheckError(f"GlobalCall: expected {n_params} args, got {n_args}")
+
+    # each arg must match type of corresponding param
+    @staticmethod
+    def check_arg(msig: 'MethodSignature', i: int, arg_type: 'JLiteType', local_mid: Optional[str]):
+        param_name, param_type = msig.params[i][0], msig.params[i][1]
+        if param_type != arg_type:
+            if local_mid is not None:
+                raise TypeCheckError(f"{local_mid} {param_name}: expected {param_type}, got {arg_type}")
+            raise TypeCheckError(f"GlobalCall: {param_name}: expected {param_type}, got {arg_type}")
+
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], temporary: str, cname: str, mid: str, ret_type: 'JLiteType', idc3_list: List[Idc3], id_temp: IR3Value = None) -> IR3Value:
+        """
+        A.a ( ExpList ) OR a ( ExpList ) OR this ( ExpList) OR (new Cname())( ExpList ) OR null ( ExpList )
+        ExpList.code    // make a temporary for each exp
+        A.code          // get a_temp
+        b_temp = A.a
+        b_temp ( VList3 ) // vlist3 consists of temporaries from ExpList
+        """
+        # mangle the method name with its class, e.g %Class_methodname
+        mangled_mid = IR3Node.mangle_method_name(cname, mid)
+        if id_temp is None:
+            # local call, no 'this' object, e.g this(1, 2), toString(1, 2)
+            exp3 = Exp3MethodCall(mangled_mid, VList3(idc3_list))
+        else:
+            # global call, pass the temporary to 'this' first
+            exp3 = Exp3MethodCall(mangled_mid, VList3([Idc3(id_temp)] + idc3_list))
+
+        # differentiate void functions and those that return types
+        if ret_type is VOID_TYPE:
+            context["code"].append(Stmt3MethodCall(exp3.id3, exp3.vlist3))
+        else:
+            context["code"].append(Stmt3Assignment(temporary, exp3, ret_type))
+
+        return temporary
+
+    # the called method's name, and its name again if the call is local
+    @property
+    def mids(self) -> Tuple[str, Optional[str]]:
+        if isinstance(self.left, Id):
+            return self.left.id_name, self.left.id_name
+        return self.left.id_node.id_name, None
+
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
         # if left is id, LocalCall, else GlobalCall
-        if type(self.left) == Id:
+        if isinstance(self.left, Id):
             # bypass calling static_check on the LHS Id node
-            mid = self.left.id_name
-            msig: MethodSignature = type_env.msig_lookup(mid)
-            if msig is None:
-                raise TypeCheckError(f"unexpected id {mid} in 'MethodCall'")
-
-            # hack: retrieve class of this method signature
-            cname = type_env.cname_of_msig(msig)
-            self.left_type = JClass(cname)
-            self.cname = cname
-
-            params, ret_type = msig[0], msig[1]
-            self.ret_type = ret_type
-            exps: List['Exp'] = self.explist.exps
-
-            # number of args must match number of params
-            if len(exps) != len(params):
-                raise TypeCheckError(f"{mid}: expected {len(exps)} args, got {len(params)}")
-
-            # each arg must match type of corresponding param
-            for i, exp_node in enumerate(self.explist.exps):
-                param_name, param_type = params[i][0], params[i][1]
-                arg_type = exp_node.static_check(type_env, metadata)
-                if param_type != arg_type:
-                    raise TypeCheckError(f"{mid} {param_name}: expected {param_type}, got {arg_type}")
-
-            # if all ok, type of local call is the return type
-            return ret_type
+            msig = self.local_msig(type_env, self.left.id_name)
         else:
             # declare to child type checking that we expect different behaviour
             # NOTE THE EXPLICIT ASKING FOR A METHOD SIGNATURE THROUGH 'METHODCALL'
-            msig: MethodSignature = self.left.static_check(type_env, MethodCall)
-            if msig is None:
-                raise TypeCheckError(f"Left child {type(self.left)} has no method in 'MethodCall'")
+            msig = self.check_global_msig((yield self.left.visit_static_check(type_env, MethodCall)), self.left.__class__)
 
-            # hack: retrieve class of this method signature
-            cname = type_env.cname_of_msig(msig)
-            self.left_type = JClass(cname)
-            self.cname = cname
+        # save the called method for ir3
+        self.left_type = JClass(msig.cname)
+        self.cname = msig.cname
+        self.ret_type = msig.ret_type
 
-            params, ret_type = msig
-            self.ret_type = ret_type
-            exps: List['Exp'] = self.explist.exps
+        _, local_mid = self.mids
+        self.check_arg_count(msig, len(self.explist.exps), local_mid)
+        for i, exp_node in enumerate(self.explist.exps):
+            arg_type = yield exp_node.visit_static_check(type_env, metadata)
+            self.check_arg(msig, i, arg_type, local_mid)
 
-            # number of args must match number of params
-            if len(exps) != len(params):
-                raise TypeCheckError(f"GlobalCall: expected {len(params)} args, got {len(exps)}")
+        # if all ok, type of the call is the return type
+        return msig.ret_type
 
-            # each arg must match type of corresponding param
-            for i, exp_node in enumerate(self.explist.exps):
-                param_name, param_type = params[i][0], params[i][1]
-                arg_type = exp_node.static_check(type_env, metadata)
-                if param_type != arg_type:
-                    raise TypeCheckError(f"GlobalCall: {param_name}: expected {param_type}, got {arg_type}")
-
-            return ret_type
-
-    def ir3(self, context: Dict[str, Any]):
-        """
-        A.a ( ExpList ) OR a ( ExpList ) OR this ( ExpList) OR (new Cname())( ExpList ) OR null ( ExpList )
-        ExpList.code    // make a temporary for each exp
-        A.code          // get a_temp
-        b_temp = A.a
-        b_temp ( VList3 ) // vlist3 consists of temporaries from ExpList
-        """
-        idc3_list = []
-        code = []
+    def visit_ir3(self, context: Dict[str, Any]):
         temporary = IR3Node.new_temporary()
-
+        idc3_list = []
         for exp_node in self.explist.exps:
-            exp_code, exp_temp = exp_node.ir3(context)
-            code.extend(exp_code)
+            exp_temp = yield exp_node.visit_ir3(context)
             idc3_list.append(Idc3(exp_temp))
 
-        if type(self.left) == Id:
-            # local call, no 'this' object, e.g this(1, 2), toString(1, 2)
-            mid = self.left.id_name
-
-            # mangle method name
-            # cname = context.get("classname")
-            # if not cname:
-            #     raise RuntimeError("classname should be present in current context")
-            mangled_mid = IR3Node.mangle_method_name(self.cname, mid)
-
-            exp3 = Exp3MethodCall(mangled_mid, VList3(idc3_list))
-        elif type(self.left) == FieldAccess:
+        id_temp = None
+        if isinstance(self.left, FieldAccess):
             # global call, need to get a temporary to 'this', e.g a.id(1, 2)
-            id_code, id_temp = self.left.left.ir3(context)
-            code.extend(id_code)
+            id_temp = yield self.left.left.visit_ir3(context)
+        elif not isinstance(self.left, Id):
+            raise RuntimeError("should not be here")
 
-            # get and mangle the method name with classname, e.g %Class_methodname
-            mid = self.left.id_node.id_name
-            # cname = self.left_type.cname # for field access, the class name is the type of LHS
+        mid, _ = self.mids
+        return self.emit_ir3(context, temporary, self.cname, mid, self.ret_type, idc3_list, id_temp)
 
-            mangled_mid = IR3Node.mangle_method_name(self.cname, mid)
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        if not isinstance(self.left, (Id, FieldAccess)):
+            # the checker rejects any other callee, and raises the same error here
+            ret_type = yield self.visit_static_check(type_env, metadata)
+            return ret_type, (yield self.visit_ir3(context))
 
-            exp3 = Exp3MethodCall(mangled_mid, VList3([Idc3(id_temp)] + idc3_list))
+        temporary = IR3Node.new_temporary()
+        mid, local_mid = self.mids
+        if local_mid is not None:
+            msig = self.local_msig(type_env, mid)
         else:
-            raise RuntimeError("should not be here")
+            # the receiver is checked before the args but lowered after them as ir3 does, so it
+            # goes through the two passes, whose annotations are cleared once it is lowered
+            msig = self.check_global_msig((yield self.left.visit_static_check(type_env, MethodCall)), self.left.__class__)
 
-        # differentiate void functions and those that return types
-        if type(self.ret_type) == JVoid:
-            code.append(Stmt3MethodCall(exp3.id3, exp3.vlist3))
-        else:
-            code.append(Stmt3Assignment(temporary, exp3, self.ret_type))
+        self.check_arg_count(msig, len(self.explist.exps), local_mid)
+        idc3_list = []
+        for i, exp_node in enumerate(self.explist.exps):
+            arg_type, exp_temp = yield exp_node.visit_check_ir3(type_env, metadata, context)
+            self.check_arg(msig, i, arg_type, local_mid)
+            idc3_list.append(Idc3(exp_temp))
+
+        id_temp = None
+        if local_mid is None:
+            id_temp = yield self.left.left.visit_ir3(context)
+            clear_annotations(self.left)
+
+        return msig.ret_type, self.emit_ir3(context, temporary, msig.cname, mid, msig.ret_type, idc3_list, id_temp)
 
-        return code, temporary
 
 
 class ReturnStatement(AstNode):
+    __slots__ = ("exp_type",)
+
     def __init__(self, exp: Optional[AstNode]=None):
-        super().__init__(name=AST_RETURN_STATEMENT, children=([exp] if exp else []))
+        super().__init__(name=AST_RETURN_STATEMENT, children=([exp] if exp is not None else []))
         self.exp_type = None
 
     @property
     def exp(self) -> Optional[AstNode]:
         return self.children[0] if self.children else None
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
-        if self.exp is None:
-            # void return type
-            type_env.augment_field("Ret", JVoid())
-            self.exp_type = JVoid()
-            return JVoid()
-        else:
-            ret_type = self.exp.static_check(type_env, metadata)
-            self.exp_type = ret_type # save for ir3 code generation
-            mtd_ret_type = type_env.field_lookup("Ret")
-
-            if ret_type != mtd_ret_type:
-                raise TypeCheckError(f"return type {ret_type} does not match method return type {mtd_ret_type}")
-            return ret_type
-
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    # a return without an exp returns void
+    @staticmethod
+    def check_void(type_env: 'TypeEnvironment') -> 'JLiteType':
+        type_env.augment_field("Ret", VOID_TYPE)
+        return VOID_TYPE
+
+    @staticmethod
+    def check_exp_type(type_env: 'TypeEnvironment', ret_type: 'JLiteType') -> 'JLiteType':
+        mtd_ret_type = type_env.field_lookup("Ret")
+        if ret_type != mtd_ret_type:
+            raise TypeCheckError(f"return type {ret_type} does not match method return type {mtd_ret_type}")
+        return ret_type
+
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], start: int, a_temp: IR3Value, exp_type: 'JLiteType'):
         """
         return A
 
         JliteType a_temp; // declare type first
         A.code          // pass a_temp
-        return a_temp   // or just return, if no exp
+        return a_temp   // or just return, if no exp (a_temp is None)
         """
-        if not self.exp:
-            return [Stmt3Return()], None
+        code = context["code"]
+        if a_temp is None:
+            code.append(Stmt3Return())
+            return None
 
-        a_code, a_temp = self.exp.ir3(context)
-        if a_code:
+        if len(code) > start:
             # declare a variable only if the return type is complex (not a constant)
-            context["return"] = (self.exp_type, a_temp) # for top-level method decl node
+            context["return"] = (exp_type, a_temp) # for top-level method decl node
 
         temporary = IR3Node.new_temporary()
-        code = []
-        code.extend(a_code)
         # a_temp can either be a temporary, or a Const
         if type(a_temp) == Const:
-            code.append(Stmt3Assignment(temporary, Idc3(a_temp), self.exp_type))
+            code.append(Stmt3Assignment(temporary, Idc3(a_temp), exp_type))
             code.append(Stmt3Return(temporary))
         else:
             code.append(Stmt3Return(a_temp))
 
-        return code, None
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+        if self.exp is None:
+            self.exp_type = self.check_void(type_env)
+        else:
+            ret_type = yield self.exp.visit_static_check(type_env, metadata)
+            self.exp_type = self.check_exp_type(type_env, ret_type) # save for ir3 code generation
+        return self.exp_type
+
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        start = len(context["code"])
+        a_temp = (yield self.exp.visit_ir3(context)) if self.exp else None
+        self.emit_ir3(context, start, a_temp, self.exp_type)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        start = len(context["code"])
+        if self.exp is None:
+            ret_type, a_temp = self.check_void(type_env), None
+        else:
+            ret_type, a_temp = yield self.exp.visit_check_ir3(type_env, metadata, context)
+            self.check_exp_type(type_env, ret_type)
+        self.emit_ir3(context, start, a_temp, ret_type)
+        return ret_type, None
+
 
 
 class AssignmentStatement(AstNode):
+    __slots__ = ("left_type",)
+
     def __init__(self, left: AstNode, right: AstNode):
         super().__init__(name=AST_ASSIGNMENT_STATEMENT, children=[left, right])
         self.left_type = None
@@ -1488,51 +1893,87 @@ class AssignmentStatement(AstNode):
     def right(self):
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
-        # if lhs and rhs types match, return void type
-        lhs_type = self.left.static_check(type_env, metadata)
-        rhs_type = self.right.static_check(type_env, metadata)
+    # whether both sides are used as they are, so neither emits code, e.g a = b or a = new A()
+    @property
+    def assigns_directly(self) -> bool:
+        return isinstance(self.left, Id) and isinstance(self.right, (ClassInstanceCreation, Id))
+
+    # if lhs and rhs types match, the assignment is void type
+    @staticmethod
+    def check_types(lhs_type: 'JLiteType', rhs_type: 'JLiteType') -> 'JLiteType':
         if lhs_type != rhs_type:
             raise TypeCheckError(f"mismatch in lhs {lhs_type} and rhs {rhs_type} in 'AssignmentStatement'")
+        return lhs_type
 
-        self.left_type = lhs_type
-        return JVoid()
-
-    def ir3(self, context: Dict[str, Any]):
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], left_type: 'JLiteType', a_temp: IR3Value, exp3: 'IR3Node', field: Optional['Symbol'] = None):
         """
         A = B
         A.code // get a_temp
         B.code // get b_temp
         a_temp = b_temp
         """
-        code = []
+        code = context["code"]
 
-        if type(self.left) == FieldAccess:
+        if field is not None:
             # suppose this.a = 1;
             # we don't want t1 = this.a;
             #               t1 = 1;
-            a_code, a_temp = self.left.left.ir3(context)
-            b_code, b_temp = self.right.ir3(context)
-            code.extend(a_code)
-            code.extend(b_code)
-            field_name: str = self.left.id_node.id_name
-            code.append(Stmt3FieldAccessAssignment(a_temp, field_name, Idc3(b_temp)))
-        elif type(self.left) == Id and type(self.right) == ClassInstanceCreation:
-            code.append(Stmt3Assignment(self.left.id_name, Exp3ClassInstanceCreation(self.right.cname.class_name), self.left_type))
-        elif type(self.left) == Id and type(self.right) == Id:
-            code.append(Stmt3Assignment(self.left.id_name, Idc3(self.right.id_name), self.left_type))
+            # so a_temp is the object of the field access
+            code.append(Stmt3FieldAccessAssignment(a_temp, field.name, exp3, field.index))
         else:
-            a_code, a_temp = self.left.ir3(context)
-            b_code, b_temp = self.right.ir3(context)
-
-            code.extend(a_code)
-            code.extend(b_code)
-            code.append(Stmt3Assignment(a_temp, Idc3(b_temp), self.left_type))
+            code.append(Stmt3Assignment(a_temp, exp3, left_type))
+
+    # the rhs when both sides are used as they are, e.g b in a = b
+    def direct_exp3(self) -> 'IR3Node':
+        if isinstance(self.right, ClassInstanceCreation):
+            return Exp3ClassInstanceCreation(self.right.cname.class_name)
+        return Idc3(self.right.id_name)
+
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+        lhs_type = yield self.left.visit_static_check(type_env, metadata)
+        rhs_type = yield self.right.visit_static_check(type_env, metadata)
+        self.left_type = self.check_types(lhs_type, rhs_type) # saved for ir3
+        return VOID_TYPE
+
+    def visit_ir3(self, context: Dict[str, Any]):
+        if isinstance(self.left, FieldAccess):
+            a_temp = yield self.left.left.visit_ir3(context)
+            b_temp = yield self.right.visit_ir3(context)
+            self.emit_ir3(context, self.left_type, a_temp, Idc3(b_temp), self.left.id_node.symbol)
+        elif self.assigns_directly:
+            self.emit_ir3(context, self.left_type, self.left.id_name, self.direct_exp3())
+        else:
+            a_temp = yield self.left.visit_ir3(context)
+            b_temp = yield self.right.visit_ir3(context)
+            self.emit_ir3(context, self.left_type, a_temp, Idc3(b_temp))
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        if isinstance(self.left, FieldAccess):
+            # only the object of the field access is lowered
+            ctype, a_temp = yield self.left.left.visit_check_ir3(type_env, None, context)
+            lhs_type, _, field = self.left.lookup_member(type_env, ctype, metadata, self.left.id_node.id_name)
+            rhs_type, b_temp = yield self.right.visit_check_ir3(type_env, metadata, context)
+            self.emit_ir3(context, self.check_types(lhs_type, rhs_type), a_temp, Idc3(b_temp), field)
+        elif self.assigns_directly:
+            # only checked, both sides are used as they are
+            lhs_type = Id.check_type(type_env, self.left.id_name, metadata)
+            if isinstance(self.right, ClassInstanceCreation):
+                rhs_type = ClassInstanceCreation.check_class(type_env, self.right.cname.class_name)
+            else:
+                rhs_type = Id.check_type(type_env, self.right.id_name, metadata)
+            self.emit_ir3(context, self.check_types(lhs_type, rhs_type), self.left.id_name, self.direct_exp3())
+        else:
+            lhs_type, a_temp = yield self.left.visit_check_ir3(type_env, metadata, context)
+            rhs_type, b_temp = yield self.right.visit_check_ir3(type_env, metadata, context)
+            self.emit_ir3(context, self.check_types(lhs_type, rhs_type), a_temp, Idc3(b_temp))
+        return VOID_TYPE, None
 
-        return code, None
 
 
 class Println(AstNode):
+    __slots__ = ()
+
     def __init__(self,  exp: AstNode):
         super().__init__(name=AST_PRINTLN, children=[exp])
 
@@ -1540,29 +1981,40 @@ class Println(AstNode):
     def exp(self):
         return self.children[0]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
-        # exp should be int or bool or string, if so, return void type
-        exp_type = self.exp.static_check(type_env, metadata)
-        if type(exp_type) not in (JInt, JBool, JString):
+    # exp should be int or bool or string, if so, println is void type
+    @staticmethod
+    def check_exp_type(exp_type: 'JLiteType'):
+        if exp_type not in PRINTABLE_TYPES:
             raise TypeCheckError(f"expected Int/Bool/String for 'println', got {exp_type}")
 
-        return JVoid()
-
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], a_temp: IR3Value):
         """
         println A
         A.code // get a_temp
         println a_temp
         """
-        a_code, a_temp = self.exp.ir3(context)
+        context["code"].append(Stmt3Println(Idc3(a_temp)))
+
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+        exp_type = yield self.exp.visit_static_check(type_env, metadata)
+        self.check_exp_type(exp_type)
+        return VOID_TYPE
+
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        a_temp = yield self.exp.visit_ir3(context)
+        self.emit_ir3(context, a_temp)
 
-        code = []
-        code.extend(a_code)
-        code.append(Stmt3Println(Idc3(a_temp)))
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        exp_type, a_temp = yield self.exp.visit_check_ir3(type_env, metadata, context)
+        self.check_exp_type(exp_type)
+        self.emit_ir3(context, a_temp)
+        return VOID_TYPE, None
 
-        return code, None
 
 class Readln(AstNode):
+    __slots__ = ()
+
     def __init__(self, id_node: 'Id'):
         super().__init__(name=AST_READLN, children=[id_node])
 
@@ -1570,21 +2022,37 @@ class Readln(AstNode):
     def id_node(self) -> 'Id':
         return self.children[0]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
-        # id should be int or bool or string, if so, return void type
-        id_type = self.id_node.static_check(type_env, metadata)
-        if type(id_type) not in (JInt, JBool, JString):
+    # id should be int or bool or string, if so, readln is void type
+    @staticmethod
+    def check_id_type(id_type: 'JLiteType'):
+        if id_type not in PRINTABLE_TYPES:
             raise TypeCheckError(f"expected Int/Bool/String for 'println', got {id_type}")
 
-        return JVoid()
-
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], id3: str):
         """
         readln id
         """
-        return [Stmt3Readln(self.id_node.id_name)], None
+        context["code"].append(Stmt3Readln(id3))
+
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+        id_type = yield self.id_node.visit_static_check(type_env, metadata)
+        self.check_id_type(id_type)
+        return VOID_TYPE
+
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        self.emit_ir3(context, self.id_node.id_name)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        id_type, id3 = yield self.id_node.visit_check_ir3(type_env, metadata, context)
+        self.check_id_type(id_type)
+        self.emit_ir3(context, id3)
+        return VOID_TYPE, None
+
 
 class Lt(AstNode):
+    __slots__ = ()
+
     def __init__(self, lhs: AstNode, rhs: AstNode):
         super().__init__(name=AST_LT, children=[lhs, rhs])
 
@@ -1596,19 +2064,19 @@ class Lt(AstNode):
     def rhs(self) -> AstNode:
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
-        # LHS and RHS should be int, if so, return bool type
-        lhs_type = self.lhs.static_check(type_env, metadata)
-        if type(lhs_type) != JInt:
+    # LHS and RHS should be int, if so, the comparison is bool type
+    @staticmethod
+    def check_lhs(lhs_type: 'JLiteType'):
+        if lhs_type is not INT_TYPE:
             raise TypeCheckError(f"expected lhs type of 'Lt (<)' to be Int")
 
-        rhs_type = self.rhs.static_check(type_env, metadata)
-        if type(rhs_type) != JInt:
+    @staticmethod
+    def check_rhs(rhs_type: 'JLiteType'):
+        if rhs_type is not INT_TYPE:
             raise TypeCheckError(f"expected rhs type of 'Lt (<)' to be Int")
 
-        return JBool()
-
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], a_temp: IR3Value, b_temp: IR3Value) -> IR3Value:
         """
         A < B
         a_temp = new temp()
@@ -1617,20 +2085,30 @@ class Lt(AstNode):
         B.code // get b_temp
         a_temp < b_temp
         """
-        a_code, a_temp = self.lhs.ir3(context)
-        b_code, b_temp = self.rhs.ir3(context)
-
-        code = []
-        code.extend(a_code)
-        code.extend(b_code)
-
-        temporary = IR3Node.new_temporary()
-        exp3 = Exp3Relop(Idc3(a_temp), RelOp3.lt(), Idc3(b_temp))
-        code.append(Stmt3Assignment(temporary, exp3, JBool()))
-
-        return code, temporary
+        return assign_temporary(context, Exp3Relop(Idc3(a_temp), RelOp3.lt(), Idc3(b_temp)), BOOL_TYPE)
+
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+        lhs_type = yield self.lhs.visit_static_check(type_env, metadata)
+        self.check_lhs(lhs_type)
+        rhs_type = yield self.rhs.visit_static_check(type_env, metadata)
+        self.check_rhs(rhs_type)
+        return BOOL_TYPE
+
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        a_temp = yield self.lhs.visit_ir3(context)
+        b_temp = yield self.rhs.visit_ir3(context)
+        return self.emit_ir3(context, a_temp, b_temp)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        lhs_type, a_temp = yield self.lhs.visit_check_ir3(type_env, metadata, context)
+        self.check_lhs(lhs_type)
+        rhs_type, b_temp = yield self.rhs.visit_check_ir3(type_env, metadata, context)
+        self.check_rhs(rhs_type)
+        return BOOL_TYPE, self.emit_ir3(context, a_temp, b_temp)
 
 class Gt(AstNode):
+    __slots__ = ()
+
     def __init__(self, lhs: 'AstNode', rhs: 'AstNode'):
         super().__init__(name=AST_GT, children=[lhs, rhs])
 
@@ -1642,19 +2120,19 @@ class Gt(AstNode):
     def rhs(self) -> 'AstNode':
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
-        # LHS and RHS should be int, if so, return bool type
-        lhs_type = self.lhs.static_check(type_env, metadata)
-        if type(lhs_type) != JInt:
+    # LHS and RHS should be int, if so, the comparison is bool type
+    @staticmethod
+    def check_lhs(lhs_type: 'JLiteType'):
+        if lhs_type is not INT_TYPE:
             raise TypeCheckError(f"expected lhs type of 'Gt (>)' to be Int")
 
-        rhs_type = self.rhs.static_check(type_env, metadata)
-        if type(rhs_type) != JInt:
+    @staticmethod
+    def check_rhs(rhs_type: 'JLiteType'):
+        if rhs_type is not INT_TYPE:
             raise TypeCheckError(f"expected rhs type of 'Gt (>)' to be Int")
 
-        return JBool()
-
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], a_temp: IR3Value, b_temp: IR3Value) -> IR3Value:
         """
         A > B
         a_temp = new temp()
@@ -1663,20 +2141,30 @@ class Gt(AstNode):
         B.code // get b_temp
         a_temp > b_temp
         """
-        a_code, a_temp = self.lhs.ir3(context)
-        b_code, b_temp = self.rhs.ir3(context)
-
-        code = []
-        code.extend(a_code)
-        code.extend(b_code)
-
-        temporary = IR3Node.new_temporary()
-        exp3 = Exp3Relop(Idc3(a_temp), RelOp3.gt(), Idc3(b_temp))
-        code.append(Stmt3Assignment(temporary, exp3, JBool()))
-
-        return code, temporary
+        return assign_temporary(context, Exp3Relop(Idc3(a_temp), RelOp3.gt(), Idc3(b_temp)), BOOL_TYPE)
+
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+        lhs_type = yield self.lhs.visit_static_check(type_env, metadata)
+        self.check_lhs(lhs_type)
+        rhs_type = yield self.rhs.visit_static_check(type_env, metadata)
+        self.check_rhs(rhs_type)
+        return BOOL_TYPE
+
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        a_temp = yield self.lhs.visit_ir3(context)
+        b_temp = yield self.rhs.visit_ir3(context)
+        return self.emit_ir3(context, a_temp, b_temp)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        lhs_type, a_temp = yield self.lhs.visit_check_ir3(type_env, metadata, context)
+        self.check_lhs(lhs_type)
+        rhs_type, b_temp = yield self.rhs.visit_check_ir3(type_env, metadata, context)
+        self.check_rhs(rhs_type)
+        return BOOL_TYPE, self.emit_ir3(context, a_temp, b_temp)
 
 class Le(AstNode):
+    __slots__ = ()
+
     def __init__(self, lhs: 'AstNode', rhs: 'AstNode'):
         super().__init__(name=AST_LE, children=[lhs, rhs])
 
@@ -1688,19 +2176,19 @@ class Le(AstNode):
     def rhs(self) -> 'AstNode':
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
-        # LHS and RHS should be int, if so, return bool type
-        lhs_type = self.lhs.static_check(type_env, metadata)
-        if type(lhs_type) != JInt:
+    # LHS and RHS should be int, if so, the comparison is bool type
+    @staticmethod
+    def check_lhs(lhs_type: 'JLiteType'):
+        if lhs_type is not INT_TYPE:
             raise TypeCheckError(f"expected lhs type of 'Le (<=)' to be Int")
 
-        rhs_type = self.rhs.static_check(type_env, metadata)
-        if type(rhs_type) != JInt:
+    @staticmethod
+    def check_rhs(rhs_type: 'JLiteType'):
+        if rhs_type is not INT_TYPE:
             raise TypeCheckError(f"expected rhs type of 'Le (<=)' to be Int")
 
-        return JBool()
-
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], a_temp: IR3Value, b_temp: IR3Value) -> IR3Value:
         """
         A <= B
         a_temp = new temp()
@@ -1709,20 +2197,30 @@ class Le(AstNode):
         B.code // get b_temp
         a_temp <= b_temp
         """
-        a_code, a_temp = self.lhs.ir3(context)
-        b_code, b_temp = self.rhs.ir3(context)
-
-        code = []
-        code.extend(a_code)
-        code.extend(b_code)
-
-        temporary = IR3Node.new_temporary()
-        exp3 = Exp3Relop(Idc3(a_temp), RelOp3.ne(), Idc3(b_temp))
-        code.append(Stmt3Assignment(temporary, exp3, JBool()))
-
-        return code, temporary
+        return assign_temporary(context, Exp3Relop(Idc3(a_temp), RelOp3.ne(), Idc3(b_temp)), BOOL_TYPE)
+
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+        lhs_type = yield self.lhs.visit_static_check(type_env, metadata)
+        self.check_lhs(lhs_type)
+        rhs_type = yield self.rhs.visit_static_check(type_env, metadata)
+        self.check_rhs(rhs_type)
+        return BOOL_TYPE
+
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        a_temp = yield self.lhs.visit_ir3(context)
+        b_temp = yield self.rhs.visit_ir3(context)
+        return self.emit_ir3(context, a_temp, b_temp)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        lhs_type, a_temp = yield self.lhs.visit_check_ir3(type_env, metadata, context)
+        self.check_lhs(lhs_type)
+        rhs_type, b_temp = yield self.rhs.visit_check_ir3(type_env, metadata, context)
+        self.check_rhs(rhs_type)
+        return BOOL_TYPE, self.emit_ir3(context, a_temp, b_temp)
 
 class Ge(AstNode):
+    __slots__ = ()
+
     def __init__(self, lhs: 'AstNode', rhs: 'AstNode'):
         super().__init__(name=AST_GE, children=[lhs, rhs])
 
@@ -1734,19 +2232,19 @@ class Ge(AstNode):
     def rhs(self) -> 'AstNode':
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
-        # LHS and RHS should be int, if so, return bool type
-        lhs_type = self.lhs.static_check(type_env, metadata)
-        if type(lhs_type) != JInt:
+    # LHS and RHS should be int, if so, the comparison is bool type
+    @staticmethod
+    def check_lhs(lhs_type: 'JLiteType'):
+        if lhs_type is not INT_TYPE:
             raise TypeCheckError(f"expected lhs type of 'Ge (>=)' to be Int")
 
-        rhs_type = self.rhs.static_check(type_env, metadata)
-        if type(rhs_type) != JInt:
+    @staticmethod
+    def check_rhs(rhs_type: 'JLiteType'):
+        if rhs_type is not INT_TYPE:
             raise TypeCheckError(f"expected rhs type of 'Ge (>=)' to be Int")
 
-        return JBool()
-
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], a_temp: IR3Value, b_temp: IR3Value) -> IR3Value:
         """
         A >= B
         a_temp = new temp()
@@ -1755,20 +2253,30 @@ class Ge(AstNode):
         B.code // get b_temp
         a_temp >= b_temp
         """
-        a_code, a_temp = self.lhs.ir3(context)
-        b_code, b_temp = self.rhs.ir3(context)
-
-        code = []
-        code.extend(a_code)
-        code.extend(b_code)
-
-        temporary = IR3Node.new_temporary()
-        exp3 = Exp3Relop(Idc3(a_temp), RelOp3.ge(), Idc3(b_temp))
-        code.append(Stmt3Assignment(temporary, exp3, JBool()))
-
-        return code, temporary
+        return assign_temporary(context, Exp3Relop(Idc3(a_temp), RelOp3.ge(), Idc3(b_temp)), BOOL_TYPE)
+
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+        lhs_type = yield self.lhs.visit_static_check(type_env, metadata)
+        self.check_lhs(lhs_type)
+        rhs_type = yield self.rhs.visit_static_check(type_env, metadata)
+        self.check_rhs(rhs_type)
+        return BOOL_TYPE
+
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        a_temp = yield self.lhs.visit_ir3(context)
+        b_temp = yield self.rhs.visit_ir3(context)
+        return self.emit_ir3(context, a_temp, b_temp)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        lhs_type, a_temp = yield self.lhs.visit_check_ir3(type_env, metadata, context)
+        self.check_lhs(lhs_type)
+        rhs_type, b_temp = yield self.rhs.visit_check_ir3(type_env, metadata, context)
+        self.check_rhs(rhs_type)
+        return BOOL_TYPE, self.emit_ir3(context, a_temp, b_temp)
 
 class Eq(AstNode):
+    __slots__ = ()
+
     def __init__(self, lhs: 'AstNode', rhs: 'AstNode'):
         super().__init__(name=AST_EQ, children=[lhs, rhs])
 
@@ -1780,19 +2288,19 @@ class Eq(AstNode):
     def rhs(self) -> 'AstNode':
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
-        # LHS and RHS should be int, if so, return bool type
-        lhs_type = self.lhs.static_check(type_env, metadata)
-        if type(lhs_type) != JInt:
+    # LHS and RHS should be int, if so, the comparison is bool type
+    @staticmethod
+    def check_lhs(lhs_type: 'JLiteType'):
+        if lhs_type is not INT_TYPE:
             raise TypeCheckError(f"expected lhs type of 'Eq (==)' to be Int")
 
-        rhs_type = self.rhs.static_check(type_env, metadata)
-        if type(rhs_type) != JInt:
+    @staticmethod
+    def check_rhs(rhs_type: 'JLiteType'):
+        if rhs_type is not INT_TYPE:
             raise TypeCheckError(f"expected rhs type of 'Eq (==)' to be Int")
 
-        return JBool()
-
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], a_temp: IR3Value, b_temp: IR3Value) -> IR3Value:
         """
         A == B
         a_temp = new temp()
@@ -1801,20 +2309,30 @@ class Eq(AstNode):
         B.code // get b_temp
         a_temp == b_temp
         """
-        a_code, a_temp = self.lhs.ir3(context)
-        b_code, b_temp = self.rhs.ir3(context)
-
-        code = []
-        code.extend(a_code)
-        code.extend(b_code)
-
-        temporary = IR3Node.new_temporary()
-        exp3 = Exp3Relop(Idc3(a_temp), RelOp3.eq(), Idc3(b_temp))
-        code.append(Stmt3Assignment(temporary, exp3, JBool()))
-
-        return code, temporary
+        return assign_temporary(context, Exp3Relop(Idc3(a_temp), RelOp3.eq(), Idc3(b_temp)), BOOL_TYPE)
+
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+        lhs_type = yield self.lhs.visit_static_check(type_env, metadata)
+        self.check_lhs(lhs_type)
+        rhs_type = yield self.rhs.visit_static_check(type_env, metadata)
+        self.check_rhs(rhs_type)
+        return BOOL_TYPE
+
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        a_temp = yield self.lhs.visit_ir3(context)
+        b_temp = yield self.rhs.visit_ir3(context)
+        return self.emit_ir3(context, a_temp, b_temp)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        lhs_type, a_temp = yield self.lhs.visit_check_ir3(type_env, metadata, context)
+        self.check_lhs(lhs_type)
+        rhs_type, b_temp = yield self.rhs.visit_check_ir3(type_env, metadata, context)
+        self.check_rhs(rhs_type)
+        return BOOL_TYPE, self.emit_ir3(context, a_temp, b_temp)
 
 class Ne(AstNode):
+    __slots__ = ()
+
     def __init__(self, lhs: 'AstNode', rhs: 'AstNode'):
         super().__init__(name=AST_NE, children=[lhs, rhs])
 
@@ -1826,19 +2344,19 @@ class Ne(AstNode):
     def rhs(self) -> 'AstNode':
         return self.children[1]
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
-        # LHS and RHS should be int, if so, return bool type
-        lhs_type = self.lhs.static_check(type_env, metadata)
-        if type(lhs_type) != JInt:
+    # LHS and RHS should be int, if so, the comparison is bool type
+    @staticmethod
+    def check_lhs(lhs_type: 'JLiteType'):
+        if lhs_type is not INT_TYPE:
             raise TypeCheckError(f"expected lhs type of 'Ne (!=)' to be Int")
 
-        rhs_type = self.rhs.static_check(type_env, metadata)
-        if type(rhs_type) != JInt:
+    @staticmethod
+    def check_rhs(rhs_type: 'JLiteType'):
+        if rhs_type is not INT_TYPE:
             raise TypeCheckError(f"expected rhs type of 'Ne (!=)' to be Int")
 
-        return JBool()
-
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    @staticmethod
+    def emit_ir3(context: Dict[str, Any], a_temp: IR3Value, b_temp: IR3Value) -> IR3Value:
         """
         A != B
         a_temp = new temp()
@@ -1847,62 +2365,82 @@ class Ne(AstNode):
         B.code // get b_temp
         a_temp != b_temp
         """
-        a_code, a_temp = self.lhs.ir3(context)
-        b_code, b_temp = self.rhs.ir3(context)
+        return assign_temporary(context, Exp3Relop(Idc3(a_temp), RelOp3.ne(), Idc3(b_temp)), BOOL_TYPE)
 
-        code = []
-        code.extend(a_code)
-        code.extend(b_code)
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+        lhs_type = yield self.lhs.visit_static_check(type_env, metadata)
+        self.check_lhs(lhs_type)
+        rhs_type = yield self.rhs.visit_static_check(type_env, metadata)
+        self.check_rhs(rhs_type)
+        return BOOL_TYPE
 
-        temporary = IR3Node.new_temporary()
-        exp3 = Exp3Relop(Idc3(a_temp), RelOp3.ne(), Idc3(b_temp))
-        code.append(Stmt3Assignment(temporary, exp3, JBool()))
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        a_temp = yield self.lhs.visit_ir3(context)
+        b_temp = yield self.rhs.visit_ir3(context)
+        return self.emit_ir3(context, a_temp, b_temp)
 
-        return code, temporary
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        lhs_type, a_temp = yield self.lhs.visit_check_ir3(type_env, metadata, context)
+        self.check_lhs(lhs_type)
+        rhs_type, b_temp = yield self.rhs.visit_check_ir3(type_env, metadata, context)
+        self.check_rhs(rhs_type)
+        return BOOL_TYPE, self.emit_ir3(context, a_temp, b_temp)
 
 
 ########################### TERMINAL AST NODES ###########################
+
+
 class Int(AstNode):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(name=AST_INT)
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
-        return JInt()
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+        return INT_TYPE
 
-    def ir3(self, context: Dict[str, Any]):
+    def visit_ir3(self, context: Dict[str, Any]):
         raise NotImplementedError()
 
 class Bool(AstNode):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(name=AST_BOOL)
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
-        return JBool()
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+        return BOOL_TYPE
 
-    def ir3(self, context: Dict[str, Any]):
+    def visit_ir3(self, context: Dict[str, Any]):
         raise NotImplementedError()
 
 class String(AstNode):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(name=AST_STRING)
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
-        return JString()
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+        return STRING_TYPE
 
-    def ir3(self, context: Dict[str, Any]):
+    def visit_ir3(self, context: Dict[str, Any]):
         raise NotImplementedError()
 
 class Void(AstNode):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(name=AST_VOID)
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
-        return JVoid()
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+        return VOID_TYPE
 
-    def ir3(self, context: Dict[str, Any]):
+    def visit_ir3(self, context: Dict[str, Any]):
         raise NotImplementedError()
 
 class Cname(AstNode):
+    __slots__ = ()
+
     def __init__(self, tok: lex.Token):
         super().__init__(name=AST_CNAME, value=tok)
 
@@ -1910,58 +2448,91 @@ class Cname(AstNode):
     def class_name(self) -> str:
         return self.value.value
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JClass':
-        return JClass(self.value)
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JClass':
+        return JClass(self.class_name)
 
-    def ir3(self, context: Dict[str, Any]):
+    def visit_ir3(self, context: Dict[str, Any]):
         raise NotImplementedError()
 
 class Id(AstNode):
+    __slots__ = ("symbol",)
+
     def __init__(self, tok: lex.Token):
         super().__init__(name=AST_ID, value=tok)
+        self.symbol: Optional['Symbol'] = None # what the name resolves to, saved for ir3
 
     @property
     def id_name(self) -> str:
         return self.value.value
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
+    @staticmethod
+    def symbol_type(symbol: Optional['Symbol']) -> Optional['JLiteType']:
+        return symbol.type if symbol else None
+
+    # what name evaluates to: the signature of a called method, else the type of its variable
+    @staticmethod
+    def check_type(type_env: 'TypeEnvironment', name: str, metadata) -> Union['JLiteType', 'MethodSignature', None]:
+        if metadata == MethodCall:
+            return type_env.msig_lookup(name)
+        return Id.symbol_type(type_env.symbol_lookup(name))
+
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
         if metadata == MethodCall:
             return type_env.msig_lookup(self.id_name)
-        return type_env.field_lookup(self.id_name)
+        self.symbol = type_env.symbol_lookup(self.id_name)
+        return self.symbol_type(self.symbol)
 
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
         """
         # if an id can't be found locally, it must be an instance variable
         local_vars: List[VarDecl] = context["localvars"]
         parameters: List[Fml3] = context["parameters"]
         local = set([x.id_node.id_name for x in local_vars] + [x.id3 for x in parameters])
         if self.id_name in local:
-            return [], self.id_name
-        return [], Exp3FieldAccess("this", self.id_name)
+            return self.id_name
+        return Exp3FieldAccess("this", self.id_name)
         """
-        return [], self.id_name
+        return self.id_name
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        return self.check_type(type_env, self.id_name, metadata), self.id_name
+
 
 class TrueLit(AstNode):
+    __slots__ = ()
+
     def __init__(self, tok: lex.Token):
         super().__init__(name=AST_TRUE, value=tok)
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JBool':
-        return JBool()
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JBool':
+        return BOOL_TYPE
+
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        return Const(True)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        return self.visit_static_check(type_env, metadata), self.visit_ir3(context)
 
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
-        return [], Const(True)
 
 class FalseLit(AstNode):
+    __slots__ = ()
+
     def __init__(self, tok: lex.Token):
         super().__init__(name=AST_FALSE, value=tok)
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JBool':
-        return JBool()
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JBool':
+        return BOOL_TYPE
+
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        return Const(False)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        return self.visit_static_check(type_env, metadata), self.visit_ir3(context)
 
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
-        return [], Const(False)
 
 class IntegerLiteral(AstNode):
+    __slots__ = ()
+
     def __init__(self, tok: lex.Token):
         super().__init__(name=AST_INT_LITERAL, value=tok)
 
@@ -1969,13 +2540,19 @@ class IntegerLiteral(AstNode):
     def int_value(self) -> int:
         return self.value.value
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JInt':
-        return JInt()
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JInt':
+        return INT_TYPE
+
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        return Const(self.int_value)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        return self.visit_static_check(type_env, metadata), self.visit_ir3(context)
 
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
-        return [], Const(self.int_value)
 
 class StringLiteral(AstNode):
+    __slots__ = ()
+
     def __init__(self, tok: lex.Token):
         super().__init__(name=AST_STR_LITERAL, value=tok)
 
@@ -1983,34 +2560,1154 @@ class StringLiteral(AstNode):
     def str_value(self) -> str:
         return self.value.value
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JString':
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JString':
         global string_literals
         string_literals.append(self.str_value)
-        return JString()
+        return STRING_TYPE
+
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        return Const(self.str_value)
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        return self.visit_static_check(type_env, metadata), self.visit_ir3(context)
 
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
-        return [], Const(self.str_value)
 
 class This(AstNode):
+    __slots__ = ()
+
     def __init__(self, tok: lex.Token):
         super().__init__(name=AST_THIS, value=tok)
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JLiteType':
         return type_env.field_lookup("this")
 
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
-        return [], "this"
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        return "this"
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        return self.visit_static_check(type_env, metadata), self.visit_ir3(context)
+
 
 class Null(AstNode):
+    __slots__ = ()
+
     def __init__(self, tok: lex.Token):
         super().__init__(name=AST_NULL, value=tok)
 
-    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JNull':
+    def visit_static_check(self, type_env: 'TypeEnvironment' = None, metadata=None) -> 'JNull':
         # special null type
-        return JNull()
+        return NULL_TYPE
+
+    def visit_ir3(self, context: Dict[str, Any]) -> IR3Value:
+        return Const("NULL")
+
+    def visit_check_ir3(self, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+        return self.visit_static_check(type_env, metadata), self.visit_ir3(context)
+
+#####################################################################
+############################# AST ARENA #############################
+#####################################################################
+
+NO_NODE = -1 # first child/next sibling of nodes without one, token of nodes without a value
+
+# kinds of the nodes of an AstArena, indexes into ARENA_KINDS
+NODE_PROGRAM = 0
+NODE_MAINCLASS = 1
+NODE_CLASSDECLS = 2
+NODE_CLASSDECL = 3
+NODE_MDDECLS = 4
+NODE_MDDECL = 5
+NODE_FMLLIST = 6
+NODE_FML = 7
+NODE_MDBODY = 8
+NODE_VARDECLS = 9
+NODE_VARDECL = 10
+NODE_STMTS = 11
+NODE_IF_STATEMENT = 12
+NODE_WHILE = 13
+NODE_EXP = 14
+NODE_EXPLIST = 15
+NODE_NEGATE = 16
+NODE_AND = 17
+NODE_OR = 18
+NODE_PLUS = 19
+NODE_MINUS = 20
+NODE_MULT = 21
+NODE_DIV = 22
+NODE_UNEGATIVE = 23
+NODE_CLASS_INSTANCE_CREATION = 24
+NODE_FIELD_ACCESS = 25
+NODE_METHOD_CALL = 26
+NODE_RETURN_STATEMENT = 27
+NODE_ASSIGNMENT_STATEMENT = 28
+NODE_PRINTLN = 29
+NODE_READLN = 30
+NODE_LT = 31
+NODE_GT = 32
+NODE_LE = 33
+NODE_GE = 34
+NODE_EQ = 35
+NODE_NE = 36
+NODE_INT = 37
+NODE_BOOL = 38
+NODE_STRING = 39
+NODE_VOID = 40
+NODE_CNAME = 41
+NODE_ID = 42
+NODE_TRUE = 43
+NODE_FALSE = 44
+NODE_INT_LITERAL = 45
+NODE_STR_LITERAL = 46
+NODE_THIS = 47
+NODE_NULL = 48
+
+# the node class of each kind and the name of its nodes
+ARENA_KINDS: Tuple[Tuple[Type[AstNode], str], ...] = (
+    (Program, AST_PROGRAM),
+    (MainClass, AST_MAINCLASS),
+    (ClassDecls, AST_CLASSDECLS),
+    (ClassDecl, AST_CLASSDECL),
+    (MdDecls, AST_MDDECLS),
+    (MdDecl, AST_MDDECL),
+    (FmlList, AST_FMLLIST),
+    (Fml, AST_FML),
+    (MdBody, AST_MDBODY),
+    (VarDecls, AST_VARDECLS),
+    (VarDecl, AST_VARDECL),
+    (Stmts, AST_STMTS),
+    (IfStatement, AST_IF_STATEMENT),
+    (WhileStatement, AST_WHILE),
+    (Exp, AST_EXP),
+    (ExpList, AST_EXPLIST),
+    (Complement, AST_NEGATE),
+    (AndOp, AST_AND),
+    (OrOp, AST_OR),
+    (PlusOp, AST_PLUS),
+    (MinusOp, AST_MINUS),
+    (MultOp, AST_MULT),
+    (DivOp, AST_DIV),
+    (Unegative, AST_UNEGATIVE),
+    (ClassInstanceCreation, AST_CLASS_INSTANCE_CREATION),
+    (FieldAccess, AST_FIELD_ACCESS),
+    (MethodCall, AST_METHOD_CALL),
+    (ReturnStatement, AST_RETURN_STATEMENT),
+    (AssignmentStatement, AST_ASSIGNMENT_STATEMENT),
+    (Println, AST_PRINTLN),
+    (Readln, AST_READLN),
+    (Lt, AST_LT),
+    (Gt, AST_GT),
+    (Le, AST_LE),
+    (Ge, AST_GE),
+    (Eq, AST_EQ),
+    (Ne, AST_NE),
+    (Int, AST_INT),
+    (Bool, AST_BOOL),
+    (String, AST_STRING),
+    (Void, AST_VOID),
+    (Cname, AST_CNAME),
+    (Id, AST_ID),
+    (TrueLit, AST_TRUE),
+    (FalseLit, AST_FALSE),
+    (IntegerLiteral, AST_INT_LITERAL),
+    (StringLiteral, AST_STR_LITERAL),
+    (This, AST_THIS),
+    (Null, AST_NULL),
+)
+ARENA_KIND_OF: Dict[Type[AstNode], int] = {node_cls: kind for kind, (node_cls, _) in enumerate(ARENA_KINDS)}
+
+class AstArena:
+    """Compact struct-of-arrays storage for a whole AST, indexed by node id.
+
+    Each node is a kind (one of NODE_*) in a bytearray, its first child and next sibling in
+    arrays('i') and the index of its token in another, so a large tree is a handful of flat
+    arrays instead of an object per node. Nodes are added children first, so the root is the
+    last node. The arena has the make_* factories of AstNode, taking and returning node ids,
+    so PredictiveParser(tokens, arena=True) builds straight into it; from_tree copies a tree
+    that exists already.
+
+    static_check(), ir3() and check_ir3() run the passes over the node ids: a node is visited
+    by the function of its kind in ARENA_STATIC_CHECKS, ARENA_IR3 or ARENA_CHECK_IR3, which
+    apply the type rules and ir3 lowering helpers of the kind's node class. What static_check
+    saves for ir3 is kept in a list indexed by node id.
+    """
+    def __init__(self):
+        self.kinds = bytearray() # reads faster than an array("B"), at the same byte per node
+        self.first_children = array("i")
+        self.next_siblings = array("i")
+        self.token_ids = array("i")
+        self.tokens: List[lex.Token] = []
+        self.annotations: Optional[List[Any]] = None # what static_check saves for ir3, by node id
+        self.type_env: Optional['TypeEnvironment'] = None
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    @classmethod
+    def from_tree(cls, root: AstNode) -> 'AstArena':
+        """Copies the tree rooted at root into a new arena."""
+        arena = cls()
+        ids: List[int] = [] # ids of the nodes copied whose parent is not yet
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if node.children and not expanded:
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.children))
+                continue
+            first = len(ids) - len(node.children)
+            ids[first:] = [arena.add(ARENA_KIND_OF[type(node)], ids[first:], node.value)]
+        return arena
+
+    # adds a node of the given kind, whose children were added before it, returning its id
+    def add(self, kind: int, children: Sequence[int] = (), token: Optional[lex.Token] = None) -> int:
+        idx = len(self.kinds)
+        self.kinds.append(kind)
+        self.first_children.append(children[0] if children else NO_NODE)
+        self.next_siblings.append(NO_NODE)
+        for i in range(1, len(children)):
+            self.next_siblings[children[i - 1]] = children[i]
+
+        if token is None:
+            self.token_ids.append(NO_NODE)
+        else:
+            self.token_ids.append(len(self.tokens))
+            self.tokens.append(token)
+        return idx
+
+    ######################### NONTERMINALS #########################
+    def make_program(self, mainclass: int, classdecls: int) -> int:
+        return self.add(NODE_PROGRAM, (mainclass, classdecls))
+
+    def make_mainclass(self, cname: int, mainmd: int) -> int:
+        return self.add(NODE_MAINCLASS, (cname, mainmd))
+
+    def make_classdecls(self, classdecls: List[int]) -> int:
+        return self.add(NODE_CLASSDECLS, classdecls)
+
+    def make_classdecl(self, cname: int, vardecls: int, mddecls: int) -> int:
+        return self.add(NODE_CLASSDECL, (cname, vardecls, mddecls))
+
+    def make_mddecls(self, mddecls: List[int]) -> int:
+        return self.add(NODE_MDDECLS, mddecls)
+
+    def make_mddecl(self, type: int, id: int, fmllist: int, mdbody: int) -> int:
+        return self.add(NODE_MDDECL, (type, id, fmllist, mdbody))
+
+    def make_fmllist(self, fmls: List[int]) -> int:
+        return self.add(NODE_FMLLIST, fmls)
+
+    def make_fml(self, type_node: int, id_node: int) -> int:
+        return self.add(NODE_FML, (type_node, id_node))
+
+    def make_mdbody(self, vardecls: int, stmts: int) -> int:
+        return self.add(NODE_MDBODY, (vardecls, stmts))
+
+    def make_vardecls(self, vardecls: List[int]) -> int:
+        return self.add(NODE_VARDECLS, vardecls)
+
+    def make_vardecl(self, type: int, id: int) -> int:
+        return self.add(NODE_VARDECL, (type, id))
+
+    def make_stmts(self, stmts: List[int]) -> int:
+        return self.add(NODE_STMTS, stmts)
+
+    def make_if_statement(self, conditional: int, if_body: int, else_body: int) -> int:
+        return self.add(NODE_IF_STATEMENT, (conditional, if_body, else_body))
+
+    def make_while_statement(self, conditional: int, while_body: int) -> int:
+        return self.add(NODE_WHILE, (conditional, while_body))
+
+    def make_exp(self, actual_exp: int) -> int:
+        return self.add(NODE_EXP, (actual_exp,))
+
+    def make_explist(self, exps: List[int]) -> int:
+        return self.add(NODE_EXPLIST, exps)
+
+    def make_complement(self, bgrd_atom_true_false: int) -> int:
+        return self.add(NODE_NEGATE, (bgrd_atom_true_false,))
+
+    def make_and_op(self, left: int, right: int) -> int:
+        return self.add(NODE_AND, (left, right))
+
+    def make_or_op(self, left: int, right: int) -> int:
+        return self.add(NODE_OR, (left, right))
+
+    def make_plus_op(self, left: int, right: int) -> int:
+        return self.add(NODE_PLUS, (left, right))
+
+    def make_minus_op(self, left: int, right: int) -> int:
+        return self.add(NODE_MINUS, (left, right))
+
+    def make_mult_op(self, left: int, right: int) -> int:
+        return self.add(NODE_MULT, (left, right))
+
+    def make_div_op(self, left: int, right: int) -> int:
+        return self.add(NODE_DIV, (left, right))
+
+    def make_unegative(self, factor: int) -> int:
+        return self.add(NODE_UNEGATIVE, (factor,))
+
+    def make_class_instance_creation(self, cname: int) -> int:
+        return self.add(NODE_CLASS_INSTANCE_CREATION, (cname,))
+
+    def make_field_access(self, left: int, id: int) -> int:
+        return self.add(NODE_FIELD_ACCESS, (left, id))
+
+    def make_method_call(self, left: int, explist: int) -> int:
+        return self.add(NODE_METHOD_CALL, (left, explist))
+
+    def make_return_statement(self, exp: Optional[int] = None) -> int:
+        return self.add(NODE_RETURN_STATEMENT, (exp,) if exp is not None else ())
+
+    def make_assignment_statement(self, left: int, right: int) -> int:
+        return self.add(NODE_ASSIGNMENT_STATEMENT, (left, right))
+
+    def make_println(self, exp: int) -> int:
+        return self.add(NODE_PRINTLN, (exp,))
+
+    def make_readln(self, idd: int) -> int:
+        return self.add(NODE_READLN, (idd,))
+
+    def make_lt(self, lhs: int, rhs: int) -> int:
+        return self.add(NODE_LT, (lhs, rhs))
+
+    def make_gt(self, lhs: int, rhs: int) -> int:
+        return self.add(NODE_GT, (lhs, rhs))
+
+    def make_le(self, lhs: int, rhs: int) -> int:
+        return self.add(NODE_LE, (lhs, rhs))
+
+    def make_ge(self, lhs: int, rhs: int) -> int:
+        return self.add(NODE_GE, (lhs, rhs))
+
+    def make_eq(self, lhs: int, rhs: int) -> int:
+        return self.add(NODE_EQ, (lhs, rhs))
+
+    def make_ne(self, lhs: int, rhs: int) -> int:
+        return self.add(NODE_NE, (lhs, rhs))
+
+    ######################### TERMINALS #########################
+    def make_int(self) -> int:
+        return self.add(NODE_INT)
+
+    def make_bool(self) -> int:
+        return self.add(NODE_BOOL)
+
+    def make_string(self) -> int:
+        return self.add(NODE_STRING)
+
+    def make_void(self) -> int:
+        return self.add(NODE_VOID)
+
+    def make_cname(self, tok: lex.Token) -> int:
+        return self.add(NODE_CNAME, (), cname_token(tok))
+
+    def make_id(self, tok: lex.Token) -> int:
+        return self.add(NODE_ID, (), id_token(tok))
+
+    def make_true(self, tok: lex.Token) -> int:
+        return self.add(NODE_TRUE, (), tok)
+
+    def make_false(self, tok: lex.Token) -> int:
+        return self.add(NODE_FALSE, (), tok)
+
+    def make_integer_literal(self, tok: lex.Token) -> int:
+        return self.add(NODE_INT_LITERAL, (), tok)
+
+    def make_string_literal(self, tok: lex.Token) -> int:
+        return self.add(NODE_STR_LITERAL, (), tok)
+
+    def make_this(self, tok: lex.Token) -> int:
+        return self.add(NODE_THIS, (), tok)
+
+    def make_null(self, tok: lex.Token) -> int:
+        return self.add(NODE_NULL, (), tok)
+
+    ######################### READING #########################
+    def root(self) -> int:
+        return len(self.kinds) - 1
+
+    def children(self, idx: int) -> List[int]:
+        children, child = [], self.first_children[idx]
+        while child != NO_NODE:
+            children.append(child)
+            child = self.next_siblings[child]
+        return children
+
+    def name(self, idx: int) -> str:
+        return ARENA_KINDS[self.kinds[idx]][1]
+
+    def node_class(self, idx: int) -> Type[AstNode]:
+        return ARENA_KINDS[self.kinds[idx]][0]
+
+    def value(self, idx: int) -> Optional[lex.Token]:
+        token_id = self.token_ids[idx]
+        return None if token_id == NO_NODE else self.tokens[token_id]
+
+    # the name an id or cname node holds
+    def id_name(self, idx: int) -> str:
+        return self.tokens[self.token_ids[idx]].value
+
+    # a cursor on node idx, the root by default
+    def cursor(self, idx: Optional[int] = None) -> 'AstCursor':
+        return AstCursor(self, self.root() if idx is None else idx)
+
+    def __str__(self):
+        # same as print_tree, without recursing
+        lines = []
+        stack = [(self.root(), 0)] if self.kinds else []
+        while stack:
+            idx, level = stack.pop()
+            value = self.value(idx)
+            if value and value.value:
+                lines.append(" " * level + f"({self.name(idx)}, {value.value})\n")
+            else:
+                lines.append(" " * level + f"({self.name(idx)})\n")
+            stack.extend((child, level + 4) for child in reversed(self.children(idx)))
+        return "".join(lines)
+
+    ######################### DECLARATIONS #########################
+    # the type a type node stands for, as node_to_type
+    def node_type(self, idx: int) -> 'JLiteType':
+        kind = self.kinds[idx]
+        if kind == NODE_INT:
+            return INT_TYPE
+        elif kind == NODE_STRING:
+            return STRING_TYPE
+        elif kind == NODE_BOOL:
+            return BOOL_TYPE
+        elif kind == NODE_VOID:
+            return VOID_TYPE
+        else:
+            return JClass(self.id_name(idx))
+
+    # names and types of the vardecls or params under node idx, as unpack_vars
+    def unpack_vars(self, idx: int) -> List[Tuple[str, 'JLiteType']]:
+        first_children, next_siblings = self.first_children, self.next_siblings
+        return [(self.id_name(next_siblings[first_children[decl]]), self.node_type(first_children[decl])) for decl in self.children(idx)]
+
+    def vardecl_names(self, idx: int) -> List[str]:
+        return [self.id_name(self.next_siblings[self.first_children[decl]]) for decl in self.children(idx)]
+
+    def unpack_method(self, idx: int) -> Tuple[str, List[Tuple[str, 'JLiteType']], 'JLiteType']:
+        type_node, id_node, fmllist, _ = self.children(idx)
+        return self.id_name(id_node), self.unpack_vars(fmllist), self.node_type(type_node)
+
+    # the classes of the program at node idx, as unpack_classes
+    def unpack_classes(self, idx: int) -> List['ClassSpec']:
+        mainclass, classdecls = self.children(idx)
+        cname, mainmd = self.children(mainclass)
+        classes: List['ClassSpec'] = [(self.id_name(cname), [], [self.unpack_method(mainmd)])]
+        for classdecl in self.children(classdecls):
+            cname, vardecls, mddecls = self.children(classdecl)
+            mthds = [self.unpack_method(mddecl) for mddecl in self.children(mddecls)]
+            classes.append((self.id_name(cname), self.unpack_vars(vardecls), mthds))
+        return classes
+
+    # the class nodes of the program at node idx, main class first
+    def classes(self, idx: int) -> List[int]:
+        mainclass = self.first_children[idx]
+        return [mainclass] + self.children(self.next_siblings[mainclass])
+
+    # the method nodes of a class node
+    def methods(self, idx: int) -> List[int]:
+        cname = self.first_children[idx]
+        if self.kinds[idx] == NODE_MAINCLASS:
+            return [self.next_siblings[cname]]
+        return self.children(self.next_siblings[self.next_siblings[cname]])
+
+    ######################### PASSES #########################
+    # type checks the program, returning its type
+    def static_check(self, type_env: 'TypeEnvironment' = None, metadata=None):
+        self.annotations = [None] * len(self.kinds)
+        return walk(static_check_program(self, self.root(), type_env, metadata))
+
+    # generates the program's ir3 once it was type checked
+    def ir3(self, context: Dict[str, Any]):
+        return walk(ir3_program(self, self.root(), context))
+
+    # type checks and generates ir3 in a single traversal, as AstNode.check_ir3. Only the
+    # receivers of calls go through both passes, and their annotations are dropped at the end
+    def check_ir3(self, type_env: 'TypeEnvironment' = None, metadata=None, context: Dict[str, Any] = None):
+        self.annotations = [None] * len(self.kinds)
+        try:
+            return walk(check_ir3_program(self, self.root(), type_env, metadata, context))
+        finally:
+            self.annotations = None
+
+class AstCursor:
+    """A position in an AstArena. goto_first_child(), goto_next_sibling() and goto_parent()
+    move it in place, so a single cursor walks a whole arena without an object per node."""
+    __slots__ = ("arena", "idx", "parents")
+
+    def __init__(self, arena: AstArena, idx: int):
+        self.arena = arena
+        self.idx = idx
+        self.parents: List[int] = [] # ids of the nodes the cursor went down from
+
+    @property
+    def name(self) -> str:
+        return self.arena.name(self.idx)
+
+    @property
+    def value(self) -> Optional[lex.Token]:
+        return self.arena.value(self.idx)
+
+    @property
+    def node_class(self) -> Type[AstNode]:
+        return self.arena.node_class(self.idx)
+
+    # moves to the first child, returning False and staying put if there is none
+    def goto_first_child(self) -> bool:
+        child = self.arena.first_children[self.idx]
+        if child == NO_NODE:
+            return False
+        self.parents.append(self.idx)
+        self.idx = child
+        return True
+
+    # moves to the next sibling, returning False and staying put if there is none
+    def goto_next_sibling(self) -> bool:
+        sibling = self.arena.next_siblings[self.idx]
+        if sibling == NO_NODE:
+            return False
+        self.idx = sibling
+        return True
+
+    # moves back to the node the cursor went down from, returning False at the start node
+    def goto_parent(self) -> bool:
+        if not self.parents:
+            return False
+        self.idx = self.parents.pop()
+        return True
+
+# The visits of the arena's nodes, one per kind and pass. Each mirrors the visit_* method of
+# the kind's node class, reading the node's children from the arena by id, and visits a child
+# through the table of its pass indexed by the child's kind, e.g
+# ARENA_STATIC_CHECKS[arena.kinds[child]](arena, child, type_env, metadata)
+
+########################### DECLARATIONS ###########################
+
+def static_check_program(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata):
+    # distinct name-checking done during initialization
+    arena.type_env = TypeEnvironment.initialize(arena.unpack_classes(idx))
+    for class_node in arena.classes(idx):
+        yield static_check_class(arena, class_node, arena.type_env, metadata)
+
+def ir3_program(arena: AstArena, idx: int, context: Dict[str, Any]) -> Program3:
+    type_env = arena.type_env
+    cdata3_list = []
+    cmtd3_list = []
+    for class_node in arena.classes(idx):
+        cid = arena.id_name(arena.first_children[class_node])
+        # pass classname down to child nodes (e.g method call nodes need to mangle names too)
+        context["classname"] = cid
+        cdata3_list.append(class_data3(type_env, cid))
+
+        msigs = type_env.class_lookup(cid)[1]
+        for mddecl in arena.methods(class_node):
+            _, id_node, _, mdbody = arena.children(mddecl)
+            mid = arena.id_name(id_node)
+            msig = msigs[mid]
+            fmllist3 = MdDecl.enter_ir3(cid, msig, context, arena.children(arena.first_children[mdbody]))
+            mdbody3 = yield ir3_mdbody(arena, mdbody, context)
+            cmtd3_list.append(MdDecl.make_cmtd3(cid, mid, msig, fmllist3, mdbody3))
+
+    return Program3(cdata3_list, cmtd3_list)
+
+def check_ir3_program(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Program3:
+    type_env = TypeEnvironment.initialize(arena.unpack_classes(idx))
+    cdata3_list = []
+    cmtd3_list = []
+    for class_node in arena.classes(idx):
+        cdata3, cmtd3s = yield check_ir3_class(arena, class_node, type_env, metadata, context)
+        cdata3_list.append(cdata3)
+        cmtd3_list.extend(cmtd3s)
+    return Program3(cdata3_list, cmtd3_list)
+
+# the main class or a class declaration
+def static_check_class(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata):
+    cid = arena.id_name(arena.first_children[idx])
+    child_env = open_class_env(type_env, cid)
+    for mddecl in arena.methods(idx):
+        yield static_check_mddecl(arena, mddecl, child_env, cid)
+    close_class_env(type_env, cid)
+
+def check_ir3_class(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple[CData3, List[CMtd3]]:
+    cid = arena.id_name(arena.first_children[idx])
+    context["classname"] = cid
+    cdata3 = class_data3(type_env, cid)
+    child_env = open_class_env(type_env, cid)
+
+    cmtd3_list = []
+    for mddecl in arena.methods(idx):
+        cmtd3 = yield check_ir3_mddecl(arena, mddecl, child_env, cid, context)
+        cmtd3_list.append(cmtd3)
+
+    close_class_env(type_env, cid)
+    return cdata3, cmtd3_list
+
+def static_check_mddecl(arena: AstArena, idx: int, type_env: 'TypeEnvironment', cid: str):
+    _, id_node, _, mdbody = arena.children(idx)
+    mid = arena.id_name(id_node)
+    child_env, msig = MdDecl.method_env(type_env, cid, mid, arena.unpack_vars(arena.first_children[mdbody]))
+    mdbody_type = yield static_check_mdbody(arena, mdbody, child_env, cid)
+    MdDecl.check_body_type(cid, mid, msig, mdbody_type)
+
+def check_ir3_mddecl(arena: AstArena, idx: int, type_env: 'TypeEnvironment', cid: str, context: Dict[str, Any]) -> CMtd3:
+    _, id_node, _, mdbody = arena.children(idx)
+    mid = arena.id_name(id_node)
+    vardecls = arena.first_children[mdbody]
+    child_env, msig = MdDecl.method_env(type_env, cid, mid, arena.unpack_vars(vardecls))
+    fmllist3 = MdDecl.enter_ir3(cid, msig, context, arena.children(vardecls))
+
+    mdbody_type, mdbody3 = yield check_ir3_mdbody(arena, mdbody, child_env, cid, context)
+    MdDecl.check_body_type(cid, mid, msig, mdbody_type)
+    return MdDecl.make_cmtd3(cid, mid, msig, fmllist3, mdbody3)
+
+def static_check_mdbody(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata):
+    vardecls = arena.first_children[idx]
+    arena.annotations[idx] = MdBody.local_types(type_env, arena.vardecl_names(vardecls)) # saved for ir3
+    return (yield static_check_stmts(arena, arena.next_siblings[vardecls], type_env, metadata))
+
+def ir3_mdbody(arena: AstArena, idx: int, context: Dict[str, Any]) -> MdBody3:
+    vardecls = arena.first_children[idx]
+    stmt3s_lst = context["code"] = []
+    yield ir3_stmts(arena, arena.next_siblings[vardecls], context)
+    return MdBody.make_mdbody3(context, stmt3s_lst, arena.vardecl_names(vardecls), arena.annotations[idx])
+
+def check_ir3_mdbody(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', MdBody3]:
+    vardecls = arena.first_children[idx]
+    var_ids = arena.vardecl_names(vardecls)
+    var_types = MdBody.local_types(type_env, var_ids)
+    stmt3s_lst = context["code"] = []
+    mdbody_type, _ = yield check_ir3_stmts(arena, arena.next_siblings[vardecls], type_env, metadata, context)
+    return mdbody_type, MdBody.make_mdbody3(context, stmt3s_lst, var_ids, var_types)
+
+########################### STATEMENTS ###########################
+
+def static_check_stmts(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata) -> 'JLiteType':
+    # the type of a bunch of statements is the last statement
+    kinds, next_siblings = arena.kinds, arena.next_siblings
+    last_type = VOID_TYPE
+    stmt = arena.first_children[idx]
+    while stmt != NO_NODE:
+        last_type = yield ARENA_STATIC_CHECKS[kinds[stmt]](arena, stmt, type_env, metadata)
+        stmt = next_siblings[stmt]
+    return last_type
+
+def ir3_stmts(arena: AstArena, idx: int, context: Dict[str, Any]):
+    kinds, next_siblings = arena.kinds, arena.next_siblings
+    stmt = arena.first_children[idx]
+    while stmt != NO_NODE:
+        yield ARENA_IR3[kinds[stmt]](arena, stmt, context)
+        stmt = next_siblings[stmt]
+
+def check_ir3_stmts(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+    kinds, next_siblings = arena.kinds, arena.next_siblings
+    last_type = VOID_TYPE
+    stmt = arena.first_children[idx]
+    while stmt != NO_NODE:
+        last_type, _ = yield ARENA_CHECK_IR3[kinds[stmt]](arena, stmt, type_env, metadata, context)
+        stmt = next_siblings[stmt]
+    return last_type, None
+
+def static_check_if(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata) -> 'JLiteType':
+    conditional = arena.first_children[idx]
+    if_body = arena.next_siblings[conditional]
+    else_body = arena.next_siblings[if_body]
+    cond_type = yield ARENA_STATIC_CHECKS[arena.kinds[conditional]](arena, conditional, type_env, metadata)
+    IfStatement.check_conditional(cond_type)
+
+    if_type = yield static_check_stmts(arena, if_body, type_env.child_env(), metadata)
+    else_type = yield static_check_stmts(arena, else_body, type_env.child_env(), metadata)
+    return IfStatement.check_bodies(if_type, else_type)
+
+def ir3_if(arena: AstArena, idx: int, context: Dict[str, Any]):
+    conditional = arena.first_children[idx]
+    if_body = arena.next_siblings[conditional]
+    else_body = arena.next_siblings[if_body]
+    labels = IR3Node.new_label(), IR3Node.new_label()
+    b_temp = yield ARENA_IR3[arena.kinds[conditional]](arena, conditional, context)
+
+    code = context["code"]
+    s1_code = context["code"] = []
+    yield ir3_stmts(arena, if_body, context)
+    s2_code = context["code"] = []
+    yield ir3_stmts(arena, else_body, context)
+    context["code"] = code
+
+    IfStatement.emit_ir3(code, labels, b_temp, s1_code, s2_code)
+
+def check_ir3_if(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+    conditional = arena.first_children[idx]
+    if_body = arena.next_siblings[conditional]
+    else_body = arena.next_siblings[if_body]
+    labels = IR3Node.new_label(), IR3Node.new_label()
+    cond_type, b_temp = yield ARENA_CHECK_IR3[arena.kinds[conditional]](arena, conditional, type_env, metadata, context)
+    IfStatement.check_conditional(cond_type)
+
+    code = context["code"]
+    s1_code = context["code"] = []
+    if_type, _ = yield check_ir3_stmts(arena, if_body, type_env.child_env(), metadata, context)
+    s2_code = context["code"] = []
+    else_type, _ = yield check_ir3_stmts(arena, else_body, type_env.child_env(), metadata, context)
+    context["code"] = code
+
+    if_type = IfStatement.check_bodies(if_type, else_type)
+    IfStatement.emit_ir3(code, labels, b_temp, s1_code, s2_code)
+    return if_type, None
+
+def static_check_while(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata) -> 'JLiteType':
+    conditional = arena.first_children[idx]
+    cond_type = yield ARENA_STATIC_CHECKS[arena.kinds[conditional]](arena, conditional, type_env, metadata)
+    WhileStatement.check_conditional(cond_type)
+    return (yield static_check_stmts(arena, arena.next_siblings[conditional], type_env.child_env(), metadata))
+
+def ir3_while(arena: AstArena, idx: int, context: Dict[str, Any]):
+    conditional = arena.first_children[idx]
+    labels = IR3Node.new_label(), IR3Node.new_label(), IR3Node.new_label()
+
+    code = context["code"]
+    b_code = context["code"] = []
+    b_temp = yield ARENA_IR3[arena.kinds[conditional]](arena, conditional, context)
+    s1_code = context["code"] = []
+    yield ir3_stmts(arena, arena.next_siblings[conditional], context)
+    context["code"] = code
+
+    WhileStatement.emit_ir3(code, labels, b_temp, b_code, s1_code)
+
+def check_ir3_while(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+    conditional = arena.first_children[idx]
+    labels = IR3Node.new_label(), IR3Node.new_label(), IR3Node.new_label()
+
+    code = context["code"]
+    b_code = context["code"] = []
+    cond_type, b_temp = yield ARENA_CHECK_IR3[arena.kinds[conditional]](arena, conditional, type_env, metadata, context)
+    WhileStatement.check_conditional(cond_type)
+    s1_code = context["code"] = []
+    while_type, _ = yield check_ir3_stmts(arena, arena.next_siblings[conditional], type_env.child_env(), metadata, context)
+    context["code"] = code
+
+    WhileStatement.emit_ir3(code, labels, b_temp, b_code, s1_code)
+    return while_type, None
+
+def static_check_return(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata) -> 'JLiteType':
+    exp = arena.first_children[idx]
+    if exp == NO_NODE:
+        exp_type = ReturnStatement.check_void(type_env)
+    else:
+        ret_type = yield ARENA_STATIC_CHECKS[arena.kinds[exp]](arena, exp, type_env, metadata)
+        exp_type = ReturnStatement.check_exp_type(type_env, ret_type)
+    arena.annotations[idx] = exp_type # saved for ir3
+    return exp_type
+
+def ir3_return(arena: AstArena, idx: int, context: Dict[str, Any]):
+    exp = arena.first_children[idx]
+    start = len(context["code"])
+    a_temp = (yield ARENA_IR3[arena.kinds[exp]](arena, exp, context)) if exp != NO_NODE else None
+    ReturnStatement.emit_ir3(context, start, a_temp, arena.annotations[idx])
+
+def check_ir3_return(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+    exp = arena.first_children[idx]
+    start = len(context["code"])
+    if exp == NO_NODE:
+        ret_type, a_temp = ReturnStatement.check_void(type_env), None
+    else:
+        ret_type, a_temp = yield ARENA_CHECK_IR3[arena.kinds[exp]](arena, exp, type_env, metadata, context)
+        ReturnStatement.check_exp_type(type_env, ret_type)
+    ReturnStatement.emit_ir3(context, start, a_temp, ret_type)
+    return ret_type, None
+
+# the rhs of an assignment whose sides are used as they are, as AssignmentStatement.direct_exp3,
+# or None if the assignment lowers its sides
+def direct_exp3(arena: AstArena, left: int, right: int) -> Optional[IR3Node]:
+    kinds = arena.kinds
+    if kinds[left] != NODE_ID:
+        return None
+    if kinds[right] == NODE_CLASS_INSTANCE_CREATION:
+        return Exp3ClassInstanceCreation(arena.id_name(arena.first_children[right]))
+    if kinds[right] == NODE_ID:
+        return Idc3(arena.id_name(right))
+    return None
+
+def static_check_assignment(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata) -> 'JLiteType':
+    left = arena.first_children[idx]
+    right = arena.next_siblings[left]
+    lhs_type = yield ARENA_STATIC_CHECKS[arena.kinds[left]](arena, left, type_env, metadata)
+    rhs_type = yield ARENA_STATIC_CHECKS[arena.kinds[right]](arena, right, type_env, metadata)
+    arena.annotations[idx] = AssignmentStatement.check_types(lhs_type, rhs_type) # saved for ir3
+    return VOID_TYPE
+
+def ir3_assignment(arena: AstArena, idx: int, context: Dict[str, Any]):
+    kinds = arena.kinds
+    left = arena.first_children[idx]
+    right = arena.next_siblings[left]
+    left_type = arena.annotations[idx]
+    exp3 = direct_exp3(arena, left, right)
+    if kinds[left] == NODE_FIELD_ACCESS:
+        obj = arena.first_children[left]
+        a_temp = yield ARENA_IR3[kinds[obj]](arena, obj, context)
+        b_temp = yield ARENA_IR3[kinds[right]](arena, right, context)
+        AssignmentStatement.emit_ir3(context, left_type, a_temp, Idc3(b_temp), arena.annotations[arena.next_siblings[obj]])
+    elif exp3 is not None:
+        AssignmentStatement.emit_ir3(context, left_type, arena.id_name(left), exp3)
+    else:
+        a_temp = yield ARENA_IR3[kinds[left]](arena, left, context)
+        b_temp = yield ARENA_IR3[kinds[right]](arena, right, context)
+        AssignmentStatement.emit_ir3(context, left_type, a_temp, Idc3(b_temp))
+
+def check_ir3_assignment(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+    kinds = arena.kinds
+    left = arena.first_children[idx]
+    right = arena.next_siblings[left]
+    exp3 = direct_exp3(arena, left, right)
+    if kinds[left] == NODE_FIELD_ACCESS:
+        # only the object of the field access is lowered
+        obj = arena.first_children[left]
+        ctype, a_temp = yield ARENA_CHECK_IR3[kinds[obj]](arena, obj, type_env, None, context)
+        lhs_type, _, field = FieldAccess.lookup_member(type_env, ctype, metadata, arena.id_name(arena.next_siblings[obj]))
+        rhs_type, b_temp = yield ARENA_CHECK_IR3[kinds[right]](arena, right, type_env, metadata, context)
+        AssignmentStatement.emit_ir3(context, AssignmentStatement.check_types(lhs_type, rhs_type), a_temp, Idc3(b_temp), field)
+    elif exp3 is not None:
+        # only checked, both sides are used as they are
+        lhs_type = Id.check_type(type_env, arena.id_name(left), metadata)
+        if kinds[right] == NODE_CLASS_INSTANCE_CREATION:
+            rhs_type = ClassInstanceCreation.check_class(type_env, arena.id_name(arena.first_children[right]))
+        else:
+            rhs_type = Id.check_type(type_env, arena.id_name(right), metadata)
+        AssignmentStatement.emit_ir3(context, AssignmentStatement.check_types(lhs_type, rhs_type), arena.id_name(left), exp3)
+    else:
+        lhs_type, a_temp = yield ARENA_CHECK_IR3[kinds[left]](arena, left, type_env, metadata, context)
+        rhs_type, b_temp = yield ARENA_CHECK_IR3[kinds[right]](arena, right, type_env, metadata, context)
+        AssignmentStatement.emit_ir3(context, AssignmentStatement.check_types(lhs_type, rhs_type), a_temp, Idc3(b_temp))
+    return VOID_TYPE, None
+
+def static_check_println(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata) -> 'JLiteType':
+    exp = arena.first_children[idx]
+    exp_type = yield ARENA_STATIC_CHECKS[arena.kinds[exp]](arena, exp, type_env, metadata)
+    Println.check_exp_type(exp_type)
+    return VOID_TYPE
+
+def ir3_println(arena: AstArena, idx: int, context: Dict[str, Any]):
+    exp = arena.first_children[idx]
+    a_temp = yield ARENA_IR3[arena.kinds[exp]](arena, exp, context)
+    Println.emit_ir3(context, a_temp)
+
+def check_ir3_println(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+    exp = arena.first_children[idx]
+    exp_type, a_temp = yield ARENA_CHECK_IR3[arena.kinds[exp]](arena, exp, type_env, metadata, context)
+    Println.check_exp_type(exp_type)
+    Println.emit_ir3(context, a_temp)
+    return VOID_TYPE, None
+
+def static_check_readln(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata) -> 'JLiteType':
+    id_type = static_check_id(arena, arena.first_children[idx], type_env, metadata)
+    Readln.check_id_type(id_type)
+    return VOID_TYPE
+
+def ir3_readln(arena: AstArena, idx: int, context: Dict[str, Any]):
+    Readln.emit_ir3(context, arena.id_name(arena.first_children[idx]))
+
+def check_ir3_readln(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+    id_type, id3 = check_ir3_id(arena, arena.first_children[idx], type_env, metadata, context)
+    Readln.check_id_type(id_type)
+    Readln.emit_ir3(context, id3)
+    return VOID_TYPE, None
+
+########################### EXPRESSIONS ###########################
+
+def static_check_exp(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata):
+    exp = arena.first_children[idx]
+    return (yield ARENA_STATIC_CHECKS[arena.kinds[exp]](arena, exp, type_env, metadata))
+
+def ir3_exp(arena: AstArena, idx: int, context: Dict[str, Any]) -> IR3Value:
+    exp = arena.first_children[idx]
+    return (yield ARENA_IR3[arena.kinds[exp]](arena, exp, context))
+
+def check_ir3_exp(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+    exp = arena.first_children[idx]
+    return (yield ARENA_CHECK_IR3[arena.kinds[exp]](arena, exp, type_env, metadata, context))
+
+# '!' and unary '-', whose node classes have check_operand and emit_ir3
+def static_check_unary(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata) -> 'JLiteType':
+    operand = arena.first_children[idx]
+    child_type = yield ARENA_STATIC_CHECKS[arena.kinds[operand]](arena, operand, type_env, metadata)
+    arena.node_class(idx).check_operand(child_type)
+    return child_type
+
+def ir3_unary(arena: AstArena, idx: int, context: Dict[str, Any]) -> IR3Value:
+    operand = arena.first_children[idx]
+    a_temp = yield ARENA_IR3[arena.kinds[operand]](arena, operand, context)
+    return arena.node_class(idx).emit_ir3(context, a_temp)
+
+def check_ir3_unary(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+    operand = arena.first_children[idx]
+    child_type, a_temp = yield ARENA_CHECK_IR3[arena.kinds[operand]](arena, operand, type_env, metadata, context)
+    node_cls = arena.node_class(idx)
+    node_cls.check_operand(child_type)
+    return child_type, node_cls.emit_ir3(context, a_temp)
+
+def any_operand(operand_type: 'JLiteType'):
+    pass
+
+def left_operand_type(left_type: 'JLiteType', right_type: 'JLiteType') -> 'JLiteType':
+    return left_type
+
+def bool_result(left_type: 'JLiteType', right_type: 'JLiteType') -> 'JLiteType':
+    return BOOL_TYPE
+
+# binary operators: kind -> (check of the left operand, check of the right operand, type of the
+# operation given both operand types, ir3 lowering), as the visits of their node classes do
+BINARY_RULES: Dict[int, Tuple[Callable, Callable, Callable, Callable]] = {
+    NODE_AND: (AndOp.check_left, AndOp.check_right, left_operand_type, AndOp.emit_ir3),
+    NODE_OR: (OrOp.check_left, OrOp.check_right, left_operand_type, OrOp.emit_ir3),
+    NODE_PLUS: (any_operand, any_operand, PlusOp.check_operands, PlusOp.emit_ir3),
+    NODE_MINUS: (MinusOp.check_left, MinusOp.check_right, left_operand_type, MinusOp.emit_ir3),
+    NODE_MULT: (MultOp.check_left, MultOp.check_right, left_operand_type, MultOp.emit_ir3),
+    NODE_DIV: (DivOp.check_left, DivOp.check_right, left_operand_type, DivOp.emit_ir3),
+    NODE_LT: (Lt.check_lhs, Lt.check_rhs, bool_result, Lt.emit_ir3),
+    NODE_GT: (Gt.check_lhs, Gt.check_rhs, bool_result, Gt.emit_ir3),
+    NODE_LE: (Le.check_lhs, Le.check_rhs, bool_result, Le.emit_ir3),
+    NODE_GE: (Ge.check_lhs, Ge.check_rhs, bool_result, Ge.emit_ir3),
+    NODE_EQ: (Eq.check_lhs, Eq.check_rhs, bool_result, Eq.emit_ir3),
+    NODE_NE: (Ne.check_lhs, Ne.check_rhs, bool_result, Ne.emit_ir3),
+}
+
+def static_check_binary(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata) -> 'JLiteType':
+    kinds = arena.kinds
+    check_left, check_right, result_type, _ = BINARY_RULES[kinds[idx]]
+    left = arena.first_children[idx]
+    right = arena.next_siblings[left]
+    left_type = yield ARENA_STATIC_CHECKS[kinds[left]](arena, left, type_env, metadata)
+    check_left(left_type)
+    right_type = yield ARENA_STATIC_CHECKS[kinds[right]](arena, right, type_env, metadata)
+    check_right(right_type)
+    return result_type(left_type, right_type)
+
+def ir3_binary(arena: AstArena, idx: int, context: Dict[str, Any]) -> IR3Value:
+    kinds = arena.kinds
+    left = arena.first_children[idx]
+    right = arena.next_siblings[left]
+    a_temp = yield ARENA_IR3[kinds[left]](arena, left, context)
+    b_temp = yield ARENA_IR3[kinds[right]](arena, right, context)
+    return BINARY_RULES[kinds[idx]][3](context, a_temp, b_temp)
+
+def check_ir3_binary(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+    kinds = arena.kinds
+    check_left, check_right, result_type, emit_ir3 = BINARY_RULES[kinds[idx]]
+    left = arena.first_children[idx]
+    right = arena.next_siblings[left]
+    left_type, a_temp = yield ARENA_CHECK_IR3[kinds[left]](arena, left, type_env, metadata, context)
+    check_left(left_type)
+    right_type, b_temp = yield ARENA_CHECK_IR3[kinds[right]](arena, right, type_env, metadata, context)
+    check_right(right_type)
+    return result_type(left_type, right_type), emit_ir3(context, a_temp, b_temp)
+
+def static_check_field_access(arena: AstArena, idx: int, type_env: 'TypeEnvironment', parent_type) -> Union['JLiteType', 'MethodSignature']:
+    left = arena.first_children[idx]
+    id_node = arena.next_siblings[left]
+    ctype = yield ARENA_STATIC_CHECKS[arena.kinds[left]](arena, left, type_env, None)
+    # the type of the access and the field's symbol are saved for ir3
+    member, arena.annotations[idx], arena.annotations[id_node] = FieldAccess.lookup_member(type_env, ctype, parent_type, arena.id_name(id_node))
+    return member
+
+def ir3_field_access(arena: AstArena, idx: int, context: Dict[str, Any]) -> IR3Value:
+    left = arena.first_children[idx]
+    a_temp = yield ARENA_IR3[arena.kinds[left]](arena, left, context)
+    left_field = FieldAccess.this_field(arena.annotations[left]) if arena.kinds[left] == NODE_ID else None
+    return FieldAccess.emit_ir3(context, a_temp, arena.annotations[idx], arena.annotations[arena.next_siblings[left]], left_field)
+
+def check_ir3_field_access(arena: AstArena, idx: int, type_env: 'TypeEnvironment', parent_type, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+    left = arena.first_children[idx]
+    left_field = None
+    if arena.kinds[left] == NODE_ID:
+        # an id emits no code, but its symbol tells whether it is a field of this
+        symbol = type_env.symbol_lookup(arena.id_name(left))
+        ctype, a_temp, left_field = Id.symbol_type(symbol), arena.id_name(left), FieldAccess.this_field(symbol)
+    else:
+        ctype, a_temp = yield ARENA_CHECK_IR3[arena.kinds[left]](arena, left, type_env, None, context)
+    member, left_type, symbol = FieldAccess.lookup_member(type_env, ctype, parent_type, arena.id_name(arena.next_siblings[left]))
+    return member, FieldAccess.emit_ir3(context, a_temp, left_type, symbol, left_field)
+
+# the name of the method a call calls, and the name again if the call is local, as MethodCall.mids
+def call_mids(arena: AstArena, left: int) -> Tuple[str, Optional[str]]:
+    if arena.kinds[left] == NODE_ID:
+        return arena.id_name(left), arena.id_name(left)
+    return arena.id_name(arena.next_siblings[arena.first_children[left]]), None
+
+def static_check_method_call(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata) -> 'JLiteType':
+    kinds = arena.kinds
+    left = arena.first_children[idx]
+    if kinds[left] == NODE_ID:
+        # bypass checking the id on the left
+        mid, local_mid = call_mids(arena, left)
+        msig = MethodCall.local_msig(type_env, mid)
+    else:
+        # the left must evaluate to a method signature, which is asked for through 'MethodCall'
+        msig = yield ARENA_STATIC_CHECKS[kinds[left]](arena, left, type_env, MethodCall)
+        msig = MethodCall.check_global_msig(msig, arena.node_class(left))
+        local_mid = None
+    arena.annotations[idx] = msig # saved for ir3
+
+    exps = arena.children(arena.next_siblings[left])
+    MethodCall.check_arg_count(msig, len(exps), local_mid)
+    for i, exp in enumerate(exps):
+        arg_type = yield ARENA_STATIC_CHECKS[kinds[exp]](arena, exp, type_env, metadata)
+        MethodCall.check_arg(msig, i, arg_type, local_mid)
+    return msig.ret_type
+
+def ir3_method_call(arena: AstArena, idx: int, context: Dict[str, Any]) -> IR3Value:
+    kinds = arena.kinds
+    left = arena.first_children[idx]
+    msig: MethodSignature = arena.annotations[idx]
+    temporary = IR3Node.new_temporary()
+    idc3_list = []
+    for exp in arena.children(arena.next_siblings[left]):
+        exp_temp = yield ARENA_IR3[kinds[exp]](arena, exp, context)
+        idc3_list.append(Idc3(exp_temp))
+
+    id_temp = None
+    if kinds[left] == NODE_FIELD_ACCESS:
+        # global call, need to get a temporary to 'this', e.g a.id(1, 2)
+        obj = arena.first_children[left]
+        id_temp = yield ARENA_IR3[kinds[obj]](arena, obj, context)
+    elif kinds[left] != NODE_ID:
+        raise RuntimeError("should not be here")
+
+    mid, _ = call_mids(arena, left)
+    return MethodCall.emit_ir3(context, temporary, msig.cname, mid, msig.ret_type, idc3_list, id_temp)
+
+def check_ir3_method_call(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+    kinds = arena.kinds
+    left = arena.first_children[idx]
+    if kinds[left] != NODE_ID and kinds[left] != NODE_FIELD_ACCESS:
+        # the checker rejects any other callee, and raises the same error here
+        ret_type = yield static_check_method_call(arena, idx, type_env, metadata)
+        return ret_type, (yield ir3_method_call(arena, idx, context))
+
+    temporary = IR3Node.new_temporary()
+    mid, local_mid = call_mids(arena, left)
+    if local_mid is not None:
+        msig = MethodCall.local_msig(type_env, mid)
+    else:
+        # the receiver is checked before the args but lowered after them, as in MethodCall
+        msig = yield static_check_field_access(arena, left, type_env, MethodCall)
+        msig = MethodCall.check_global_msig(msig, FieldAccess)
+
+    exps = arena.children(arena.next_siblings[left])
+    MethodCall.check_arg_count(msig, len(exps), local_mid)
+    idc3_list = []
+    for i, exp in enumerate(exps):
+        arg_type, exp_temp = yield ARENA_CHECK_IR3[kinds[exp]](arena, exp, type_env, metadata, context)
+        MethodCall.check_arg(msig, i, arg_type, local_mid)
+        idc3_list.append(Idc3(exp_temp))
+
+    id_temp = None
+    if local_mid is None:
+        obj = arena.first_children[left]
+        id_temp = yield ARENA_IR3[kinds[obj]](arena, obj, context)
+
+    return msig.ret_type, MethodCall.emit_ir3(context, temporary, msig.cname, mid, msig.ret_type, idc3_list, id_temp)
+
+def static_check_id(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata):
+    name = arena.tokens[arena.token_ids[idx]].value
+    if metadata == MethodCall:
+        return type_env.msig_lookup(name)
+    symbol = arena.annotations[idx] = type_env.symbol_lookup(name) # saved for ir3
+    return symbol.type if symbol else None
+
+def ir3_id(arena: AstArena, idx: int, context: Dict[str, Any]) -> IR3Value:
+    return arena.tokens[arena.token_ids[idx]].value
+
+def check_ir3_id(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+    name = arena.tokens[arena.token_ids[idx]].value
+    return Id.check_type(type_env, name, metadata), name
+
+def static_check_class_instance_creation(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata) -> 'JLiteType':
+    return ClassInstanceCreation.check_class(type_env, arena.id_name(arena.first_children[idx]))
+
+def ir3_class_instance_creation(arena: AstArena, idx: int, context: Dict[str, Any]) -> IR3Value:
+    return ClassInstanceCreation.emit_ir3(context, arena.id_name(arena.first_children[idx]))
+
+def static_check_true(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata) -> 'JLiteType':
+    return BOOL_TYPE
+
+def ir3_true(arena: AstArena, idx: int, context: Dict[str, Any]) -> IR3Value:
+    return Const(True)
+
+def static_check_false(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata) -> 'JLiteType':
+    return BOOL_TYPE
+
+def ir3_false(arena: AstArena, idx: int, context: Dict[str, Any]) -> IR3Value:
+    return Const(False)
+
+def static_check_integer_literal(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata) -> 'JLiteType':
+    return INT_TYPE
+
+def ir3_integer_literal(arena: AstArena, idx: int, context: Dict[str, Any]) -> IR3Value:
+    return Const(arena.tokens[arena.token_ids[idx]].value)
+
+def static_check_string_literal(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata) -> 'JLiteType':
+    string_literals.append(arena.tokens[arena.token_ids[idx]].value)
+    return STRING_TYPE
+
+def ir3_string_literal(arena: AstArena, idx: int, context: Dict[str, Any]) -> IR3Value:
+    return Const(arena.tokens[arena.token_ids[idx]].value)
+
+def static_check_this(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata) -> 'JLiteType':
+    return type_env.field_lookup("this")
+
+def ir3_this(arena: AstArena, idx: int, context: Dict[str, Any]) -> IR3Value:
+    return "this"
+
+def static_check_null(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata) -> 'JLiteType':
+    return NULL_TYPE
+
+def ir3_null(arena: AstArena, idx: int, context: Dict[str, Any]) -> IR3Value:
+    return Const("NULL")
+
+# nodes whose children emit no code: checked, then lowered
+def check_ir3_leaf(arena: AstArena, idx: int, type_env: 'TypeEnvironment', metadata, context: Dict[str, Any]) -> Tuple['JLiteType', IR3Value]:
+    kind = arena.kinds[idx]
+    return ARENA_STATIC_CHECKS[kind](arena, idx, type_env, metadata), ARENA_IR3[kind](arena, idx, context)
+
+def not_visited(arena: AstArena, idx: int, *args):
+    raise NotImplementedError(f"{arena.name(idx)} is not visited by this pass")
+
+# kind -> (static_check, ir3, check_ir3) visits. Classes, methods and bodies are visited by their
+# parents directly, and types, names and lists are read by their parents
+ARENA_PASSES: Dict[int, Tuple[Callable, Callable, Callable]] = {
+    NODE_PROGRAM: (static_check_program, ir3_program, check_ir3_program),
+    NODE_STMTS: (static_check_stmts, ir3_stmts, check_ir3_stmts),
+    NODE_IF_STATEMENT: (static_check_if, ir3_if, check_ir3_if),
+    NODE_WHILE: (static_check_while, ir3_while, check_ir3_while),
+    NODE_RETURN_STATEMENT: (static_check_return, ir3_return, check_ir3_return),
+    NODE_ASSIGNMENT_STATEMENT: (static_check_assignment, ir3_assignment, check_ir3_assignment),
+    NODE_PRINTLN: (static_check_println, ir3_println, check_ir3_println),
+    NODE_READLN: (static_check_readln, ir3_readln, check_ir3_readln),
+    NODE_EXP: (static_check_exp, ir3_exp, check_ir3_exp),
+    NODE_NEGATE: (static_check_unary, ir3_unary, check_ir3_unary),
+    NODE_UNEGATIVE: (static_check_unary, ir3_unary, check_ir3_unary),
+    NODE_FIELD_ACCESS: (static_check_field_access, ir3_field_access, check_ir3_field_access),
+    NODE_METHOD_CALL: (static_check_method_call, ir3_method_call, check_ir3_method_call),
+    NODE_ID: (static_check_id, ir3_id, check_ir3_id),
+    NODE_CLASS_INSTANCE_CREATION: (static_check_class_instance_creation, ir3_class_instance_creation, check_ir3_leaf),
+    NODE_TRUE: (static_check_true, ir3_true, check_ir3_leaf),
+    NODE_FALSE: (static_check_false, ir3_false, check_ir3_leaf),
+    NODE_INT_LITERAL: (static_check_integer_literal, ir3_integer_literal, check_ir3_leaf),
+    NODE_STR_LITERAL: (static_check_string_literal, ir3_string_literal, check_ir3_leaf),
+    NODE_THIS: (static_check_this, ir3_this, check_ir3_leaf),
+    NODE_NULL: (static_check_null, ir3_null, check_ir3_leaf),
+}
+for kind in BINARY_RULES:
+    ARENA_PASSES[kind] = (static_check_binary, ir3_binary, check_ir3_binary)
+
+# the visit of each kind by each pass, indexed by kind
+ARENA_STATIC_CHECKS: List[Callable] = [ARENA_PASSES.get(kind, (not_visited,) * 3)[0] for kind in range(len(ARENA_KINDS))]
+ARENA_IR3: List[Callable] = [ARENA_PASSES.get(kind, (not_visited,) * 3)[1] for kind in range(len(ARENA_KINDS))]
+ARENA_CHECK_IR3: List[Callable] = [ARENA_PASSES.get(kind, (not_visited,) * 3)[2] for kind in range(len(ARENA_KINDS))]
 
-    def ir3(self, context: Dict[str, Any]) -> IR3Result:
-        return [], Const("NULL")
 
 ######################################################################
 ######################## CONCRETE SYNTAX TREE ########################
@@ -2440,11 +4137,43 @@ class TypeCheckError(RuntimeError):
 
 AstType = Union[Int, String, Bool, Void, Cname]
 
+# kinds of JLite types, indexing COMPATIBLE
+KIND_INT, KIND_BOOL, KIND_STRING, KIND_VOID, KIND_NULL, KIND_CLASS = range(6)
+
+# COMPATIBLE[a][b] is whether types of kinds a and b match: each type matches itself, and null matches
+# strings and objects. Two class types match only if they are the same class, which interning makes
+# the same object, so the class/class entry is only reached for different classes.
+COMPATIBLE = (
+    # Int    Bool   String Void   Null   Class
+    (True,  False, False, False, False, False), # Int
+    (False, True,  False, False, False, False), # Bool
+    (False, False, True,  False, True,  False), # String
+    (False, False, False, True,  False, False), # Void
+    (False, False, True,  False, True,  True),  # Null
+    (False, False, False, False, True,  False), # Class
+)
+
 class JLiteType:
+    """A JLite type. Types are interned, each primitive type has a single instance and each class
+    name a single JClass, so an exact type check is an identity check, e.g `typ is INT_TYPE`.
+    `==` is type compatibility, looked up in COMPATIBLE."""
+    __slots__ = ()
+    kind: int
+
+    def __new__(cls):
+        if "instance" not in cls.__dict__:
+            cls.instance = super().__new__(cls)
+        return cls.instance
+
     def __eq__(self, other):
-        return type(self) == type(other)
+        return self is other or (isinstance(other, JLiteType) and COMPATIBLE[self.kind][other.kind])
+
+    __hash__ = object.__hash__
 
 class JInt(JLiteType):
+    __slots__ = ()
+    kind = KIND_INT
+
     def __str__(self):
         return "Int"
 
@@ -2452,17 +4181,19 @@ class JInt(JLiteType):
         return "<JInt>"
 
 class JString(JLiteType):
+    __slots__ = ()
+    kind = KIND_STRING
+
     def __str__(self):
         return "String"
 
     def __repr__(self):
         return "<JString>"
 
-    def __eq__(self, other):
-        # string can be the empty string or empty object
-        return type(other) in (JString, JNull)
-
 class JBool(JLiteType):
+    __slots__ = ()
+    kind = KIND_BOOL
+
     def __str__(self):
         return "Bool"
 
@@ -2470,6 +4201,9 @@ class JBool(JLiteType):
         return "<JBool>"
 
 class JVoid(JLiteType):
+    __slots__ = ()
+    kind = KIND_VOID
+
     def __str__(self):
         return "Void"
 
@@ -2477,9 +4211,17 @@ class JVoid(JLiteType):
         return "<JVoid>"
 
 class JClass(JLiteType):
-    def __init__(self, tid):
-        super().__init__()
-        self.tid = tid
+    __slots__ = ("tid",)
+    kind = KIND_CLASS
+    interned: Dict[str, 'JClass'] = {}
+
+    def __new__(cls, tid: str):
+        typ = cls.interned.get(tid)
+        if typ is None:
+            typ = object.__new__(cls)
+            typ.tid = tid
+            cls.interned[tid] = typ
+        return typ
 
     @property
     def cname(self):
@@ -2491,190 +4233,211 @@ class JClass(JLiteType):
     def __repr__(self):
         return f"<JClass: {self.tid}>"
 
-    def __eq__(self, other):
-        # either class with same id, or null
-        a = type(other) == JClass and self.tid == other.tid
-        b = type(other) == JNull
-        return a or b
-
-    def __hash__(self):
-        return hash(self.tid)
-
 class JNull(JLiteType):
+    __slots__ = ()
+    kind = KIND_NULL
+
     def __str__(self):
         return "Null"
 
     def __repr__(self):
         return "<JNull>"
 
-    def __eq__(self, other):
-        # null can be the empty string or empty object, but not Void, Int, Bool
-        a = type(other) in (JString, JNull)
-        b = type(other) == JClass
-        return a or b
+INT_TYPE = JInt()
+BOOL_TYPE = JBool()
+STRING_TYPE = JString()
+VOID_TYPE = JVoid()
+NULL_TYPE = JNull()
+
+# interned types are hashed by identity, so membership in these is an exact type check
+PRINTABLE_TYPES = frozenset((INT_TYPE, BOOL_TYPE, STRING_TYPE))
+STRING_OPERAND_TYPES = frozenset((STRING_TYPE, NULL_TYPE))
 
 FieldDeclarations = Dict[str, JLiteType]
-MethodSignature = Tuple[List[Tuple[str, JLiteType]], JLiteType]
+
+class MethodSignature:
+    """The parameters and return type of a method, and the class that declares it."""
+    __slots__ = ("cname", "name", "params", "ret_type")
+
+    def __init__(self, cname: str, name: str, params: List[Tuple[str, JLiteType]], ret_type: JLiteType):
+        self.cname = cname
+        self.name = name
+        self.params = params
+        self.ret_type = ret_type
+
+    def __repr__(self):
+        return f"<MethodSignature: {self.cname}.{self.name}{self.params} -> {self.ret_type!r}>"
+
 MethodSignatures = Dict[str, MethodSignature]
 
+# kinds of storage a name can resolve to
+SYMBOL_PARAM, SYMBOL_LOCAL, SYMBOL_FIELD = range(3)
+SYMBOL_KIND_NAMES = ("param", "local", "field")
+
+class Symbol:
+    """What a name is bound to: its type and, for a variable, where it is stored.
+
+    Params are indexed by their position in the method's ir3 formals (this is param 0),
+    locals by their position in the method's var decls and fields by their position in
+    the owning class. Other bindings (e.g Ret) have no kind."""
+    __slots__ = ("name", "type", "kind", "index", "cname")
+
+    def __init__(self, name: str, typ: JLiteType, kind: Optional[int] = None, index: Optional[int] = None, cname: Optional[str] = None):
+        self.name = name
+        self.type = typ
+        self.kind = kind
+        self.index = index
+        self.cname = cname
+
+    def __repr__(self):
+        if self.kind is None:
+            return f"<Symbol: {self.name}: {self.type!r}>"
+        return f"<Symbol: {SYMBOL_KIND_NAMES[self.kind]} {self.index} {self.cname}.{self.name}: {self.type!r}>"
+
 class TypeEnvironment:
+    """The class descriptor and one scope of the symbol table.
+
+    All the environments of a program share one ScopeTable. Using an environment first
+    closes any scopes opened below it, so a parent can be used again once its child's block
+    has been checked, but an environment can't be used after its own scope was closed.
+    """
     @classmethod
-    def initialize(cls, mc: MainClass, cds: ClassDecls):
-        class_descriptor = ClassDescriptor(mc, cds)
-        env = Environment()
-        return TypeEnvironment(class_descriptor, env)
+    def initialize(cls, classes: List['ClassSpec']):
+        class_descriptor = ClassDescriptor(classes)
+        return TypeEnvironment(class_descriptor, ScopeTable())
 
-    def __init__(self, cd: 'ClassDescriptor'=None, env: 'Environment'=None):
+    def __init__(self, cd: 'ClassDescriptor'=None, table: 'ScopeTable'=None):
         self.cd = cd
-        self.env = env
-
-    # looks up the type of a variable/attribute from local environment
-    # if not found in current env, looks at parent environments
+        self.table = table if table is not None else ScopeTable()
+        self.scope = self.table.open_scope()
+        self.depth = len(self.table.scopes)
+
+    # makes this environment's scope the innermost open one
+    def enter(self):
+        scopes = self.table.scopes
+        if len(scopes) < self.depth or scopes[self.depth - 1] != self.scope:
+            raise RuntimeError("type environment used after its scope was closed")
+        if len(scopes) != self.depth:
+            self.table.close_scopes(self.depth)
+
+    # looks up the type of a variable/attribute, innermost scope first
     # if doesn't exist, returns None
     def field_lookup(self, var: str) -> Optional[JLiteType]:
-        curr_env = self.env
-        while curr_env is not None:
-            # try to find var in the current env
-            typ = curr_env.lookup_field(var)
-            if typ is not None:
-                return typ
-            # otherwise, look at parent environment
-            curr_env = curr_env.parent
-        return None
+        symbol = self.symbol_lookup(var)
+        return symbol.type if symbol else None
+
+    # looks up what a variable/attribute resolves to, innermost scope first
+    # if doesn't exist, returns None
+    def symbol_lookup(self, var: str) -> Optional[Symbol]:
+        self.enter()
+        bindings = self.table.fields.get(var)
+        return bindings[-1][1] if bindings else None
 
     def msig_lookup(self, var: str) -> Optional[MethodSignature]:
-        curr_env = self.env
-        while curr_env is not None:
-            typ = curr_env.lookup_msig(var)
-            if typ is not None:
-                return typ
-            curr_env = curr_env.parent
-        return None
+        self.enter()
+        bindings = self.table.msigs.get(var)
+        return bindings[-1][1] if bindings else None
 
     # give a class name, returns (dict of field decls, dict of methd decls)
     def class_lookup(self, cname: str) -> Optional[Tuple[FieldDeclarations, MethodSignatures]]:
         # custom hash using class name
         return self.cd.get_class(cname)
 
+    # given a class name, returns the symbols of its fields
+    def field_symbols(self, cname: str) -> Optional[Dict[str, Symbol]]:
+        return self.cd.get_field_symbols(cname)
+
     # returns all classes
     def classes(self) -> List[Tuple[str, FieldDeclarations, MethodSignatures]]:
         return self.cd.get_classes()
 
     # augments the current environment with var -> type
     def augment_field(self, var: str, typ: JLiteType):
-        self.env.augment_field(var, typ)
+        self.augment_symbol(Symbol(var, typ))
+
+    def augment_symbol(self, symbol: Symbol):
+        self.enter()
+        self.table.bind(self.table.fields, symbol.name, symbol)
 
     def augment_msig(self, var: str, typ: MethodSignature):
-        # preprend msgis with _ to differentiate m.a and m.a()
-        self.env.augment_msig(var, typ)
+        self.enter()
+        self.table.bind(self.table.msigs, var, typ)
 
     # augments the Environment with given fields
     def augment_fields(self, fields: FieldDeclarations):
         for name, sig in fields.items():
             self.augment_field(name, sig)
 
+    # augments the Environment with given resolved variables
+    def augment_symbols(self, symbols: Dict[str, Symbol]):
+        for symbol in symbols.values():
+            self.augment_symbol(symbol)
+
     # augments the Environment with given method signatures
     def augment_msigs(self, msigs: MethodSignatures):
         for name, sigs in msigs.items():
             self.augment_msig(name, sigs)
 
     def child_env(self) -> 'TypeEnvironment':
-        return TypeEnvironment(self.cd, self.env.child_env())
+        self.enter()
+        return TypeEnvironment(self.cd, self.table)
 
     def in_current_local_env(self, name: str) -> bool:
-        return self.env.in_current_env(name)
-
-    def cname_of_msig(self, msig: MethodSignature):
-        for cname, field_decls, msigs in self.cd.get_classes():
-            if msig in msigs.values():
-                return cname
-        raise RuntimeError()
+        self.enter()
+        return self.table.bound_in_innermost(name)
 
     def __str__(self):
-        ret = ["**** Type Environment ****", str(self.cd), str(self.env), "**** Type Environment ****"]
+        ret = ["**** Type Environment ****", str(self.cd), str(self.table), "**** Type Environment ****"]
         return "\n".join(ret)
 
 # all nodes go through here
 def node_to_type(node: AstType) -> JLiteType:
-    if type(node) == Int:
-        return JInt()
-    elif type(node) == String:
-        return JString()
-    elif type(node) == Bool:
-        return JBool()
-    elif type(node) == Void:
-        return JVoid()
+    if isinstance(node, Int):
+        return INT_TYPE
+    elif isinstance(node, String):
+        return STRING_TYPE
+    elif isinstance(node, Bool):
+        return BOOL_TYPE
+    elif isinstance(node, Void):
+        return VOID_TYPE
     else:
         return JClass(node.class_name)
 
-def unpack_fields(vardecls: List[VarDecl]) -> FieldDeclarations:
-    field_mapping = {}
-    for vardecl in vardecls:
-        name = vardecl.id_node.id_name
-        typ = node_to_type(vardecl.type_node)
-        field_mapping[name] = typ
-    return field_mapping
+# a class as declared: its name, its fields and its methods, each (name, params, return type).
+# The class descriptor is built from these, whether the program is a tree or an AstArena
+ClassSpec = Tuple[str, List[Tuple[str, JLiteType]], List[Tuple[str, List[Tuple[str, JLiteType]], JLiteType]]]
+
+# names and types of vardecls or params
+def unpack_vars(nodes: Iterable[Union[VarDecl, Fml]]) -> List[Tuple[str, JLiteType]]:
+    return [(node.id_node.id_name, node_to_type(node.type_node)) for node in nodes]
 
 # returns param types and return type
 def unpack_method(mddecl: MdDecl) -> Tuple[str, List[Tuple[str, JLiteType]], JLiteType]:
-    mtd_name = mddecl.id_node.id_name
-    param_types = []
-    ret_type = node_to_type(mddecl.type_node)
-    for fml in mddecl.fmllist.fmls:
-        param_name = fml.id_node.id_name
-        param_type = node_to_type(fml.type_node)
-        param_types.append((param_name, param_type))
-    return mtd_name, param_types, ret_type
-
-def unpack_methods(mddecls: List[MdDecl]) -> MethodSignatures:
+    return mddecl.id_node.id_name, unpack_vars(mddecl.fmllist.fmls), node_to_type(mddecl.type_node)
+
+# the classes of a program, main class first. The main class has no fields
+def unpack_classes(main_class: MainClass, class_decls: ClassDecls) -> List[ClassSpec]:
+    classes: List[ClassSpec] = [(main_class.cname.class_name, [], [unpack_method(main_class.mainmd)])]
+    for cdecl_node in class_decls.classdecls:
+        mthds = [unpack_method(mdecl_node) for mdecl_node in cdecl_node.mddecls.mddecl_list]
+        classes.append((cdecl_node.cname.class_name, unpack_vars(cdecl_node.vardecls.vardecl_list), mthds))
+    return classes
+
+# returns the signatures of the methods cname declares, each recording cname as its owner
+def unpack_methods(cname: str, mthds: List[Tuple[str, List[Tuple[str, JLiteType]], JLiteType]]) -> MethodSignatures:
     mtd_mapping = {}
-    # unpack method
-    for mddecl in mddecls:
-        name, param_types, ret_type = unpack_method(mddecl)
-        mtd_mapping[name] = (param_types, ret_type)
+    for name, param_types, ret_type in mthds:
+        mtd_mapping[name] = MethodSignature(cname, name, param_types, ret_type)
     return mtd_mapping
 
-def distinct_name_check(main_class: MainClass, class_decls: ClassDecls):
+def distinct_name_check(classes: List[ClassSpec]):
     # [(cname, [(mtdname,
     #               [(field1 name, field1 type), (field2 name, field2 type)...],
     #               [(param1 name, param1 type), (p2 name, p2 type)...]
     #               )]), ...]]
     cnameMethods: List[Tuple[str, List[Tuple[str, JLiteType]], List[Tuple[str, List[Tuple[str, JLiteType]]]]]] = []
-
-    # add main class
-    main_cname: str = main_class.cname.class_name
-    main_mtdname: str = main_class.mainmd.id_node.id_name
-    main_params: List[Tuple[str, JLiteType]] = []
-    for fml in main_class.mainmd.fmllist.fmls:
-        param_name = fml.id_node.id_name
-        param_type = node_to_type(fml.type_node)
-        main_params.append((param_name, param_type))
-    cnameMethods.append((main_cname, [], [(main_mtdname, main_params)]))
-
-    # add class decls
-    for cdecl_node in class_decls.classdecls:
-        cname = cdecl_node.cname.class_name
-
-        # get all fields for a class
-        vardecls = []
-        for vardecl_node in cdecl_node.vardecls.vardecl_list:
-            var_name = vardecl_node.id_node.id_name
-            var_type = node_to_type(vardecl_node.type_node)
-            vardecls.append((var_name, var_type))
-
-        # get all methods for a class
-        mthds = []
-        for mdecl_node in cdecl_node.mddecls.mddecl_list:
-            mtd_name = mdecl_node.id_node.id_name
-            mtd_params = []
-            # get all param names and types for a method
-            for fml_node in mdecl_node.fmllist.fmls:
-                param_name = fml_node.id_node.id_name
-                param_type = node_to_type(fml_node.type_node)
-                mtd_params.append((param_name, param_type))
-            mthds.append((mtd_name, mtd_params))
-
-        cnameMethods.append((cname, vardecls, mthds))
+    for cname, vardecls, mthds in classes:
+        cnameMethods.append((cname, vardecls, [(mtd_name, mtd_params) for mtd_name, mtd_params, _ in mthds]))
 
     def all_cnames_distinct():
         seen_cnames = set()
@@ -2721,15 +4484,15 @@ def distinct_name_check(main_class: MainClass, class_decls: ClassDecls):
     all_param_names_in_mtd_distinct()
 
 class ClassDescriptor:
-    def __init__(self, main_class: MainClass, class_decls: ClassDecls):
+    def __init__(self, classes: List[ClassSpec]):
         # static check done first since we use dicts, which don't allow multiple same keys
         # so we can't construct the class descriptor then check for duplicate names etc
-        distinct_name_check(main_class, class_decls)
+        distinct_name_check(classes)
 
         self.descriptor = {}    # maps a class name to (field decs, mtd decs)
-        self.add_main_class(main_class)
-        for other_class in class_decls.classdecls:
-            self.add_class(other_class)
+        self.field_symbols: Dict[str, Dict[str, Symbol]] = {} # maps a class name to its resolved fields
+        for name, fields, mthds in classes:
+            self.add_class(name, fields, mthds)
 
     def get_class(self, cname: str) -> Optional[Tuple[FieldDeclarations, MethodSignatures]]:
         # since __hash__ is overriden, need to wrap with class first
@@ -2738,18 +4501,15 @@ class ClassDescriptor:
     def get_classes(self) -> List[Tuple[str, FieldDeclarations, MethodSignatures]]:
         return [(cname, tup[0], tup[1]) for cname, tup in self.descriptor.items()]
 
-    def add_main_class(self, main_class: MainClass):
-        # get class name, field declarations, method declarations
-        name = main_class.cname.class_name
-        field_mapping = unpack_fields([]) # no fields in main method
-        mtd_mapping = unpack_methods([main_class.mainmd])
-        self.descriptor[name] = (field_mapping, mtd_mapping)
+    def get_field_symbols(self, cname: str) -> Optional[Dict[str, Symbol]]:
+        return self.field_symbols.get(cname)
 
-    def add_class(self, classdecl: ClassDecl):
-        name = classdecl.cname.class_name
-        field_mapping = unpack_fields(classdecl.vardecls.vardecl_list)
-        mtd_mapping = unpack_methods(classdecl.mddecls.mddecl_list)
+    def add_class(self, name: str, fields: List[Tuple[str, JLiteType]], mthds: List[Tuple[str, List[Tuple[str, JLiteType]], JLiteType]]):
+        # get class name, field declarations, method declarations
+        field_mapping = dict(fields)
+        mtd_mapping = unpack_methods(name, mthds)
         self.descriptor[name] = (field_mapping, mtd_mapping)
+        self.field_symbols[name] = {fname: Symbol(fname, ftype, SYMBOL_FIELD, idx, name) for idx, (fname, ftype) in enumerate(field_mapping.items())}
 
     def __str__(self):
         ret = ["###### Class Descriptor ######"]
@@ -2769,36 +4529,57 @@ class ClassDescriptor:
 
         return "\n".join(ret)
 
-class Environment:
-    def __init__(self, parent: 'Environment'=None):
-        self.field_mapping = {}
-        self.msigs_mapping = {}
-        self.parent = parent
-
-    def lookup_msig(self, var: str) -> Optional[MethodSignature]:
-        return self.msigs_mapping[var] if var in self.msigs_mapping else None
-
-    def lookup_field(self, var: str) -> Optional[JLiteType]:
-        return self.field_mapping[var] if var in self.field_mapping else None
-
-    def augment_field(self, name: str, typ: JLiteType):
-        self.field_mapping[name] = typ
-
-    def augment_msig(self, name: str, sig: MethodSignature):
-        self.msigs_mapping[name] = sig
-
-    def child_env(self) -> 'Environment':
-        child = Environment()
-        child.parent = self
-        return child
+class ScopeTable:
+    """The bindings of every open scope: each name maps to a stack of (depth, binding), innermost
+    last, so a lookup reads the top of one stack however deep the scopes are nested. Every
+    binding pushed is recorded in an undo log, and closing a scope pops its bindings off."""
+    def __init__(self):
+        self.fields: Dict[str, List[Tuple[int, Symbol]]] = {}
+        self.msigs: Dict[str, List[Tuple[int, MethodSignature]]] = {}
+        self.scopes: List[int] = []     # id of each open scope, innermost last
+        self.marks: List[int] = []      # length of the undo log when each open scope was opened
+        self.undo_log: List[Tuple[Dict[str, list], str]] = []
+        self.next_scope = 0
+
+    # opens a scope inside the innermost one, returning its id
+    def open_scope(self) -> int:
+        scope = self.next_scope
+        self.next_scope += 1
+        self.scopes.append(scope)
+        self.marks.append(len(self.undo_log))
+        return scope
+
+    # closes scopes until depth scopes are left open
+    def close_scopes(self, depth: int):
+        while len(self.scopes) > depth:
+            self.scopes.pop()
+            mark = self.marks.pop()
+            while len(self.undo_log) > mark:
+                mapping, name = self.undo_log.pop()
+                bindings = mapping[name]
+                bindings.pop()
+                if not bindings:
+                    del mapping[name]
+
+    # binds name in the innermost scope, replacing a binding of name made in that scope
+    def bind(self, mapping: Dict[str, list], name: str, value: Any):
+        depth = len(self.scopes)
+        bindings = mapping.get(name)
+        if bindings is None:
+            bindings = mapping[name] = []
+        elif bindings[-1][0] == depth:
+            bindings[-1] = (depth, value)
+            return
+        bindings.append((depth, value))
+        self.undo_log.append((mapping, name))
 
-    def in_current_env(self, name: str):
-        return (name in self.field_mapping) or (name in self.msigs_mapping)
+    def bound_in_innermost(self, name: str) -> bool:
+        depth = len(self.scopes)
+        return any(name in mapping and mapping[name][-1][0] == depth for mapping in (self.fields, self.msigs))
 
     def __str__(self):
-        ret = ["###### Environment ######", f"parent: {self.parent}"]
-        for key, val in self.field_mapping.items():
-            ret.append(f"{key} -> {val}")
-        for key, val in self.msigs_mapping.items():
-            ret.append(f"{key} -> {val}")
+        ret = ["###### Scope Table ######", f"depth: {len(self.scopes)}"]
+        for mapping in (self.fields, self.msigs):
+            for key, bindings in mapping.items():
+                ret.append(f"{key} -> {bindings[-1][1]}")
         return "\n".join(ret)
\ No newline at end of file
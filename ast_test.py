@@ -1,5 +1,19 @@
 import unittest
-from parse import run
+import lex
+import ir3
+import backend
+from parse import run, Parser, PredictiveParser, TypeCheckError, AstArena, TypeEnvironment, JInt, JBool, JString, JVoid, JNull, JClass, \
+    Id, Exp3FieldAccess, SYMBOL_PARAM, SYMBOL_LOCAL, SYMBOL_FIELD, NODE_METHOD_CALL
+
+# parses a well-formed program to its ast, numbering ir3 temporaries and labels from 1 again
+def parse_program(text: str):
+    tokens, _ = lex.run(text, "test_fused")
+    _, err, astt, _ = Parser(tokens, cst=False).parse()
+    assert err is None, str(err)
+    # temporaries and labels are numbered globally
+    ir3.IR3Node.label_id = 1
+    ir3.IR3Node.temporary_id = 1
+    return astt
 
 class TestSemantics(unittest.TestCase):
     def test(self):
@@ -14,6 +28,402 @@ class TestSemantics(unittest.TestCase):
 
             astt.static_check()
 
+class TestWalk(unittest.TestCase):
+    def parse(self, body: str):
+        text = "class Main { Void main() { " + body + " } }"
+        tokens, _ = lex.run(text, "test_walk")
+        _, err, astt, _ = Parser(tokens, cst=False).parse()
+        self.assertTrue(err is None)
+        return astt
+
+    def test_walk_success_1(self):
+        # a chain far deeper than the recursion limit is checked and generated without recursing
+        n = 20000
+        astt = self.parse("Int a; a = " + " + ".join(["a"] * n) + ";")
+        astt.static_check()
+        stmts = ir3.run(astt).cmtd3_list[0].stmts_list()
+        self.assertEqual(len(stmts), n)
+
+    def test_walk_success_2(self):
+        # statements from nested bodies are appended to the method's buffer in program order
+        astt = self.parse("Int a; if (a < 1) { a = 2; } else { while (true) { a = 3; } } return;")
+        astt.static_check()
+        stmts = ir3.run(astt).cmtd3_list[0].stmts_list()
+        self.assertEqual(
+            [type(stmt).__name__ for stmt in stmts],
+            ["Stmt3Assignment", "Stmt3IfGoto",
+                "Stmt3LabelSemicolon", "Stmt3IfGoto", "Stmt3GotoLabel", "Stmt3LabelSemicolon",
+                "Stmt3Assignment", "Stmt3GotoLabel", "Stmt3LabelSemicolon",
+             "Stmt3GotoLabel", "Stmt3LabelSemicolon", "Stmt3Assignment", "Stmt3LabelSemicolon",
+             "Stmt3Return"])
+
+    def test_walk_failure_1(self):
+        # type errors deep in a tree are raised as they were by recursive checking
+        astt = self.parse("Int a; a = " + " + ".join(["a"] * 5000) + " + true;")
+        with self.assertRaises(TypeCheckError) as ctx:
+            astt.static_check()
+        self.assertIn("expected lhs and rhs to be both Int", str(ctx.exception))
+
+class TestFused(unittest.TestCase):
+    program = """
+    class Main {
+        Void main(Int i) {
+            Counter c;
+            Int n;
+            c = new Counter();
+            n = c.add(i, 2);
+            if (n > 3) { println("big"); } else { println(n); }
+            return;
+        }
+    }
+    class Counter {
+        Int total;
+        Counter next;
+        Int add(Int a, Int b) {
+            while (a < b) { a = a + 1; }
+            this.total = total + a * b;
+            return twice(total);
+        }
+        Int twice(Int x) {
+            return x + x;
+        }
+    }
+    """
+
+    def sequential(self, text: str) -> str:
+        astt = parse_program(text)
+        astt.static_check()
+        return str(ir3.run(astt))
+
+    def fused(self, text: str) -> str:
+        return str(ir3.run_fused(parse_program(text)))
+
+    def test_fused_success_1(self):
+        self.assertEqual(self.fused(self.program), self.sequential(self.program))
+
+    def test_fused_success_2(self):
+        # the fused pass is walked without recursing too
+        text = "class Main { Void main() { Int a; a = " + " + ".join(["a"] * 20000) + "; } }"
+        self.assertEqual(self.fused(text), self.sequential(text))
+
+    def test_fused_success_3(self):
+        # receivers that emit code are lowered after the args, as ir3 does
+        text = self.program.replace("c.add(i, 2)", "new Counter().add(c.next.add(i, 2), c.total)")
+        self.assertEqual(self.fused(text), self.sequential(text))
+
+    def test_fused_success_4(self):
+        # nothing resolved by the fused pass is left on the nodes
+        astt = parse_program(self.program.replace("c.add(i, 2)", "c.next.add(i, c.total)"))
+        ir3.run_fused(astt)
+        stack = [astt]
+        while stack:
+            node = stack.pop()
+            for name in type(node).__slots__:
+                self.assertIsNone(getattr(node, name), f"{type(node).__name__}.{name}")
+            stack.extend(node.children)
+
+    def test_fused_failure_1(self):
+        # the first type error of the program is raised, after earlier methods were generated
+        text = self.program.replace("return x + x;", "return x + true;")
+        with self.assertRaises(TypeCheckError) as seq_ctx:
+            self.sequential(text)
+        with self.assertRaises(TypeCheckError) as fused_ctx:
+            self.fused(text)
+        self.assertEqual(str(fused_ctx.exception), str(seq_ctx.exception))
+
+    def test_fused_failure_2(self):
+        text = self.program.replace("c.add(i, 2)", "c.add(i)")
+        with self.assertRaises(TypeCheckError) as seq_ctx:
+            self.sequential(text)
+        with self.assertRaises(TypeCheckError) as fused_ctx:
+            self.fused(text)
+        self.assertEqual(str(fused_ctx.exception), str(seq_ctx.exception))
+
+class TestSlots(unittest.TestCase):
+    def parse(self, body: str):
+        text = "class Main { Void main() { " + body + " } } class C { Int f; Int m() { return f; } }"
+        tokens, _ = lex.run(text, "test_slots")
+        _, err, astt, _ = Parser(tokens, cst=False).parse()
+        self.assertTrue(err is None)
+        return astt
+
+    def nodes(self, astt):
+        stack = [astt]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(node.children)
+
+    def test_slots_success_1(self):
+        # no node carries an instance dict, and children are tuples
+        astt = self.parse("C c; Int a; a = 1 + 2 * -a; c.f = c.m(); println(a);")
+        for node in self.nodes(astt):
+            self.assertFalse(hasattr(node, "__dict__"), type(node).__name__)
+            self.assertIsInstance(node.children, tuple)
+
+    def test_slots_success_2(self):
+        # the annotations passes leave on nodes are declared slots, and properties still resolve
+        astt = self.parse("C c; Int a; c = new C(); a = c.f; a = c.m(); return;")
+        astt.static_check()
+        mddecl = astt.mainclass.mainmd
+        stmts = mddecl.mdbody.stmts.stmts
+        self.assertEqual(str(stmts[1].left_type), "Int")
+        self.assertEqual(stmts[1].right.id_node.id_name, "f")
+        self.assertEqual(stmts[2].right.cname, "C")
+        self.assertEqual(str(stmts[3].exp_type), "Void")
+        self.assertIsNotNone(astt.type_env)
+
+    def test_slots_failure_1(self):
+        # undeclared attributes can't be attached to a node
+        astt = self.parse("return;")
+        with self.assertRaises(AttributeError):
+            astt.mainclass.scratch = 1
+
+class TestArena(unittest.TestCase):
+    program = TestFused.program
+
+    def sequential(self, tree) -> str:
+        tree.static_check()
+        return str(ir3.run(tree))
+
+    def test_arena_success_1(self):
+        # checking and lowering the arena gives the same ir3 as the object tree, sequential or fused
+        expected = self.sequential(parse_program(self.program))
+        self.assertEqual(self.sequential(AstArena.from_tree(parse_program(self.program))), expected)
+        self.assertEqual(str(ir3.run_fused(AstArena.from_tree(parse_program(self.program)))), expected)
+
+    def test_arena_success_2(self):
+        # a cursor walk over first child/next sibling visits the tree's nodes in order
+        astt = parse_program(self.program)
+        arena = AstArena.from_tree(astt)
+        def names(cursor):
+            yield cursor.name, cursor.value
+            if cursor.goto_first_child():
+                yield from names(cursor)
+                while cursor.goto_next_sibling():
+                    yield from names(cursor)
+                cursor.goto_parent()
+        def tree_names(node):
+            yield node.name, node.value
+            for child in node.children:
+                yield from tree_names(child)
+        self.assertEqual(list(names(arena.cursor())), list(tree_names(astt)))
+        self.assertEqual(len(arena), len(list(tree_names(astt))))
+        self.assertEqual(str(arena), str(astt))
+
+    def test_arena_success_3(self):
+        # what static_check saves for ir3 is kept by node id, the fused pass keeps nothing
+        arena = AstArena.from_tree(parse_program(self.program))
+        arena.static_check()
+        self.assertIsNotNone(arena.type_env)
+        call = arena.kinds.index(NODE_METHOD_CALL)
+        self.assertEqual(arena.annotations[call].cname, "Counter")
+        arena.check_ir3(context={})
+        self.assertIsNone(arena.annotations)
+
+    def test_arena_success_4(self):
+        # the predictive parser builds the arena directly, and it checks and lowers like the tree
+        expected = self.sequential(parse_program(self.program))
+        tokens, _ = lex.run(self.program, "test_arena")
+        _, err, arena, _ = PredictiveParser(tokens, arena=True).parse()
+        self.assertTrue(err is None)
+        self.assertIsInstance(arena, AstArena)
+        self.assertEqual(str(arena), str(parse_program(self.program)))
+        ir3.IR3Node.label_id = 1
+        ir3.IR3Node.temporary_id = 1
+        self.assertEqual(self.sequential(arena), expected)
+
+    def test_arena_success_5(self):
+        # one cursor, moved in place, visits every node of the arena
+        arena = AstArena.from_tree(parse_program(self.program))
+        cursor = arena.cursor()
+        def advance(cursor) -> bool:
+            # preorder: down, else right, else up until a node has a next sibling
+            if cursor.goto_first_child() or cursor.goto_next_sibling():
+                return True
+            while cursor.goto_parent():
+                if cursor.goto_next_sibling():
+                    return True
+            return False
+        visited = 1
+        while advance(cursor):
+            visited += 1
+        self.assertEqual(visited, len(arena))
+        self.assertEqual(cursor.idx, arena.root())
+
+    def test_arena_failure_1(self):
+        text = self.program.replace("return x + x;", "return x + true;")
+        with self.assertRaises(TypeCheckError) as tree_ctx:
+            parse_program(text).static_check()
+        with self.assertRaises(TypeCheckError) as arena_ctx:
+            AstArena.from_tree(parse_program(text)).static_check()
+        self.assertEqual(str(arena_ctx.exception), str(tree_ctx.exception))
+
+class TestMethodOwner(unittest.TestCase):
+    program = """
+    class Main {
+        Void main() {
+            A a;
+            B b;
+            a = new A();
+            b = new B();
+            a.m();
+            b.m();
+        }
+    }
+    class A {
+        Void m() { return; }
+    }
+    class B {
+        Void m() { return; }
+        Void n() { m(); return; }
+    }
+    """
+
+    def test_owner_success_1(self):
+        # methods with identical signatures in different classes resolve to their own class
+        astt = parse_program(self.program)
+        astt.static_check()
+        stmts = astt.mainclass.mainmd.mdbody.stmts.stmts
+        self.assertEqual([stmts[2].cname, stmts[3].cname], ["A", "B"])
+        self.assertEqual(astt.type_env.class_lookup("B")[1]["m"].cname, "B")
+
+    def test_owner_success_2(self):
+        # a local call is lowered to the method of the enclosing class, not the first one declared
+        astt = parse_program(self.program)
+        astt.static_check()
+        code = str(ir3.run(astt))
+        self.assertIn("_B_m(", code.split("Void _B_n")[1])
+
+    def test_owner_failure_1(self):
+        # calling something that isn't a method is a type error
+        with self.assertRaises(TypeCheckError):
+            parse_program(self.program.replace("a.m();", "this();")).static_check()
+
+class TestScopes(unittest.TestCase):
+    def test_scopes_success_1(self):
+        # a child's bindings shadow its parent's until the parent is used again
+        env = TypeEnvironment()
+        env.augment_field("a", JInt())
+        child = env.child_env()
+        child.augment_field("a", JBool())
+        child.augment_field("b", JInt())
+        self.assertEqual(child.field_lookup("a"), JBool())
+        self.assertTrue(child.in_current_local_env("b"))
+        self.assertEqual(env.field_lookup("a"), JInt())
+        self.assertIsNone(env.field_lookup("b"))
+        self.assertFalse(env.in_current_local_env("b"))
+
+    def test_scopes_success_2(self):
+        # sibling scopes don't see each other, and lookups see through any number of scopes
+        env = TypeEnvironment()
+        env.augment_field("a", JInt())
+        first = env.child_env()
+        first.augment_field("b", JInt())
+        second = env.child_env()
+        self.assertIsNone(second.field_lookup("b"))
+        inner = second
+        for _ in range(100):
+            inner = inner.child_env()
+        self.assertEqual(inner.field_lookup("a"), JInt())
+        self.assertFalse(inner.in_current_local_env("a"))
+
+    def test_scopes_failure_1(self):
+        # an environment can't be used once a sibling replaced its scope
+        env = TypeEnvironment()
+        first = env.child_env()
+        env.child_env()
+        with self.assertRaises(RuntimeError):
+            first.field_lookup("a")
+
+class TestTypes(unittest.TestCase):
+    def test_types_success_1(self):
+        # types are interned
+        self.assertIs(JInt(), JInt())
+        self.assertIs(JClass("A"), JClass("A"))
+        self.assertIsNot(JClass("A"), JClass("B"))
+
+    def test_types_success_2(self):
+        # null matches strings and objects both ways, and nothing else
+        for typ in (JString(), JClass("A"), JNull()):
+            self.assertEqual(JNull(), typ)
+            self.assertEqual(typ, JNull())
+        for typ in (JInt(), JBool(), JVoid()):
+            self.assertNotEqual(JNull(), typ)
+            self.assertNotEqual(typ, JNull())
+        self.assertNotEqual(JClass("A"), JClass("B"))
+        self.assertNotEqual(JString(), JClass("A"))
+        self.assertNotEqual(JInt(), None)
+
+    def test_types_failure_1(self):
+        self.assertEqual(backend.type_to_bytes(JClass("A")), 4)
+        with self.assertRaises(RuntimeError):
+            backend.type_to_bytes(JVoid())
+
+
+class TestSymbols(unittest.TestCase):
+    program = """
+    class Main {
+        Void main() {
+            return;
+        }
+    }
+    class A {
+        Int x;
+        A next;
+        Int m(Int p, A q) {
+            Int l;
+            A o;
+            if (p > 0) {
+                o = next;
+                l = o.x + q.x;
+            } else {
+                l = next.x;
+            }
+            return l;
+        }
+    }
+    """
+
+    # maps each resolved name to (kind, index, owning class)
+    def resolved(self, astt) -> dict:
+        ret, stack = {}, [astt]
+        while stack:
+            node = stack.pop()
+            stack.extend(node.children)
+            if isinstance(node, Id) and node.symbol is not None:
+                ret[node.id_name] = (node.symbol.kind, node.symbol.index, node.symbol.cname)
+        return ret
+
+    def test_symbols_success_1(self):
+        # params (after this), locals and fields resolve to their slots
+        astt = parse_program(self.program)
+        astt.static_check()
+        self.assertEqual(self.resolved(astt), {
+            "p": (SYMBOL_PARAM, 1, "A"), "q": (SYMBOL_PARAM, 2, "A"),
+            "l": (SYMBOL_LOCAL, 0, "A"), "o": (SYMBOL_LOCAL, 1, "A"),
+            "x": (SYMBOL_FIELD, 0, "A"), "next": (SYMBOL_FIELD, 1, "A"),
+        })
+
+    def test_symbols_success_2(self):
+        # a local used inside a block is not mistaken for a field of this
+        astt = parse_program(self.program)
+        astt.static_check()
+        code = str(ir3.run(astt))
+        self.assertNotIn("this.o", code)
+        self.assertIn("this.next", code)
+
+    def test_symbols_success_3(self):
+        # field accesses carry the index of the field in its class
+        program3 = ir3.run_fused(parse_program(self.program))
+        accesses = [s.exp3 for s in program3.cmtd3_list[1].mdbody3.stmt3 if isinstance(getattr(s, "exp3", None), Exp3FieldAccess)]
+        self.assertEqual({(a.r_id3, a.field_index) for a in accesses}, {("x", 0), ("next", 1)})
+
+    def test_symbols_failure_1(self):
+        # a name that resolves to nothing is a type error
+        with self.assertRaises(TypeCheckError):
+            parse_program(self.program.replace("l = next.x;", "l = y;")).static_check()
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
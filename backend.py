@@ -15,7 +15,7 @@ SymbolTable
 # order in which function variable are stored
 FUNCTION_REGS = ["a1", "a2", "a3", "a4", "v1", "v2", "v3", "v4", "v5", "v6", "v7"]
 TEMPORARY_SIZE_BYTES = 4
-ClassInfo = namedtuple("ClassInfo", ["name", "fields", "size_bytes"])
+ClassInfo = namedtuple("ClassInfo", ["name", "fields", "size_bytes", "field_indices", "field_offsets"])
 MethodInfo = namedtuple("MethodInfo", ["name", "params", "local_vars", "stack_info"])
 StackInfo = namedtuple("StackInfo", ["name", "type", "size", "fp_offset"])
 NameType = namedtuple("NameType", ["name", "type", "size"])
@@ -33,10 +33,14 @@ class SymbolTable:
         name = cdata3.cname
         fields = []
         size_bytes = 0
+        field_indices = {} # field name to its index in the class
+        field_offsets = [] # offset of each field from the object's address, by index
         for v in cdata3.vardecls:
+            field_indices[v.id3] = len(fields)
+            field_offsets.append(-size_bytes) # fields are laid out descending
             size_bytes += type_to_bytes(v.type3)
             fields.append(NameType(v.id3, v.type3, type_to_bytes(v.type3)))
-        self.classes[name] = ClassInfo(name, fields, size_bytes)
+        self.classes[name] = ClassInfo(name, fields, size_bytes, field_indices, field_offsets)
 
     def add_method(self, cmtd3: CMtd3):
         name = cmtd3.id3
@@ -73,35 +77,23 @@ class SymbolTable:
         stack_info = self.get_stack_info(method_name)
         return stack_info[var_name].fp_offset * -1 # descending stack
 
-    def get_fp_field_offset(self, method_name: str, var: str, field_name: str) -> int:
+    def get_fp_field_offset(self, method_name: str, var: str, field_name: str, field_index: Optional[int] = None) -> int:
         stack_info = self.get_stack_info(method_name)
         offset = stack_info[var].fp_offset * -1
-        t = stack_info[var].type
-        if type(t) != JClass:
-            raise AssertionError()
-        t: JClass
-        class_info = self.get_class_info(t.cname)
-        field: NameType
-        for field in class_info.fields:
-            if field.name == field_name:
-                return offset
-            offset -= field.size
-        raise RuntimeError(f"get_fp_field_offset: {method_name} {var} {field_name} not found")
-
-    def get_field_offset(self, method_name: str, var: str, field_name: str):
-        # get underlying type of given var, then calculate its offset
+        return offset + self.get_field_offset(method_name, var, field_name, field_index)
+
+    def get_field_offset(self, method_name: str, var: str, field_name: str, field_index: Optional[int] = None) -> int:
+        # get underlying type of given var, then look up its offset by the field's index
         t = self.get_stack_info(method_name)[var].type
-        if type(t) != JClass:
+        if t.kind != KIND_CLASS:
             raise AssertionError()
         t: JClass
         class_info = self.get_class_info(t.cname)
-        offset = 0
-        field: NameType
-        for field in class_info.fields:
-            if field.name == field_name:
-                return offset
-            offset -= field.size
-        raise RuntimeError(f"get_field_offset: {method_name} {var} {field_name} not found")
+        if field_index is None:
+            field_index = class_info.field_indices.get(field_name)
+            if field_index is None:
+                raise RuntimeError(f"get_field_offset: {method_name} {var} {field_name} not found")
+        return class_info.field_offsets[field_index]
 
     def get_type(self, method_name: str, var_name: str) -> JLiteType:
         stack_info = self.get_stack_info(method_name)
@@ -109,13 +101,16 @@ class SymbolTable:
 
 symbol_table = SymbolTable()
 
+# size of a value of each kind of type, indexed by JLiteType.kind
+# JString - memory location to place in .data
+# JClass - memory location to heap memory
+KIND_BYTES = (4, 4, 4, None, None, 4)
+
 def type_to_bytes(type_obj: JLiteType):
-    global symbol_table
-    if type(type_obj) in (JInt, JBool, JString, JClass):
-        # JString - memory location to place in .data
-        # JClass - memory location to heap memory
-        return 4
-    raise RuntimeError(f"{type_obj} has no supported size")
+    size = KIND_BYTES[type_obj.kind]
+    if size is None:
+        raise RuntimeError(f"{type_obj} has no supported size")
+    return size
 
 class Arm:
     def __init__(self, ir: Program3):
@@ -516,7 +511,7 @@ class Block:
                 bl scanf(PLT)
                 """
                 s: Stmt3Readln
-                if type(symbol_table.get_type(self.method_name, s.id3_str)) != JInt:
+                if symbol_table.get_type(self.method_name, s.id3_str) is not INT_TYPE:
                     raise NotImplementedError("readln only supports integers")
                 ret.append(f"ldr a1,={SymbolTable.INT_FORMAT_LABEL_NAME}")
                 ret.append(f"add a2,fp,#{symbol_table.get_fp_offset(self.method_name, s.id3_str)}")
@@ -542,10 +537,10 @@ class Block:
                     ret.append(gen_load_const_str("a1", s.idc3_node.var_value))
                 elif s.idc3_node.is_var():
                     typ = symbol_table.get_type(self.method_name, s.idc3_node.var_name)
-                    if type(typ) in (JInt, JBool):
+                    if typ is INT_TYPE or typ is BOOL_TYPE:
                         ret.append(f"ldr a1,={SymbolTable.INT_FORMAT_LABEL_NAME}")
                         ret.append(gen_load_from_mem("a2", s.idc3_node.var_name))
-                    elif type(typ) == JString:
+                    elif typ is STRING_TYPE:
                         ret.append(gen_load_from_mem("a1", s.idc3_node.var_name))
                     else:
                         raise NotImplementedError()
@@ -572,7 +567,7 @@ class Block:
                 b = s.id3_right
                 ret.append(gen_load_idc3("a1", s.idc3))
                 ret.append(f"ldr a2,[fp,#{symbol_table.get_fp_offset(self.method_name, a)}]")
-                ret.append(f"str a1,[a2,#{symbol_table.get_field_offset(self.method_name, a, b)}]")
+                ret.append(f"str a1,[a2,#{symbol_table.get_field_offset(self.method_name, a, b, s.field_index)}]")
             elif typ == Stmt3MethodCall:
                 """id(1, "hi", c)
                 
@@ -674,7 +669,7 @@ class Block:
                 a = node.l_id3
                 b = node.r_id3
                 ret.append(gen_load_from_mem("a1", a))
-                ret.append(f"ldr a1,[a1,#{symbol_table.get_field_offset(self.method_name, a, b)}]")
+                ret.append(f"ldr a1,[a1,#{symbol_table.get_field_offset(self.method_name, a, b, node.field_index)}]")
                 return "a1", ret
             elif typ == Exp3MethodCall:
                 """f(a,b,c...)
@@ -0,0 +1,383 @@
+# Benchmarks for the compiler phases, run on generated JLite programs.
+# Usage: python3 benchmark.py <benchmark> [size]
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+import ast
+import backend
+import lex
+import parse
+import ir3
+
+def generate_program(n_classes: int) -> str:
+    """Generates a well-typed JLite program with n_classes classes after the main class."""
+    lines = [
+        "class Main {",
+        "    Void main() {",
+        "        Int x;",
+        "        x = 1;",
+        "        println(x);",
+        "    }",
+        "}",
+    ]
+    for i in range(n_classes):
+        lines += [
+            f"class C{i} {{",
+            f"    Int f;",
+            f"    Bool g;",
+            f"    Int m{i}(Int a, Int b) {{",
+            f"        Int c;",
+            f"        String s;",
+            f"        c = a + b * 2 - f;",
+            f"        s = \"class {i}\";",
+            f"        if (c > 3 && !g) {{ c = c - 1; }} else {{ c = c + 1; }}",
+            f"        while (c < 10 || g) {{ c = c + 1; println(s); }}",
+            f"        return c;",
+            f"    }}",
+            f"}}",
+        ]
+    return "\n".join(lines) + "\n"
+
+def generate_expressions(n_groups: int) -> str:
+    """Generates a JLite main method made of n_groups groups of long and nested expressions."""
+    lines = ["class Main {", "    Void main() {", "        Int x;", "        Bool b;", "        String s;"]
+    for i in range(n_groups):
+        lines += [
+            f"        x = (a{i} + b * 2 - c.f / 3) * -d + e.g(1, f + 2) - (h + i{i}) * 4;",
+            f"        b = a{i} + 1 < c * 2 && !d || e.f(g) >= (h - 1) && true;",
+            f"        s = \"x\" + a{i} + b.c() + \"y\";",
+            f"        x = ((a{i} + (b * (c - 1))) * (2 + d.e(f, (g))));",
+        ]
+    lines += ["    }", "}"]
+    return "\n".join(lines) + "\n"
+
+def generate_calls(n_classes: int) -> str:
+    """Generates a JLite program whose main method calls the same-signature method of n_classes classes."""
+    lines = ["class Main {", "    Void main() {", "        Int x;"]
+    lines += [f"        C{i} c{i};" for i in range(n_classes)]
+    for i in range(n_classes):
+        lines += [f"        c{i} = new C{i}();", f"        x = c{i}.m(x, {i});"]
+    lines += ["    }", "}"]
+    for i in range(n_classes):
+        lines += [f"class C{i} {{", "    Int m(Int a, Int b) {", "        return a + b;", "    }", "}"]
+    return "\n".join(lines) + "\n"
+
+def generate_nested(depth: int, n_stmts: int) -> str:
+    """Generates a JLite main method that uses its locals n_stmts times inside depth nested whiles."""
+    lines = ["class Main {", "    Void main() {", "        Int x;", "        Bool b;"]
+    lines += ["        while (b) {"] * depth
+    lines += ["            x = x + 1;"] * n_stmts
+    lines += ["        }"] * depth
+    lines += ["    }", "}"]
+    return "\n".join(lines) + "\n"
+
+def generate_fields(n_fields: int) -> str:
+    """Generates a JLite program whose main method writes then reads every field of an n_fields field class."""
+    lines = ["class Main {", "    Void main() {", "        Int x;", "        Record r;", "        r = new Record();"]
+    lines += [f"        r.f{i} = x;" for i in range(n_fields)]
+    lines += [f"        x = r.f{i};" for i in range(n_fields)]
+    lines += ["    }", "}", "class Record {"]
+    lines += [f"    Int f{i};" for i in range(n_fields)]
+    lines += ["}"]
+    return "\n".join(lines) + "\n"
+
+def measure_memory(fn):
+    """Returns the result of fn and the number of bytes it left allocated."""
+    tracemalloc.start()
+    result = fn()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+def measure_time(fn, repeat: int=3) -> float:
+    """Returns the best wall time of fn over repeat runs, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_token_buffer(size: int):
+    """Memory per token and parse throughput of a token list against a TokenBuffer."""
+    text = generate_program(size)
+    filename = "token_buffer.j"
+
+    (tokens, _), list_bytes = measure_memory(lambda: lex.run(text, filename))
+    (buffer, _), buffer_bytes = measure_memory(lambda: lex.RegexLexer(text, filename).lex_buffer())
+    n = len(tokens)
+
+    list_time = measure_time(lambda: parse.Parser(tokens).parse())
+    buffer_time = measure_time(lambda: parse.Parser(buffer).parse())
+
+    print(f"tokens: {n}")
+    print(f"memory per token: list {list_bytes / n:.1f} B, buffer {buffer_bytes / n:.1f} B")
+    print(f"parse throughput: list {n / list_time:,.0f} tok/s, buffer {n / buffer_time:,.0f} tok/s")
+
+def bench_parallel_lex(size: int):
+    """Scaling of the parallel lexer over worker counts, against the serial lexer."""
+    text = generate_program(size)
+    filename = "parallel_lex.j"
+
+    serial = measure_time(lambda: lex.run(text, filename), repeat=1)
+    print(f"characters: {len(text)}")
+    print(f"serial: {serial:.3f} s")
+
+    workers = 1
+    while workers <= max(os.cpu_count() or 1, 2):
+        elapsed = measure_time(lambda: lex.run_parallel(text, filename, lex.LEXER_REGEX, workers), repeat=1)
+        print(f"workers {workers}: {elapsed:.3f} s, speedup {serial / elapsed:.2f}x")
+        workers *= 2
+
+def bench_relex(size: int):
+    """Time per one-character edit near the start of the file as the file doubles, relexed
+    against lexed from scratch."""
+    print(f"{'tokens':>8} {'relex':>10} {'lex':>10}")
+    n_edits = 200
+    for n_classes in (size, size * 2, size * 4, size * 8):
+        text = generate_program(n_classes)
+        tokens, _ = lex.run(text, "relex.j")
+        offset = text.index("{") + 1 # typing inside the first class, so nearly all tokens follow
+
+        def edits():
+            edited, toks = text, tokens
+            for _ in range(n_edits):
+                edited, toks, _ = lex.relex(edited, toks, offset, 0, " ", "relex.j")
+
+        elapsed = measure_time(edits, repeat=1)
+        scratch = measure_time(lambda: lex.run(text, "relex.j"), repeat=1)
+        print(f"{len(tokens):>8} {elapsed * 1e6 / n_edits:>7.1f} us {scratch * 1e3:>7.1f} ms")
+
+def bench_predictive_parse(size: int):
+    """Parse time per token of the predictive parser against the backtracking parser, as input doubles."""
+    print(f"{'classes':>8} {'tokens':>8} {'backtracking':>14} {'predictive':>12}")
+    for n_classes in (size, size * 2, size * 4, size * 8):
+        text = generate_program(n_classes)
+        tokens, _ = lex.run(text, "predictive_parse.j")
+        n = len(tokens)
+
+        backtracking = measure_time(lambda: parse.Parser(tokens).parse(), repeat=1)
+        predictive = measure_time(lambda: parse.PredictiveParser(tokens).parse())
+        print(f"{n_classes:>8} {n:>8} {backtracking * 1e6 / n:>11.2f} us {predictive * 1e6 / n:>9.2f} us")
+
+def bench_packrat_nesting(size: int):
+    """Parse time of nested parenthesised expressions with and without packrat memoization."""
+    print(f"{'depth':>6} {'backtracking':>14} {'packrat':>10}")
+    for depth in range(1, size + 1):
+        text = "class Main { Void main() { x = " + "(" * depth + "a + 1" + ")" * depth + "; } }"
+        tokens, _ = lex.run(text, "packrat_nesting.j")
+
+        backtracking = measure_time(lambda: parse.Parser(tokens).parse(), repeat=1)
+        packrat = measure_time(lambda: parse.Parser(tokens, packrat=True).parse(), repeat=1)
+        print(f"{depth:>6} {backtracking * 1e3:>11.2f} ms {packrat * 1e3:>7.2f} ms")
+
+def bench_expression_parse(size: int):
+    """Parse throughput of both parsers on an expression-heavy method."""
+    text = generate_expressions(size)
+    tokens, _ = lex.run(text, "expression_parse.j")
+    n = len(tokens)
+
+    backtracking = measure_time(lambda: parse.Parser(tokens).parse())
+    predictive = measure_time(lambda: parse.PredictiveParser(tokens).parse())
+    print(f"tokens: {n}")
+    print(f"parse throughput: backtracking {n / backtracking:,.0f} tok/s, predictive {n / predictive:,.0f} tok/s")
+
+def count_cst_nodes(fn):
+    """Returns the result of fn and the number of CstNode objects it created."""
+    count = 0
+    init = parse.CstNode.__init__
+    def counting_init(self, *args, **kwargs):
+        nonlocal count
+        count += 1
+        init(self, *args, **kwargs)
+    parse.CstNode.__init__ = counting_init
+    try:
+        return fn(), count
+    finally:
+        parse.CstNode.__init__ = init
+
+def bench_ast_only_parse(size: int):
+    """CST allocations, peak memory and parse time with and without building the CST."""
+    text = generate_program(size)
+    tokens, _ = lex.run(text, "ast_only_parse.j")
+    print(f"tokens: {len(tokens)}")
+
+    for cst in (True, False):
+        _, nodes = count_cst_nodes(lambda: parse.Parser(tokens, cst=cst).parse())
+        tracemalloc.start()
+        parse.Parser(tokens, cst=cst).parse()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        elapsed = measure_time(lambda: parse.Parser(tokens, cst=cst).parse())
+
+        mode = "cst + ast" if cst else "ast only"
+        print(f"{mode}: {nodes} cst nodes, peak {peak / 1024:,.0f} KiB, {elapsed * 1e3:.1f} ms")
+
+def bench_fused_pass(size: int):
+    """Time and peak memory of type checking then generating ir3, against the fused single pass,
+    and the annotations each leaves on the tree."""
+    text = generate_program(size)
+    tokens, _ = lex.run(text, "fused_pass.j")
+
+    def sequential(astt):
+        astt.static_check()
+        return ir3.run(astt)
+
+    for fused in (False, True):
+        passes = ir3.run_fused if fused else sequential
+        astt = parse.Parser(tokens, cst=False).parse()[2]
+        tracemalloc.start()
+        passes(astt)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        annotations = sum(getattr(node, name) is not None for node in ast_nodes(astt) for name in type(node).__slots__)
+        elapsed = measure_time(lambda: passes(astt))
+
+        mode = "fused" if fused else "sequential"
+        print(f"{mode}: peak {peak / 1024:,.0f} KiB, {elapsed * 1e3:.1f} ms, {annotations} annotations left")
+
+def ast_nodes(root) -> list:
+    """Returns every node of the tree rooted at root."""
+    nodes, stack = [], [root]
+    while stack:
+        node = stack.pop()
+        nodes.append(node)
+        stack.extend(node.children)
+    return nodes
+
+def bench_ast_memory(size: int):
+    """Memory held per AST node: the node object, its children and any instance dict."""
+    text = generate_program(size)
+    tokens, _ = lex.run(text, "ast_memory.j")
+
+    (_, _, astt, _), retained = measure_memory(lambda: parse.Parser(tokens, cst=False).parse())
+    nodes = ast_nodes(astt)
+    n = len(nodes)
+    objects = sum(sys.getsizeof(node) for node in nodes)
+    children = sum(sys.getsizeof(node.children) for node in nodes)
+    dicts = sum(sys.getsizeof(node.__dict__) for node in nodes if hasattr(node, "__dict__"))
+
+    print(f"ast nodes: {n}")
+    print(f"per node: object {objects / n:.1f} B, children {children / n:.1f} B, dict {dicts / n:.1f} B")
+    print(f"retained by parse: {retained / n:.1f} B per node")
+
+def bench_ast_arena(size: int):
+    """Memory taken parsing to an object tree and straight to an arena, and the time of the passes
+    over each, timed apart from parsing."""
+    text = generate_program(size)
+    tokens, _ = lex.run(text, "ast_arena.j")
+
+    def sequential(astt):
+        astt.static_check()
+        return ir3.run(astt)
+
+    trees = {}
+    for mode, arena in (("tree", False), ("arena", True)):
+        tracemalloc.start()
+        _, _, astt, _ = parse.PredictiveParser(tokens, arena=arena).parse()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        n = len(astt) if arena else len(ast_nodes(astt))
+        print(f"{mode}: {n} nodes, parse peak {peak / n:.1f} B, retained {retained / n:.1f} B per node")
+
+        elapsed = measure_time(lambda: parse.PredictiveParser(tokens, arena=arena).parse())
+        print(f"{mode}: parse {elapsed * 1e3:.1f} ms")
+        trees[mode] = astt
+
+    # the passes are interleaved so drift on a noisy machine hits tree and arena alike
+    times = {}
+    gc.disable()
+    try:
+        for _ in range(10):
+            for mode, astt in trees.items():
+                for passes in (sequential, ir3.run_fused):
+                    elapsed = measure_time(lambda: passes(astt), repeat=1)
+                    times[mode, passes] = min(times.get((mode, passes), elapsed), elapsed)
+    finally:
+        gc.enable()
+
+    for mode in trees:
+        print(f"{mode}: static_check + ir3 {times[mode, sequential] * 1e3:.1f} ms, fused {times[mode, ir3.run_fused] * 1e3:.1f} ms")
+    for passes, name in ((sequential, "static_check + ir3"), (ir3.run_fused, "fused")):
+        print(f"arena/tree {name}: {times['arena', passes] / times['tree', passes]:.2f}x")
+
+def bench_method_calls(size: int):
+    """Type checking time per call site as the number of classes doubles."""
+    print(f"{'classes':>8} {'calls':>8} {'static_check':>14}")
+    for n_classes in (size, size * 2, size * 4, size * 8):
+        tokens, _ = lex.run(generate_calls(n_classes), "method_calls.j")
+        _, _, astt, _ = parse.PredictiveParser(tokens).parse()
+
+        elapsed = measure_time(astt.static_check)
+        print(f"{n_classes:>8} {n_classes:>8} {elapsed * 1e6 / n_classes:>11.2f} us")
+
+def bench_scoped_lookup(size: int):
+    """Type checking time per variable lookup as the lookups are nested deeper."""
+    print(f"{'depth':>6} {'lookups':>8} {'static_check':>14}")
+    n_stmts = 1000
+    for depth in (size // 8, size // 4, size // 2, size):
+        tokens, _ = lex.run(generate_nested(depth, n_stmts), "scoped_lookup.j")
+        _, _, astt, _ = parse.PredictiveParser(tokens).parse()
+
+        elapsed = measure_time(astt.static_check)
+        # each statement looks x up twice, every while looks b up once
+        lookups = n_stmts * 2 + depth
+        print(f"{depth:>6} {lookups:>8} {elapsed * 1e9 / lookups:>11.0f} ns")
+
+def bench_type_checks(size: int):
+    """Type checking throughput and allocations on a well-typed program."""
+    text = generate_program(size)
+    tokens, _ = lex.run(text, "type_checks.j")
+    _, _, astt, _ = parse.Parser(tokens, cst=False).parse()
+    n = len(ast_nodes(astt))
+
+    _, allocated = measure_memory(astt.static_check)
+    elapsed = measure_time(astt.static_check)
+    print(f"ast nodes: {n}")
+    print(f"static_check: {n / elapsed:,.0f} nodes/s, {allocated / n:.1f} B left allocated per node")
+
+def bench_field_offsets(size: int):
+    """Code generation time per field access as the accessed class grows."""
+    print(f"{'fields':>8} {'accesses':>9} {'arm':>12}")
+    for n_fields in (size, size * 2, size * 4, size * 8):
+        tokens, _ = lex.run(generate_fields(n_fields), "field_offsets.j")
+        _, _, astt, _ = parse.PredictiveParser(tokens).parse()
+        program3 = ir3.run_fused(astt)
+
+        elapsed = measure_time(lambda: backend.Arm(program3).run())
+        accesses = n_fields * 2
+        print(f"{n_fields:>8} {accesses:>9} {elapsed * 1e6 / accesses:>9.2f} us")
+
+BENCHMARKS = {
+    "token_buffer": (bench_token_buffer, 200),
+    "parallel_lex": (bench_parallel_lex, 20000),
+    "relex": (bench_relex, 50),
+    "predictive_parse": (bench_predictive_parse, 25),
+    "packrat_nesting": (bench_packrat_nesting, 7),
+    "expression_parse": (bench_expression_parse, 200),
+    "ast_only_parse": (bench_ast_only_parse, 200),
+    "fused_pass": (bench_fused_pass, 500),
+    "ast_memory": (bench_ast_memory, 200),
+    "ast_arena": (bench_ast_arena, 200),
+    "method_calls": (bench_method_calls, 500),
+    "scoped_lookup": (bench_scoped_lookup, 128),
+    "type_checks": (bench_type_checks, 500),
+    "field_offsets": (bench_field_offsets, 250),
+}
+
+def main():
+    if len(sys.argv) not in (2, 3) or sys.argv[1] not in BENCHMARKS:
+        print(f"Usage: python3 benchmark.py <{'|'.join(BENCHMARKS)}> [size]")
+        exit(1)
+
+    bench, size = BENCHMARKS[sys.argv[1]]
+    if len(sys.argv) == 3:
+        size = int(sys.argv[2])
+
+    bench(size)
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,79 @@
 import sys
+from typing import List, Optional
 
 import lex
 import parse
 import ir3
 import backend
 
+# --fused type checks and generates ir3 in a single pass, --profile-parse prints the calls,
+# backtracks and time of every parser production to stderr, as a table or with =json as json,
+# --workers=N lexes large files across N processes before parsing
+FLAGS = {"--fused", "--profile-parse", "--profile-parse=json"}
+WORKERS_FLAG = "--workers="
+
+def profile_format(flags: List[str]) -> Optional[str]:
+    if "--profile-parse=json" in flags:
+        return "json"
+    if "--profile-parse" in flags:
+        return "text"
+    return None
+
+# the number of lexer processes asked for, or 0 when the flag is malformed
+def worker_count(flags: List[str]) -> int:
+    counts = [flag[len(WORKERS_FLAG):] for flag in flags if flag.startswith(WORKERS_FLAG)]
+    if not counts:
+        return 1
+    return int(counts[-1]) if counts[-1].isdigit() else 0
+
 def main():
     # verify user input
-    if len(sys.argv) != 2:
-        print("Usage: python3 compile.py <filename>")
+    flags = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    workers = worker_count(flags)
+    if len(args) != 1 or not {flag for flag in flags if not flag.startswith(WORKERS_FLAG)} <= FLAGS or workers < 1:
+        print("Usage: python3 compile.py [--fused] [--profile-parse[=json]] [--workers=N] <filename>")
         exit(1)
 
-    # execute main logic
-    filename = sys.argv[1]
-    with open(filename) as f:
-        content = f.read()
-        run(content, filename)
+    # execute main logic, large files are lexed from a memory map, or across processes if asked
+    filename = args[0]
+    if workers > 1:
+        with open(filename) as f:
+            run_parallel(f.read(), filename, workers, fused="--fused" in flags, profile=profile_format(flags))
+    else:
+        run_lexer(lex.open_lexer(filename), filename, fused="--fused" in flags, profile=profile_format(flags))
+
+def run(text: str, filename: str, fused: bool = False, profile: Optional[str] = None):
+    return run_lexer(lex.RegexLexer(text, filename), filename, fused, profile)
 
-def run(text: str, filename: str):
-    # lexing - extract tokens
-    tokens, err = lex.Lexer(text, filename).lex()
+def run_lexer(lexer: lex.RegexLexer, filename: str, fused: bool = False, profile: Optional[str] = None):
+    # lexing and parsing - tokens are streamed to the parser as it needs them, only the AST is built
+    tokens = lexer.iter_tokens()
+    parser = parse.Parser(tokens, cst=False, profile=profile is not None)
+    cst, err, astt, _ = parser.parse()
+    for _ in tokens: pass # finish lexing, lexer errors are reported before parser errors
+    if profile: print(parser.profile_report(as_json=profile == "json"), file=sys.stderr)
+    if lexer.err: return print(lexer.err)
     if err: return print(err)
+    run_ast(astt, filename, fused)
 
-    # parsing - generate AST
-    cst, err, astt, _ = parse.Parser(tokens).parse()
+def run_parallel(text: str, filename: str, workers: int, fused: bool = False, profile: Optional[str] = None):
+    # lexing - the whole file is lexed across worker processes into one TokenBuffer, then parsed
+    tokens, lex_err = lex.run(text, filename, workers=workers)
+    if lex_err: return print(lex_err)
+    parser = parse.Parser(tokens, cst=False, profile=profile is not None)
+    cst, err, astt, _ = parser.parse()
+    if profile: print(parser.profile_report(as_json=profile == "json"), file=sys.stderr)
     if err: return print(err)
+    run_ast(astt, filename, fused)
 
-    # static checking
+def run_ast(astt, filename: str, fused: bool = False):
+    # static checking, together with intermediate code generation if fused
     try:
-        astt.static_check()
+        if fused:
+            ir: ir3.Program3 = ir3.run_fused(astt)
+        else:
+            astt.static_check()
     except Exception as err:
         print("Error during static checking!")
         return print(err)
@@ -36,7 +81,8 @@ def run(text: str, filename: str):
     #print(astt)
 
     # intermediate code generation
-    ir: ir3.Program3 = ir3.run(astt)
+    if not fused:
+        ir: ir3.Program3 = ir3.run(astt)
 
     #print(ir)
 
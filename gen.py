@@ -1,34 +1,85 @@
 import sys
+from typing import List, Optional
 
 import lex
 import parse
 import ir3
 
+# --fused type checks and generates ir3 in a single pass, --profile-parse prints the calls,
+# backtracks and time of every parser production to stderr, as a table or with =json as json,
+# --workers=N lexes large files across N processes before parsing
+FLAGS = {"--fused", "--profile-parse", "--profile-parse=json"}
+WORKERS_FLAG = "--workers="
+
+def profile_format(flags: List[str]) -> Optional[str]:
+    if "--profile-parse=json" in flags:
+        return "json"
+    if "--profile-parse" in flags:
+        return "text"
+    return None
+
+# the number of lexer processes asked for, or 0 when the flag is malformed
+def worker_count(flags: List[str]) -> int:
+    counts = [flag[len(WORKERS_FLAG):] for flag in flags if flag.startswith(WORKERS_FLAG)]
+    if not counts:
+        return 1
+    return int(counts[-1]) if counts[-1].isdigit() else 0
+
 def main():
-    if len(sys.argv) != 2:
-        print("Usage: python3 gen.py <filename>")
+    flags = [arg for arg in sys.argv[1:] if arg.startswith("--")]
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    workers = worker_count(flags)
+    if len(args) != 1 or not {flag for flag in flags if not flag.startswith(WORKERS_FLAG)} <= FLAGS or workers < 1:
+        print("Usage: python3 gen.py [--fused] [--profile-parse[=json]] [--workers=N] <filename>")
         exit(1)
 
-    filename = sys.argv[1]
+    filename = args[0]
+
+    # open file, large files are lexed from a memory map, or across processes if asked
+    if workers > 1:
+        with open(filename) as f:
+            run_parallel(f.read(), filename, workers, fused="--fused" in flags, profile=profile_format(flags))
+    else:
+        run_lexer(lex.open_lexer(filename), fused="--fused" in flags, profile=profile_format(flags))
 
-    # open file, lex input text, print out all tokens
-    with open(filename) as f:
-        run(f.read(), filename)
+def run(text: str, filename: str, fused: bool = False, profile: Optional[str] = None):
+    return run_lexer(lex.RegexLexer(text, filename), fused, profile)
 
-def run(text: str, filename: str):
-    # generate tokens
-    lexer = lex.Lexer(text, filename)
-    tokens, err = lexer.lex()
-    if err: return print(err)
+def run_lexer(lexer: lex.RegexLexer, fused: bool = False, profile: Optional[str] = None):
+    # generate tokens, streamed to the parser as it needs them
+    tokens = lexer.iter_tokens()
 
     # generate AST
-    parser = parse.Parser(tokens)
-    cst, err, astt, _ = parser.parse()
-    if err: return print(err)
+    parser = parse.Parser(tokens, cst=False, profile=profile is not None)
+    parsed = parser.parse()
+    for _ in tokens: pass # finish lexing, lexer errors are reported before parser errors
+    if profile: print(parser.profile_report(as_json=profile == "json"), file=sys.stderr)
+    if lexer.err: return print(lexer.err)
+    if parsed[1]: return print(parsed[1])
+    return run_ast(parsed, fused)
+
+def run_parallel(text: str, filename: str, workers: int, fused: bool = False, profile: Optional[str] = None):
+    # generate tokens, lexed across worker processes into one TokenBuffer before parsing
+    tokens, lex_err = lex.run(text, filename, workers=workers)
+    if lex_err: return print(lex_err)
+
+    # generate AST
+    parser = parse.Parser(tokens, cst=False, profile=profile is not None)
+    parsed = parser.parse()
+    if profile: print(parser.profile_report(as_json=profile == "json"), file=sys.stderr)
+    if parsed[1]: return print(parsed[1])
+    return run_ast(parsed, fused)
+
+# parsed is what the parser returned, (cst, err, astt, info), and is returned when ir3 is generated
+def run_ast(parsed, fused: bool = False):
+    astt = parsed[2]
 
-    # if parse succeeds, proceed to static checking
+    # if parse succeeds, proceed to static checking (and intermediate code generation, if fused)
     try:
-        astt.static_check()
+        if fused:
+            ir: ir3.Program3 = ir3.run_fused(astt)
+        else:
+            astt.static_check()
     except Exception as err:
         print("Error during static checking!")
         return print(err)
@@ -36,10 +87,11 @@ def run(text: str, filename: str):
     #print(astt)
 
     # if typecheck succeeds, proceed to intermediate code generation
-    ir: ir3.Program3 = ir3.run(astt)
+    if not fused:
+        ir: ir3.Program3 = ir3.run(astt)
     print(ir)
 
-    return cst, err, astt, _
+    return parsed
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,10 +3,16 @@ Class definitions for the intermediate code (IR3) tree
 """
 from typing import List, Set, Dict, Tuple, Optional, Callable, Optional, Any, Union
 
+import lex
+
 # starting method
 def run(tree) -> 'Program3':
     return tree.ir3({})
 
+# type checks the tree and generates its ir3 in a single traversal
+def run_fused(tree) -> 'Program3':
+    return tree.check_ir3(context={})
+
 def format_label(num: int):
     return f"Label{str(num)}"
 
@@ -16,6 +22,7 @@ def format_label(num: int):
 class IR3Node:
     label_id = 1
     temporary_id = 1
+    mangled_names: Dict[Tuple[str, str], str] = {}
 
     @classmethod
     def new_label(cls) -> str:
@@ -31,7 +38,10 @@ class IR3Node:
 
     @classmethod
     def mangle_method_name(cls, cname: str, mname: str) -> str:
-        return f"_{cname}_{mname}"
+        key = (cname, mname)
+        if key not in IR3Node.mangled_names: # build each name once, and share it with the backend
+            IR3Node.mangled_names[key] = lex.intern(f"_{cname}_{mname}")
+        return IR3Node.mangled_names[key]
 
     @classmethod
     # Given some statement i: x = y + z, extract these vars (x, y, z)
@@ -239,10 +249,11 @@ class Stmt3Assignment(IR3Node):
         return f"{self.id3} = {str(self.exp3)};"
 
 class Stmt3FieldAccessAssignment(IR3Node):
-    def __init__(self, id3_left: str, id3_right: str, idc3: 'Idc3'):
+    def __init__(self, id3_left: str, id3_right: str, idc3: 'Idc3', field_index: Optional[int] = None):
         self.id3_left = id3_left
         self.id3_right = id3_right
         self.idc3 = idc3
+        self.field_index = field_index # index of id3_right in its class, if resolved
 
     @property
     def lhs_left_id(self) -> str:
@@ -328,9 +339,10 @@ class Exp3Uop(IR3Node):
         return f"{str(self.uop3)}{str(self.idc3)}"
 
 class Exp3FieldAccess(IR3Node):
-    def __init__(self, l_id3: str, r_id3: str):
+    def __init__(self, l_id3: str, r_id3: str, field_index: Optional[int] = None):
         self.l_id3 = l_id3
         self.r_id3 = r_id3
+        self.field_index = field_index # index of r_id3 in its class, if resolved
 
     @property
     def names(self) -> List[str]:
@@ -530,4 +542,6 @@ class Const(IR3Node):
         else:
             return str(self.value)
 
-IR3Result = Tuple[List[IR3Node], Optional[Union[str, Const]]]
\ No newline at end of file
+# the temporary or constant holding an expression's value, its code is appended to the
+# method body's shared buffer, context["code"]
+IR3Value = Optional[Union[str, Const]]
\ No newline at end of file
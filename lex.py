@@ -1,6 +1,12 @@
+import mmap
+import os
+import re
 import sys
+from array import array
+from bisect import bisect_left, bisect_right
 from copy import deepcopy
-from typing import List, Set, Dict, Tuple, Optional, Callable, Optional, Any
+from functools import lru_cache
+from typing import List, Set, Dict, Tuple, Optional, Callable, Optional, Any, Iterator, Union
 
 ########################################################
 ######################## TOKENS ########################
@@ -81,15 +87,100 @@ TT_EPSILON = "EPSILON"
 TT_EOF = "EOF"
 TT_EMPTY = "##EMPTY_TOKEN##"
 
+# Small integer kinds, one per token type. Compared instead of the type strings
+TOKEN_TYPES = [
+    TT_INT,
+    TT_STR,
+    TT_KEYWORD,
+    TT_ID,
+    TT_PLUS,
+    TT_MINUS,
+    TT_MULT,
+    TT_DIV,
+    TT_AND,
+    TT_OR,
+    TT_LESS_EQ,
+    TT_LESS_THAN,
+    TT_GREATER_EQ,
+    TT_GREATER_THAN,
+    TT_EQUAL,
+    TT_NOT_EQ,
+    TT_EXCLAMATION,
+    TT_TYPE,
+    TT_CNAME,
+    TT_ASSIGNMENT,
+    TT_L_CURLY_BRACE,
+    TT_R_CURLY_BRACE,
+    TT_L_PAREN,
+    TT_R_PAREN,
+    TT_SEMICOLON,
+    TT_COMMA,
+    TT_DOT,
+    TT_COMMENT,
+    TT_EPSILON,
+    TT_EOF,
+    TT_EMPTY,
+]
+TOKEN_KINDS = {token_type: kind for kind, token_type in enumerate(TOKEN_TYPES)}
+K_INT = TOKEN_KINDS[TT_INT]
+K_STR = TOKEN_KINDS[TT_STR]
+K_KEYWORD = TOKEN_KINDS[TT_KEYWORD]
+K_ID = TOKEN_KINDS[TT_ID]
+K_PLUS = TOKEN_KINDS[TT_PLUS]
+K_MINUS = TOKEN_KINDS[TT_MINUS]
+K_MULT = TOKEN_KINDS[TT_MULT]
+K_DIV = TOKEN_KINDS[TT_DIV]
+K_AND = TOKEN_KINDS[TT_AND]
+K_OR = TOKEN_KINDS[TT_OR]
+K_LESS_EQ = TOKEN_KINDS[TT_LESS_EQ]
+K_LESS_THAN = TOKEN_KINDS[TT_LESS_THAN]
+K_GREATER_EQ = TOKEN_KINDS[TT_GREATER_EQ]
+K_GREATER_THAN = TOKEN_KINDS[TT_GREATER_THAN]
+K_EQUAL = TOKEN_KINDS[TT_EQUAL]
+K_NOT_EQ = TOKEN_KINDS[TT_NOT_EQ]
+K_EXCLAMATION = TOKEN_KINDS[TT_EXCLAMATION]
+K_TYPE = TOKEN_KINDS[TT_TYPE]
+K_CNAME = TOKEN_KINDS[TT_CNAME]
+K_ASSIGNMENT = TOKEN_KINDS[TT_ASSIGNMENT]
+K_L_CURLY_BRACE = TOKEN_KINDS[TT_L_CURLY_BRACE]
+K_R_CURLY_BRACE = TOKEN_KINDS[TT_R_CURLY_BRACE]
+K_L_PAREN = TOKEN_KINDS[TT_L_PAREN]
+K_R_PAREN = TOKEN_KINDS[TT_R_PAREN]
+K_SEMICOLON = TOKEN_KINDS[TT_SEMICOLON]
+K_COMMA = TOKEN_KINDS[TT_COMMA]
+K_DOT = TOKEN_KINDS[TT_DOT]
+K_COMMENT = TOKEN_KINDS[TT_COMMENT]
+K_EPSILON = TOKEN_KINDS[TT_EPSILON]
+K_EOF = TOKEN_KINDS[TT_EOF]
+K_EMPTY = TOKEN_KINDS[TT_EMPTY]
+
 class Token:
+    epoch = 0 # how many edits of its source were relexed before the token was lexed, see relex
+
     @classmethod
     def empty(cls):
         return Token(TT_EMPTY)
 
-    def __init__(self, token_type: str, value: Any=None, lexed_pos: 'LexerPosition'=None):
+    def __init__(self, token_type: str, value: Any=None, offset: int=None, source: 'SourceIndex'=None):
         self.type = token_type
+        self.kind = TOKEN_KINDS[token_type]
         self.value = value
-        self.lexed_pos = lexed_pos
+        self.stored_offset = offset # offset into the text as lexed, later edits move it lazily
+        self.source = source
+
+    # index into the text, resolved to a row and col on demand
+    @property
+    def offset(self) -> Optional[int]:
+        offset = self.stored_offset
+        if offset is None or self.source is None:
+            return offset
+        return self.source.resolve(offset, self.epoch)
+
+    @property
+    def lexed_pos(self) -> Optional['LexerPosition']:
+        if self.offset is None:
+            return None
+        return self.source.position(self.offset)
 
     def __repr__(self):
         if self.value:
@@ -100,6 +191,27 @@ class Token:
         return self.type == other.make_type \
                and self.value == other.value
 
+#########################################################
+######################## SYMBOLS ########################
+#########################################################
+
+class Symbols:
+    """Interns every identifier and class name seen in a compilation.
+
+    Each distinct name is kept as one str object, so the dict lookups in later phases reuse
+    its cached hash and equal names compare by identity.
+    """
+    def __init__(self):
+        self.table: Dict[str, str] = {}
+
+    def intern(self, name: str) -> str:
+        return self.table.setdefault(name, name)
+
+symbols = Symbols() # owned by the current compilation, one compilation runs per process
+
+def intern(name: str) -> str:
+    return symbols.table.setdefault(name, name)
+
 ########################################################
 ######################## ERRORS ########################
 ########################################################
@@ -149,6 +261,216 @@ class LexerPosition:
     def copy(self) -> 'LexerPosition':
         return deepcopy(self)
 
+class SourceIndex:
+    """Start offsets of every line in one lexed file.
+
+    Tokens only keep an offset into the text, the row and col are looked up here
+    when an error actually needs them.
+
+    Edits relexed since the file was lexed are logged here too, so relex never rewrites the
+    tokens or line starts after an edit: line starts from gap_line on are stored gap_shift
+    short of where they are, and a token's offset is moved by each edit logged after it was
+    lexed (see resolve).
+    """
+    def __init__(self, text: str, filename: str):
+        self.filename = filename
+        self.line_starts = [0] + [m.end() for m in re.finditer("\n", text)]
+        self.gap_line = 0
+        self.gap_shift = 0
+        self.edits: List[Tuple[int, int]] = [] # (offset the unchanged text resumed at, shift) per edit
+        self.boundaries: List[Optional[Token]] = [] # per edit, the first token it moved, if any
+
+    @classmethod
+    def from_bytes(cls, data: Any, filename: str) -> 'SourceIndex':
+        """Indexes a bytes-like file without copying it, as if the lexers' trailing newline were there."""
+        source = cls("", filename)
+        source.line_starts = [0] + [m.end() for m in re.finditer(b"\n", data)] + [len(data) + 1]
+        return source
+
+    def line_start(self, line: int) -> int:
+        start = self.line_starts[line]
+        return start + self.gap_shift if line >= self.gap_line else start
+
+    # index of the line offset is on
+    def line_of(self, offset: int) -> int:
+        starts, gap = self.line_starts, self.gap_line
+        line = bisect_right(starts, offset, 0, gap)
+        if line == gap:
+            line = bisect_right(starts, offset - self.gap_shift, gap)
+        return line - 1
+
+    def position(self, offset: int) -> LexerPosition:
+        line = self.line_of(offset)
+        # the first line is 1-indexed, later lines are 0-indexed (see LexerPosition.advance)
+        col = offset - self.line_start(line) + (1 if line == 0 else 0)
+        return LexerPosition(idx=offset, row=line + 1, col=col, filename=self.filename)
+
+    # the position just past the last character of the text, where EOF is reported
+    def end_position(self) -> LexerPosition:
+        return self.position(self.line_start(len(self.line_starts) - 1) - 1) # the newline every lexer appends
+
+    # where an offset stored by a token lexed after epoch edits is now
+    def resolve(self, offset: int, epoch: int) -> int:
+        for resumed, shift in self.edits[epoch:]:
+            if offset >= resumed:
+                offset += shift
+        return offset
+
+    # moves the gap to line, rewriting only the starts between it and the old gap
+    def move_gap(self, line: int) -> None:
+        starts, gap, shift = self.line_starts, self.gap_line, self.gap_shift
+        if shift and gap < line:
+            for i in range(gap, line):
+                starts[i] += shift
+        elif shift and line < gap:
+            for i in range(line, gap):
+                starts[i] -= shift
+        self.gap_line = line
+
+    # updates the line starts for text[offset:offset + removed] being replaced by inserted, and
+    # logs the edit for the offsets of the tokens after it
+    def apply_edit(self, offset: int, removed: int, inserted: str) -> None:
+        delta = len(inserted) - removed
+        lo = self.line_of(offset) + 1
+        hi = self.line_of(offset + removed) + 1
+        self.move_gap(hi)
+        added = [offset + m.end() for m in re.finditer("\n", inserted)]
+        self.line_starts[lo:hi] = added
+        self.gap_line = lo + len(added)
+        self.gap_shift += delta
+        self.edits.append((offset + removed, delta))
+        self.boundaries.append(None)
+
+    # the last edit moved every older token from first_moved on, and replaced tokens: an older
+    # edit whose first moved token was replaced now starts moving tokens there instead
+    def set_boundary(self, replaced: List[Token], first_moved: Optional[Token]) -> None:
+        gone = {id(token) for token in replaced}
+        boundaries = self.boundaries
+        for j, token in enumerate(boundaries):
+            if token is not None and id(token) in gone:
+                boundaries[j] = first_moved
+        boundaries[-1] = first_moved
+
+    def flush_edits(self, tokens: List[Token]) -> None:
+        """Stores the current offset of every token and empties the edit log.
+
+        Tokens are in text order, so an edit moves exactly the tokens lexed before it that come
+        at or after its boundary, and one sweep finds what every epoch has moved by.
+        """
+        starting: Dict[int, List[int]] = {}
+        for j, token in enumerate(self.boundaries):
+            if token is not None:
+                starting.setdefault(id(token), []).append(j)
+        moved = [0] * (len(self.edits) + 1) # by epoch, how far the tokens swept so far moved
+        for token in tokens:
+            if id(token) in starting:
+                for j in starting[id(token)]:
+                    shift = self.edits[j][1]
+                    for epoch in range(j + 1):
+                        moved[epoch] += shift
+            epoch = token.epoch
+            if moved[epoch] and token.stored_offset is not None:
+                token.stored_offset += moved[epoch]
+            if epoch:
+                del token.epoch
+        self.edits.clear()
+        self.boundaries.clear()
+
+##############################################################
+######################## TOKEN BUFFER ########################
+##############################################################
+
+NO_OFFSET = 0xFFFFFFFF # offset stored for tokens without a position, like EOF
+
+class TokenBuffer:
+    """Compact struct-of-arrays storage for the tokens of one file.
+
+    Each token is a kind in an array('B'), an offset in an array('I') and the id of its
+    value in an interned side table, so repeated identifiers share one entry. Indexing
+    returns a TokenView, which reads like a Token.
+    """
+    def __init__(self, source: 'SourceIndex'):
+        self.source = source
+        self.kinds = array("B")
+        self.offsets = array("I")
+        self.value_ids = array("I")
+        self.values: List[Any] = [None] # value id 0 is reserved for tokens without a value
+        self.value_index: Dict[Any, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.kinds)
+
+    def __getitem__(self, idx: int) -> 'TokenView':
+        if not 0 <= idx < len(self.kinds):
+            raise IndexError(idx)
+        return TokenView(self, idx)
+
+    def append(self, token_type: str, value: Any=None, offset: Optional[int]=None) -> None:
+        self.kinds.append(TOKEN_KINDS[token_type])
+        self.offsets.append(NO_OFFSET if offset is None else offset)
+        self.value_ids.append(self.intern(value))
+
+    def intern(self, value: Any) -> int:
+        if value is None:
+            return 0
+        value_id = self.value_index.get(value)
+        if value_id is None:
+            value_id = len(self.values)
+            self.values.append(value)
+            self.value_index[value] = value_id
+        return value_id
+
+    # returns the token at the cursor, or None past the end of the input
+    def get(self, cursor: int) -> Optional['TokenView']:
+        return TokenView(self, cursor) if cursor < len(self.kinds) else None
+
+    # the whole file is already held compactly, nothing to forget
+    def discard_before(self, cursor: int) -> None:
+        pass
+
+class TokenView:
+    """A Token read out of a TokenBuffer. Setting its value writes back to the buffer."""
+    __slots__ = ("buffer", "idx", "kind")
+
+    def __init__(self, buffer: TokenBuffer, idx: int):
+        self.buffer = buffer
+        self.idx = idx
+        self.kind = buffer.kinds[idx] # read on every Parser.is_* check, so kept on the view
+
+    @property
+    def type(self) -> str:
+        return TOKEN_TYPES[self.kind]
+
+    @property
+    def value(self) -> Any:
+        return self.buffer.values[self.buffer.value_ids[self.idx]]
+
+    @value.setter
+    def value(self, value: Any) -> None:
+        self.buffer.value_ids[self.idx] = self.buffer.intern(value)
+
+    @property
+    def offset(self) -> Optional[int]:
+        offset = self.buffer.offsets[self.idx]
+        return None if offset == NO_OFFSET else offset
+
+    @property
+    def source(self) -> 'SourceIndex':
+        return self.buffer.source
+
+    @property
+    def lexed_pos(self) -> Optional[LexerPosition]:
+        offset = self.offset
+        if offset is None:
+            return None
+        return self.buffer.source.position(offset)
+
+    def __repr__(self):
+        value = self.value
+        if value:
+            return f"Token({self.type},{value})"
+        return f"Token({self.type})"
+
 #######################################################
 ######################## LEXER ########################
 #######################################################
@@ -159,6 +481,7 @@ class Lexer:
         self.filename = filename
         self.curr_token = text[0] if text else None
         self.pos = LexerPosition(idx=0, row=1, col=1, filename=filename)
+        self.source = SourceIndex(self.text, filename)
 
     # move the current position and loads the next token to be processed
     def advance(self) -> None:
@@ -176,34 +499,34 @@ class Lexer:
             token = self.curr_token
 
             if token == "+": # binop arithmetic
-                tokens.append(Token(TT_PLUS, lexed_pos=self.pos.copy()))
+                tokens.append(Token(TT_PLUS, offset=self.pos.idx, source=self.source))
                 self.advance()
             elif token == "-": # binop arithmetic
-                tokens.append(Token(TT_MINUS, lexed_pos=self.pos.copy()))
+                tokens.append(Token(TT_MINUS, offset=self.pos.idx, source=self.source))
                 self.advance()
             elif token == "*": # binop arithmetic
-                tokens.append(Token(TT_MULT, lexed_pos=self.pos.copy()))
+                tokens.append(Token(TT_MULT, offset=self.pos.idx, source=self.source))
                 self.advance()
             elif token == "{":
-                tokens.append(Token(TT_L_CURLY_BRACE, lexed_pos=self.pos.copy()))
+                tokens.append(Token(TT_L_CURLY_BRACE, offset=self.pos.idx, source=self.source))
                 self.advance()
             elif token == "}":
-                tokens.append(Token(TT_R_CURLY_BRACE, lexed_pos=self.pos.copy()))
+                tokens.append(Token(TT_R_CURLY_BRACE, offset=self.pos.idx, source=self.source))
                 self.advance()
             elif token == "(":
-                tokens.append(Token(TT_L_PAREN, lexed_pos=self.pos.copy()))
+                tokens.append(Token(TT_L_PAREN, offset=self.pos.idx, source=self.source))
                 self.advance()
             elif token == ")":
-                tokens.append(Token(TT_R_PAREN, lexed_pos=self.pos.copy()))
+                tokens.append(Token(TT_R_PAREN, offset=self.pos.idx, source=self.source))
                 self.advance()
             elif token == ";":
-                tokens.append(Token(TT_SEMICOLON, lexed_pos=self.pos.copy()))
+                tokens.append(Token(TT_SEMICOLON, offset=self.pos.idx, source=self.source))
                 self.advance()
             elif token == ",":
-                tokens.append(Token(TT_COMMA, lexed_pos=self.pos.copy()))
+                tokens.append(Token(TT_COMMA, offset=self.pos.idx, source=self.source))
                 self.advance()
             elif token == ".":
-                tokens.append(Token(TT_DOT, lexed_pos=self.pos.copy()))
+                tokens.append(Token(TT_DOT, offset=self.pos.idx, source=self.source))
                 self.advance()
             elif token in WHITESPACE: # whitespace
                 self.advance()
@@ -251,23 +574,23 @@ class Lexer:
             else:
                 return [], IllegalTokenError(f"'{token}'", self.pos.copy())
 
-        tokens.append(Token(TT_EOF))
+        tokens.append(Token(TT_EOF, source=self.source))
         return tokens, None
 
     def lex_digits(self) -> Tuple[Token, Optional[Error]]:
         digits_str = ""
-        start_pos = self.pos.copy()
+        start_idx = self.pos.idx
 
         while self.curr_token in DIGITS:
             digits_str += self.curr_token
             self.advance()
 
-        return Token(TT_INT, int(digits_str), lexed_pos=start_pos), None
+        return Token(TT_INT, int(digits_str), offset=start_idx, source=self.source), None
 
     def lex_cname(self) -> Tuple[Token, Optional[Error]]:
         # start off with uppercase letter
         cname_str = self.curr_token
-        start_pos = self.pos.copy()
+        start_idx = self.pos.idx
 
         # consume uppercase letter and read
         self.advance()
@@ -275,10 +598,10 @@ class Lexer:
             cname_str += self.curr_token
             self.advance()
 
-        return Token(TT_TYPE, cname_str, lexed_pos=start_pos), None
+        return Token(TT_TYPE, intern(cname_str), offset=start_idx, source=self.source), None
 
     def lex_comment_or_div(self) -> Tuple[Token, Optional[Error]]:
-        start_pos = self.pos.copy()
+        start_idx = self.pos.idx
         self.advance()
 
         # edge case - '/' then EOF
@@ -307,11 +630,11 @@ class Lexer:
 
         else:
             # assume we mean division
-            return Token(TT_DIV, lexed_pos=self.pos.copy()), None
+            return Token(TT_DIV, offset=self.pos.idx, source=self.source), None
 
     def lex_string_literal(self) -> Tuple[Token, Optional[Error]]:
         string_lit = ""
-        start_pos = self.pos.copy()
+        start_idx = self.pos.idx
 
         isEscape = False
         esc_char_to_seq = {
@@ -364,11 +687,11 @@ class Lexer:
                 self.advance()
 
         self.advance() # consume remaining "
-        return Token(TT_STR, string_lit, lexed_pos=start_pos), None
+        return Token(TT_STR, string_lit, offset=start_idx, source=self.source), None
 
     def lex_identifier_or_keyword(self) -> Tuple[Token, Optional[Error]]:
         id_str = f"{self.curr_token}"
-        start_pos = self.pos.copy()
+        start_idx = self.pos.idx
 
         self.advance()
         while self.curr_token in LETTERS_DIGITS_UNDERSCORE:
@@ -376,13 +699,14 @@ class Lexer:
             self.advance()
 
         # check if reserved keyword (boolean literal)
+        id_str = intern(id_str)
         if id_str in RESERVED_KEYWORDS:
-            return Token(TT_KEYWORD, id_str, lexed_pos=start_pos), None
+            return Token(TT_KEYWORD, id_str, offset=start_idx, source=self.source), None
 
-        return Token(TT_ID, id_str, lexed_pos=start_pos), None
+        return Token(TT_ID, id_str, offset=start_idx, source=self.source), None
 
     def lex_boolean_and(self) -> Tuple[Token, Optional[Error]]:
-        start_pos = self.pos.copy()
+        start_idx = self.pos.idx
 
         self.advance()
         if self.curr_token != "&":
@@ -392,10 +716,10 @@ class Lexer:
             )
         self.advance() # consume the second '&'
 
-        return Token(TT_AND, lexed_pos=start_pos), None
+        return Token(TT_AND, offset=start_idx, source=self.source), None
 
     def lex_boolean_or(self) -> Tuple[Token, Optional[Error]]:
-        start_pos = self.pos.copy()
+        start_idx = self.pos.idx
 
         self.advance()
         if self.curr_token != "|":
@@ -405,41 +729,712 @@ class Lexer:
             )
         self.advance() # consume the second '|'
 
-        return Token(TT_OR, lexed_pos=start_pos), None
+        return Token(TT_OR, offset=start_idx, source=self.source), None
 
     def lex_relational_op_or_unegation_or_assign(self) -> Tuple[Token, Optional[Error]]:
-        start_pos = self.pos.copy()
+        start_idx = self.pos.idx
         start_token = self.curr_token
 
         self.advance()
         if self.curr_token == "=": # LE, GE, NE, EQ
             self.advance() # consume the '='
             if start_token == ">":
-                return Token(TT_GREATER_EQ, lexed_pos=start_pos), None
+                return Token(TT_GREATER_EQ, offset=start_idx, source=self.source), None
             elif start_token == "<":
-                return Token(TT_LESS_EQ, lexed_pos=start_pos), None
+                return Token(TT_LESS_EQ, offset=start_idx, source=self.source), None
             elif start_token == "!":
-                return Token(TT_NOT_EQ, lexed_pos=start_pos), None
+                return Token(TT_NOT_EQ, offset=start_idx, source=self.source), None
             elif start_token == "=":
-                return Token(TT_EQUAL, lexed_pos=start_pos), None
+                return Token(TT_EQUAL, offset=start_idx, source=self.source), None
             else:
                 raise AssertionError("should not be here 2")
 
         if start_token == ">":
-            return Token(TT_GREATER_THAN, lexed_pos=start_pos), None
+            return Token(TT_GREATER_THAN, offset=start_idx, source=self.source), None
         elif start_token == "<":
-            return Token(TT_LESS_THAN, lexed_pos=start_pos), None
+            return Token(TT_LESS_THAN, offset=start_idx, source=self.source), None
         elif start_token == "!":
-            return Token(TT_EXCLAMATION, lexed_pos=start_pos), None
+            return Token(TT_EXCLAMATION, offset=start_idx, source=self.source), None
         elif start_token == "=":
-            return Token(TT_ASSIGNMENT, lexed_pos=start_pos), None
+            return Token(TT_ASSIGNMENT, offset=start_idx, source=self.source), None
         else:
             raise AssertionError("should not be here 1")
 
-def run(text: str, filename: str) -> Tuple[List[Token], Optional[Error]]:
-    lexer = Lexer(text, filename)
+##############################################################
+######################## REGEX LEXER #########################
+##############################################################
+
+ESC_CHAR_TO_SEQ = {
+    "t": "\t",
+    "b": "\b",
+    "r": "\r",
+    "f": "\f",
+    "n": "\n",
+    "\\": "\\",
+    "\"": "\""
+}
+
+# one alternative per token class, tried left to right at every offset
+MASTER_PATTERN = re.compile(r"""
+    (?P<WS>[ \t\n]+)
+  | (?P<LINE_COMMENT>//[^\n]*)
+  | (?P<BLOCK_COMMENT>/\*.*?\*/)
+  | (?P<OPEN_COMMENT>/\*)
+  | (?P<INT>[0-9]+)
+  | (?P<CNAME>[A-Z][A-Za-z0-9_]*)
+  | (?P<ID>[a-z][A-Za-z0-9_]*)
+  | (?P<STR>"(?:[^"\\\n]|\\[^\n])*")
+  | (?P<BAD_STR>")
+  | (?P<OP><=|>=|==|!=|&&|\|\||[-+*/{}();,.<>=!])
+  | (?P<MISMATCH>.)
+""", re.VERBOSE | re.DOTALL)
+STRING_CHUNK_PATTERN = re.compile(r'[^"\\\n]*')
+ESCAPE_DIGITS_PATTERN = re.compile(r"[0-9]*")
+
+OP_TO_TOKEN_TYPE = {
+    "+": TT_PLUS, "-": TT_MINUS, "*": TT_MULT, "/": TT_DIV,
+    "{": TT_L_CURLY_BRACE, "}": TT_R_CURLY_BRACE,
+    "(": TT_L_PAREN, ")": TT_R_PAREN,
+    ";": TT_SEMICOLON, ",": TT_COMMA, ".": TT_DOT,
+    "&&": TT_AND, "||": TT_OR,
+    "<": TT_LESS_THAN, ">": TT_GREATER_THAN, "<=": TT_LESS_EQ, ">=": TT_GREATER_EQ,
+    "==": TT_EQUAL, "!=": TT_NOT_EQ, "!": TT_EXCLAMATION, "=": TT_ASSIGNMENT,
+}
+
+class RegexLexer:
+    """Lexes the whole input with one compiled master pattern.
+
+    Produces exactly the same tokens, positions and errors as Lexer, but scans
+    whole token spans and slices values out of the text instead of walking the
+    input one character at a time.
+    """
+    def __init__(self, text: str, filename: str, source: Optional[SourceIndex]=None):
+        self.text = text + "\n" # edge case: file ends with comment but no newline
+        self.filename = filename
+        self.source = source if source is not None else SourceIndex(self.text, filename)
+        self.err: Optional[Error] = None
+
+    # returns the position Lexer would have been at after consuming text[:idx]
+    def position(self, idx: int) -> LexerPosition:
+        return self.source.position(idx)
+
+    def lex(self) -> Tuple[List[Token], Optional[Error]]:
+        tokens = list(self.iter_tokens())
+        if isinstance(self.err, IllegalTokenError): # Lexer drops every token on an illegal character
+            return [], self.err
+        return tokens, self.err
+
+    # lexes into a compact TokenBuffer instead of a list of Token objects
+    def lex_buffer(self) -> Tuple[TokenBuffer, Optional[Error]]:
+        buffer = TokenBuffer(self.source)
+        for token_type, value, offset in self.scan():
+            buffer.append(token_type, value, offset)
+        if isinstance(self.err, IllegalTokenError):
+            return TokenBuffer(self.source), self.err
+        return buffer, self.err
+
+    # yields tokens as they are lexed, ending with EOF. On an error, stops early and leaves it in self.err
+    def iter_tokens(self) -> Iterator[Token]:
+        source = self.source
+        for token_type, value, offset in self.scan():
+            yield Token(token_type, value, offset, source)
+
+    # yields (token type, value, offset) for every token from start, shared by every output format
+    def scan(self, start: int=0) -> Iterator[Tuple[str, Any, Optional[int]]]:
+        text = self.text
+
+        if len(text) == 1: # nothing but the newline we added
+            yield TT_EOF, None, None
+            return
+
+        for match in MASTER_PATTERN.finditer(text, start):
+            kind = match.lastgroup
+            start = match.start()
+
+            if kind == "WS" or kind == "LINE_COMMENT" or kind == "BLOCK_COMMENT":
+                continue
+            elif kind == "ID":
+                value = intern(match.group())
+                token_type = TT_KEYWORD if value in RESERVED_KEYWORDS else TT_ID
+                yield token_type, value, start
+            elif kind == "OP":
+                value = match.group()
+                if value == "/": # Lexer reports division after consuming the '/'
+                    start += 1
+                yield OP_TO_TOKEN_TYPE[value], None, start
+            elif kind == "CNAME":
+                yield TT_TYPE, intern(match.group()), start
+            elif kind == "INT":
+                yield TT_INT, int(match.group()), start
+            elif kind == "STR":
+                body = text[start + 1:match.end() - 1]
+                if "\\" in body:
+                    value, self.err = self.lex_string_literal(start)
+                    if self.err is not None:
+                        return
+                    yield TT_STR, value, start
+                else:
+                    yield TT_STR, body, start
+            elif kind == "BAD_STR": # unterminated, or broken by a line end
+                _, self.err = self.lex_string_literal(start)
+                return
+            elif kind == "OPEN_COMMENT":
+                self.err = InvalidSyntaxError( # couldn't find end of comment
+                    f"expected end of comment */",
+                    error_pos=self.position(len(text))
+                )
+                return
+            else: # MISMATCH
+                char = match.group()
+                if char == "&":
+                    self.err = InvalidSyntaxError(
+                        f"expected '&', got '{text[start + 1]}'",
+                        error_pos=self.position(start + 1)
+                    )
+                elif char == "|":
+                    self.err = InvalidSyntaxError(
+                        f"expected '|', got {text[start + 1]}",
+                        error_pos=self.position(start + 1)
+                    )
+                else:
+                    self.err = IllegalTokenError(f"'{char}'", self.position(start))
+                return
+
+        yield TT_EOF, None, None
+
+    # slow path for string literals containing escapes or errors, returns the decoded string
+    def lex_string_literal(self, start: int) -> Tuple[str, Optional[Error]]:
+        text = self.text
+        parts = []
+        idx = start + 1 # skip leading "
+
+        while True:
+            chunk = STRING_CHUNK_PATTERN.match(text, idx)
+            parts.append(chunk.group())
+            idx = chunk.end()
+            char = text[idx]
+
+            if char == "\"":
+                return "".join(parts), None
+            elif char == "\n": # no multiline strings allowed
+                return "", InvalidSyntaxError(
+                    "illegal line end in string literal",
+                    error_pos=self.position(idx)
+                )
+
+            # backslash, starting an escape
+            idx += 1
+            char = text[idx]
+            if char == "x" or char == "0": # decimal or hex escape
+                digits = ESCAPE_DIGITS_PATTERN.match(text, idx + 1)
+                idx = digits.end()
+                ordinal = int(digits.group(), base=10 if char == "0" else 16)
+                if ordinal >= 128:
+                    return "", IllegalEscapeError(
+                        f"decimal/hex ascii character translates to >= 128",
+                        self.position(idx)
+                    )
+                parts.append(chr(ordinal))
+            elif char in ESCAPE_CHARS:
+                parts.append(ESC_CHAR_TO_SEQ[char])
+                idx += 1
+            else: # escaping unknown char
+                return "", IllegalEscapeError(
+                    f"illegal escape character '{char}'",
+                    self.position(idx)
+                )
+
+##############################################################
+######################## BYTES LEXER #########################
+##############################################################
+
+MMAP_THRESHOLD = 16 * 1024 * 1024 # files at least this big are lexed straight from a memory map
+
+# classes of the first byte of a token, looked up in a 256-entry table
+(B_OTHER, B_WS, B_DIGIT, B_UPPER, B_LOWER, B_SLASH, B_QUOTE,
+ B_SINGLE, B_RELOP, B_AMP, B_PIPE) = range(11)
+
+def make_byte_classes() -> bytes:
+    table = [B_OTHER] * 256
+    for chars, byte_class in ((b" \t\n", B_WS), (b"0123456789", B_DIGIT),
+                              (b"ABCDEFGHIJKLMNOPQRSTUVWXYZ", B_UPPER), (b"abcdefghijklmnopqrstuvwxyz", B_LOWER),
+                              (b"/", B_SLASH), (b"\"", B_QUOTE), (b"+-*{}();,.", B_SINGLE),
+                              (b"<>=!", B_RELOP), (b"&", B_AMP), (b"|", B_PIPE)):
+        for c in chars:
+            table[c] = byte_class
+    return bytes(table)
+
+BYTE_CLASSES = make_byte_classes()
+BYTE_TO_TOKEN_TYPE = {ord(op): token_type for op, token_type in OP_TO_TOKEN_TYPE.items() if len(op) == 1}
+RELOP_EQ_TO_TOKEN_TYPE = {ord("<"): TT_LESS_EQ, ord(">"): TT_GREATER_EQ, ord("="): TT_EQUAL, ord("!"): TT_NOT_EQ}
+
+WHITESPACE_BYTES = re.compile(rb"[ \t\n]*")
+WORD_BYTES = re.compile(rb"[A-Za-z0-9_]*")
+DIGITS_BYTES = re.compile(rb"[0-9]*")
+PLAIN_STRING_BYTES = re.compile(rb'"[^"\\\n]*"')
+STRING_CHUNK_BYTES = re.compile(rb'[^"\\\n]*')
+NON_ASCII_BYTES = re.compile(rb"[\x80-\xff]")
+
+class BytesLexer(RegexLexer):
+    """Lexes ASCII source held as bytes, such as a memory-mapped file, without copying it.
+
+    Each token is dispatched on the class of its first byte and its span is matched in
+    place, only identifier and string literal spans are decoded. The newline the other
+    lexers append to the text is simulated at the end of the data.
+    """
+    def __init__(self, data: Any, filename: str):
+        self.data = data
+        self.filename = filename
+        self.source = SourceIndex.from_bytes(data, filename)
+        self.err: Optional[Error] = None
+
+    # returns the character at idx, reading the simulated newline at the end
+    def char_at(self, idx: int) -> str:
+        return chr(self.data[idx]) if idx < len(self.data) else "\n"
+
+    def scan(self, start: int=0) -> Iterator[Tuple[str, Any, Optional[int]]]:
+        data = self.data
+        n = len(data)
+        pos = start
+
+        while pos < n:
+            c = data[pos]
+            byte_class = BYTE_CLASSES[c]
+
+            if byte_class == B_WS:
+                pos = WHITESPACE_BYTES.match(data, pos).end()
+            elif byte_class == B_LOWER:
+                end = WORD_BYTES.match(data, pos + 1).end()
+                value = intern(data[pos:end].decode("ascii"))
+                yield (TT_KEYWORD if value in RESERVED_KEYWORDS else TT_ID), value, pos
+                pos = end
+            elif byte_class == B_SINGLE:
+                yield BYTE_TO_TOKEN_TYPE[c], None, pos
+                pos += 1
+            elif byte_class == B_UPPER:
+                end = WORD_BYTES.match(data, pos + 1).end()
+                yield TT_TYPE, intern(data[pos:end].decode("ascii")), pos
+                pos = end
+            elif byte_class == B_DIGIT:
+                end = DIGITS_BYTES.match(data, pos).end()
+                yield TT_INT, int(data[pos:end]), pos
+                pos = end
+            elif byte_class == B_RELOP:
+                if pos + 1 < n and data[pos + 1] == ord("="):
+                    yield RELOP_EQ_TO_TOKEN_TYPE[c], None, pos
+                    pos += 2
+                else:
+                    yield BYTE_TO_TOKEN_TYPE[c], None, pos
+                    pos += 1
+            elif byte_class == B_SLASH:
+                following = data[pos + 1] if pos + 1 < n else None
+                if following == ord("/"): # line comment, runs to the end of the line
+                    end = data.find(b"\n", pos + 2)
+                    pos = n if end == -1 else end
+                elif following == ord("*"): # block comment
+                    end = data.find(b"*/", pos + 2)
+                    if end == -1:
+                        self.err = InvalidSyntaxError( # couldn't find end of comment
+                            f"expected end of comment */",
+                            error_pos=self.position(n + 1)
+                        )
+                        return
+                    pos = end + 2
+                else: # Lexer reports division after consuming the '/'
+                    yield TT_DIV, None, pos + 1
+                    pos += 1
+            elif byte_class == B_QUOTE:
+                match = PLAIN_STRING_BYTES.match(data, pos)
+                if match is not None:
+                    yield TT_STR, data[pos + 1:match.end() - 1].decode("ascii"), pos
+                    pos = match.end()
+                    continue
+                value, end, self.err = self.lex_bytes_string_literal(pos)
+                if self.err is not None:
+                    return
+                yield TT_STR, value, pos
+                pos = end
+            elif byte_class == B_AMP or byte_class == B_PIPE:
+                double = ord("&") if byte_class == B_AMP else ord("|")
+                if pos + 1 < n and data[pos + 1] == double:
+                    yield (TT_AND if byte_class == B_AMP else TT_OR), None, pos
+                    pos += 2
+                    continue
+                got = self.char_at(pos + 1)
+                self.err = InvalidSyntaxError(
+                    f"expected '&', got '{got}'" if byte_class == B_AMP else f"expected '|', got {got}",
+                    error_pos=self.position(pos + 1)
+                )
+                return
+            else:
+                self.err = IllegalTokenError(f"'{chr(c)}'", self.position(pos))
+                return
+
+        yield TT_EOF, None, None
+
+    # string literals containing escapes or errors, returns the decoded string and the index after it
+    def lex_bytes_string_literal(self, start: int) -> Tuple[str, int, Optional[Error]]:
+        data = self.data
+        parts = []
+        idx = start + 1 # skip leading "
+
+        while True:
+            chunk = STRING_CHUNK_BYTES.match(data, idx)
+            parts.append(chunk.group().decode("ascii"))
+            idx = chunk.end()
+            char = self.char_at(idx)
+
+            if char == "\"":
+                return "".join(parts), idx + 1, None
+            elif char == "\n": # no multiline strings allowed
+                return "", idx, InvalidSyntaxError(
+                    "illegal line end in string literal",
+                    error_pos=self.position(idx)
+                )
+
+            # backslash, starting an escape
+            idx += 1
+            char = self.char_at(idx)
+            if char == "x" or char == "0": # decimal or hex escape
+                digits = DIGITS_BYTES.match(data, idx + 1)
+                idx = digits.end()
+                ordinal = int(digits.group(), base=10 if char == "0" else 16)
+                if ordinal >= 128:
+                    return "", idx, IllegalEscapeError(
+                        f"decimal/hex ascii character translates to >= 128",
+                        self.position(idx)
+                    )
+                parts.append(chr(ordinal))
+            elif char in ESCAPE_CHARS:
+                parts.append(ESC_CHAR_TO_SEQ[char])
+                idx += 1
+            else: # escaping unknown char
+                return "", idx, IllegalEscapeError(
+                    f"illegal escape character '{char}'",
+                    self.position(idx)
+                )
+
+def open_lexer(filename: str) -> RegexLexer:
+    """Returns a lexer over a file. Large ASCII files are memory-mapped instead of read into a str."""
+    if os.path.getsize(filename) >= MMAP_THRESHOLD:
+        with open(filename, "rb") as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if NON_ASCII_BYTES.search(data) is None: # byte offsets are character offsets
+            return BytesLexer(data, filename)
+        data.close()
+
+    with open(filename) as f:
+        return RegexLexer(f.read(), filename)
+
+##############################################################
+######################## NUMPY LEXER #########################
+##############################################################
+
+# character classes of the vectorised pre-pass. Runs of whitespace and of word characters
+# each start one span, every other character starts its own
+C_PUNCT, C_WS, C_WORD = range(3)
+
+@lru_cache(maxsize=None)
+def load_numpy() -> Any:
+    """Imports NumPy on first use, or returns None when it is not installed.
+
+    NumPy imports inspect, which needs the standard library's ast, so while NumPy is imported
+    this directory is taken off sys.path and the compiler's ast module out of sys.modules.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    path, ours = sys.path[:], sys.modules.pop("ast", None)
+    sys.path[:] = [entry for entry in path if os.path.abspath(entry or os.curdir) != here]
+    try:
+        import numpy
+    except ImportError:
+        return None
+    finally:
+        sys.path[:] = path
+        if ours is not None:
+            sys.modules["ast"] = ours
+        else:
+            sys.modules.pop("ast", None) # left for the compiler's ast to be imported later
+    return numpy
+
+@lru_cache(maxsize=None)
+def char_classes() -> Any:
+    np = load_numpy()
+    table = np.full(256, C_PUNCT, dtype=np.uint8)
+    table[np.frombuffer(b" \t\n", dtype=np.uint8)] = C_WS
+    table[np.frombuffer("".join(sorted(LETTERS_DIGITS_UNDERSCORE)).encode("ascii"), dtype=np.uint8)] = C_WORD
+    return table
+STRING_PATTERN = re.compile(r'"(?:[^"\\\n]|\\[^\n])*"')
+DIGITS_PATTERN = re.compile(r"[0-9]+")
+
+class NumpyLexer(RegexLexer):
+    """Lexes with a NumPy pre-pass that classifies every character at once.
+
+    Span starts are found with np.diff and np.flatnonzero, so the Python loop only visits
+    the start of each whitespace run, word or punctuation character. Without NumPy, or for
+    non-ASCII text, it lexes exactly like RegexLexer.
+    """
+    def scan(self, start: int=0) -> Iterator[Tuple[str, Any, Optional[int]]]:
+        text = self.text
+        np = load_numpy()
+        if np is None or start != 0 or not text.isascii() or len(text) == 1:
+            yield from super().scan(start)
+            return
+
+        codes = char_classes()[np.frombuffer(text.encode("ascii"), dtype=np.uint8)]
+        boundaries = np.empty(len(codes), dtype=bool)
+        boundaries[0] = True
+        boundaries[1:] = (np.diff(codes) != 0) | (codes[1:] == C_PUNCT)
+        starts = np.flatnonzero(boundaries).tolist()
+        starts.append(len(text))
+        classes = codes[starts[:-1]].tolist()
+
+        k = 0
+        while k < len(classes):
+            pos = starts[k]
+            end = starts[k + 1]
+            char_class = classes[k]
+            k += 1
+
+            if char_class == C_WS:
+                continue
+            elif char_class == C_WORD:
+                char = text[pos]
+                if char in DIGITS: # integer literal, a word may go on after its digits
+                    digits_end = DIGITS_PATTERN.match(text, pos).end()
+                    yield TT_INT, int(text[pos:digits_end]), pos
+                    if digits_end == end:
+                        continue
+                    pos = digits_end
+                    char = text[pos]
+                if char in LOWERCASE:
+                    value = intern(text[pos:end])
+                    yield (TT_KEYWORD if value in RESERVED_KEYWORDS else TT_ID), value, pos
+                elif char in UPPERCASE:
+                    yield TT_TYPE, intern(text[pos:end]), pos
+                else: # '_' cannot start a name
+                    self.err = IllegalTokenError(f"'{char}'", self.position(pos))
+                    return
+                continue
+
+            # punctuation, one character per span
+            char = text[pos]
+            following = text[pos + 1] if pos + 1 < len(text) else ""
+            if char == "/":
+                if following == "/" or following == "*":
+                    comment_end = text.find("\n" if following == "/" else "*/", pos + 2)
+                    if comment_end == -1: # a line comment always ends at the newline we added
+                        self.err = InvalidSyntaxError( # couldn't find end of comment
+                            f"expected end of comment */",
+                            error_pos=self.position(len(text))
+                        )
+                        return
+                    k = bisect_left(starts, comment_end + (0 if following == "/" else 2), k)
+                else: # Lexer reports division after consuming the '/'
+                    yield TT_DIV, None, pos + 1
+            elif char == "\"":
+                match = STRING_PATTERN.match(text, pos)
+                if match is None: # unterminated, or broken by a line end
+                    _, self.err = self.lex_string_literal(pos)
+                    return
+                body = text[pos + 1:match.end() - 1]
+                if "\\" in body:
+                    body, self.err = self.lex_string_literal(pos)
+                    if self.err is not None:
+                        return
+                yield TT_STR, body, pos
+                k = bisect_left(starts, match.end(), k)
+            elif char + following in OP_TO_TOKEN_TYPE: # <=, >=, ==, !=, && and ||
+                yield OP_TO_TOKEN_TYPE[char + following], None, pos
+                k += 1
+            elif char in OP_TO_TOKEN_TYPE:
+                yield OP_TO_TOKEN_TYPE[char], None, pos
+            elif char == "&":
+                self.err = InvalidSyntaxError(
+                    f"expected '&', got '{following}'",
+                    error_pos=self.position(pos + 1)
+                )
+                return
+            elif char == "|":
+                self.err = InvalidSyntaxError(
+                    f"expected '|', got {following}",
+                    error_pos=self.position(pos + 1)
+                )
+                return
+            else:
+                self.err = IllegalTokenError(f"'{char}'", self.position(pos))
+                return
+
+        yield TT_EOF, None, None
+
+LEXER_CLASSIC = "classic"
+LEXER_REGEX = "regex"
+LEXER_NUMPY = "numpy"
+LEXERS = {
+    LEXER_CLASSIC: Lexer,
+    LEXER_REGEX: RegexLexer,
+    LEXER_NUMPY: NumpyLexer,
+}
+
+def run(text: str, filename: str, engine: str = LEXER_REGEX, workers: int = 1) -> Tuple[Union[List[Token], TokenBuffer], Optional[Error]]:
+    if workers > 1 and len(text) >= PARALLEL_MIN_CHUNK * 2:
+        return run_parallel(text, filename, engine, workers)
+    lexer = LEXERS[engine](text, filename)
     return lexer.lex()
 
+################################################################
+######################## PARALLEL LEXER ########################
+################################################################
+
+PARALLEL_MIN_CHUNK = 64 * 1024 # smaller chunks cost more to ship between processes than to lex
+CHUNKS_PER_WORKER = 4
+
+# the only tokens or comments a newline can be inside of. Strings cannot hold newlines, but must be
+# matched so that a /* inside one is not taken as a comment
+COMMENT_OR_STRING_PATTERN = re.compile(r'//[^\n]*|/\*.*?(?:\*/|\Z)|"(?:[^"\\\n]|\\[^\n])*"?', re.DOTALL)
+
+def safe_split_points(text: str, n_chunks: int) -> List[int]:
+    """Returns the starts of up to n_chunks chunks, each right after a newline outside any block comment."""
+    comments = [m.span() for m in COMMENT_OR_STRING_PATTERN.finditer(text) if m.group().startswith("/*")]
+    comment_starts = [start for start, _ in comments]
+
+    splits = [0]
+    target = len(text) // n_chunks
+    for i in range(1, n_chunks):
+        idx = text.find("\n", max(i * target, splits[-1]))
+        while idx != -1:
+            c = bisect_right(comment_starts, idx) - 1
+            if c < 0 or comments[c][1] <= idx: # not inside a block comment
+                break
+            idx = text.find("\n", comments[c][1])
+        if idx == -1:
+            break
+        if idx + 1 < len(text):
+            splits.append(idx + 1)
+    return splits
+
+# one lexed chunk as it comes back from a worker: the token kinds, their offsets in the whole
+# text, their value ids, the values by id, the ids of the values that are names, and any error
+ChunkArrays = Tuple[bytes, array, array, List[Any], Set[int], Optional[Error]]
+
+NAME_KINDS = (K_ID, TOKEN_KINDS[TT_TYPE], TOKEN_KINDS[TT_KEYWORD])
+
+# lexes one chunk in a worker process into the arrays of a TokenBuffer, so no Token objects are
+# sent back and merging a chunk is a few array extends
+def lex_chunk(chunk: str, filename: str, engine: str, start: int) -> ChunkArrays:
+    lexer = LEXERS[engine](chunk, filename)
+    if isinstance(lexer, RegexLexer):
+        buffer, err = lexer.lex_buffer()
+    else:
+        tokens, err = lexer.lex()
+        buffer = TokenBuffer(lexer.source)
+        for token in tokens:
+            buffer.append(token.type, token.value, token.offset)
+    if buffer.kinds and buffer.kinds[-1] == K_EOF: # the whole text has a single EOF
+        del buffer.kinds[-1], buffer.offsets[-1], buffer.value_ids[-1]
+
+    names = {value_id for kind, value_id in zip(buffer.kinds, buffer.value_ids) if kind in NAME_KINDS}
+    offsets = array("I", map(start.__add__, buffer.offsets))
+    return bytes(buffer.kinds), offsets, buffer.value_ids, buffer.values, names, err
+
+def run_parallel(text: str, filename: str, engine: str, workers: int) -> Tuple[TokenBuffer, Optional[Error]]:
+    """Lexes chunks of the text in a process pool and joins them into one TokenBuffer, giving the
+    same tokens and errors as Lexer."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    n_chunks = min(workers * CHUNKS_PER_WORKER, max(len(text) // PARALLEL_MIN_CHUNK, 1))
+    starts = safe_split_points(text, n_chunks)
+    ends = starts[1:] + [len(text)]
+    chunks = [text[start:end] for start, end in zip(starts, ends)]
+
+    source = SourceIndex(text + "\n", filename)
+    buffer = TokenBuffer(source)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(lex_chunk, chunks, [filename] * len(chunks), [engine] * len(chunks), starts)
+        for start, (kinds, offsets, value_ids, values, names, err) in zip(starts, results):
+            # the chunk's value ids are renumbered into the buffer's, names come back from other
+            # processes as fresh objects and are interned again
+            renumber = [buffer.intern(intern(value) if value_id in names else value) for value_id, value in enumerate(values)]
+            buffer.kinds.extend(kinds)
+            buffer.offsets.extend(offsets)
+            buffer.value_ids.extend(map(renumber.__getitem__, value_ids))
+            if err is not None: # positions are rebased on the whole text, later chunks are dropped
+                err.error_pos = source.position(start + err.error_pos.idx)
+                if isinstance(err, IllegalTokenError):
+                    return TokenBuffer(source), err
+                return buffer, err
+
+    buffer.append(TT_EOF)
+    return buffer, None
+
+# index of the character a token starts at, DIV tokens are positioned after their '/'
+def token_start(token: Token) -> int:
+    return token.offset - 1 if token.kind == K_DIV else token.offset
+
+# index of the first token before EOF that starts at or after offset
+def first_token_at(tokens: List[Token], offset: int) -> int:
+    lo, hi = 0, len(tokens) - 1 # EOF has no offset
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if token_start(tokens[mid]) < offset:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+MAX_PENDING_EDITS = 64 # edits logged in a SourceIndex before relex stores every offset again
+
+def relex(text: str, tokens: List[Token], offset: int, removed: int, inserted: str, filename: str) -> Tuple[str, List[Token], Optional[Error]]:
+    """Applies an edit to a lexed text, relexing only around the edited range.
+
+    Lexing restarts at the token before the edit, which is never inside a string or
+    comment, and stops as soon as a new token starts where an old token started after
+    the edit. The relexed tokens are spliced into the list in place, and the old tokens after
+    them are not touched: the edit is logged in their SourceIndex, which moves their offsets
+    when they are read. Every MAX_PENDING_EDITS edits the log is flushed into the tokens.
+    Returns the edited text, its tokens and any lexing error.
+    """
+    new_text = text[:offset] + inserted + text[offset + removed:]
+
+    # without a complete token stream to resynchronise with, lex from scratch
+    if not tokens or tokens[-1].type != TT_EOF or tokens[0].offset is None:
+        tokens, err = run(new_text, filename)
+        return new_text, tokens, err
+
+    # keep every token that starts strictly before the token the edit starts in
+    lo = first_token_at(tokens, offset)
+    keep = max(lo - 1, 0)
+    restart = token_start(tokens[keep]) if lo > 0 else 0
+    unchanged = first_token_at(tokens, offset + removed) # the old tokens that can only move
+
+    source = tokens[0].source
+    source.apply_edit(offset, removed, inserted)
+    epoch = len(source.edits)
+    edit_end = offset + len(inserted) # first index of the unchanged suffix, in the new text
+
+    lexer = RegexLexer(new_text, filename, source=source)
+    fresh = []
+    old = unchanged # the next old token that could start at the same place as a new one
+    for token_type, value, token_offset in lexer.scan(restart):
+        token = Token(token_type, value, token_offset, source)
+        token.epoch = epoch
+        if token_offset is not None and token_start(token) >= edit_end:
+            while old < len(tokens) - 1 and token_start(tokens[old]) < token_start(token):
+                old += 1
+            if old < len(tokens) - 1 and token_start(tokens[old]) == token_start(token):
+                # resynchronised, the rest of the old stream only moves by the logged edit
+                source.set_boundary(tokens[keep:old], tokens[old])
+                tokens[keep:old] = fresh
+                if len(source.edits) >= MAX_PENDING_EDITS:
+                    source.flush_edits(tokens)
+                return new_text, tokens, None
+        fresh.append(token)
+
+    source.set_boundary(tokens[keep:], None)
+    if isinstance(lexer.err, IllegalTokenError):
+        return new_text, [], lexer.err
+    tokens[keep:] = fresh
+    return new_text, tokens, lexer.err
+
 def main():
     if len(sys.argv) != 2:
         print("Usage: python3 lex.py <filename>")
@@ -448,15 +1443,12 @@ def main():
     filename = sys.argv[1]
 
     # open file, lex input text, print out all tokens
-    with open(filename) as f:
-        text = f.read()
+    tokens, err = open_lexer(filename).lex()
+    if err is not None:
+        return print(err)
 
-        tokens, err = run(text, filename)
-        if err is not None:
-            return print(err)
-
-        for token in tokens:
-            print(token)
+    for token in tokens:
+        print(token)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,6 +1,14 @@
+import lex
 from lex import *
+import sys
 import unittest
 
+# what two lexers must agree on: each token's type, value and position, and the error
+def summarize_tokens(tokens, err):
+    toks = [(t.type, t.value, None if t.lexed_pos is None else (t.lexed_pos.idx, t.lexed_pos.row, t.lexed_pos.col))
+            for t in tokens]
+    return toks, None if err is None else (type(err).__name__, str(err))
+
 class TestArithmetic(unittest.TestCase):
     def test_arithmetic_success_1(self):
         tokens, err = run(" 123 + 201 -343* 46   / 5", "test_arithmetic_success_1")
@@ -85,5 +93,230 @@ class TestRelOpUnegation(unittest.TestCase):
         print(tokens)
         self.assertTrue(err is None)
 
+class TestSourceIndex(unittest.TestCase):
+    def test_position_success_1(self):
+        tokens, err = run("class\n  Main\n\n{", "test_position_success_1")
+        self.assertTrue(err is None)
+        positions = [(t.offset, t.lexed_pos.row, t.lexed_pos.col) for t in tokens[:-1]]
+        self.assertEqual(positions, [(0, 1, 1), (8, 2, 2), (14, 4, 0)])
+        self.assertTrue(tokens[-1].lexed_pos is None)
+
+    def test_position_failure_1(self):
+        tokens, err = run("a\n  #", "test_position_failure_1")
+        self.assertEqual(str(err), "\nIllegalTokenError: '#'\nFile test_position_failure_1, row 2, col 2\n")
+
+class TestTokenBuffer(unittest.TestCase):
+    def test_buffer_success_1(self):
+        text = "class Main { Int a; a = 12 / 3; } \"s\\n\" a"
+        tokens, err = run(text, "test_buffer_success_1")
+        buffer, err = RegexLexer(text, "test_buffer_success_1").lex_buffer()
+        self.assertTrue(err is None)
+        self.assertEqual(len(buffer), len(tokens))
+        for token, view in zip(tokens, buffer):
+            self.assertEqual((view.kind, view.type, view.value, view.offset), (token.kind, token.type, token.value, token.offset))
+            self.assertEqual(repr(view), repr(token))
+        self.assertEqual(buffer.values.count("a"), 1) # values are interned
+
+    def test_buffer_success_2(self):
+        buffer, err = RegexLexer("Foo", "test_buffer_success_2").lex_buffer()
+        buffer[0].value = "Bar" # writes through to the buffer
+        self.assertEqual(buffer[0].value, "Bar")
+        self.assertEqual((buffer[0].lexed_pos.row, buffer[0].lexed_pos.col), (1, 1))
+        self.assertTrue(buffer[1].lexed_pos is None)
+
+    def test_buffer_failure_1(self):
+        buffer, err = RegexLexer("a #", "test_buffer_failure_1").lex_buffer()
+        self.assertTrue(isinstance(err, IllegalTokenError))
+        self.assertEqual(len(buffer), 0)
+
+class TestSymbols(unittest.TestCase):
+    def test_intern_success_1(self):
+        # the same name lexed twice, by either lexer, is one interned object
+        a, err = run("counter Counter", "test_intern_success_1")
+        b, err = run("counter Counter", "test_intern_success_1", engine=LEXER_CLASSIC)
+        self.assertTrue(a[0].value is b[0].value)
+        self.assertTrue(a[1].value is b[1].value)
+        self.assertTrue(intern("count" + "er") is a[0].value)
+
+class TestRelex(unittest.TestCase):
+    # relexing after an edit must agree with lexing the edited text from scratch
+    def assertRelex(self, text: str, offset: int, removed: int, inserted: str):
+        tokens, err = run(text, "relex")
+        self.assertTrue(err is None)
+        new_text, actual, actual_err = relex(text, tokens, offset, removed, inserted, "relex")
+        expected, expected_err = run(new_text, "relex")
+        summarize = lambda toks: [(t.type, t.value, t.offset, None if t.lexed_pos is None else (t.lexed_pos.row, t.lexed_pos.col))
+                                  for t in toks]
+        self.assertEqual(summarize(actual), summarize(expected), (text, offset, removed, inserted))
+        self.assertEqual(str(actual_err), str(expected_err))
+
+    def test_relex_success_1(self):
+        text = "class Main {\n  Void main() {\n    a = b / c; // d\n    println(\"x y\");\n  }\n}\n"
+        self.assertRelex(text, 33, 1, "bb")      # replace an identifier
+        self.assertRelex(text, 31, 0, "\n\n")   # add lines before the remaining tokens
+        self.assertRelex(text, 39, 1, "*")       # division becomes multiplication
+        self.assertRelex(text, 0, 5, "class")    # replace the first token
+        self.assertRelex(text, len(text), 0, "class A {}")
+
+    def test_relex_success_2(self):
+        text = "a b c d e"
+        self.assertRelex(text, 2, 0, "/* ")      # opens a comment that swallows the rest
+        self.assertRelex(text, 4, 1, "\"")       # opens a string that never closes
+        self.assertRelex("a \"b c\" d", 4, 1, "") # edit inside a string literal
+        self.assertRelex("a /* b */ c", 5, 1, "q") # edit inside a comment
+
+    def test_relex_success_3(self):
+        # edits pile up in the SourceIndex, and are flushed into the tokens every few edits
+        text = "class Main {\n  Void main() {\n    a = b / c;\n    b = c;\n  }\n}\n"
+        tokens, _ = run(text, "relex")
+        last = tokens[-2]
+        pending = lex.MAX_PENDING_EDITS
+        lex.MAX_PENDING_EDITS = 4
+        try:
+            for i, (offset, removed, inserted) in enumerate([(13, 0, "\n"), (40, 1, "bb"), (0, 0, "  "), (44, 0, "x"),
+                                                            (20, 2, ""), (47, 0, "\n\n"), (5, 0, "a"), (60, 1, "c * d")]):
+                text, actual, err = relex(text, tokens, offset, removed, inserted, "relex")
+                self.assertTrue(actual is tokens and err is None) # spliced in place
+                expected, _ = run(text, "relex")
+                summarize = lambda toks: [(t.type, t.value, t.offset, t.lexed_pos and (t.lexed_pos.row, t.lexed_pos.col)) for t in toks]
+                self.assertEqual(summarize(actual), summarize(expected), (i, text))
+                self.assertEqual(len(tokens[0].source.edits), (i + 1) % 4)
+        finally:
+            lex.MAX_PENDING_EDITS = pending
+        self.assertTrue(tokens[-2] is last) # the tokens after the edits were never relexed
+
+    def test_relex_failure_1(self):
+        self.assertRelex("a b c", 2, 1, "#")
+        self.assertRelex("a b c", 2, 0, "&")
+
+class TestBytesLexer(unittest.TestCase):
+    # the bytes lexer must agree with the regex lexer on every token and error
+    def assertParity(self, text: str):
+        expected = RegexLexer(text, "parity").lex()
+        actual = BytesLexer(text.encode(), "parity").lex()
+        self.assertEqual(summarize_tokens(*actual), summarize_tokens(*expected), repr(text))
+
+    def test_bytes_success_1(self):
+        import glob
+        for text in ["", "/", "a/b // c", "/* x\n */ Int", "a<=b>=c==d!=e<f>g=!h&&i||j", '"a\\tb\\x41" "c"']:
+            self.assertParity(text)
+        for filename in glob.glob("test/**/*.j", recursive=True):
+            with open(filename) as f:
+                self.assertParity(f.read())
+
+    def test_bytes_failure_1(self):
+        for text in ["a &", "a |", "a #", "/* open", '"open', '"\\', '"\\x99"', '"\\q"']:
+            self.assertParity(text)
+
+    def test_open_lexer_success_1(self):
+        import tempfile, os
+        with tempfile.TemporaryDirectory() as d:
+            ascii_file, other_file = os.path.join(d, "a.j"), os.path.join(d, "b.j")
+            with open(ascii_file, "w") as f:
+                f.write("class Main { }")
+            with open(other_file, "w", encoding="utf-8") as f:
+                f.write("class Main { } // caf\u00e9")
+
+            threshold = lex.MMAP_THRESHOLD
+            lex.MMAP_THRESHOLD = 0
+            try:
+                lexer = open_lexer(ascii_file)
+                tokens, err = lexer.lex()
+                self.assertTrue(isinstance(lexer, BytesLexer))
+                self.assertEqual([t.type for t in tokens], [TT_KEYWORD, TT_TYPE, TT_L_CURLY_BRACE, TT_R_CURLY_BRACE, TT_EOF])
+                lexer.data.close()
+                # offsets would stop matching characters, so non-ASCII files are read as text
+                self.assertFalse(isinstance(open_lexer(other_file), BytesLexer))
+            finally:
+                lex.MMAP_THRESHOLD = threshold
+
+class TestParallelLexer(unittest.TestCase):
+    # lexing in chunks across processes must agree with lexing serially
+    def assertParity(self, text: str):
+        chunk = lex.PARALLEL_MIN_CHUNK
+        lex.PARALLEL_MIN_CHUNK = 1
+        try:
+            actual = run(text, "parity", workers=2)
+        finally:
+            lex.PARALLEL_MIN_CHUNK = chunk
+        expected = run(text, "parity")
+        self.assertTrue(isinstance(actual[0], TokenBuffer)) # chunks are merged as arrays, not Tokens
+        self.assertEqual(summarize_tokens(*actual), summarize_tokens(*expected), repr(text))
+
+    def test_split_success_1(self):
+        text = "a\n/* b\n c */\nd\n\"/*\"\ne\n"
+        splits = safe_split_points(text, 8)
+        self.assertEqual(splits, [0, 13, 15, 20]) # never inside the comment, a /* in a string is no comment
+
+    def test_parallel_success_1(self):
+        import glob
+        text = "\n".join(open(filename).read() for filename in sorted(glob.glob("test/**/*.j", recursive=True)))
+        self.assertParity(text)
+        self.assertParity("a\n/* b\n c */ d\n\"/*\" e\n// f\ng")
+
+    def test_parallel_failure_1(self):
+        for text in ["a\nb\nc #\nd\ne", "a\nb\n\"c\nd\n", "a\nb\n/* c\nd\n", "a\n&\nb"]:
+            self.assertParity(text)
+
+class TestNumpyLexer(unittest.TestCase):
+    # the numpy lexer must agree with the regex lexer, with or without numpy
+    def assertParity(self, text: str):
+        expected = run(text, "parity")
+        self.assertEqual(summarize_tokens(*run(text, "parity", engine=LEXER_NUMPY)), summarize_tokens(*expected), repr(text))
+        load_numpy = lex.load_numpy
+        lex.load_numpy = lambda: None
+        try:
+            self.assertEqual(summarize_tokens(*run(text, "parity", engine=LEXER_NUMPY)), summarize_tokens(*expected), repr(text))
+        finally:
+            lex.load_numpy = load_numpy
+
+    def test_load_numpy_success_1(self):
+        import importlib.util
+        if importlib.util.find_spec("numpy") is None:
+            self.skipTest("numpy is not installed")
+        ours = sys.modules.get("ast")
+        lex.load_numpy.cache_clear()
+        np = lex.load_numpy()
+        self.assertTrue(np is not None and np.__name__ == "numpy")
+        self.assertTrue(sys.modules.get("ast") is ours) # whichever ast was imported is left in place
+
+    def test_numpy_success_1(self):
+        import glob
+        for text in ["", "a", "12ab 3_ Int_1", "a/b // c\nd", "/* x\n */ Int", "a<=b>=c==d!=e<f>g=!h&&i||j",
+                     '"a\\tb\\x41" "c" "/*"']:
+            self.assertParity(text)
+        for filename in glob.glob("test/**/*.j", recursive=True):
+            with open(filename) as f:
+                self.assertParity(f.read())
+
+    def test_numpy_failure_1(self):
+        for text in ["_a", "1_", "a &", "a |b", "a\r", "/* open", '"open', '"\\q"', "caf\u00e9"]:
+            self.assertParity(text)
+
+class TestRegexLexerParity(unittest.TestCase):
+    # the regex lexer must agree with the classic lexer on every token and error
+    def assertParity(self, text: str):
+        expected = run(text, "parity", engine=LEXER_CLASSIC)
+        actual = run(text, "parity", engine=LEXER_REGEX)
+        self.assertEqual(summarize_tokens(*actual), summarize_tokens(*expected), repr(text))
+
+    def test_parity_success_1(self):
+        for text in ["", " ", "\n", "/", "a/b", "x / /* c */ y // z", "/**/", "/* multi\nline */ Int",
+                     "class Main { Void main() { return; } }", "a<=b>=c==d!=e<f>g=!h&&i||j",
+                     "123 + 201 -343* 46   / 5", "true false True False this null new",
+                     '"hi\\065\\x42 " "another"', '"\\t\\b\\r\\f\\n\\\\\\""', "a_1 B_2 c3D"]:
+            self.assertParity(text)
+
+    def test_parity_failure_1(self):
+        for text in ["a & b", "a | b", "a\n  #", "_a", "x\r\n", "/* unterminated", "/*/",
+                     '"no end', '"line\nend"', '"\\q"', '"\\0200"', '"\\x99"', '"\\\n"']:
+            self.assertParity(text)
+
+    def test_parity_files_1(self):
+        import glob
+        for filename in glob.glob("test/**/*.j", recursive=True):
+            with open(filename) as f:
+                self.assertParity(f.read())
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
\ No newline at end of file
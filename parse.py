@@ -1,6 +1,8 @@
+import json
+import time
 from lex import *
 from ast import *
-from typing import List, Set, Dict, Tuple, Optional, Callable, Optional, Any, Union
+from typing import List, Set, Dict, Tuple, Optional, Callable, Optional, Any, Union, Iterable, Type
 from operator import itemgetter
 
 ########################################################
@@ -15,502 +17,570 @@ class IllegalSyntaxError(Error):
     def __init__(self, desc: str, error_pos: lex.LexerPosition):
         super().__init__("IllegalSyntaxError", desc, error_pos)
 
+# where an error at token is reported, EOF has no offset and is placed at the end of the text
+def token_error_pos(token: lex.Token) -> Optional[lex.LexerPosition]:
+    if token.offset is None and token.source is not None:
+        return token.source.end_position()
+    return token.lexed_pos
+
+# the error for a token that matched none of what was expected, shared by both parsers
+def expected_error(expected: Iterable[str], token: lex.Token, note: Optional[str]=None) -> IllegalSyntaxError:
+    expected = sorted(expected)
+    if not expected:
+        desc = "invalid syntax"
+    elif len(expected) > 1:
+        desc = f"expected one of {', '.join(expected)}, got {token}"
+    else:
+        desc = f"expected {expected[0]}, got {token}"
+    if note is not None:
+        desc += f" ({note})"
+    return IllegalSyntaxError(desc=desc, error_pos=token_error_pos(token))
+
 ########################################################
 ######################## PARSER ########################
 ########################################################
 
-# cst node, error (if any), dict of info for astt building
-ParseResult = Tuple[CstNode, Optional[Error], Optional[AstNode], Any]
+class DeferredError(Error):
+    """Stands in for the error of every failed production, Parser.syntax_err() builds the
+    real one once the whole parse has failed."""
+    def __init__(self):
+        super().__init__("IllegalSyntaxError", "invalid syntax", None)
+
+# the result of every failed production, shared so that failing allocates nothing
+FAILED = DeferredError()
+
+# a production returns its ast node, None for a terminal without one, or FAILED
+ParseResult = Union[AstNode, DeferredError, None]
+
+# unwinds the parser to parse() once its work budget is spent
+class BudgetExhausted(Exception):
+    pass
+
+class TokenStream:
+    """Tokens pulled lazily from a lexer as the parser advances.
+
+    Only the tokens from the oldest cursor the parser may still backtrack to are kept,
+    so memory follows the backtracking window rather than the size of the file.
+    """
+    def __init__(self, tokens: Iterable[lex.Token]):
+        self.tokens = iter(tokens)
+        self.window: List[lex.Token] = [] # tokens from index self.start onwards
+        self.start = 0
+        self.exhausted = False
+
+    # returns the token at the cursor, or None past the end of the input
+    def get(self, cursor: int) -> Optional[lex.Token]:
+        idx = cursor - self.start
+        while idx >= len(self.window) and not self.exhausted:
+            self.pull()
+        return self.window[idx] if idx < len(self.window) else None
+
+    def pull(self) -> None:
+        token = next(self.tokens, None)
+        if token is not None:
+            self.window.append(token)
+            return
+        self.exhausted = True
+        # a lexer that stopped on an error never sends EOF, end the input for it
+        if not self.window or self.window[-1].type != lex.TT_EOF:
+            source = self.window[-1].source if self.window else None
+            self.window.append(lex.Token(lex.TT_EOF, source=source))
+
+    # forgets every token before the cursor, they can no longer be backtracked to
+    def discard_before(self, cursor: int) -> None:
+        dead = cursor - self.start
+        # only compact once half the window is dead, keeping discards amortised O(1)
+        if dead > 0 and dead * 2 >= len(self.window):
+            del self.window[:dead]
+            self.start = cursor
+
+# nonterminals of the modified grammar memoized in packrat mode, their alternatives are
+# only reached through them so they need no entries of their own. Atom1 is left out, its
+# result depends on the atom before it and not only on the cursor
+PACKRAT_PRODUCTIONS = (
+    "eat_program1", "eat_classdecl", "eat_classdecl1", "eat_classdecl2", "eat_vardecl",
+    "eat_mddecl", "eat_fmllist", "eat_fmllist1", "eat_fmlrest", "eat_type", "eat_mdbody",
+    "eat_mdbody1", "eat_mdbody2", "eat_stmt", "eat_stmt1", "eat_exp", "eat_atom",
+    "eat_explist", "eat_explist1", "eat_exprest",
+)
+
+class CstStack:
+    """Builds the CST beside the AST the productions return.
+
+    A terminal pushes its node and a production, once all of its children have matched,
+    replaces their nodes on top of the stack with its own. Parser.attempt() drops the
+    nodes a failed alternative had pushed.
+    """
+    def __init__(self, nodes: List[CstNode]):
+        self.nodes = nodes
+        # the terminal factories, CstNode.semicolon(tok) and so on, push their node
+        for name, value in vars(CstNode).items():
+            if isinstance(value, classmethod):
+                setattr(self, name, self.pusher(getattr(CstNode, name)))
+
+    def pusher(self, make: Callable[..., CstNode]) -> Callable[..., None]:
+        append = self.nodes.append
+        def push(*args) -> None:
+            append(make(*args))
+        return push
+
+    # replaces the top count nodes with a node named name over them
+    def reduce(self, name: str, count: int) -> None:
+        nodes = self.nodes
+        children = nodes[-count:]
+        del nodes[-count:]
+        nodes.append(CstNode(name, None, children))
+
+    # replaces the top count nodes with the right-nested list named name over them
+    def reduce_list(self, name: str, count: int) -> None:
+        cst = CstNode(name, children=[CstNode.epsilon()])
+        for _ in range(count):
+            cst = CstNode(name, children=[self.nodes.pop(), cst])
+        self.nodes.append(cst)
+
+class SkippedCst:
+    """Stands in for CstStack when only the AST is built, nothing is pushed."""
+    def __init__(self):
+        self.nodes: List[CstNode] = [] # stays empty
+        for name, value in vars(CstNode).items():
+            if isinstance(value, classmethod):
+                setattr(self, name, self.skip)
+
+    def skip(self, *args) -> None:
+        return None
+
+    reduce = reduce_list = skip
+
+SKIPPED_CST = SkippedCst()
+
+class ProductionStats:
+    """Counters of one production, collected by a profiling Parser."""
+    def __init__(self, name: str):
+        self.name = name
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.backtracks = 0 # failures that had consumed tokens, which are given back
+        self.revisits = 0 # tokens consumed that an earlier call had consumed already
+        self.time = 0.0 # seconds, including the productions it called
+
+    def to_dict(self) -> Dict[str, Any]:
+        return dict(vars(self))
 
 class Parser:
-    def __init__(self, tokens: List[lex.Token]):
-        self.tokens = tokens
+    def __init__(self, tokens: Union[Iterable[lex.Token], lex.TokenBuffer], packrat: bool=False, cst: bool=True,
+                 max_revisits: Optional[int]=None, profile: bool=False):
+        self.tokens = tokens if isinstance(tokens, lex.TokenBuffer) else TokenStream(tokens)
+        # the cst built so far, or SKIPPED_CST to build the AST only and return None for the cst
+        self.cst = CstStack([]) if cst else SKIPPED_CST
+        self.cst_nodes = self.cst.nodes
         self.cursor = 0
-        self.curr_token: lex.Token = tokens[0] if len(tokens) > 0 else None
+        self.checkpoints: List[int] = [] # cursors that may still be backtracked to, oldest first
+        self.curr_token: lex.Token = self.tokens.get(0)
+
+        # furthest cursor a match failed at and what was expected there, see fail()
+        self.furthest = -1
+        self.furthest_token: Optional[lex.Token] = None
+        self.expected: Set[str] = set()
+
+        # work spent on failed alternatives: how many were backtracked out of, and how many tokens
+        # they had consumed and must be read again. Past max_revisits tokens the parse is abandoned
+        self.backtracks = 0
+        self.revisits = 0
+        self.max_revisits = max_revisits
+
+        # (production, cursor) -> (result, end cursor, cst node or None), None unless packrat
+        self.memo: Optional[Dict[Tuple[str, int], Tuple[ParseResult, int, Optional[CstNode]]]] = None
+        if packrat:
+            self.memo = {}
+            # shadow the productions on this instance only, the default parser pays nothing
+            for name in PACKRAT_PRODUCTIONS:
+                setattr(self, name, self.memoize(name, getattr(self, name)))
+
+        # production name -> its counters, None unless profiling
+        self.profile: Optional[Dict[str, ProductionStats]] = None
+        self.reached = 0 # furthest cursor any production has returned at
+        if profile:
+            self.profile = {}
+            # shadowed on this instance like packrat, around the memoized productions
+            for name in vars(Parser):
+                if name.startswith("eat_") and name != "eat_repeated":
+                    setattr(self, name, self.profiled(name, getattr(self, name)))
 
     def advance(self):
         self.cursor += 1
-        self.curr_token = self.tokens[self.cursor] if self.cursor < len(self.tokens) else None
+        self.curr_token = self.tokens.get(self.cursor)
         return self.curr_token
 
     def save_cursor(self) -> int:
-        return deepcopy(self.cursor)
+        self.checkpoints.append(self.cursor)
+        return self.cursor
+
+    # marks a saved cursor as no longer needed for backtracking
+    def release_cursor(self, cursor: int):
+        self.checkpoints.pop()
+        if not self.checkpoints:
+            self.tokens.discard_before(self.cursor)
 
     def backtrack(self, cursor: int):
         self.cursor = cursor
-        self.curr_token = self.tokens[self.cursor]
+        self.curr_token = self.tokens.get(self.cursor)
+
+    # tries a production, backtracking to where it started if it fails
+    def attempt(self, eat: Callable[..., ParseResult], *args) -> ParseResult:
+        cursor = self.save_cursor()
+        height = len(self.cst_nodes)
+        result = eat(*args)
+        if result is FAILED:
+            del self.cst_nodes[height:]
+            self.backtracks += 1
+            self.revisits += self.cursor - cursor
+            self.backtrack(cursor)
+            if self.max_revisits is not None and self.revisits > self.max_revisits:
+                raise BudgetExhausted()
+        self.release_cursor(cursor)
+        return result
+
+    # wraps a production so each cursor is parsed once, later calls replay the result
+    def memoize(self, name: str, eat: Callable[[], ParseResult]) -> Callable[[], ParseResult]:
+        memo, nodes = self.memo, self.cst_nodes
+        def eat_memoized() -> ParseResult:
+            key = (name, self.cursor)
+            entry = memo.get(key)
+            if entry is not None:
+                result, end, cst = entry
+                self.backtrack(end)
+                if cst is not None:
+                    nodes.append(cst)
+                return result
+            result = eat()
+            memo[key] = (result, self.cursor, nodes[-1] if result is not FAILED and nodes else None)
+            return result
+        return eat_memoized
+
+    # wraps a production to count its calls, outcomes and revisited tokens, and time it
+    def profiled(self, name: str, eat: Callable[..., ParseResult]) -> Callable[..., ParseResult]:
+        stats = self.profile[name] = ProductionStats(name)
+        def eat_profiled(*args) -> ParseResult:
+            cursor, reached = self.cursor, self.reached
+            start = time.perf_counter()
+            result = eat(*args)
+            stats.time += time.perf_counter() - start
+
+            stats.calls += 1
+            stats.revisits += max(0, min(self.cursor, reached) - cursor)
+            self.reached = max(reached, self.reached, self.cursor)
+            if result is not FAILED:
+                stats.successes += 1
+            else:
+                stats.failures += 1
+                if self.cursor > cursor:
+                    stats.backtracks += 1
+            return result
+        return eat_profiled
+
+    # the profile of every production called, most time first, as a table or as json
+    def profile_report(self, as_json: bool=False) -> str:
+        rows = sorted((stats for stats in self.profile.values() if stats.calls), key=lambda stats: (-stats.time, stats.name))
+        if as_json:
+            return json.dumps([stats.to_dict() for stats in rows], indent=2)
+
+        lines = [f"{'production':<16}{'calls':>10}{'successes':>11}{'failures':>10}{'backtracks':>12}{'revisits':>10}{'time (ms)':>11}"]
+        for stats in rows:
+            lines.append(f"{stats.name:<16}{stats.calls:>10}{stats.successes:>11}{stats.failures:>10}"
+                         f"{stats.backtracks:>12}{stats.revisits:>10}{stats.time * 1e3:>11.2f}")
+        return "\n".join(lines)
+
+    # List -> Item List | '', with a loop rather than a call per item so long lists
+    # do not grow the stack. Returns the ast of every item, the list's cst goes on the stack
+    def eat_repeated(self, eat_item: Callable[[], ParseResult], cst_name: str) -> List[AstNode]:
+        items = []
+        while True:
+            astt = self.attempt(eat_item)
+            if astt is FAILED: break
+            items.append(astt)
+
+        self.cst.reduce_list(cst_name, len(items))
+        return items
 
     def parse(self) -> Tuple[CstNode, Optional[Error], Optional[Program], Any]:
-        cst, err, astt, _ = self.eat_program()
-        if not err and self.curr_token.type != lex.TT_EOF:
-            return cst, IllegalSyntaxError("Invalid Syntax", self.curr_token.lexed_pos), astt, _
-        return cst, err, astt, _
+        try:
+            astt = self.eat_program()
+        except BudgetExhausted:
+            # fail fast with the furthest failure seen so far
+            return None, self.syntax_err(f"gave up after revisiting {self.revisits} tokens"), None, None
+        if astt is FAILED:
+            return None, self.syntax_err(), None, None
+        cst = self.cst_nodes.pop() if self.cst_nodes else None
+        if self.curr_token.kind != lex.K_EOF:
+            self.fail("<EOF>")
+            return cst, self.syntax_err(), astt, None
+        return cst, None, astt, None
 
     """
     ######################## PRODUCTIONS (NON-TERMINALS) ########################
     """
 
-    def eat_program(self) -> Tuple[CstNode, Optional[Error], Optional[Program], Any]:
+    def eat_program(self) -> Union[Program, DeferredError]:
         """NO BACKTRACKING
         Program -> MainClass Program1
         """
-        n1, err, a1, _ = self.eat_mainclass() # mainclass node
-        if err is not None: return n1, err, a1, _
+        a1 = self.eat_mainclass() # mainclass node
+        if a1 is FAILED: return FAILED
 
-        n2, err, a2, _ = self.eat_program1() # classdecls node
-        if err is not None: return n2, err, a1, _
+        a2 = self.eat_program1() # classdecls node
+        if a2 is FAILED: return FAILED
 
-        cst = CstNode(name=CST_PROGRAM, children=[n1,n2])
+        self.cst.reduce(CST_PROGRAM, 2)
         astt = AstNode.make_program(a1, a2)
 
-        return cst, None, astt, None
+        return astt
 
-    def eat_program1(self) -> Tuple[CstNode, Optional[Error], Optional[ClassDecls], Any]:
-        """BACKTRACKING
+    def eat_program1(self) -> Union[ClassDecls, DeferredError]:
+        """LOOP
         Program1 -> ClassDecl Program1
                 | ''
         """
-        cursor = self.save_cursor()
-        node, err, astt, _ = self.eat_program11()
-        if err is None: return node, err, astt, _
-        self.backtrack(cursor)
-
-        cursor = self.save_cursor()
-        node, err, astt, _ = self.eat_program12()
-        if err is None: return node, err, astt, _
-        self.backtrack(cursor)
-
-        # backtracking didn't work, return error
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_program11(self) -> Tuple[CstNode, Optional[Error], Optional[ClassDecls], Any]:
-        """no backtracking
-        Program1 -> ClassDecl Program1
-        """
-        node1, err, a1, _ = self.eat_classdecl() # single classdecl node
-        if err is not None: return node1, err, a1, _
+        classdecls = self.eat_repeated(self.eat_classdecl, CST_PROGRAM1)
+        return AstNode.make_classdecls(classdecls)
 
-        node2, err, a2, _ = self.eat_program1() # classdecls node
-        if err is not None: return node2, err, a2, _
-
-        cst = CstNode(name=CST_PROGRAM1, children=[node1, node2])
-        astt = AstNode.make_classdecls([a1] + a2.children)
-
-        return cst, None, astt, None
-
-    def eat_program12(self) -> ParseResult:
-        """no backtracking
-        Program1 -> ''
-        """
-        cst = CstNode(name=CST_PROGRAM1, children=[CstNode.epsilon()])
-        astt = AstNode.make_classdecls([])
-        return cst, None, astt, None
-
-    def eat_mainclass(self) -> Tuple[CstNode, Optional[Error], Optional[MainClass], Any]:
+    def eat_mainclass(self) -> Union[MainClass, DeferredError]:
         """no backtracking
         MainClass -> class cname { Void main ( FmlList ) MdBody }
         """
         # check for "class"
-        node1, err, _, _ = self.eat_class()
-        if err is not None: return node1, err, _, _
+        if self.eat_class() is FAILED: return FAILED
 
         # check for <cname>
-        node2, err, a2, _ = self.eat_cname()
-        if err is not None: return node2, err, a2, _
+        a2 = self.eat_cname()
+        if a2 is FAILED: return FAILED
 
         # check for '{'
-        node3, err, _, _ = self.eat_l_curly_brace()
-        if err is not None: return node3, err, _, _
+        if self.eat_l_curly_brace() is FAILED: return FAILED
 
         # check for 'void'
-        node4, err, a4, _ = self.eat_void_type()
-        if err is not None: return node4, err, a4, _
+        a4 = self.eat_void_type()
+        if a4 is FAILED: return FAILED
 
         # check for 'main'
-        node5, err, a5, _ = self.eat_id()
-        if err is not None: return node5, err, a5, _
+        a5 = self.eat_id()
+        if a5 is FAILED: return FAILED
 
         # check for '('
-        node6, err, _, _ = self.eat_l_paren()
-        if err is not None: return node6, err, _, _
+        if self.eat_l_paren() is FAILED: return FAILED
 
         # check for FmlList
-        node7, err, a7, _ = self.eat_fmllist()
-        if err is not None: return node7, err, a7, _
+        a7 = self.eat_fmllist()
+        if a7 is FAILED: return FAILED
 
         # check for ')'
-        node8, err, _, _ = self.eat_r_paren()
-        if err is not None: return node8, err, _, _
+        if self.eat_r_paren() is FAILED: return FAILED
 
         # check for MdBody
-        node9, err, a9, _ = self.eat_mdbody()
-        if err is not None: return node9, err, a9, _
+        a9 = self.eat_mdbody()
+        if a9 is FAILED: return FAILED
 
         # check for '}'
-        node10, err, _, _ = self.eat_r_curly_brace()
-        if err is not None: return node10, err, _, _
+        if self.eat_r_curly_brace() is FAILED: return FAILED
 
-        cst = CstNode(name=CST_MAINCLASS, children=[node1,node2,node3,node4,node5,node6,node7,node8,node9,node10])
+        self.cst.reduce(CST_MAINCLASS, 10)
         mainmd = AstNode.make_mddecl(type=a4, id=a5, fmllist=a7, mdbody=a9)
         astt = AstNode.make_mainclass(cname=a2, mainmd=mainmd)
 
-        return cst, None, astt, None
+        return astt
 
     def eat_classdecl(self) -> ParseResult:
         """ClassDecl -> class cname { ClassDecl1 ClassDecl2 }"""
+        # nothing before a class declaration is parsed again, bound the memo to one class
+        if self.memo is not None:
+            self.memo.clear()
+
         # check 'class'
-        n1, err, _, _ = self.eat_class()
-        if err is not None: return n1, err, _, _
+        if self.eat_class() is FAILED: return FAILED
 
         # check 'cname'
-        n2, err, a2, _ = self.eat_cname() # cname node
-        if err is not None: return n2, err, a2, _
+        a2 = self.eat_cname() # cname node
+        if a2 is FAILED: return FAILED
 
         # check '{'
-        n3, err, _, _ = self.eat_l_curly_brace()
-        if err is not None: return n2, err, _, _
+        if self.eat_l_curly_brace() is FAILED: return FAILED
 
         # check ClassDecl1
-        n4, err, a4, _ = self.eat_classdecl1() # vardecls node
-        if err is not None: return n4, err, a4, _
+        a4 = self.eat_classdecl1() # vardecls node
+        if a4 is FAILED: return FAILED
 
         # check ClassDecl2
-        n5, err, a5, _ = self.eat_classdecl2() # mddecls node
-        if err is not None: return n5, err, a5, _
+        a5 = self.eat_classdecl2() # mddecls node
+        if a5 is FAILED: return FAILED
 
         # check '}'
-        n6, err, _, _ = self.eat_r_curly_brace()
-        if err is not None: return n6, err, _, _
+        if self.eat_r_curly_brace() is FAILED: return FAILED
 
-        cst = CstNode(name=CST_CLASSDECL, children=[n1,n2,n3,n4,n5,n6])
+        self.cst.reduce(CST_CLASSDECL, 6)
         astt = AstNode.make_classdecl(a2, a4, a5)
 
-        return cst, None, astt, None
+        return astt
 
     def eat_classdecl1(self) -> ParseResult:
         """ClassDecl1 -> VarDecl ClassDecl1 | '' """
-        cursor = self.save_cursor()
-        node, err, astt, _ = self.eat_classdecl11()
-        if err is None: return node, err, astt, _
-        self.backtrack(cursor)
-
-        cursor = self.save_cursor()
-        node, err, astt, _ = self.eat_classdecl12()
-        if err is None: return node, err, astt, _
-        self.backtrack(cursor)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_classdecl11(self) -> Tuple[CstNode, Optional[Error], Optional[VarDecls], Any]:
-        """ClassDecl1 -> VarDecl ClassDecl1"""
-        # check VarDecl
-        n1, err, a1, _ = self.eat_vardecl() # single vardecl node
-        if err is not None: return n1, err, None, _
-
-        # check ClassDecl1
-        n2, err, a2, _ = self.eat_classdecl1() # vardecls node
-        if err is not None: return n2, err, None, _
-
-        cst = CstNode(name=CST_CLASSDECL1, children=[n1,n2])
-        astt = AstNode.make_vardecls([a1] + a2.children)
-
-        return cst, None, astt, None
-
-    def eat_classdecl12(self) -> Tuple[CstNode, Optional[Error], Optional[VarDecls], Any]:
-        """ClassDecl1 -> '' """
-        cst = CstNode(name=CST_CLASSDECL1, children=[CstNode.epsilon()])
-        astt = AstNode.make_vardecls([])
-        return cst, None, astt, None
+        vardecls = self.eat_repeated(self.eat_vardecl, CST_CLASSDECL1)
+        return AstNode.make_vardecls(vardecls)
 
     def eat_classdecl2(self) -> ParseResult:
         """ClassDecl2 -> MdDecl ClassDecl2 | '' """
-        cursor = self.save_cursor()
-        node, err, astt, _ = self.eat_classdecl21()
-        if err is None: return node, err, astt, _
-        self.backtrack(cursor)
-
-        cursor = self.save_cursor()
-        node, err, astt, _ = self.eat_classdecl22()
-        if err is None: return node, err, astt, _
-        self.backtrack(cursor)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_classdecl21(self) -> Tuple[CstNode, Optional[Error], Optional[MdDecls], Any]:
-        """ClassDecl2 -> MdDecl ClassDecl2"""
-        # MdDecl
-        n1, err, a1, _ = self.eat_mddecl() # single mddecl
-        if err is not None: return n1, err, None, _
-
-        # ClassDecl2
-        n2, err, a2, _ = self.eat_classdecl2() # mddels node
-        if err is not None: return n2, err, None, _
-
-        cst = CstNode(name=CST_CLASSDECL2, children=[n1,n2])
-        astt = AstNode.make_mddecls([a1] + a2.children)
-
-        return cst, None, astt, None
-
-    def eat_classdecl22(self) -> ParseResult:
-        """ClassDecl2 -> '' """
-        cst = CstNode(name=CST_CLASSDECL2, children=[CstNode.epsilon()])
-        astt = AstNode.make_mddecls([])
-        return cst, None, astt, None
+        mddecls = self.eat_repeated(self.eat_mddecl, CST_CLASSDECL2)
+        return AstNode.make_mddecls(mddecls)
 
     def eat_vardecl(self) -> ParseResult:
         """VarDecl -> Type id ; """
         # Type
-        n1, err, a1, _ = self.eat_type()
-        if err is not None: return n1, err, a1, _
+        a1 = self.eat_type()
+        if a1 is FAILED: return FAILED
 
         # id
-        n2, err, a2, _ = self.eat_id()
-        if err is not None: return n2, err, a2, _
+        a2 = self.eat_id()
+        if a2 is FAILED: return FAILED
 
         # ;
-        n3, err, a3, _ = self.eat_semicolon()
-        if err is not None: return n3, err, a3, _
+        if self.eat_semicolon() is FAILED: return FAILED
 
-        cst = CstNode(name=CST_VARDECL, children=[n1,n2,n3])
+        self.cst.reduce(CST_VARDECL, 3)
         astt = AstNode.make_vardecl(a1, a2)
 
-        return cst, None, astt, None
+        return astt
 
-    def eat_mddecl(self) -> Tuple[CstNode, Optional[Error], Optional[MdDecl], Any]:
+    def eat_mddecl(self) -> Union[MdDecl, DeferredError]:
         """MdDecl -> Type id ( FmlList ) MdBody"""
         # Type
-        n1, err, a1, info = self.eat_type()
-        if err is not None: return n1, err, a1, info
+        a1 = self.eat_type()
+        if a1 is FAILED: return FAILED
 
         # id
-        n2, err, a2, info = self.eat_id()
-        if err is not None: return n2, err, a2, info
+        a2 = self.eat_id()
+        if a2 is FAILED: return FAILED
 
         # (
-        n3, err, a3, info = self.eat_l_paren()
-        if err is not None: return n3, err, a3, info
+        if self.eat_l_paren() is FAILED: return FAILED
 
         # Fmllist
-        n4, err, a4, info = self.eat_fmllist()
-        if err is not None: return n4, err, a4, info
+        a4 = self.eat_fmllist()
+        if a4 is FAILED: return FAILED
 
         # )
-        n5, err, a5, info = self.eat_r_paren()
-        if err is not None: return n5, err, a5, info
+        if self.eat_r_paren() is FAILED: return FAILED
 
         # MdBody
-        n6, err, a6, info = self.eat_mdbody()
-        if err is not None: return n6, err, a6, info
+        a6 = self.eat_mdbody()
+        if a6 is FAILED: return FAILED
 
-        cst = CstNode(name=CST_MDDECL, children=[n1,n2,n3,n4,n5,n6])
+        self.cst.reduce(CST_MDDECL, 6)
         astt = AstNode.make_mddecl(a1, a2, a4, a6)
 
-        return cst, None, astt, {}
+        return astt
 
-    def eat_fmllist(self) -> Tuple[CstNode, Optional[Error], Optional[FmlList], Any]:
+    def eat_fmllist(self) -> Union[FmlList, DeferredError]:
         """FmlList -> Type id FmlList1 | '' """
-        cursor = self.save_cursor()
-        node, err, astt, info = self.eat_fmllist01() # list of fml
-        if err is None: return node, err, astt, info
-        self.backtrack(cursor)
+        result = self.attempt(self.eat_fmllist01) # list of fml
+        if result is not FAILED: return result
 
-        cursor = self.save_cursor()
-        node, err, astt, info = self.eat_fmllist02() # empty list of fml
-        if err is None: return node, err, astt, info
-        self.backtrack(cursor)
+        result = self.attempt(self.eat_fmllist02) # empty list of fml
+        if result is not FAILED: return result
 
-        return CstNode.empty(), self.generic_syntax_err(), None, {}
+        return self.fail()
 
     def eat_fmllist01(self) -> ParseResult:
         """FmlList -> Type id FmlList1"""
-        n1, err, a1, info = self.eat_type() # type node
-        if err is not None: return n1, err, a1, info
+        a1 = self.eat_type() # type node
+        if a1 is FAILED: return FAILED
 
-        n2, err, a2, info = self.eat_id() # id node
-        if err is not None: return n2, err, a2, info
+        a2 = self.eat_id() # id node
+        if a2 is FAILED: return FAILED
 
-        n3, err, a3, info = self.eat_fmllist1() #  list of fml
-        if err is not None: return n3, err, a3, info
+        a3 = self.eat_fmllist1() #  list of fml
+        if a3 is FAILED: return FAILED
 
-        cst = CstNode(name=CST_FMLLIST, children=[n1,n2,n3])
-        astt = AstNode.make_fmllist([AstNode.make_fml(a1, a2)] + a3.children)
+        self.cst.reduce(CST_FMLLIST, 3)
+        astt = AstNode.make_fmllist([AstNode.make_fml(a1, a2), *a3.children])
 
-        return cst, None, astt, {}
+        return astt
 
     def eat_fmllist02(self) -> ParseResult:
         """FmlList -> '' """
-        cst = CstNode(name=CST_FMLLIST, children=[CstNode.epsilon()])
-        astt = AstNode.make_fmllist([])
-        return cst, None, astt, {}
+        self.cst.epsilon()
+        self.cst.reduce(CST_FMLLIST, 1)
+        return AstNode.make_fmllist([])
 
     def eat_fmllist1(self) -> ParseResult:
         """FmlList1 -> FmlRest FmlList1 | '' """
-        cursor = self.save_cursor()
-        node, err, astt, info = self.eat_fmllist11() # list of fml
-        if err is None: return node, err, astt, info
-        self.backtrack(cursor)
-
-        cursor = self.save_cursor()
-        node, err, astt, info = self.eat_fmllist12() # empty list
-        if err is None: return node, err, astt, info
-        self.backtrack(cursor)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, {}
-
-    def eat_fmllist11(self) -> ParseResult:
-        """FmlList1 -> FmlRest FmlList1"""
-        n1, err, a1, info = self.eat_fmlrest() # fml node
-        if err is not None: return n1, err, a1, info
-
-        n2, err, a2, info = self.eat_fmllist1() # list of fml
-        if err is not None: return n2, err, a1, info
-
-        cst = CstNode(name=CST_FMLLIST1, children=[n1,n2])
-        astt = AstNode.make_fmllist([a1] + a2.children)
+        fmls = self.eat_repeated(self.eat_fmlrest, CST_FMLLIST1)
+        return AstNode.make_fmllist(fmls)
 
-        return cst, None, astt, {}
-
-    def eat_fmllist12(self) -> ParseResult:
-        """FmlList1 -> '' """
-        cst = CstNode(name=CST_FMLLIST1, children=[CstNode.epsilon()])
-        astt = AstNode.make_fmllist([])
-        return cst, None, astt, {}
-
-    def eat_fmlrest(self) -> Tuple[CstNode, Optional[Error], Optional[Fml], Any]:
+    def eat_fmlrest(self) -> Union[Fml, DeferredError]:
         """FmlRest -> , Type id"""
-        n1, err, a1, info = self.eat_comma()
-        if err is not None: return n1, err, a1, info
+        if self.eat_comma() is FAILED: return FAILED
 
-        n2, err, a2, info = self.eat_type()
-        if err is not None: return n2, err, a2, info
+        a2 = self.eat_type()
+        if a2 is FAILED: return FAILED
 
-        n3, err, a3, info = self.eat_id()
-        if err is not None: return n3, err, a3, info
+        a3 = self.eat_id()
+        if a3 is FAILED: return FAILED
 
-        cst = CstNode(name=CST_FMLREST, children=[n1,n2,n3])
+        self.cst.reduce(CST_FMLREST, 3)
         astt = AstNode.make_fml(a2, a3)
 
-        return cst, None, astt, {}
+        return astt
 
-    def eat_type(self) -> Tuple[CstNode, Optional[Error], Optional['AstType'], Any]:
+    def eat_type(self) -> Union['AstType', DeferredError]:
         """Type -> Int | Bool | String | Void | cname"""
-        cursor = self.save_cursor()
-        node, err, a1, info = self.eat_int_type()
-        if err is None: return node, err, a1, info
-        self.backtrack(cursor)
+        result = self.attempt(self.eat_int_type)
+        if result is not FAILED: return result
 
-        cursor = self.save_cursor()
-        node, err, a1, info= self.eat_bool_type()
-        if err is None: return node, err, a1, info
-        self.backtrack(cursor)
+        result = self.attempt(self.eat_bool_type)
+        if result is not FAILED: return result
 
-        cursor = self.save_cursor()
-        node, err, a1, info = self.eat_str_type()
-        if err is None: return node, err, a1, info
-        self.backtrack(cursor)
+        result = self.attempt(self.eat_str_type)
+        if result is not FAILED: return result
 
-        cursor = self.save_cursor()
-        node, err, a1, info = self.eat_void_type()
-        if err is None: return node, err, a1, info
-        self.backtrack(cursor)
+        result = self.attempt(self.eat_void_type)
+        if result is not FAILED: return result
 
-        cursor = self.save_cursor()
-        node, err, a1, info = self.eat_cname()
-        if err is None: return node, err, a1, info
-        self.backtrack(cursor)
+        result = self.attempt(self.eat_cname)
+        if result is not FAILED: return result
 
-        return CstNode.empty(), self.generic_syntax_err(), None, {}
+        return self.fail()
 
-    def eat_mdbody(self) -> Tuple[CstNode, Optional[Error], Optional[MdBody], Any]:
+    def eat_mdbody(self) -> Union[MdBody, DeferredError]:
         """MdBody -> { MdBody1 Stmt MdBody2 }"""
-        n1, err, a1, _ = self.eat_l_curly_brace()
-        if err is not None: return n1, err, a1, _
+        if self.eat_l_curly_brace() is FAILED: return FAILED
 
-        n2, err, a2, _ = self.eat_mdbody1() # vardecls node
-        if err is not None: return n2, err, a2, _
+        a2 = self.eat_mdbody1() # vardecls node
+        if a2 is FAILED: return FAILED
 
-        n3, err, a3, _ = self.eat_stmt() # stmts node
-        if err is not None: return n3, err, a3, _
+        a3 = self.eat_stmt() # stmts node
+        if a3 is FAILED: return FAILED
 
-        n4, err, a4, _ = self.eat_mdbody2() # stmts node
-        if err is not None: return n4, err, a4, _
+        a4 = self.eat_mdbody2() # stmts node
+        if a4 is FAILED: return FAILED
 
-        n5, err, a5, _ = self.eat_r_curly_brace()
-        if err is not None: return n5, err, a5, _
+        if self.eat_r_curly_brace() is FAILED: return FAILED
 
-        cst = CstNode(name=CST_MDBODY, children=[n1,n2,n3,n4,n5])
+        self.cst.reduce(CST_MDBODY, 5)
         tmp = AstNode.make_stmts(a3.children + a4.children)
         astt = AstNode.make_mdbody(a2, tmp)
 
-        return cst, None, astt, None
+        return astt
 
-    def eat_mdbody1(self) -> Tuple[CstNode, Optional[Error], Optional[VarDecls], Any]:
+    def eat_mdbody1(self) -> Union[VarDecls, DeferredError]:
         """MdBody1 -> VarDecl MdBody1 | '' """
-        cursor = self.save_cursor()
-        node, err, astt, _ = self.eat_mdbody11() # vardecls node
-        if err is None: return node, err, astt, _
-        self.backtrack(cursor)
-
-        cursor = self.save_cursor()
-        node, err, astt, _ = self.eat_mdbody12() # vardecls node
-        if err is None: return node, err, astt, _
-        self.backtrack(cursor)
+        vardecls = self.eat_repeated(self.eat_vardecl, CST_MDBODY1)
+        return AstNode.make_vardecls(vardecls)
 
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_mdbody11(self) -> Tuple[CstNode, Optional[Error], Optional[VarDecls], Any]:
-        """MdBody1 -> VarDecl MdBody1"""
-        n1, err, a1, _ = self.eat_vardecl() # node w/ single child [vardecl]
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, _ = self.eat_mdbody1() # node w/ children [vardecl]
-        if err is not None: return n2, err, a2, _
-
-        cst = CstNode(name=CST_MDBODY1, children=[n1,n2])
-        astt = AstNode.make_vardecls([a1] + a2.children)
-
-        return cst, None, astt, None
-
-    def eat_mdbody12(self) -> Tuple[CstNode, Optional[Error], Optional[VarDecls], Any]:
-        """MdBody1 -> '' """
-        cst = CstNode(name=CST_MDBODY1, children=[CstNode.epsilon()])
-        astt = AstNode.make_vardecls([])
-        return cst, None, astt, None
-
-    def eat_mdbody2(self) -> Tuple[CstNode, Optional[Error], Optional[Stmts], Any]:
+    def eat_mdbody2(self) -> Union[Stmts, DeferredError]:
         """MdBody2 -> Stmt MdBody2 | '' """
-        cursor = self.save_cursor()
-        node, err, astt, _ = self.eat_mdbody21() # stmts node
-        if err is None: return node, err, astt, _
-        self.backtrack(cursor)
-
-        cursor = self.save_cursor()
-        node, err, astt, _ = self.eat_mdbody22() # stmts node
-        if err is None: return node, err, astt, _
-        self.backtrack(cursor)
+        stmts = self.eat_repeated(self.eat_stmt, CST_MDBODY2)
+        return AstNode.make_stmts([s for a in stmts for s in a.children])
 
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_mdbody21(self) -> Tuple[CstNode, Optional[Error], Optional[Stmts], Any]:
-        """MdBody2 -> Stmt MdBody2"""
-        n1, err, a1, _ = self.eat_stmt() # stmts node
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, _ = self.eat_mdbody2() # stmts node
-        if err is not None: return n2, err, a2, _
-
-        cst = CstNode(name=CST_MDBODY2, children=[n1,n2])
-        astt = AstNode.make_stmts(a1.children + a2.children)
-
-        return cst, None, astt, None
-
-    def eat_mdbody22(self) -> Tuple[CstNode, Optional[Error], Optional[Stmts], Any]:
-        """MdBody2 -> '' """
-        cst = CstNode(name=CST_MDBODY2, children=[CstNode.epsilon()])
-        astt = AstNode.make_stmts([])
-        return cst, None, astt, None
-
-    def eat_stmt(self) -> Tuple[CstNode, Optional[Error], Optional[Stmts], Any]:
+    def eat_stmt(self) -> Union[Stmts, DeferredError]:
         """
         Stmt -> if ( Exp ) { Stmt Stmt1 } else { Stmt Stmt1 }
             | while ( Exp ) { Stmt1 }
@@ -523,901 +593,265 @@ class Parser:
             | return Exp ;
             | return ;
         """
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_stmt01() # if statement node
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_stmt02() # while statement
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_stmt03() # readln
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_stmt04() # println
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_stmt05() # id = Exp;
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_stmt06() # Atom . id = Exp;
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_stmt07() # Atom ; (atom is type function call)
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_stmt09() # return Exp;
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_stmt010() # return;
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_stmt01(self) -> Tuple[CstNode, Optional[Error], Optional[Stmts], Any]:
+        result = self.attempt(self.eat_stmt01) # if statement node
+        if result is not FAILED: return result
+
+        result = self.attempt(self.eat_stmt02) # while statement
+        if result is not FAILED: return result
+
+        result = self.attempt(self.eat_stmt03) # readln
+        if result is not FAILED: return result
+
+        result = self.attempt(self.eat_stmt04) # println
+        if result is not FAILED: return result
+
+        result = self.attempt(self.eat_stmt05) # id = Exp;
+        if result is not FAILED: return result
+
+        result = self.attempt(self.eat_stmt06) # Atom . id = Exp;
+        if result is not FAILED: return result
+
+        result = self.attempt(self.eat_stmt07) # Atom ; (atom is type function call)
+        if result is not FAILED: return result
+
+        result = self.attempt(self.eat_stmt09) # return Exp;
+        if result is not FAILED: return result
+
+        result = self.attempt(self.eat_stmt010) # return;
+        if result is not FAILED: return result
+
+        return self.fail()
+
+    def eat_stmt01(self) -> Union[Stmts, DeferredError]:
         """Stmt -> if ( Exp ) { Stmt Stmt1 } else { Stmt Stmt1 }"""
-        n1, err, _, _ = self.eat_if()
-        if err is not None: return n1, err, _, _
+        if self.eat_if() is FAILED: return FAILED
 
-        n2, err, _, _ = self.eat_l_paren()
-        if err is not None: return n2, err, _, _
+        if self.eat_l_paren() is FAILED: return FAILED
 
-        n3, err, a3, _ = self.eat_exp() # exp node
-        if err is not None: return n3, err, a3, _
+        a3 = self.eat_exp() # exp node
+        if a3 is FAILED: return FAILED
 
-        n4, err, _, _ = self.eat_r_paren()
-        if err is not None: return n4, err, _, _
+        if self.eat_r_paren() is FAILED: return FAILED
 
-        n5, err, _, _ = self.eat_l_curly_brace()
-        if err is not None: return n5, err, _, _
+        if self.eat_l_curly_brace() is FAILED: return FAILED
 
-        n6, err, a6, _ = self.eat_stmt() # stmts node
-        if err is not None: return n6, err, a6, _
+        a6 = self.eat_stmt() # stmts node
+        if a6 is FAILED: return FAILED
 
-        n7, err, a7, _ = self.eat_stmt1() # stmts node
-        if err is not None: return n6, err, a7, _
+        a7 = self.eat_stmt1() # stmts node
+        if a7 is FAILED: return FAILED
 
-        n8, err, _, _ = self.eat_r_curly_brace()
-        if err is not None: return n8, err, _, _
+        if self.eat_r_curly_brace() is FAILED: return FAILED
 
-        n9, err, _, _ = self.eat_else()
-        if err is not None: return n9, err, _, _
+        if self.eat_else() is FAILED: return FAILED
 
-        n10, err, _, _ = self.eat_l_curly_brace()
-        if err is not None: return n10, err, _, _
+        if self.eat_l_curly_brace() is FAILED: return FAILED
 
-        n11, err, a11, _ = self.eat_stmt() # stmts ndoe
-        if err is not None: return n11, err, a11, _
+        a11 = self.eat_stmt() # stmts ndoe
+        if a11 is FAILED: return FAILED
 
-        n12, err, a12, _ = self.eat_stmt1() # stmts node
-        if err is not None: return n12, err, a12, _
+        a12 = self.eat_stmt1() # stmts node
+        if a12 is FAILED: return FAILED
 
-        n13, err, _, _ = self.eat_r_curly_brace()
-        if err is not None: return n13, err, _, _
+        if self.eat_r_curly_brace() is FAILED: return FAILED
 
-        cst = CstNode(name=CST_STMT, children=[n1,n2,n3,n4,n5,n6,n7,n8,n9,n10,n11,n12,n13])
+        self.cst.reduce(CST_STMT, 13)
         if_stmts = AstNode.make_stmts(a6.children + a7.children)
         else_stmts = AstNode.make_stmts(a11.children + a12.children)
         astt = AstNode.make_stmts([AstNode.make_if_statement(a3, if_stmts, else_stmts)])
 
-        return cst, None, astt, None
+        return astt
 
-    def eat_stmt02(self) -> Tuple[CstNode, Optional[Error], Optional[Stmts], Any]:
+    def eat_stmt02(self) -> Union[Stmts, DeferredError]:
         """Stmt -> while ( Exp ) { Stmt1 }"""
-        n1, err, _, _ = self.eat_while()
-        if err is not None: return n1, err, _, _
+        if self.eat_while() is FAILED: return FAILED
 
-        n2, err, _, _ = self.eat_l_paren()
-        if err is not None: return n2, err, _, _
+        if self.eat_l_paren() is FAILED: return FAILED
 
-        n3, err, a3, _ = self.eat_exp()
-        if err is not None: return n3, err, a3, _
+        a3 = self.eat_exp()
+        if a3 is FAILED: return FAILED
 
-        n4, err, _, _ = self.eat_r_paren()
-        if err is not None: return n4, err, _, _
+        if self.eat_r_paren() is FAILED: return FAILED
 
-        n5, err, _, _ = self.eat_l_curly_brace()
-        if err is not None: return n5, err, _, _
+        if self.eat_l_curly_brace() is FAILED: return FAILED
 
-        n6, err, a6, _ = self.eat_stmt1()
-        if err is not None: return n6 ,err, a6, _
+        a6 = self.eat_stmt1()
+        if a6 is FAILED: return FAILED
 
-        n7, err, _, _ = self.eat_r_curly_brace()
-        if err is not None: return n7, err, _, _
+        if self.eat_r_curly_brace() is FAILED: return FAILED
 
-        cst = CstNode(name=CST_STMT, children=[n1,n2,n3,n4,n5,n6,n7])
+        self.cst.reduce(CST_STMT, 7)
         astt = AstNode.make_stmts([AstNode.make_while_statement(a3, a6)])
 
-        return cst, None, astt, None
+        return astt
 
-    def eat_stmt03(self) -> Tuple[CstNode, Optional[Error], Optional[Stmts], Any]:
+    def eat_stmt03(self) -> Union[Stmts, DeferredError]:
         """Stmt -> readln ( id ) ;"""
-        n1, err, _, _ = self.eat_readln()
-        if err is not None: return n1, err, _, _
+        if self.eat_readln() is FAILED: return FAILED
 
-        n2, err, _, _ = self.eat_l_paren()
-        if err is not None: return n2, err, _, _
+        if self.eat_l_paren() is FAILED: return FAILED
 
-        n3, err, a3, _ = self.eat_id()
-        if err is not None: return n3, err, a3, _
+        a3 = self.eat_id()
+        if a3 is FAILED: return FAILED
 
-        n4, err, _, _ = self.eat_r_paren()
-        if err is not None: return n4, err, _, _
+        if self.eat_r_paren() is FAILED: return FAILED
 
-        n5, err, _, _ = self.eat_semicolon()
-        if err is not None: return n5, err, _, _
+        if self.eat_semicolon() is FAILED: return FAILED
 
-        cst = CstNode(name=CST_STMT, children=[n1,n2,n3,n4,n5])
+        self.cst.reduce(CST_STMT, 5)
         astt = AstNode.make_stmts([AstNode.make_readln(a3)])
 
-        return cst, None, astt, None
+        return astt
 
-    def eat_stmt04(self) -> Tuple[CstNode, Optional[Error], Optional[Stmts], Any]:
+    def eat_stmt04(self) -> Union[Stmts, DeferredError]:
         """Stmt -> println ( Exp ) ;"""
-        n1, err, _, _ = self.eat_println()
-        if err is not None: return n1, err, _, _
+        if self.eat_println() is FAILED: return FAILED
 
-        n2, err, _, _ = self.eat_l_paren()
-        if err is not None: return n2, err, _, _
+        if self.eat_l_paren() is FAILED: return FAILED
 
-        n3, err, a3, _ = self.eat_exp()
-        if err is not None: return n3, err, a3, _
+        a3 = self.eat_exp()
+        if a3 is FAILED: return FAILED
 
-        n4, err, _, _ = self.eat_r_paren()
-        if err is not None: return n4, err, _, _
+        if self.eat_r_paren() is FAILED: return FAILED
 
-        n5, err, _, _ = self.eat_semicolon()
-        if err is not None: return n5, err, _, _
+        if self.eat_semicolon() is FAILED: return FAILED
 
-        cst = CstNode(name=CST_STMT, children=[n1,n2,n3,n4,n5])
+        self.cst.reduce(CST_STMT, 5)
         astt = AstNode.make_stmts([AstNode.make_println(a3)])
 
-        return cst, None, astt, None
+        return astt
 
-    def eat_stmt05(self) -> Tuple[CstNode, Optional[Error], Optional[Stmts], Any]:
+    def eat_stmt05(self) -> Union[Stmts, DeferredError]:
         """Stmt -> id = Exp ;"""
-        n1, err, a1, _ = self.eat_id()
-        if err is not None: return n1, err, a1, _
+        a1 = self.eat_id()
+        if a1 is FAILED: return FAILED
 
-        n2, err, _, _ = self.eat_assign()
-        if err is not None: return n2, err, _, _
+        if self.eat_assign() is FAILED: return FAILED
 
-        n3, err, a3, _ = self.eat_exp()
-        if err is not None: return n3, err, a3, _
+        a3 = self.eat_exp()
+        if a3 is FAILED: return FAILED
 
-        n4, err, _, _ = self.eat_semicolon()
-        if err is not None: return n4, err, _, _
+        if self.eat_semicolon() is FAILED: return FAILED
 
-        cst = CstNode(name=CST_STMT, children=[n1,n2,n3,n4])
+        self.cst.reduce(CST_STMT, 4)
         astt = AstNode.make_stmts([AstNode.make_assignment_statement(a1, a3)])
 
-        return cst, None, astt, None
+        return astt
 
-    def eat_stmt06(self) -> Tuple[CstNode, Optional[Error], Optional[Stmts], Any]:
+    def eat_stmt06(self) -> Union[Stmts, DeferredError]:
         """Stmt -> Atom = Exp ; (atom is type field access)"""
-        n1, err, a1, _ = self.eat_atom()
-        if not a1 or a1.name != AST_FIELD_ACCESS:
-            return n1, self.generic_syntax_err(), a1, _
-        if err is not None: return n1, err, a1, _
+        a1 = self.eat_atom()
+        if a1 is FAILED or a1.name != AST_FIELD_ACCESS:
+            return self.fail()
 
-        n4, err, _, _ = self.eat_assign()
-        if err is not None: return n4, err, _, _
+        if self.eat_assign() is FAILED: return FAILED
 
-        n5, err, a5, _ = self.eat_exp()
-        if err is not None: return n5, err, a5, _
+        a5 = self.eat_exp()
+        if a5 is FAILED: return FAILED
 
-        n6, err, _, _ = self.eat_semicolon()
-        if err is not None: return n6, err, _, _
+        if self.eat_semicolon() is FAILED: return FAILED
 
-        cst = CstNode(name=CST_STMT, children=[n1,n4,n5,n6])
+        self.cst.reduce(CST_STMT, 4)
         astt = AstNode.make_stmts([AstNode.make_assignment_statement(a1, a5)])
 
-        return cst, None, astt, None
+        return astt
 
-    def eat_stmt07(self) -> Tuple[CstNode, Optional[Error], Optional[Stmts], Any]:
+    def eat_stmt07(self) -> Union[Stmts, DeferredError]:
         """Stmt -> Atom ; (atom is type function call)"""
-        n1, err, a1, _ = self.eat_atom()
-        if not a1 or a1.name != AST_METHOD_CALL:
-            return n1, self.generic_syntax_err(), a1, _
-        if err is not None: return n1, err, a1, _
+        a1 = self.eat_atom()
+        if a1 is FAILED or a1.name != AST_METHOD_CALL:
+            return self.fail()
 
-        n5, err, _, _ = self.eat_semicolon()
-        if err is not None: return n5, err, _, _
+        if self.eat_semicolon() is FAILED: return FAILED
 
-        cst = CstNode(name=CST_STMT, children=[n1,n5])
+        self.cst.reduce(CST_STMT, 2)
         astt = AstNode.make_stmts([a1])
 
-        return cst, None, astt, None
+        return astt
 
-    def eat_stmt09(self) -> Tuple[CstNode, Optional[Error], Optional[Stmts], Any]:
+    def eat_stmt09(self) -> Union[Stmts, DeferredError]:
         """Stmt -> return Exp ;"""
-        n1, err, _, _ = self.eat_return()
-        if err is not None: return n1, err, _, _
+        if self.eat_return() is FAILED: return FAILED
 
-        n2, err, a2, _ = self.eat_exp()
-        if err is not None: return n2, err, a2, _
+        a2 = self.eat_exp()
+        if a2 is FAILED: return FAILED
 
-        n3, err, _, _ = self.eat_semicolon()
-        if err is not None: return n3, err, _ , _
+        if self.eat_semicolon() is FAILED: return FAILED
 
-        cst = CstNode(name=CST_STMT, children=[n1,n2,n3])
+        self.cst.reduce(CST_STMT, 3)
         astt = AstNode.make_stmts([AstNode.make_return_statement(a2)])
 
-        return cst, None, astt, None
+        return astt
 
-    def eat_stmt010(self) -> Tuple[CstNode, Optional[Error], Optional[Stmts], Any]:
+    def eat_stmt010(self) -> Union[Stmts, DeferredError]:
         """Stmt -> return ;"""
-        n1, err, _, _ = self.eat_return()
-        if err is not None: return n1, err, _, _
+        if self.eat_return() is FAILED: return FAILED
 
-        n2, err, _, _ = self.eat_semicolon()
-        if err is not None: return n2, err, _, _
+        if self.eat_semicolon() is FAILED: return FAILED
 
-        cst = CstNode(name=CST_STMT, children=[n1,n2])
+        self.cst.reduce(CST_STMT, 2)
         astt = AstNode.make_stmts([AstNode.make_return_statement()])
 
-        return cst, None, astt, None
+        return astt
 
-    def eat_stmt1(self) -> Tuple[CstNode, Optional[Error], Optional[Stmts], Any]:
+    def eat_stmt1(self) -> Union[Stmts, DeferredError]:
         """Stmt1 -> Stmt Stmt1 | '' """
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_stmt11() # stmts node
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_stmt12() # stmts node
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_stmt11(self) -> Tuple[CstNode, Optional[Error], Optional[Stmts], Any]:
-        """Stmt1 -> Stmt Stmt1"""
-        n1, err, a1, _ = self.eat_stmt() # stmts node, one child
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, _ = self.eat_stmt1() # stmts node, multiple children
-        if err is not None: return n2, err, a2, _
-
-        cst = CstNode(name=CST_STMT1, children=[n1,n2])
-        astt = AstNode.make_stmts(a1.children + a2.children)
-
-        return cst, None, astt, None
-
-    def eat_stmt12(self) -> Tuple[CstNode, Optional[Error], Optional[Stmts], Any]:
-        """Stmt1 -> '' """
-        return CstNode(name=CST_STMT1, children=[CstNode.epsilon()]), None, AstNode.make_stmts([]), None
-
-    def eat_exp(self) -> Tuple[CstNode, Optional[Error], Optional[Exp], Any]:
-        """Exp -> BExp | AExp | SExp"""
-        def backtrack_pick_longest(lst):
-            ans = max(lst, key=itemgetter(0))
-            self.backtrack(ans[0])
-            return ans[1]
-
-        c = self.save_cursor()
-        bNode, bErr, bAst, _ = self.eat_bexp()
-        bAns = (bNode, bErr, bAst, _)
-        bPos = self.cursor # store how far we travelled
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        sNode, sErr, sAst, _ = self.eat_sexp()
-        sAns = (sNode, sErr, sAst, _)
-        sPos = self.cursor
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        aNode, aErr, aAst, _ = self.eat_aexp()
-        aAns = (aNode, aErr, aAst, _)
-        aPos = self.cursor
-        self.backtrack(c)
-
-        # all paths failed
-        if bErr and sErr and aErr:
-            return CstNode.empty(), self.generic_syntax_err(), None, None
-
-        # else, pick the longest path
-        lst = [(bPos, bAns), (sPos, sAns), (aPos, aAns)]
-        return backtrack_pick_longest(lst)
-
-    def eat_bexp(self) -> ParseResult:
-        """BExp -> Conj BExp1"""
-        n1, err, a1, _ = self.eat_conj() # conj node
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, conjs = self.eat_bexp1() # empty node, conjs list
-        if err is not None: return n2, err, a2, conjs
-
-        def generate(lst):
-            if len(lst) == 1:
-                return lst[0]
-            return AstNode.make_or_op(generate(lst[:-1]), lst[-1])
-
-        new_conjs = [a1] + conjs
-        astt = generate(new_conjs)
-        cst = CstNode(name=CST_BEXP, children=[n1,n2])
-
-        return cst, None, astt, None
-
-    def eat_bexp1(self) -> ParseResult:
-        """BExp1 -> || Conj BExp1 | '' """
-        c = self.save_cursor()
-        node, err, astt, rexps = self.eat_bexp11()
-        if err is None: return node, err, astt, rexps
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, rexps = self.eat_bexp12()
-        if err is None: return node, err, astt, rexps
-        self.backtrack(c)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-
-    def eat_bexp11(self) -> ParseResult:
-        """BExp1 -> || Conj BExp1"""
-        n1, err, _, _ = self.eat_or()
-        if err is not None: return n1, err, _, _
-
-        n2, err, a2, _ = self.eat_conj()
-        if err is not None: return n2, err, a2, _
-
-        n3, err, _, conjs = self.eat_bexp1()
-        if err is not None: return n3, err, _, conjs
-
-        cst = CstNode(name=CST_BEXP1, children=[n1,n2,n3])
-        astt = None
-        rexps = [a2] + conjs
-
-        return cst, None, astt, rexps
-
-    def eat_bexp12(self) -> ParseResult:
-        """BExp1 -> '' """
-        return CstNode(name=CST_BEXP1, children=[CstNode.epsilon()]), None, None, []
-
-    def eat_conj(self) -> ParseResult:
-        """Conj -> RExp Conj1"""
-        n1, err, a1, _ = self.eat_rexp() # rexp node
-        if err is not None: return n1, err, a1, _
-
-        n2, err, _, rexps = self.eat_conj1() # && node, may have no children (epsilon)
-        if err is not None: return n2, err, _, rexps
-
-        def generate(lst):
-            if len(lst) == 1:
-                return lst[0]
-            return AstNode.make_and_op(generate(lst[:-1]), lst[-1])
-
-        new_rexps = [a1] + rexps
-        astt = generate(new_rexps)
-        cst = CstNode(name=CST_CONJ, children=[n1,n2])
-
-        return cst, None, astt, None
-
-    def eat_conj1(self) -> ParseResult:
-        """Conj1 -> && RExp Conj1 | '' """
-        c = self.save_cursor()
-        node, err, astt, rexps = self.eat_conj11()
-        if err is None: return node, err, astt, rexps
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, rexps = self.eat_conj12()
-        if err is None: return node, err, astt, rexps
-        self.backtrack(c)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_conj11(self) -> ParseResult:
-        """Conj1 -> && RExp Conj1"""
-        n1, err, _, _ = self.eat_and()
-        if err is not None: return n1, err, _, _
-
-        n2, err, a2, _ = self.eat_rexp()
-        if err is not None: return n2, err, a2, _
-
-        n3, err, a3, rexps = self.eat_conj1()
-        if err is not None: return n3, err, a3, rexps
-
-        rexp_nodes = [a2] + rexps
-        cst = CstNode(name=CST_CONJ1, children=[n1,n2,n3])
-
-        return cst, None, None, rexp_nodes
-
-    def eat_conj12(self) -> ParseResult:
-        """Conj1 -> '' """
-        return CstNode(name=CST_CONJ1, children=[CstNode.epsilon()]), None, None, []
-
-    def eat_rexp(self) -> ParseResult:
-        """RExp -> AExp BOp AExp | BGrd"""
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_rexp01() # bop node
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_rexp02() # bgrd node
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_rexp01(self) -> ParseResult:
-        """RExp -> AExp BOp AExp"""
-        n1, err, a1, _ = self.eat_aexp()
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, _ = self.eat_bop() # terminal > < >= <= == != node
-        if err is not None: return n2, err, a2, _
-
-        n3, err, a3, _ = self.eat_aexp()
-        if err is not None: return n3, err, a3, _
-
-        cst = CstNode(name=CST_REXP, children=[n1,n2,n3])
-        astt = a2
-        astt.set_left_child(a1)
-        astt.set_right_child(a3)
-        # astt.children.extend([a1, a3]) ######## THE ORDER HERE MATTERS!!! ########
-
-        return cst, None, astt, None
-
-    def eat_rexp02(self) -> ParseResult:
-        """RExp -> BGrd"""
-        n1, err, astt, _ = self.eat_bgrd() # bgrd node
-        if err is not None: return n1, err, astt, _
-
-        return CstNode(name=CST_REXP, children=[n1]), None, astt, None
-
-    def eat_bop(self) -> ParseResult:
-        """BOp -> < | > | <= | >= | == | !="""
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_bop01()
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_bop02()
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_bop03()
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_bop04()
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_bop05()
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_bop06()
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_bop01(self) -> Tuple[CstNode, Optional[Error], Optional[Lt], Any]:
-        """BOp -> < """
-        n1, err, astt, _ = self.eat_lt()
-        if err is not None: return n1, err, astt, _
-
-        return CstNode(name=CST_BOP, children=[n1]), None, astt, None
-
-    def eat_bop02(self) -> Tuple[CstNode, Optional[Error], Optional[Gt], Any]:
-        """BOp -> > """
-        n1, err, astt, _ = self.eat_gt()
-        if err is not None: return n1, err, astt, _
-
-        return CstNode(name=CST_BOP, children=[n1]), None, astt, None
-
-    def eat_bop03(self) -> Tuple[CstNode, Optional[Error], Optional[Le], Any]:
-        """BOp -> <= """
-        n1, err, astt, _ = self.eat_le()
-        if err is not None: return n1, err, astt, _
-
-        return CstNode(name=CST_BOP, children=[n1]), None, astt, None
+        stmts = self.eat_repeated(self.eat_stmt, CST_STMT1)
+        return AstNode.make_stmts([s for a in stmts for s in a.children])
 
-    def eat_bop04(self) -> Tuple[CstNode, Optional[Error], Optional[Ge], Any]:
-        """BOp -> >= """
-        n1, err, astt, _ = self.eat_ge()
-        if err is not None: return n1, err, astt, _
+    def eat_exp(self) -> Union[Exp, DeferredError]:
+        """Exp -> BExp | AExp | SExp
 
-        return CstNode(name=CST_BOP, children=[n1]), None, astt, None
-
-    def eat_bop05(self) -> Tuple[CstNode, Optional[Error], Optional[Eq], Any]:
-        """BOp -> == """
-        n1, err, astt, _ = self.eat_dbl_eq()
-        if err is not None: return n1, err, astt, _
-
-        return CstNode(name=CST_BOP, children=[n1]), None, astt, None
-
-    def eat_bop06(self) -> Tuple[CstNode, Optional[Error], Optional[Ne], Any]:
-        """BOp -> != """
-        n1, err, astt, _ = self.eat_ne()
-        if err is not None: return n1, err, astt, _
-
-        return CstNode(name=CST_BOP, children=[n1]), None, astt, None
-
-    def eat_bgrd(self) -> ParseResult:
-        """BGrd -> ! BGrd | true | false | Atom"""
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_bgrd01() # negate node
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_bgrd02() # actual true terminal node
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_bgrd03() # actual false terminal node
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_bgrd04() # Atom node
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_bgrd01(self) -> Tuple[CstNode, Optional[Error], Optional[Complement], Any]:
-        """BGrd -> ! BGrd"""
-        n1, err, a1, _ = self.eat_exclamation()
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, _ = self.eat_bgrd() # actual bgrd/true/false/Atom
-        if err is not None: return n2, err, a2, _
-
-        cst = CstNode(name=CST_BGRD, children=[n1,n2])
-        astt = AstNode.make_complement(a2)
-
-        return cst, None, astt, None
-
-    def eat_bgrd02(self) -> Tuple[CstNode, Optional[Error], Optional[TrueLit], Any]:
-        """Bgrd -> true"""
-        n1, err, astt, _ = self.eat_true()
-        if err is not None: return n1, err, astt, _
-
-        return CstNode(name=CST_BGRD, children=[n1]), None, astt, None
-
-    def eat_bgrd03(self) -> Tuple[CstNode, Optional[Error], Optional[FalseLit], Any]:
-        """Bgrd -> false"""
-        n1, err, astt, _ = self.eat_false()
-        if err is not None: return n1, err, astt, _
-
-        return CstNode(name=CST_BGRD, children=[n1]), None, astt, None
-
-    def eat_bgrd04(self) -> ParseResult:
-        """Bgrd -> Atom"""
-        n1, err, astt, _ = self.eat_atom() # Atom node
-        if err is not None: return n1, err, astt, _
-
-        return CstNode(name=CST_BGRD, children=[n1]), None, astt, None
-
-    def eat_aexp(self) -> ParseResult:
-        """AExp -> Term AExp1"""
-        n1, err, a1, _ = self.eat_term() # term node
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, ops = self.eat_aexp1() # (operators, terms)
-        if err is not None: return n2, err, a2, ops
-
-        def generate(operators, terms):
-            if len(operators) == 0 and len(terms) == 1:
-                return terms[0]
-            if operators[-1] == "+":
-                return AstNode.make_plus_op(generate(operators[:-1], terms[:-1]), terms[-1])
-            return AstNode.make_minus_op(generate(operators[:-1], terms[:-1]), terms[-1])
-
-        cst = CstNode(name=CST_AEXP, children=[n1,n2])
-        operators: List[str] = ops[0]
-        terms = [a1] + ops[1]
-        if len(operators) == 0 and len(terms) == 0:
-            astt = a1 # only term
-        else:
-            astt = generate(operators, terms)
-
-        return cst, None, astt, None
-
-    def eat_aexp1(self) -> Tuple[CstNode, Optional[Error], None, Any]:
-        """AExp1 -> + Term AExp1 | - Term AExp1 | '' """
-        c = self.save_cursor()
-        node, err, astt, ops = self.eat_aexp11()
-        if err is None: return node, err, astt, ops
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, ops = self.eat_aexp12()
-        if err is None: return node, err, astt, ops
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, ops = self.eat_aexp13()
-        if err is None: return node, err, astt, ops
-        self.backtrack(c)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_aexp11(self) -> Tuple[CstNode, Optional[Error], None, Any]:
-        """AExp1 -> + Term AExp1"""
-        n1, err, a1, _ = self.eat_plus()
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, _ = self.eat_term()
-        if err is not None: return n2, err, a2, _
-
-        n3, err, a3, ops = self.eat_aexp1() # empty node, (operators, terms)
-        if err is not None: return n3, err, a3, ops
-
-        cst = CstNode(name=CST_AEXP1, children=[n1,n2,n3])
-        operators = ["+"] + ops[0]
-        terms = [a2] + ops[1]
-
-        return cst, None, None, (operators, terms)
-
-    def eat_aexp12(self) -> Tuple[CstNode, Optional[Error], None, Any]:
-        """AExp1 -> - Term AExp1"""
-        n1, err, a1, _ = self.eat_minus()
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, _ = self.eat_term()
-        if err is not None: return n2, err, a2, _
-
-        n3, err, a3, ops = self.eat_aexp1()
-        if err is not None: return n3, err, a3, ops
-
-        cst = CstNode(name=CST_AEXP1, children=[n1,n2,n3])
-        operators = ["-"] + ops[0]
-        terms = [a2] + ops[1]
-
-        return cst, None, None, (operators, terms)
-
-    def eat_aexp13(self) -> Tuple[CstNode, Optional[Error], None, Any]:
-        """AExp1 -> '' """
-        cst = CstNode(name=CST_AEXP1, children=[CstNode.epsilon()])
-        return cst, None, None, ([], [])
-
-    def eat_term(self) -> ParseResult:
-        """Term -> Ftr Term1"""
-        n1, err, a1, ops = self.eat_ftr()
-        if err is not None: return n1, err, a1, ops
-
-        n2, err, a2, ops = self.eat_term1()
-        if err is not None: return n2, err, a2, ops
-
-        def generate(operators, factors):
-            if len(operators) == 0 and len(factors) == 1:
-                return factors[0]
-            if operators[-1] == "*":
-                return AstNode.make_mult_op(generate(operators[:-1], factors[:-1]), factors[-1])
-            return AstNode.make_div_op(generate(operators[:-1], factors[:-1]), factors[-1])
-
-        cst = CstNode(name=CST_TERM, children=[n1,n2])
-        operators: List[str] = ops[0]
-        factors: List[AstNode] = [a1] + ops[1]
-        if len(operators) == 0 and len(factors) == 0:
-            astt = a1 # only factor
-        else:
-            astt = generate(operators, factors)
-
-        return cst, None, astt, None
-
-    def eat_term1(self) -> Tuple[CstNode, Optional[Error], None, Any]:
-        """Term1 -> * Ftr Term1 | / Ftr Term1 | '' """
-        c = self.save_cursor()
-        node, err, astt, ops = self.eat_term11()
-        if err is None: return node, err, astt, ops
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, ops = self.eat_term12()
-        if err is None: return node, err, astt, ops
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, ops = self.eat_term13()
-        if err is None: return node, err, astt, ops
-        self.backtrack(c)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_term11(self) -> Tuple[CstNode, Optional[Error], None, Any]:
-        """Term1 -> * Ftr Term1 """
-        n1, err, a1, _ = self.eat_mult()
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, _ = self.eat_ftr()
-        if err is not None: return n2, err, a2, _
-
-        n3, err, a3, ops = self.eat_term1()
-        if err is not None: return n3, err, a3, ops
-
-        cst = CstNode(name=CST_TERM1, children=[n1,n2,n3])
-        operators = ["*"] + ops[0]
-        factors = [a2] + ops[1]
-
-        return cst, None, None, (operators, factors)
-
-    def eat_term12(self) -> Tuple[CstNode, Optional[Error], None, Any]:
-        """Term1 -> / Ftr Term1 """
-        n1, err, a1, _ = self.eat_div()
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, _ = self.eat_ftr()
-        if err is not None: return n2, err, a2, _
-
-        n3, err, a3, ops = self.eat_term1()
-        if err is not None: return n3, err, a3, ops
-
-        cst = CstNode(name=CST_TERM1, children=[n1,n2,n3])
-        operators = ["/"] + ops[0]
-        factors = [a2] + ops[1]
-
-        return cst, None, None, (operators, factors)
-
-    def eat_term13(self) -> Tuple[CstNode, Optional[Error], None, Any]:
-        """Term1 -> '' """
-        cst = CstNode(name=CST_TERM1, children=[CstNode.epsilon()])
-        return cst, None, None, ([], [])
-
-    def eat_ftr(self) -> ParseResult:
-        """Ftr -> integer_literal | - Ftr | Atom"""
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_ftr01()
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_ftr02()
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_ftr03()
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_ftr01(self) -> Tuple[CstNode, Optional[Error], Optional[IntegerLiteral], Any]:
-        """Ftr -> integer_literal"""
-        n1, err, a1, _ = self.eat_int_literal()
-        if err is not None: return n1, err, a1, _
-
-        return CstNode(name=CST_FTR, children=[n1]), None, a1, None
-
-    def eat_ftr02(self) -> Tuple[CstNode, Optional[Error], Optional[Unegative], Any]:
-        """Ftr -> - Ftr"""
-        n1, err, a1, _ = self.eat_minus()
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, _ = self.eat_ftr()
-        if err is not None: return n2, err, a2, _
-
-        cst = CstNode(name=CST_FTR, children=[n1,n2])
-        astt = AstNode.make_unegative(a2)
-
-        return cst, None, astt, None
-
-    def eat_ftr03(self) -> ParseResult:
-        """Ftr -> Atom"""
-        n1, err, a1, _ = self.eat_atom()
-        if err is not None: return n1, err, a1, _
-
-        return CstNode(name=CST_FTR, children=[n1]), None, a1, None
-
-    def eat_sexp(self) -> ParseResult:
-        """SExp -> string_literal SExp1 | Atom SExp1"""
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_sexp01()
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_sexp02()
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_sexp01(self) -> ParseResult:
-        """SExp -> string_literal SExp1"""
-        n1, err, a1, _ = self.eat_str_literal()
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, astt_nodes = self.eat_sexp1() # astt_nodes = list of AstNode of string_literal or Atom
-        if err is not None: return n2, err, a2, astt_nodes
-
-        def generate(s):
-            if len(s) == 1:
-                return s[0]
-            return AstNode.make_plus_op(generate(s[:-1]), s[-1])
-
-        new_sexps = [a1] + astt_nodes
-        astt = generate(new_sexps)
-        cst = CstNode(name=CST_SEXP, children=[n1,n2])
-
-        return cst, None, astt, new_sexps
-
-    def eat_sexp02(self) -> ParseResult:
-        """SExp -> Atom SExp1"""
-        n1, err, a1, _ = self.eat_atom()
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, astt_nodes = self.eat_sexp1()
-        if err is not None: return n2, err, a2, astt_nodes
-
-        def generate(s):
-            if len(s) == 1:
-                return s[0]
-            return AstNode.make_plus_op(generate(s[:-1]), s[-1])
-
-        new_sexps = [a1] + astt_nodes
-        astt = generate(new_sexps)
-        cst = CstNode(name=CST_SEXP, children=[n1,n2])
-
-        return cst, None, astt, new_sexps
-
-    def eat_sexp1(self) -> ParseResult:
-        """SExp1 -> + SExp SExp1 | '' """
-        c = self.save_cursor()
-        node, err, astt, sexps = self.eat_sexp11()
-        if err is None: return node, err, astt, sexps
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, sexps = self.eat_sexp12()
-        if err is None: return node, err, astt, sexps
-        self.backtrack(c)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_sexp11(self) -> ParseResult:
-        """SExp1 -> + SExp SExp1"""
-        n1, err, a1, _ = self.eat_plus()
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, sexps2 = self.eat_sexp()
-        if err is not None: return n2, err, a2, _
-
-        n3, err, a3, sexps3 = self.eat_sexp1()
-        if err is not None: return n3, err, a3, sexps3
-
-        cst = CstNode(name=CST_SEXP1, children=[n1,n2,n3])
-        astt = None
-
-        return cst, None, astt, sexps2+sexps3
-
-    def eat_sexp12(self) -> ParseResult:
-        """SExp1 -> '' """
-        cst = CstNode(name=CST_SEXP1, children=[CstNode.epsilon()])
-        return cst, None, None, []
+        Parsed in one left-to-right pass by precedence climbing over EXP_OPERATORS. Whether
+        the expression is a BExp, AExp or SExp is left to static checking.
+        """
+        return self.eat_binary(0)
+
+    def eat_binary(self, min_prec: int) -> ParseResult:
+        """Operand (BinaryOp Operand)*, for the operators binding tighter than min_prec"""
+        astt = self.eat_operand()
+        if astt is FAILED: return FAILED
+
+        op = EXP_OPERATORS.get(self.curr_token.kind)
+        while op is not None and op[0] > min_prec:
+            prec, eat_op, make, cst_name = op
+
+            eat_op(self)
+            right = self.eat_binary(prec)
+            if right is FAILED: return FAILED
+
+            self.cst.reduce(cst_name, 3)
+            astt = make(astt, right)
+
+            # RExp -> AExp BOp AExp does not chain, the right operand stops before a second
+            # comparison and so does every operator around it
+            op = EXP_OPERATORS.get(self.curr_token.kind)
+            if op is not None and (op[0] > prec or op[0] == prec == PREC_REL):
+                break
+
+        return astt
+
+    def eat_operand(self) -> ParseResult:
+        """Operand -> - Operand | ! Operand | integer_literal | string_literal | true | false | Atom"""
+        if self.is_minus():
+            self.eat_minus()
+            a2 = self.eat_operand()
+            if a2 is FAILED: return FAILED
+            self.cst.reduce(CST_FTR, 2)
+            return AstNode.make_unegative(a2)
+
+        if self.is_exclamation():
+            self.eat_exclamation()
+            a2 = self.eat_operand()
+            if a2 is FAILED: return FAILED
+            self.cst.reduce(CST_BGRD, 2)
+            return AstNode.make_complement(a2)
+
+        if self.is_int_literal(): return self.eat_int_literal()
+        if self.is_str_literal(): return self.eat_str_literal()
+        if self.is_true(): return self.eat_true()
+        if self.is_false(): return self.eat_false()
+        return self.eat_atom()
 
     def eat_atom(self) -> ParseResult:
         """
@@ -1427,716 +861,1073 @@ class Parser:
             | ( Exp ) Atom1
             | null Atom1
         """
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_atom01()
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_atom02()
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
+        # every alternative starts with a different terminal, only one of them can match
+        if self.is_this(): eat = self.eat_atom01
+        elif self.is_id(): eat = self.eat_atom02
+        elif self.is_new(): eat = self.eat_atom03
+        elif self.is_l_paren(): eat = self.eat_atom04
+        elif self.is_null(): eat = self.eat_atom05
+        else: return self.fail("<atom>")
 
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_atom03()
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
+        result = self.attempt(eat)
+        if result is not FAILED: return result
 
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_atom04()
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_atom05()
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, None
+        return self.fail()
 
     def eat_atom01(self) -> ParseResult:
         """Atom -> this Atom1"""
-        n1, err, a1, _ = self.eat_this()
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, head = self.eat_atom1()
-        if err is not None: return n2, err, a2, head
+        a1 = self.eat_this()
+        if a1 is FAILED: return FAILED
 
-        cst = CstNode(name=CST_ATOM, children=[n1,n2])
+        astt = self.eat_atom1(a1)
+        if astt is FAILED: return FAILED
 
-        if a2.name == AST_EPSILON:
-            astt = a1
-        else:
-            a2.set_left_child(a1)
-            astt = head
-
-        return cst, None, astt, None
+        self.cst.reduce(CST_ATOM, 2)
+        return astt
 
     def eat_atom02(self) -> ParseResult:
         """Atom -> id Atom1"""
-        n1, err, a1, _ = self.eat_id()
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, head = self.eat_atom1()
-        if err is not None: return n2, err, a2, head
+        a1 = self.eat_id()
+        if a1 is FAILED: return FAILED
 
-        cst = CstNode(name=CST_ATOM, children=[n1,n2])
+        astt = self.eat_atom1(a1)
+        if astt is FAILED: return FAILED
 
-        if a2.name == AST_EPSILON:
-            astt = a1
-        else:
-            a2.set_left_child(a1)
-            astt = head
-
-        return cst, None, astt, None
+        self.cst.reduce(CST_ATOM, 2)
+        return astt
 
     def eat_atom03(self) -> ParseResult:
         """Atom -> new cname ( ) Atom1"""
-        n1, err, a1, _ = self.eat_new()
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, _ = self.eat_cname()
-        if err is not None: return n2, err, a2, _
+        if self.eat_new() is FAILED: return FAILED
 
-        n3, err, a3, _ = self.eat_l_paren()
-        if err is not None: return n3, err, a3, _
+        a2 = self.eat_cname()
+        if a2 is FAILED: return FAILED
 
-        n4, err, a4, _ = self.eat_r_paren()
-        if err is not None: return n4, err, a4, _
+        if self.eat_l_paren() is FAILED: return FAILED
 
-        n5, err, a5, head = self.eat_atom1()
-        if err is not None: return n5, err, a5, head
+        if self.eat_r_paren() is FAILED: return FAILED
 
-        cst = CstNode(name=CST_ATOM, children=[n1,n2,n3,n4,n5])
+        astt = self.eat_atom1(AstNode.make_class_instance_creation(a2))
+        if astt is FAILED: return FAILED
 
-        if a5.name == AST_EPSILON:
-            astt = AstNode.make_class_instance_creation(a2)
-        else:
-            a5.set_left_child(AstNode.make_class_instance_creation(a2))
-            astt = head
-
-        return cst, None, astt, None
+        self.cst.reduce(CST_ATOM, 5)
+        return astt
 
     def eat_atom04(self) -> ParseResult:
         """Atom -> ( Exp ) Atom1 """
-        n1, err, _, _ = self.eat_l_paren()
-        if err is not None: return n1, err, _, _
+        if self.eat_l_paren() is FAILED: return FAILED
 
-        n2, err, a2, _ = self.eat_exp()
-        if err is not None: return n2, err, a2, _
+        a2 = self.eat_exp()
+        if a2 is FAILED: return FAILED
 
-        n3, err, _, _ = self.eat_r_paren()
-        if err is not None: return n3, err, _, _
+        if self.eat_r_paren() is FAILED: return FAILED
 
-        n4, err, a4, head = self.eat_atom1()
-        if err is not None: return n4, err, a4, head
+        astt = self.eat_atom1(a2)
+        if astt is FAILED: return FAILED
 
-        cst = CstNode(name=CST_ATOM, children=[n1,n2,n3,n4])
-
-        if a4.name == AST_EPSILON:
-            astt = a2
-        else:
-            a4.set_left_child(a2)
-            astt = head
-
-        return cst, None, astt, None
+        self.cst.reduce(CST_ATOM, 4)
+        return astt
 
     def eat_atom05(self) -> ParseResult:
         """Atom -> null Atom1 """
-        n1, err, a1, _ = self.eat_null()
-        if err is not None: return n1, err, a1, _
+        a1 = self.eat_null()
+        if a1 is FAILED: return FAILED
 
-        n2, err, a2, head = self.eat_atom1()
-        if err is not None: return n2, err, a2, head
+        astt = self.eat_atom1(a1)
+        if astt is FAILED: return FAILED
 
-        cst = CstNode(name=CST_ATOM, children=[n1,n2])
-
-        if a2.name == AST_EPSILON:
-            astt = a1
-        else:
-            a2.set_left_child(a1)
-            astt = head
-
-        return cst, None, astt, None
+        self.cst.reduce(CST_ATOM, 2)
+        return astt
 
-    def eat_atom1(self) -> ParseResult:
+    # Atom1 applies its accesses and calls to left, the atom before it, so each one is built
+    # with its left child in place and the outermost is returned
+    def eat_atom1(self, left: AstNode) -> ParseResult:
         """Atom1 -> . id Atom1 | ( ExpList ) Atom1 | ( ) Atom1 | '' """
-        # try to eat the most at each step
-        c = self.save_cursor()
-        node, err, astt, head = self.eat_atom11()
-        if err is None: return node, err, astt, head
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, head = self.eat_atom12()
-        if err is None: return node, err, astt, head
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, head = self.eat_atom13()
-        if err is None: return node, err, astt, head
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, head = self.eat_atom14()
-        if err is None: return node, err, astt, head
-        self.backtrack(c)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_atom11(self) -> ParseResult:
-        """Atom1 -> . id Atom1"""
-        n1, err, _, _ = self.eat_dot()
-        if err is not None: return n1, err, _, _
-
-        n2, err, a2, _ = self.eat_id()
-        if err is not None: return n2, err, a2, _
+        # try to eat the most at each step, skipping alternatives whose first terminal can't match
+        if self.is_dot():
+            result = self.attempt(self.eat_atom11, left)
+            if result is not FAILED: return result
 
-        n3, err, a3, head = self.eat_atom1()
-        if err is not None: return n3, err, a3, head
+        elif self.is_l_paren():
+            result = self.attempt(self.eat_atom12, left)
+            if result is not FAILED: return result
 
-        cst = CstNode(name=CST_ATOM1, children=[n1, n2, n3])
-        if a3.name == AST_EPSILON:
-            astt = AstNode.make_field_access(None, a2)
-            head = astt
-        else:
-            # replace the left child (should be None)
-            astt = AstNode.make_field_access(None, a2)
-            a3.set_left_child(astt)
+            result = self.attempt(self.eat_atom13, left)
+            if result is not FAILED: return result
 
-        return cst, None, astt, head
+        return self.eat_atom14(left)
 
-    def eat_atom12(self) -> ParseResult:
-        """Atom1 -> ( ExpList ) Atom1"""
-        n1, err, _, _ = self.eat_l_paren()
-        if err is not None: return n1, err, _, _
+    def eat_atom11(self, left: AstNode) -> ParseResult:
+        """Atom1 -> . id Atom1"""
+        if self.eat_dot() is FAILED: return FAILED
 
-        n2, err, a2, _ = self.eat_explist()
-        if err is not None: return n2, err, a2, _
+        a2 = self.eat_id()
+        if a2 is FAILED: return FAILED
 
-        n3, err, _, _ = self.eat_r_paren()
-        if err is not None: return n3, err, _, _
+        astt = self.eat_atom1(AstNode.make_field_access(left, a2))
+        if astt is FAILED: return FAILED
 
-        n4, err, a4, head = self.eat_atom1()
-        if err is not None: return n4, err, a4, head
+        self.cst.reduce(CST_ATOM1, 3)
+        return astt
 
-        if a4.name == AST_EPSILON:
-            astt = AstNode.make_method_call(None, a2)
-            head = astt
-        else:
-            # replace the left child (should be None)
-            astt = AstNode.make_method_call(None, a2)
-            a4.set_left_child(astt)
+    def eat_atom12(self, left: AstNode) -> ParseResult:
+        """Atom1 -> ( ExpList ) Atom1"""
+        if self.eat_l_paren() is FAILED: return FAILED
 
-        cst = CstNode(name=CST_ATOM1, children=[n1, n2, n3, n4])
+        a2 = self.eat_explist()
+        if a2 is FAILED: return FAILED
 
-        return cst, None, astt, head
+        if self.eat_r_paren() is FAILED: return FAILED
 
-    def eat_atom13(self) -> ParseResult:
-        """Atom1 -> ( ) Atom1"""
-        n1, err, _, _ = self.eat_l_paren()
-        if err is not None: return n1, err, _, _
+        astt = self.eat_atom1(AstNode.make_method_call(left, a2))
+        if astt is FAILED: return FAILED
 
-        n2, err, _, _ = self.eat_r_paren()
-        if err is not None: return n2, err, _, _
+        self.cst.reduce(CST_ATOM1, 4)
+        return astt
 
-        n3, err, a3, head = self.eat_atom1()
-        if err is not None: return n3, err, a3, head
+    def eat_atom13(self, left: AstNode) -> ParseResult:
+        """Atom1 -> ( ) Atom1"""
+        if self.eat_l_paren() is FAILED: return FAILED
 
-        if a3.name == AST_EPSILON:
-            astt = AstNode.make_method_call(None, AstNode.make_explist([]))
-            head = astt
-        else:
-            # replace the left child (should be None)
-            astt = AstNode.make_method_call(None, AstNode.make_explist([]))
-            a3.set_left_child(astt)
+        if self.eat_r_paren() is FAILED: return FAILED
 
-        cst = CstNode(name=CST_ATOM1, children=[n1, n2, n3])
+        astt = self.eat_atom1(AstNode.make_method_call(left, AstNode.make_explist([])))
+        if astt is FAILED: return FAILED
 
-        return cst, None, astt, head
+        self.cst.reduce(CST_ATOM1, 3)
+        return astt
 
-    def eat_atom14(self) -> ParseResult:
+    def eat_atom14(self, left: AstNode) -> ParseResult:
         """Atom1 -> '' """
-        return CstNode(name=CST_ATOM1, children=[CstNode.epsilon()]), None, AstNode.epsilon(), None
+        self.cst.epsilon()
+        self.cst.reduce(CST_ATOM1, 1)
+        return left
 
-    def eat_explist(self) -> Tuple[CstNode, Optional[Error], Optional[ExpList], Any]:
+    def eat_explist(self) -> Union[ExpList, DeferredError]:
         """ExpList -> Exp ExpList1 """
-        n1, err, a1, _ = self.eat_exp()
-        if err is not None: return n1, err, a1, _ # exp node
+        a1 = self.eat_exp()
+        if a1 is FAILED: return FAILED # exp node
 
-        n2, err, a2, _ = self.eat_explist1() # explist node
-        if err is not None: return n2, err, a2, _
+        a2 = self.eat_explist1() # explist node
+        if a2 is FAILED: return FAILED
 
-        cst = CstNode(name=CST_EXPLIST, children=[n1,n2])
-        astt = AstNode.make_explist([a1] + a2.children)
+        self.cst.reduce(CST_EXPLIST, 2)
+        astt = AstNode.make_explist([a1, *a2.children])
 
-        return cst, None, astt, None
+        return astt
 
-    def eat_explist1(self) -> Tuple[CstNode, Optional[Error], Optional[ExpList], Any]:
+    def eat_explist1(self) -> Union[ExpList, DeferredError]:
         """"ExpList1 -> ExpRest ExpList1 | '' """
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_explist11() # explist node
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        c = self.save_cursor()
-        node, err, astt, _ = self.eat_explist12() # explist node
-        if err is None: return node, err, astt, _
-        self.backtrack(c)
-
-        return CstNode.empty(), self.generic_syntax_err(), None, None
-
-    def eat_explist11(self) -> Tuple[CstNode, Optional[Error], Optional[ExpList], Any]:
-        """ExpList1 -> ExpList ExpList1"""
-        n1, err, a1, _ = self.eat_exprest() # explist node
-        if err is not None: return n1, err, a1, _
-
-        n2, err, a2, _ = self.eat_explist1() # explist node
-        if err is not None: return n2, err, a2, _
-
-        cst = CstNode(name=CST_EXPLIST1, children=[n1,n2])
-        astt = AstNode.make_explist(a1.children + a2.children)
-
-        return cst, None, astt, None
-
-    def eat_explist12(self) -> Tuple[CstNode, Optional[Error], Optional[ExpList], Any]:
-        """ExpList1 -> '' """
-        return CstNode(name=CST_EXPLIST1, children=[CstNode.epsilon()]), None, AstNode.make_explist([]), None
+        exps = self.eat_repeated(self.eat_exprest, CST_EXPLIST1)
+        return AstNode.make_explist([e for a in exps for e in a.children])
 
-    def eat_exprest(self) -> Tuple[CstNode, Optional[Error], Optional[ExpList], Any]:
+    def eat_exprest(self) -> Union[ExpList, DeferredError]:
         """ExpRest -> , Exp"""
-        n1, err, _, _ = self.eat_comma()
-        if err is not None: return n1, err, _, _
+        if self.eat_comma() is FAILED: return FAILED
 
-        n2, err, a2, _ = self.eat_exp()
-        if err is not None: return n2, err, a2, _
+        a2 = self.eat_exp()
+        if a2 is FAILED: return FAILED
 
-        cst = CstNode(name=CST_EXPREST, children=[n1,n2])
+        self.cst.reduce(CST_EXPREST, 2)
         astt = AstNode.make_explist([a2])
 
-        return cst, None, astt, None
+        return astt
 
     """
     ######################## PRODUCTIONS (TERMINALS) ########################
     """
-    def eat_class(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_class(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_class():
-            return CstNode.empty(), self.syntax_err(f"expected 'class', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'class'")
         self.advance()
-        return CstNode.class_kw(tok), None, None, None
+        self.cst.class_kw(tok)
+        return None
 
-    def eat_cname(self) -> Tuple[CstNode, Optional[Error], Optional[Cname], Any]:
+    def eat_cname(self) -> Union[Cname, DeferredError]:
         tok = self.curr_token
         if not self.is_cname_type():
-            return CstNode.empty(), self.syntax_err(f"expected <classname>, got {self.curr_token}", self.curr_token), None, None
+            return self.fail("<classname>")
         self.advance()
-        return CstNode.cname_type(tok), None, AstNode.make_cname(tok), None
+        self.cst.cname_type(tok)
+        return AstNode.make_cname(tok)
 
-    def eat_int_type(self) -> Tuple[CstNode, Optional[Error], Optional[Int], Any]:
+    def eat_int_type(self) -> Union[Int, DeferredError]:
         tok = self.curr_token
         if not self.is_int_type():
-            return CstNode.empty(), self.syntax_err(f"expected 'Int', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'Int'")
         self.advance()
-        return CstNode.int_type(tok), None, AstNode.make_int(), None
+        self.cst.int_type(tok)
+        return AstNode.make_int()
 
-    def eat_bool_type(self) -> Tuple[CstNode, Optional[Error], Optional[Bool], Any]:
+    def eat_bool_type(self) -> Union[Bool, DeferredError]:
         tok = self.curr_token
         if not self.is_bool_type():
-            return CstNode.empty(), self.syntax_err(f"expected 'Bool', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'Bool'")
         self.advance()
-        return CstNode.bool_type(tok), None, AstNode.make_bool(), None
+        self.cst.bool_type(tok)
+        return AstNode.make_bool()
 
-    def eat_str_type(self) -> Tuple[CstNode, Optional[Error], Optional[String], Any]:
+    def eat_str_type(self) -> Union[String, DeferredError]:
         tok = self.curr_token
         if not self.is_str_type():
-            return CstNode.empty(), self.syntax_err(f"expected 'String', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'String'")
         self.advance()
-        return CstNode.str_type(tok), None, AstNode.make_string(), None
+        self.cst.str_type(tok)
+        return AstNode.make_string()
 
-    def eat_void_type(self) -> Tuple[CstNode, Optional[Error], Optional[Void], Any]:
+    def eat_void_type(self) -> Union[Void, DeferredError]:
         tok = self.curr_token
         if not self.is_void_type():
-            return CstNode.empty(), self.syntax_err(f"expected 'Void', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'Void'")
         self.advance()
-        return CstNode.void_type(tok), None, AstNode.make_void(), None
+        self.cst.void_type(tok)
+        return AstNode.make_void()
 
-    def eat_l_curly_brace(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_l_curly_brace(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_l_curly_brace():
-            return CstNode.empty(), self.syntax_err(f"expected '{{', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'{'")
         self.advance()
-        return CstNode.l_curly_brace(tok), None, None, None
+        self.cst.l_curly_brace(tok)
+        return None
 
-    def eat_r_curly_brace(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_r_curly_brace(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_r_curly_brace():
-            return CstNode.empty(), self.syntax_err(f"expected '}}', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'}'")
         self.advance()
-        return CstNode.r_curly_brace(tok), None, None, None
+        self.cst.r_curly_brace(tok)
+        return None
 
-    def eat_l_paren(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_l_paren(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_l_paren():
-            return CstNode.empty(), self.syntax_err(f"expected '(', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'('")
         self.advance()
-        return CstNode.l_paren(tok), None, None, None
+        self.cst.l_paren(tok)
+        return None
 
-    def eat_r_paren(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_r_paren(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_r_paren():
-            return CstNode.empty(), self.syntax_err(f"expected ')', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("')'")
         self.advance()
-        return CstNode.r_paren(tok), None, None, None
+        self.cst.r_paren(tok)
+        return None
 
-    def eat_semicolon(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_semicolon(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_semicolon():
-            return CstNode.empty(), self.syntax_err(f"expected ';', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("';'")
         self.advance()
-        return CstNode.semicolon(tok), None, None, None
+        self.cst.semicolon(tok)
+        return None
 
-    def eat_comma(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_comma(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_comma():
-            return CstNode.empty(), self.syntax_err(f"expected ',', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("','")
         self.advance()
-        return CstNode.comma(tok), None, None, None
+        self.cst.comma(tok)
+        return None
 
-    def eat_dot(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_dot(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_dot():
-            return CstNode.empty(), self.syntax_err(f"expected '.', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'.'")
         self.advance()
-        return CstNode.dot(tok), None, None, None
+        self.cst.dot(tok)
+        return None
 
-    def eat_id(self) -> Tuple[CstNode, Optional[Error], Optional[Id], Any]:
+    def eat_id(self) -> Union[Id, DeferredError]:
         tok = self.curr_token
         if not self.is_id():
-            return CstNode.empty(), self.syntax_err(f"expected <id>, got {self.curr_token}", self.curr_token), None, None
+            return self.fail("<id>")
         self.advance()
-        return CstNode.id(tok), None, AstNode.make_id(tok), None
+        self.cst.id(tok)
+        return AstNode.make_id(tok)
 
-    def eat_plus(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_plus(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_plus():
-            return CstNode.empty(), self.syntax_err(f"expected '+', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'+'")
         self.advance()
-        return CstNode.plus(tok), None, None, None
+        self.cst.plus(tok)
+        return None
 
-    def eat_minus(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_minus(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_minus():
-            return CstNode.empty(), self.syntax_err(f"expected '-', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'-'")
         self.advance()
-        return CstNode.minus(tok), None, None, None
+        self.cst.minus(tok)
+        return None
 
-    def eat_mult(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_mult(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_mult():
-            return CstNode.empty(), self.syntax_err(f"expected '*', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'*'")
         self.advance()
-        return CstNode.mult(tok), None, None, None
+        self.cst.mult(tok)
+        return None
 
-    def eat_div(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_div(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_div():
-            return CstNode.empty(), self.syntax_err(f"expected '/', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'/'")
         self.advance()
-        return CstNode.div(tok), None, None, None
+        self.cst.div(tok)
+        return None
 
-    def eat_assign(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_assign(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_assign():
-            return CstNode.empty(), self.syntax_err(f"expected '=', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'='")
         self.advance()
-        return CstNode.assign(tok), None, None, None
+        self.cst.assign(tok)
+        return None
 
-    def eat_dbl_eq(self) -> Tuple[CstNode, Optional[Error], Optional[Eq], Any]:
+    def eat_dbl_eq(self) -> Union[Eq, DeferredError]:
         tok = self.curr_token
         if not self.is_dbl_eq():
-            return CstNode.empty(), self.syntax_err(f"expected '==', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'=='")
         self.advance()
-        return CstNode.dbl_eq(tok), None, AstNode.make_eq(), None
+        self.cst.dbl_eq(tok)
+        return AstNode.make_eq()
 
-    def eat_lt(self) -> Tuple[CstNode, Optional[Error], Optional[Lt], Any]:
+    def eat_lt(self) -> Union[Lt, DeferredError]:
         tok = self.curr_token
         if not self.is_lt():
-            return CstNode.empty(), self.syntax_err(f"expected '<', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'<'")
         self.advance()
-        return CstNode.lt(tok), None, AstNode.make_lt(), None
+        self.cst.lt(tok)
+        return AstNode.make_lt()
 
-    def eat_gt(self) -> Tuple[CstNode, Optional[Error], Optional[Gt], Any]:
+    def eat_gt(self) -> Union[Gt, DeferredError]:
         tok = self.curr_token
         if not self.is_gt():
-            return CstNode.empty(), self.syntax_err(f"expected '>', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'>'")
         self.advance()
-        return CstNode.gt(tok), None, AstNode.make_gt(), None
+        self.cst.gt(tok)
+        return AstNode.make_gt()
 
-    def eat_le(self) -> Tuple[CstNode, Optional[Error], Optional[Le], Any]:
+    def eat_le(self) -> Union[Le, DeferredError]:
         tok = self.curr_token
         if not self.is_le():
-            return CstNode.empty(), self.syntax_err(f"expected '<=', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'<='")
         self.advance()
-        return CstNode.le(tok), None, AstNode.make_le(), None
+        self.cst.le(tok)
+        return AstNode.make_le()
 
-    def eat_ge(self) -> Tuple[CstNode, Optional[Error], Optional[Ge], Any]:
+    def eat_ge(self) -> Union[Ge, DeferredError]:
         tok = self.curr_token
         if not self.is_ge():
-            return CstNode.empty(), self.syntax_err(f"expected '>=', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'>='")
         self.advance()
-        return CstNode.ge(tok), None, AstNode.make_ge(), None
+        self.cst.ge(tok)
+        return AstNode.make_ge()
 
-    def eat_ne(self) -> Tuple[CstNode, Optional[Error], Optional[Ne], Any]:
+    def eat_ne(self) -> Union[Ne, DeferredError]:
         tok = self.curr_token
         if not self.is_ne():
-            return CstNode.empty(), self.syntax_err(f"expected '!=', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'!='")
         self.advance()
-        return CstNode.ne(tok), None, AstNode.make_ne(), None
+        self.cst.ne(tok)
+        return AstNode.make_ne()
 
-    def eat_if(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_if(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_if():
-            return CstNode.empty(), self.syntax_err(f"expected 'if', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'if'")
         self.advance()
-        return CstNode.if_kw(tok), None, None, None
+        self.cst.if_kw(tok)
+        return None
 
-    def eat_else(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_else(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_else():
-            return CstNode.empty(), self.syntax_err(f"expected 'else', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'else'")
         self.advance()
-        return CstNode.else_kw(tok), None, None, None
+        self.cst.else_kw(tok)
+        return None
 
-    def eat_while(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_while(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_while():
-            return CstNode.empty(), self.syntax_err(f"expected 'while', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'while'")
         self.advance()
-        return CstNode.while_kw(tok), None, None, None
+        self.cst.while_kw(tok)
+        return None
 
-    def eat_readln(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_readln(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_readln():
-            return CstNode.empty(), self.syntax_err(f"expected 'readln', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'readln'")
         self.advance()
-        return CstNode.readln_kw(tok), None, None, None # not a terminal astt since may accept args
+        self.cst.readln_kw(tok)
+        return None # not a terminal astt since may accept args
 
-    def eat_println(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_println(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_println():
-            return CstNode.empty(), self.syntax_err(f"expected 'println', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'println'")
         self.advance()
-        return CstNode.println_kw(tok), None, None, None # not a terminal astt since may accept args
+        self.cst.println_kw(tok)
+        return None # not a terminal astt since may accept args
 
-    def eat_return(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_return(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_return():
-            return CstNode.empty(), self.syntax_err(f"expected 'return', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'return'")
         self.advance()
-        return CstNode.return_kw(tok), None, None, None # since return may include exp, not considered as terminal
+        self.cst.return_kw(tok)
+        return None # since return may include exp, not considered as terminal
 
-    def eat_true(self) -> Tuple[CstNode, Optional[Error], Optional[TrueLit], Any]:
+    def eat_true(self) -> Union[TrueLit, DeferredError]:
         tok = self.curr_token
         if not self.is_true():
-            return CstNode.empty(), self.syntax_err(f"expected 'true', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'true'")
         self.advance()
-        return CstNode.true_kw(tok), None, AstNode.make_true(tok), None
+        self.cst.true_kw(tok)
+        return AstNode.make_true(tok)
 
-    def eat_false(self) -> Tuple[CstNode, Optional[Error], Optional[FalseLit], Any]:
+    def eat_false(self) -> Union[FalseLit, DeferredError]:
         tok = self.curr_token
         if not self.is_false():
-            return CstNode.empty(), self.syntax_err(f"expected 'false', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'false'")
         self.advance()
-        return CstNode.false_kw(tok), None, AstNode.make_false(tok), None
+        self.cst.false_kw(tok)
+        return AstNode.make_false(tok)
 
-    def eat_this(self) -> Tuple[CstNode, Optional[Error], Optional[This], Any]:
+    def eat_this(self) -> Union[This, DeferredError]:
         tok = self.curr_token
         if not self.is_this():
-            return CstNode.empty(), self.syntax_err(f"expected 'this', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'this'")
         self.advance()
-        return CstNode.this_kw(tok), None, AstNode.make_this(tok), None
+        self.cst.this_kw(tok)
+        return AstNode.make_this(tok)
 
-    def eat_new(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_new(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_new():
-            return CstNode.empty(), self.syntax_err(f"expected 'new', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'new'")
         self.advance()
-        return CstNode.new_kw(tok), None, None, None
+        self.cst.new_kw(tok)
+        return None
 
-    def eat_null(self) -> Tuple[CstNode, Optional[Error], Optional[Null], Any]:
+    def eat_null(self) -> Union[Null, DeferredError]:
         tok = self.curr_token
         if not self.is_null():
-            return CstNode.empty(), self.syntax_err(f"expected 'null', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'null'")
         self.advance()
-        return CstNode.null_kw(tok), None, AstNode.make_null(tok), None
+        self.cst.null_kw(tok)
+        return AstNode.make_null(tok)
 
-    def eat_or(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_or(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_or():
-            return CstNode.empty(), self.syntax_err(f"expected '||', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'||'")
         self.advance()
-        return CstNode.boolean_or(tok), None, None, None
+        self.cst.boolean_or(tok)
+        return None
 
-    def eat_and(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_and(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_and():
-            return CstNode.empty(), self.syntax_err(f"expected '&&', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'&&'")
         self.advance()
-        return CstNode.boolean_and(tok), None, None, None
+        self.cst.boolean_and(tok)
+        return None
 
-    def eat_exclamation(self) -> Tuple[CstNode, Optional[Error], None, Any]:
+    def eat_exclamation(self) -> Optional[DeferredError]:
         tok = self.curr_token
         if not self.is_exclamation():
-            return CstNode.empty(), self.syntax_err(f"expected '!', got {self.curr_token}", self.curr_token), None, None
+            return self.fail("'!'")
         self.advance()
-        return CstNode.exclamation(tok), None, None, None
+        self.cst.exclamation(tok)
+        return None
 
-    def eat_int_literal(self) -> Tuple[CstNode, Optional[Error], Optional[IntegerLiteral], Any]:
+    def eat_int_literal(self) -> Union[IntegerLiteral, DeferredError]:
         tok = self.curr_token
         if not self.is_int_literal():
-            return CstNode.empty(), self.syntax_err(f"expected <int_literal>, got {self.curr_token}", self.curr_token), None, None
+            return self.fail("<int_literal>")
         self.advance()
-        return CstNode.int_literal(tok), None, AstNode.make_integer_literal(tok), None
+        self.cst.int_literal(tok)
+        return AstNode.make_integer_literal(tok)
 
-    def eat_str_literal(self) -> Tuple[CstNode, Optional[Error], Optional[StringLiteral], Any]:
+    def eat_str_literal(self) -> Union[StringLiteral, DeferredError]:
         tok = self.curr_token
         if not self.is_str_literal():
-            return CstNode.empty(), self.syntax_err(f"expected <str_literal>, got {self.curr_token}", self.curr_token), None, None
+            return self.fail("<str_literal>")
         self.advance()
-        return CstNode.str_literal(tok), None, AstNode.make_string_literal(tok), None
+        self.cst.str_literal(tok)
+        return AstNode.make_string_literal(tok)
 
     """
     ######################## HELPERS ########################
     """
     def is_class(self) -> bool:
-        return self.curr_token.type == TT_KEYWORD and self.curr_token.value == CLASS
+        return self.curr_token.kind == K_KEYWORD and self.curr_token.value == CLASS
 
     def is_if(self) -> bool:
-        return self.curr_token.type == TT_KEYWORD and self.curr_token.value == IF
+        return self.curr_token.kind == K_KEYWORD and self.curr_token.value == IF
 
     def is_else(self) -> bool:
-        return self.curr_token.type == TT_KEYWORD and self.curr_token.value == ELSE
+        return self.curr_token.kind == K_KEYWORD and self.curr_token.value == ELSE
 
     def is_while(self) -> bool:
-        return self.curr_token.type == TT_KEYWORD and self.curr_token.value == WHILE
+        return self.curr_token.kind == K_KEYWORD and self.curr_token.value == WHILE
 
     def is_readln(self) -> bool:
-        return self.curr_token.type == TT_KEYWORD and self.curr_token.value == READLN
+        return self.curr_token.kind == K_KEYWORD and self.curr_token.value == READLN
 
     def is_println(self) -> bool:
-        return self.curr_token.type == TT_KEYWORD and self.curr_token.value == PRINTLN
+        return self.curr_token.kind == K_KEYWORD and self.curr_token.value == PRINTLN
 
     def is_return(self) -> bool:
-        return self.curr_token.type == TT_KEYWORD and self.curr_token.value == RETURN
+        return self.curr_token.kind == K_KEYWORD and self.curr_token.value == RETURN
 
     def is_true(self) -> bool:
-        return self.curr_token.type == TT_KEYWORD and self.curr_token.value == TRUE
+        return self.curr_token.kind == K_KEYWORD and self.curr_token.value == TRUE
 
     def is_false(self) -> bool:
-        return self.curr_token.type == TT_KEYWORD and self.curr_token.value == FALSE
+        return self.curr_token.kind == K_KEYWORD and self.curr_token.value == FALSE
 
     def is_this(self) -> bool:
-        return self.curr_token.type == TT_KEYWORD and self.curr_token.value == THIS
+        return self.curr_token.kind == K_KEYWORD and self.curr_token.value == THIS
 
     def is_new(self) -> bool:
-        return self.curr_token.type == TT_KEYWORD and self.curr_token.value == NEW
+        return self.curr_token.kind == K_KEYWORD and self.curr_token.value == NEW
 
     def is_null(self)-> bool:
-        return self.curr_token.type == TT_KEYWORD and self.curr_token.value == NULL
+        return self.curr_token.kind == K_KEYWORD and self.curr_token.value == NULL
 
     def is_cname_type(self) -> bool:
-        return self.curr_token.type == TT_TYPE and self.curr_token.value not in (INT, BOOL, STRING, VOID)
+        return self.curr_token.kind == K_TYPE and self.curr_token.value not in (INT, BOOL, STRING, VOID)
 
     def is_int_type(self):
-        return self.curr_token.type == TT_TYPE and self.curr_token.value == INT
+        return self.curr_token.kind == K_TYPE and self.curr_token.value == INT
 
     def is_bool_type(self):
-        return self.curr_token.type == TT_TYPE and self.curr_token.value == BOOL
+        return self.curr_token.kind == K_TYPE and self.curr_token.value == BOOL
 
     def is_str_type(self):
-        return self.curr_token.type == TT_TYPE and self.curr_token.value == STRING
+        return self.curr_token.kind == K_TYPE and self.curr_token.value == STRING
 
     def is_void_type(self):
-        return self.curr_token.type == TT_TYPE and self.curr_token.value == VOID
+        return self.curr_token.kind == K_TYPE and self.curr_token.value == VOID
 
     def is_l_curly_brace(self) -> bool:
-        return self.curr_token.type == TT_L_CURLY_BRACE
+        return self.curr_token.kind == K_L_CURLY_BRACE
 
     def is_r_curly_brace(self) -> bool:
-        return self.curr_token.type == TT_R_CURLY_BRACE
+        return self.curr_token.kind == K_R_CURLY_BRACE
 
     def is_l_paren(self) -> bool:
-        return self.curr_token.type == TT_L_PAREN
+        return self.curr_token.kind == K_L_PAREN
 
     def is_r_paren(self) -> bool:
-        return self.curr_token.type == TT_R_PAREN
+        return self.curr_token.kind == K_R_PAREN
 
     def is_semicolon(self) -> bool:
-        return self.curr_token.type == TT_SEMICOLON
+        return self.curr_token.kind == K_SEMICOLON
 
     def is_comma(self) -> bool:
-        return self.curr_token.type == TT_COMMA
+        return self.curr_token.kind == K_COMMA
 
     def is_dot(self) -> bool:
-        return self.curr_token.type == TT_DOT
+        return self.curr_token.kind == K_DOT
 
     def is_id(self) -> bool:
-        return self.curr_token.type == TT_ID
+        return self.curr_token.kind == K_ID
 
     def is_plus(self) -> bool:
-        return self.curr_token.type == TT_PLUS
+        return self.curr_token.kind == K_PLUS
 
     def is_minus(self) -> bool:
-        return self.curr_token.type == TT_MINUS
+        return self.curr_token.kind == K_MINUS
 
     def is_mult(self) -> bool:
-        return self.curr_token.type == TT_MULT
+        return self.curr_token.kind == K_MULT
 
     def is_div(self) -> bool:
-        return self.curr_token.type == TT_DIV
+        return self.curr_token.kind == K_DIV
 
     def is_assign(self) -> bool:
-        return self.curr_token.type == TT_ASSIGNMENT
+        return self.curr_token.kind == K_ASSIGNMENT
 
     def is_dbl_eq(self) -> bool:
-        return self.curr_token.type == TT_EQUAL
+        return self.curr_token.kind == K_EQUAL
 
     def is_lt(self) -> bool:
-        return self.curr_token.type == TT_LESS_THAN
+        return self.curr_token.kind == K_LESS_THAN
 
     def is_gt(self) -> bool:
-        return self.curr_token.type == TT_GREATER_THAN
+        return self.curr_token.kind == K_GREATER_THAN
 
     def is_le(self) -> bool:
-        return self.curr_token.type == TT_LESS_EQ
+        return self.curr_token.kind == K_LESS_EQ
 
     def is_ge(self) -> bool:
-        return self.curr_token.type == TT_GREATER_EQ
+        return self.curr_token.kind == K_GREATER_EQ
 
     def is_ne(self) -> bool:
-        return self.curr_token.type == TT_NOT_EQ
+        return self.curr_token.kind == K_NOT_EQ
 
     def is_or(self) -> bool:
-        return self.curr_token.type == TT_OR
+        return self.curr_token.kind == K_OR
 
     def is_and(self) -> bool:
-        return self.curr_token.type == TT_AND
+        return self.curr_token.kind == K_AND
 
     def is_exclamation(self) -> bool:
-        return self.curr_token.type == TT_EXCLAMATION
+        return self.curr_token.kind == K_EXCLAMATION
 
     def is_int_literal(self) -> bool:
-        return self.curr_token.type == TT_INT
+        return self.curr_token.kind == K_INT
 
     def is_str_literal(self) -> bool:
-        return self.curr_token.type == TT_STR
+        return self.curr_token.kind == K_STR
+
+    # records a failed match, keeping only what is expected at the furthest cursor reached
+    def fail(self, expected: Optional[str]=None) -> ParseResult:
+        if self.cursor >= self.furthest:
+            if self.cursor > self.furthest:
+                self.furthest = self.cursor
+                self.furthest_token = self.curr_token
+                self.expected = set()
+            if expected is not None:
+                self.expected.add(expected)
+        return FAILED
+
+    # the error for the furthest failure, built once parsing has failed
+    def syntax_err(self, note: Optional[str]=None) -> IllegalSyntaxError:
+        return expected_error(self.expected, self.furthest_token, note)
+
+# binding power of the binary operators, higher binds tighter
+PREC_OR = 1
+PREC_AND = 2
+PREC_REL = 3
+PREC_ADD = 4
+PREC_MULT = 5
+
+# token kind -> (binding power, terminal production, ast node factory, cst node name)
+EXP_OPERATORS = {
+    K_OR: (PREC_OR, Parser.eat_or, AstNode.make_or_op, CST_BEXP),
+    K_AND: (PREC_AND, Parser.eat_and, AstNode.make_and_op, CST_CONJ),
+    K_LESS_THAN: (PREC_REL, Parser.eat_lt, AstNode.make_lt, CST_REXP),
+    K_GREATER_THAN: (PREC_REL, Parser.eat_gt, AstNode.make_gt, CST_REXP),
+    K_LESS_EQ: (PREC_REL, Parser.eat_le, AstNode.make_le, CST_REXP),
+    K_GREATER_EQ: (PREC_REL, Parser.eat_ge, AstNode.make_ge, CST_REXP),
+    K_EQUAL: (PREC_REL, Parser.eat_dbl_eq, AstNode.make_eq, CST_REXP),
+    K_NOT_EQ: (PREC_REL, Parser.eat_ne, AstNode.make_ne, CST_REXP),
+    K_PLUS: (PREC_ADD, Parser.eat_plus, AstNode.make_plus_op, CST_AEXP),
+    K_MINUS: (PREC_ADD, Parser.eat_minus, AstNode.make_minus_op, CST_AEXP),
+    K_MULT: (PREC_MULT, Parser.eat_mult, AstNode.make_mult_op, CST_TERM),
+    K_DIV: (PREC_MULT, Parser.eat_div, AstNode.make_div_op, CST_TERM),
+}
+
+###################################################################
+######################## PREDICTIVE PARSER ########################
+###################################################################
+
+# lookahead keys: keywords and builtin types are keyed by their value, class names by
+# KEY_CNAME and every other token by its kind
+KEY_CNAME = "<classname>"
+BUILTIN_TYPES = (INT, BOOL, STRING, VOID)
+
+def token_key(token: lex.Token) -> Union[int, str]:
+    kind = token.kind
+    if kind == K_KEYWORD:
+        return token.value
+    if kind == K_TYPE:
+        return token.value if token.value in BUILTIN_TYPES else KEY_CNAME
+    return kind
+
+# FIRST sets of the nonterminals of the README grammar
+FIRST_TYPE = {INT, BOOL, STRING, VOID, KEY_CNAME}
+FIRST_ATOM = {THIS, K_ID, NEW, K_L_PAREN, NULL}
+FIRST_STMT = {IF, WHILE, READLN, PRINTLN, RETURN} | FIRST_ATOM
+
+# FOLLOW sets of the nullable lists and of Exp
+FOLLOW_MDBODY2 = {K_R_CURLY_BRACE}
+FOLLOW_FMLLIST = {K_R_PAREN}
+FOLLOW_EXP = {K_R_PAREN, K_SEMICOLON, K_COMMA}
+
+TYPE_TABLE = {
+    INT: lambda make, tok: make.make_int(),
+    BOOL: lambda make, tok: make.make_bool(),
+    STRING: lambda make, tok: make.make_string(),
+    VOID: lambda make, tok: make.make_void(),
+    KEY_CNAME: lambda make, tok: make.make_cname(tok),
+}
+
+# unwinds the predictive parser to parse() on the first syntax error
+class SyntaxFailure(Exception):
+    def __init__(self, err: IllegalSyntaxError):
+        super().__init__(err.desc)
+        self.err = err
+
+class PredictiveParser:
+    """Builds the same AST as Parser, without backtracking.
+
+    Every production is picked from the lookahead token through the tables above. Two
+    places look further ahead, by a fixed number of tokens: `id = Exp ;` against a
+    statement starting with an Atom, and `Type id ;` against `Type id (` in a class body.
+    Exp is parsed by precedence climbing over EXP_OPERATORS, as in Parser.eat_exp.
+    Only the AST is built, the returned CST is None.
+
+    Nodes are made by self.make, AstNode or with arena=True an AstArena, whose make_*
+    factories add each node to the arena once its children are and return its id. The
+    productions then pass node ids around in place of nodes, so no AstNode is ever made,
+    and parse() returns the arena.
+    """
+    def __init__(self, tokens: Union[Iterable[lex.Token], lex.TokenBuffer], arena: bool=False):
+        self.tokens = tokens if isinstance(tokens, lex.TokenBuffer) else TokenStream(tokens)
+        self.cursor = 0
+        self.curr_token: lex.Token = self.tokens.get(0)
+        self.key = token_key(self.curr_token)
+        self.make: Union[Type[AstNode], AstArena] = AstArena() if arena else AstNode
+        self.binary_makes = {key: getattr(self.make, op[2].__name__) for key, op in EXP_OPERATORS.items()}
+
+    def advance(self) -> lex.Token:
+        tok = self.curr_token
+        self.cursor += 1
+        self.tokens.discard_before(self.cursor) # never backtracks, consumed tokens are dead
+        self.curr_token = self.tokens.get(self.cursor)
+        self.key = token_key(self.curr_token)
+        return tok
+
+    # key of the token n places after the current one, None past the end of the input
+    def peek(self, n: int) -> Optional[Union[int, str]]:
+        tok = self.tokens.get(self.cursor + n)
+        return None if tok is None else token_key(tok)
+
+    def parse(self) -> Tuple[None, Optional[Error], Union[Program, AstArena, None], Any]:
+        try:
+            astt = self.program()
+        except SyntaxFailure as failure:
+            return None, failure.err, None, None
+        if self.make is not AstNode:
+            astt = self.make
+        if self.key != K_EOF:
+            # another class declaration could have started here too
+            return None, self.syntax_err("'class'", "<EOF>").err, astt, None
+        return None, None, astt, None
+
+    """
+    ######################## PRODUCTIONS (NON-TERMINALS) ########################
+    """
+    def program(self) -> Program:
+        """Program -> MainClass ClassDecl*"""
+        mainclass = self.mainclass()
+        classdecls = []
+        while self.key == CLASS:
+            classdecls.append(self.classdecl())
+        return self.make.make_program(mainclass, self.make.make_classdecls(classdecls))
+
+    def mainclass(self) -> MainClass:
+        """MainClass -> class cname { Void main ( FmlList ) MdBody }"""
+        self.expect(CLASS, "'class'")
+        cname = self.cname()
+        self.expect(K_L_CURLY_BRACE, "'{'")
+        self.expect(VOID, "'Void'")
+        idd = self.id()
+        self.expect(K_L_PAREN, "'('")
+        fmllist = self.fmllist()
+        self.expect(K_R_PAREN, "')'")
+        mdbody = self.mdbody()
+        self.expect(K_R_CURLY_BRACE, "'}'")
+        mainmd = self.make.make_mddecl(self.make.make_void(), idd, fmllist, mdbody)
+        return self.make.make_mainclass(cname, mainmd)
+
+    def classdecl(self) -> ClassDecl:
+        """ClassDecl -> class cname { VarDecl* MdDecl* }"""
+        self.expect(CLASS, "'class'")
+        cname = self.cname()
+        self.expect(K_L_CURLY_BRACE, "'{'")
+        vardecls = []
+        # Type id ; is a field, Type id ( starts the methods
+        while self.key in FIRST_TYPE and self.peek(2) == K_SEMICOLON:
+            vardecls.append(self.vardecl())
+        mddecls = []
+        while self.key in FIRST_TYPE:
+            mddecls.append(self.mddecl())
+        self.expect(K_R_CURLY_BRACE, "'}'")
+        return self.make.make_classdecl(cname, self.make.make_vardecls(vardecls), self.make.make_mddecls(mddecls))
+
+    def vardecl(self) -> VarDecl:
+        """VarDecl -> Type id ;"""
+        typ = self.type()
+        idd = self.id()
+        self.expect(K_SEMICOLON, "';'")
+        return self.make.make_vardecl(typ, idd)
+
+    def mddecl(self) -> MdDecl:
+        """MdDecl -> Type id ( FmlList ) MdBody"""
+        typ = self.type()
+        idd = self.id()
+        self.expect(K_L_PAREN, "'('")
+        fmllist = self.fmllist()
+        self.expect(K_R_PAREN, "')'")
+        return self.make.make_mddecl(typ, idd, fmllist, self.mdbody())
+
+    def fmllist(self) -> FmlList:
+        """FmlList -> Type id (, Type id)* | '' """
+        fmls = []
+        if self.key in FIRST_TYPE:
+            fmls.append(self.make.make_fml(self.type(), self.id()))
+            while self.key == K_COMMA:
+                self.advance()
+                fmls.append(self.make.make_fml(self.type(), self.id()))
+        if self.key not in FOLLOW_FMLLIST:
+            raise self.syntax_err("')'")
+        return self.make.make_fmllist(fmls)
+
+    def type(self) -> 'AstType':
+        """Type -> Int | Bool | String | Void | cname"""
+        make = TYPE_TABLE.get(self.key)
+        if make is None:
+            raise self.syntax_err("<type>")
+        return make(self.make, self.advance())
+
+    def mdbody(self) -> MdBody:
+        """MdBody -> { VarDecl* Stmt Stmt* }"""
+        self.expect(K_L_CURLY_BRACE, "'{'")
+        vardecls = []
+        while self.key in FIRST_TYPE:
+            vardecls.append(self.vardecl())
+        stmts = [self.stmt()]
+        stmts.extend(self.stmts())
+        self.expect(K_R_CURLY_BRACE, "'}'")
+        return self.make.make_mdbody(self.make.make_vardecls(vardecls), self.make.make_stmts(stmts))
+
+    def stmts(self) -> List[AstNode]:
+        """Stmt1 -> Stmt Stmt1 | '' """
+        stmts = []
+        while self.key in FIRST_STMT:
+            stmts.append(self.stmt())
+        if self.key not in FOLLOW_MDBODY2:
+            raise self.syntax_err("<statement>", "'}'")
+        return stmts
+
+    def stmt(self) -> AstNode:
+        """
+        Stmt -> if ( Exp ) { Stmt Stmt1 } else { Stmt Stmt1 }
+            | while ( Exp ) { Stmt1 }
+            | readln ( id ) ;
+            | println ( Exp ) ;
+            | id = Exp ;
+            | Atom = Exp ; (atom is type field access)
+            | Atom ; (atom is type method call)
+            | return Exp ;
+            | return ;
+        """
+        production = STMT_TABLE.get(self.key)
+        if production is None:
+            raise self.syntax_err("<statement>")
+        return production(self)
 
-    def generic_syntax_err(self):
-        return IllegalSyntaxError(desc="invalid syntax", error_pos=self.curr_token.lexed_pos)
+    def if_stmt(self) -> IfStatement:
+        self.advance()
+        self.expect(K_L_PAREN, "'('")
+        cond = self.exp()
+        self.expect(K_R_PAREN, "')'")
+        self.expect(K_L_CURLY_BRACE, "'{'")
+        if_stmts = [self.stmt()] + self.stmts()
+        self.expect(K_R_CURLY_BRACE, "'}'")
+        self.expect(ELSE, "'else'")
+        self.expect(K_L_CURLY_BRACE, "'{'")
+        else_stmts = [self.stmt()] + self.stmts()
+        self.expect(K_R_CURLY_BRACE, "'}'")
+        return self.make.make_if_statement(cond, self.make.make_stmts(if_stmts), self.make.make_stmts(else_stmts))
+
+    def while_stmt(self) -> WhileStatement:
+        self.advance()
+        self.expect(K_L_PAREN, "'('")
+        cond = self.exp()
+        self.expect(K_R_PAREN, "')'")
+        self.expect(K_L_CURLY_BRACE, "'{'")
+        body = self.stmts()
+        self.expect(K_R_CURLY_BRACE, "'}'")
+        return self.make.make_while_statement(cond, self.make.make_stmts(body))
+
+    def readln_stmt(self) -> Readln:
+        self.advance()
+        self.expect(K_L_PAREN, "'('")
+        idd = self.id()
+        self.expect(K_R_PAREN, "')'")
+        self.expect(K_SEMICOLON, "';'")
+        return self.make.make_readln(idd)
+
+    def println_stmt(self) -> Println:
+        self.advance()
+        self.expect(K_L_PAREN, "'('")
+        exp = self.exp()
+        self.expect(K_R_PAREN, "')'")
+        self.expect(K_SEMICOLON, "';'")
+        return self.make.make_println(exp)
+
+    def return_stmt(self) -> ReturnStatement:
+        self.advance()
+        if self.key == K_SEMICOLON:
+            self.advance()
+            return self.make.make_return_statement()
+        exp = self.exp()
+        self.expect(K_SEMICOLON, "';'")
+        return self.make.make_return_statement(exp)
+
+    def id_stmt(self) -> AstNode:
+        # id = Exp ; needs the token after the id, anything else is an Atom statement
+        if self.peek(1) != K_ASSIGNMENT:
+            return self.atom_stmt()
+        idd = self.id()
+        self.advance()
+        exp = self.exp()
+        self.expect(K_SEMICOLON, "';'")
+        return self.make.make_assignment_statement(idd, exp)
+
+    def atom_stmt(self) -> AstNode:
+        atom = self.atom()
+        name = atom.name if self.make is AstNode else self.make.name(atom)
+        if name == AST_FIELD_ACCESS:
+            self.expect(K_ASSIGNMENT, "'='")
+            exp = self.exp()
+            self.expect(K_SEMICOLON, "';'")
+            return self.make.make_assignment_statement(atom, exp)
+        if name == AST_METHOD_CALL:
+            self.expect(K_SEMICOLON, "';'")
+            return atom
+        raise self.syntax_err("a field assignment or method call")
+
+    def exp(self) -> AstNode:
+        """Exp -> BExp | AExp | SExp"""
+        astt = self.binary(0)
+        if self.key not in FOLLOW_EXP:
+            raise self.syntax_err("')'", "';'", "','")
+        return astt
+
+    def binary(self, min_prec: int) -> AstNode:
+        """Operand (BinaryOp Operand)*, for the operators binding tighter than min_prec"""
+        astt = self.operand()
+        while True:
+            op = EXP_OPERATORS.get(self.key)
+            if op is None or op[0] <= min_prec:
+                return astt
+            prec, make = op[0], self.binary_makes[self.key]
+            self.advance()
+            astt = make(astt, self.binary(prec))
+
+            # comparisons do not chain, see Parser.eat_binary
+            after = EXP_OPERATORS.get(self.key)
+            if after is not None and (after[0] > prec or after[0] == prec == PREC_REL):
+                return astt
+
+    def operand(self) -> AstNode:
+        """Operand -> - Operand | ! Operand | integer_literal | string_literal | true | false | Atom"""
+        key = self.key
+        if key == K_MINUS:
+            self.advance()
+            return self.make.make_unegative(self.operand())
+        if key == K_EXCLAMATION:
+            self.advance()
+            return self.make.make_complement(self.operand())
+        if key == K_INT:
+            return self.make.make_integer_literal(self.advance())
+        if key == K_STR:
+            return self.make.make_string_literal(self.advance())
+        if key == TRUE:
+            return self.make.make_true(self.advance())
+        if key == FALSE:
+            return self.make.make_false(self.advance())
+        if key in FIRST_ATOM:
+            return self.atom()
+        raise self.syntax_err("<expression>")
+
+    def atom(self) -> AstNode:
+        """
+        Atom -> this Atom1
+            | id Atom1
+            | new cname ( ) Atom1
+            | ( Exp ) Atom1
+            | null Atom1
+        Atom1 -> . id Atom1 | ( ExpList ) Atom1 | ( ) Atom1 | ''
+        """
+        production = ATOM_TABLE.get(self.key)
+        if production is None:
+            raise self.syntax_err("<atom>")
+        atom = production(self)
+        while True:
+            if self.key == K_DOT:
+                self.advance()
+                atom = self.make.make_field_access(atom, self.id())
+            elif self.key == K_L_PAREN:
+                self.advance()
+                explist = self.explist() if self.key != K_R_PAREN else self.make.make_explist([])
+                self.expect(K_R_PAREN, "')'")
+                atom = self.make.make_method_call(atom, explist)
+            else:
+                return atom
+
+    def new_atom(self) -> ClassInstanceCreation:
+        self.advance()
+        cname = self.cname()
+        self.expect(K_L_PAREN, "'('")
+        self.expect(K_R_PAREN, "')'")
+        return self.make.make_class_instance_creation(cname)
 
-    def syntax_err(self, desc: str, token: Token=None):
-        return IllegalSyntaxError(desc=desc, error_pos=token.lexed_pos)
+    def paren_atom(self) -> AstNode:
+        self.advance()
+        exp = self.exp()
+        self.expect(K_R_PAREN, "')'")
+        return exp
+
+    def explist(self) -> ExpList:
+        """ExpList -> Exp (, Exp)*"""
+        exps = [self.exp()]
+        while self.key == K_COMMA:
+            self.advance()
+            exps.append(self.exp())
+        return self.make.make_explist(exps)
+
+    """
+    ######################## PRODUCTIONS (TERMINALS) ########################
+    """
+    def expect(self, key: Union[int, str], desc: str) -> lex.Token:
+        if self.key != key:
+            raise self.syntax_err(desc)
+        return self.advance()
+
+    def id(self) -> Id:
+        return self.make.make_id(self.expect(K_ID, "<id>"))
+
+    def cname(self) -> Cname:
+        return self.make.make_cname(self.expect(KEY_CNAME, "<classname>"))
+
+    def syntax_err(self, *expected: str) -> SyntaxFailure:
+        return SyntaxFailure(expected_error(expected, self.curr_token))
+
+# predict tables: lookahead key -> production
+STMT_TABLE = {
+    IF: PredictiveParser.if_stmt,
+    WHILE: PredictiveParser.while_stmt,
+    READLN: PredictiveParser.readln_stmt,
+    PRINTLN: PredictiveParser.println_stmt,
+    RETURN: PredictiveParser.return_stmt,
+    K_ID: PredictiveParser.id_stmt,
+    THIS: PredictiveParser.atom_stmt,
+    NEW: PredictiveParser.atom_stmt,
+    K_L_PAREN: PredictiveParser.atom_stmt,
+    NULL: PredictiveParser.atom_stmt,
+}
+ATOM_TABLE = {
+    THIS: lambda self: self.make.make_this(self.advance()),
+    K_ID: PredictiveParser.id,
+    NEW: PredictiveParser.new_atom,
+    K_L_PAREN: PredictiveParser.paren_atom,
+    NULL: lambda self: self.make.make_null(self.advance()),
+}
 
 def run(text: str, filename: str):
     # generate tokens
@@ -0,0 +1,424 @@
+import glob
+import json
+import time
+import unittest
+from parse import *
+
+class TestTokenStream(unittest.TestCase):
+    def test_stream_success_1(self):
+        # parsing from a token generator gives the same tree as parsing from a token list
+        for filename in glob.glob("test/parsing/*.j"):
+            with open(filename) as f:
+                text = f.read()
+
+            tokens, err = lex.run(text, filename)
+            self.assertTrue(err is None)
+            expected = Parser(tokens).parse()
+            actual = Parser(RegexLexer(text, filename).iter_tokens()).parse()
+
+            self.assertEqual(str(actual[1]), str(expected[1]), filename)
+            self.assertEqual(str(actual[2]), str(expected[2]), filename)
+
+    def test_stream_success_2(self):
+        # tokens before the oldest live checkpoint are dropped
+        stream = TokenStream(RegexLexer("a b c d e f", "test_stream_success_2").iter_tokens())
+        self.assertEqual(stream.get(5).value, "f")
+        stream.discard_before(4)
+        self.assertEqual(stream.start, 4)
+        self.assertEqual([t.value for t in stream.window], ["e", "f"])
+        self.assertEqual(stream.get(6).type, TT_EOF)
+        self.assertTrue(stream.get(7) is None)
+
+    def test_buffer_success_1(self):
+        # parsing from a TokenBuffer gives the same tree as parsing from a token list
+        for filename in glob.glob("test/parsing/*.j"):
+            with open(filename) as f:
+                text = f.read()
+
+            tokens, err = lex.run(text, filename)
+            buffer, err = RegexLexer(text, filename).lex_buffer()
+            self.assertTrue(err is None)
+            expected = Parser(tokens).parse()
+            actual = Parser(buffer).parse()
+
+            self.assertEqual(str(actual[1]), str(expected[1]), filename)
+            self.assertEqual(str(actual[2]), str(expected[2]), filename)
+
+    def test_stream_failure_1(self):
+        # a lexer error ends the stream early, the parser still sees an EOF
+        lexer = RegexLexer("class Main { Void main() { # } }", "test_stream_failure_1")
+        cst, err, astt, _ = Parser(lexer.iter_tokens()).parse()
+        self.assertTrue(err is not None)
+        self.assertTrue(isinstance(lexer.err, IllegalTokenError))
+
+class TestExpression(unittest.TestCase):
+    def parse_exp(self, exp: str):
+        tokens, _ = lex.run(f"class Main {{ Void main() {{ x = {exp}; }} }}", exp)
+        return Parser(tokens).parse()
+
+    def test_exp_success_1(self):
+        # precedence and associativity, parentheses leave no node of their own
+        pairs = [
+            ("a + b * c", "a + (b * c)"),
+            ("a - b - c", "(a - b) - c"),
+            ("a / b * c", "(a / b) * c"),
+            ("a || b && c", "a || (b && c)"),
+            ("a + 1 < b * 2 && c || d", "(((a + 1) < (b * 2)) && c) || d"),
+            ("-a * b", "(-a) * b"),
+            ("!a && b", "(!a) && b"),
+            ("\"s\" + a + b.c()", "(\"s\" + a) + b.c()"),
+        ]
+        for exp, bracketed in pairs:
+            _, err, actual, _ = self.parse_exp(exp)
+            _, _, expected, _ = self.parse_exp(bracketed)
+            self.assertTrue(err is None, exp)
+            self.assertEqual(str(actual), str(expected), exp)
+
+    def test_exp_success_2(self):
+        # Bool, Int and String operands are told apart by static checking, not the parser
+        tokens, _ = lex.run("class Main { Void main() { Int x; x = true + 1; } }", "test_exp_success_2")
+        _, err, astt, _ = Parser(tokens).parse()
+        self.assertTrue(err is None)
+        self.assertRaises(TypeCheckError, astt.static_check)
+
+    def test_exp_failure_1(self):
+        # comparisons do not chain
+        for exp in ["a < b < c", "a && b < c < d", "a == b != c"]:
+            _, err, _, _ = self.parse_exp(exp)
+            self.assertTrue(isinstance(err, IllegalSyntaxError), exp)
+
+class TestPackrat(unittest.TestCase):
+    def test_packrat_success_1(self):
+        # memoizing productions gives the same trees as parsing without it
+        for filename in glob.glob("test/parsing/*.j"):
+            with open(filename) as f:
+                text = f.read()
+
+            tokens, err = lex.run(text, filename)
+            self.assertTrue(err is None)
+            expected = Parser(tokens).parse()
+            tokens, err = lex.run(text, filename)
+            actual = Parser(tokens, packrat=True).parse()
+
+            self.assertEqual(str(actual[0]), str(expected[0]), filename)
+            self.assertEqual(str(actual[1]), str(expected[1]), filename)
+            self.assertEqual(str(actual[2]), str(expected[2]), filename)
+
+    def test_packrat_success_2(self):
+        # deep nesting, each nested Atom is parsed once
+        text = "class Main { Void main() { x = " + "(" * 40 + "a + 1" + ")" * 40 + "; } }"
+        tokens, _ = lex.run(text, "test_packrat_success_2")
+        parser = Parser(tokens, packrat=True)
+        _, err, astt, _ = parser.parse()
+        self.assertTrue(err is None)
+
+        tokens, _ = lex.run(text, "test_packrat_success_2")
+        self.assertEqual(str(astt), str(PredictiveParser(tokens).parse()[2]))
+
+    def test_packrat_success_3(self):
+        # the memo only holds entries from the last class declaration, and the class list around it
+        text = "class Main { Void main() { return; } } class A { Int f; } class B { Int g; }"
+        tokens, _ = lex.run(text, "test_packrat_success_3")
+        parser = Parser(tokens, packrat=True)
+        _, err, _, _ = parser.parse()
+        self.assertTrue(err is None)
+        start = [t.value for t in tokens].index("B") - 1
+        earlier = [name for name, cursor in parser.memo if cursor < start]
+        self.assertEqual(earlier, ["eat_program1"])
+
+class TestAstOnly(unittest.TestCase):
+    def test_ast_only_success_1(self):
+        # skipping the CST gives the same AST and errors
+        for filename in glob.glob("test/**/*.j", recursive=True):
+            with open(filename) as f:
+                text = f.read()
+
+            tokens, err = lex.run(text, filename)
+            if err is not None:
+                continue
+            expected = Parser(tokens).parse()
+            tokens, _ = lex.run(text, filename)
+            actual = Parser(tokens, cst=False).parse()
+
+            self.assertTrue(actual[0] is None, filename)
+            self.assertEqual(str(actual[1]), str(expected[1]), filename)
+            self.assertEqual(str(actual[2]), str(expected[2]), filename)
+
+    def test_ast_only_success_2(self):
+        # no CST nodes are created at all
+        text = "class Main { Void main() { x = a.b(1, -2) + 3 * 4; } }"
+        tokens, _ = lex.run(text, "test_ast_only_success_2")
+        init = CstNode.__init__
+        created = []
+        CstNode.__init__ = lambda self, *args: created.append(args)
+        try:
+            _, err, astt, _ = Parser(tokens, cst=False).parse()
+        finally:
+            CstNode.__init__ = init
+        self.assertTrue(err is None)
+        self.assertTrue(astt is not None)
+        self.assertEqual(created, [])
+
+class TestCst(unittest.TestCase):
+    def test_cst_success_1(self):
+        # alternatives that were backtracked out of leave no nodes, the leaves are the tokens in order
+        text = "class Main { Void main() { a.b = 1; f(a)(); a = (b); return; } } class A { Int f; A g(Int x, A y) { return this.g(x, y).f; } }"
+        for packrat in (False, True):
+            tokens, _ = lex.run(text, "test_cst_success_1")
+            parser = Parser(tokens, packrat=packrat)
+            cst, err, _, _ = parser.parse()
+            self.assertTrue(err is None)
+            self.assertEqual(parser.cst_nodes, [])
+
+            leaves, stack = [], [cst]
+            while stack:
+                node = stack.pop()
+                if node.value is not None:
+                    leaves.append(node.value)
+                stack.extend(reversed(node.children))
+            self.assertEqual(leaves, tokens[:-1])
+
+class TestSyntaxError(unittest.TestCase):
+    def parse_err(self, text: str):
+        tokens, _ = lex.run(text, "test_syntax_error")
+        return Parser(tokens).parse()[1]
+
+    def test_syntax_error_success_1(self):
+        # a valid program never builds an error
+        built = []
+        init = IllegalSyntaxError.__init__
+        IllegalSyntaxError.__init__ = lambda self, *args, **kwargs: built.append(args) or init(self, *args, **kwargs)
+        try:
+            err = self.parse_err("class Main { Void main() { a.b = 1 + c.d(e, f) * 2; } } class A { Int f; }")
+        finally:
+            IllegalSyntaxError.__init__ = init
+        self.assertTrue(err is None)
+        self.assertEqual(built, [])
+
+    def test_syntax_error_failure_1(self):
+        # reported at the furthest token reached, not where backtracking gave up
+        err = self.parse_err("class Main { Void main() { a = 1 +; } }")
+        self.assertEqual(err.desc, "expected <atom>, got Token(SEMICOLON)")
+        self.assertEqual(err.error_pos.col, 35)
+
+    def test_syntax_error_failure_2(self):
+        err = self.parse_err("class Main { Void main() { return; } } class A { Int f; Int g() { return 1 } }")
+        self.assertEqual(err.desc, "expected ';', got Token(R_CURLY_BRACE)")
+        self.assertEqual(err.error_pos.col, 76)
+
+    def test_syntax_error_failure_3(self):
+        # everything expected at the furthest token is listed
+        err = self.parse_err("class Main { Void main() { return; } } x")
+        self.assertEqual(err.desc, "expected one of 'class', <EOF>, got Token(IDENTIFIER,x)")
+
+    def test_syntax_error_failure_4(self):
+        # input cut off inside a class is reported at the end of the text, whatever the lexer or parser
+        text = "class Main { Void main() { return; } }\nclass Foo { Int f() { return 1; }"
+        token_sources = [
+            lambda: lex.RegexLexer(text, "test_syntax_error").iter_tokens(),
+            lambda: lex.RegexLexer(text, "test_syntax_error").lex_buffer()[0],
+            lambda: lex.Lexer(text, "test_syntax_error").lex()[0],
+            lambda: lex.run(text, "test_syntax_error", workers=2)[0],
+        ]
+        for tokens in token_sources:
+            for parser in (Parser, PredictiveParser):
+                err = parser(tokens()).parse()[1]
+                self.assertTrue(err.desc.endswith("got Token(EOF)"))
+                self.assertEqual((err.error_pos.row, err.error_pos.col), (2, 33))
+                self.assertIn("File test_syntax_error, row 2, col 33", str(err))
+
+    def test_syntax_error_failure_5(self):
+        # braces are named as they are written
+        err = self.parse_err("class Main { Void main() return; } }")
+        self.assertEqual(err.desc, "expected '{', got Token(KEYWORD,return)")
+        err = self.parse_err("class Main { Void main() { return; } }\nclass Foo { Int f() { return 1; }")
+        self.assertEqual(err.desc, "expected one of 'Bool', 'Int', 'String', 'Void', '}', <classname>, got Token(EOF)")
+
+    def test_syntax_error_failure_6(self):
+        # message, row and col of errors that used to be a bare "invalid syntax" where backtracking started
+        cases = [
+            ("class Main { Void main() { Int x; x = ; } }", "expected <atom>, got Token(SEMICOLON)", 1, 39),
+            ("class Main { Void main() { if (a) { return; } } }", "expected 'else', got Token(R_CURLY_BRACE)", 1, 47),
+            ("class Main { Void main( { return; } }",
+             "expected one of ')', 'Bool', 'Int', 'String', 'Void', <classname>, got Token(L_CURLY_BRACE)", 1, 25),
+            ("class Main { Void main() { return; } }\nclass A { Int f;\nInt g() { return 1 } }",
+             "expected ';', got Token(R_CURLY_BRACE)", 3, 19),
+        ]
+        for text, desc, row, col in cases:
+            err = self.parse_err(text)
+            self.assertEqual((err.desc, err.error_pos.row, err.error_pos.col), (desc, row, col), text)
+            self.assertEqual(str(err), f"\nIllegalSyntaxError: {desc}\nFile test_syntax_error, row {row}, col {col}\n")
+
+class TestLongLists(unittest.TestCase):
+    def test_long_lists_success_1(self):
+        # list productions loop, 100k statements stay within the default recursion limit
+        n = 100000
+        text = "class Main { Void main() { " + "a = 1;" * n + " } }"
+        tokens, _ = lex.run(text, "test_long_lists_success_1")
+        _, err, astt, _ = Parser(tokens, cst=False).parse()
+        self.assertTrue(err is None)
+        self.assertEqual(len(astt.mainclass.mainmd.mdbody.stmts.children), n)
+
+    def test_long_lists_success_2(self):
+        # the same for every other list: classes, fields, methods, formals and arguments
+        n = 2000
+        fields = "".join(f"Int f{i}; " for i in range(n))
+        methods = "".join(f"Int m{i}() {{ return {i}; }} " for i in range(n))
+        fmls = ", ".join(f"Int p{i}" for i in range(n))
+        args = ", ".join(str(i) for i in range(n))
+        classes = "".join(f"class C{i} {{ }} " for i in range(n))
+        text = f"class Main {{ Void main({fmls}) {{ a = b.c({args}); }} }} class A {{ {fields}{methods}}} {classes}"
+        tokens, _ = lex.run(text, "test_long_lists_success_2")
+        _, err, astt, _ = Parser(tokens).parse()
+        self.assertTrue(err is None)
+        self.assertEqual(len(astt.classdecls.children), n + 1)
+
+    def test_long_lists_success_3(self):
+        # a long chain of left associative operators does not recurse per operand
+        text = "class Main { Void main() { a = " + " + ".join(["b"] * 10000) + "; } }"
+        tokens, _ = lex.run(text, "test_long_lists_success_3")
+        _, err, _, _ = Parser(tokens, cst=False).parse()
+        self.assertTrue(err is None)
+
+class TestBudget(unittest.TestCase):
+    # an unclosed call whose arguments are parsed again by every statement alternative
+    pathological = "class Main { Void main() { f(" + "g(1), " * 5000 + "1; } }"
+
+    def test_budget_success_1(self):
+        # valid programs revisit fewer tokens than they have, a budget that large never trips
+        for filename in glob.glob("test/parsing/*.j"):
+            with open(filename) as f:
+                tokens, _ = lex.run(f.read(), filename)
+            expected = Parser(tokens).parse()
+            parser = Parser(tokens, max_revisits=len(tokens))
+            actual = parser.parse()
+            self.assertEqual(str(actual[1]), str(expected[1]), filename)
+            self.assertEqual(str(actual[2]), str(expected[2]), filename)
+            self.assertLessEqual(parser.revisits, len(tokens), filename)
+
+    def test_budget_failure_1(self):
+        # once the budget is spent the furthest failure so far is reported, with the work done
+        tokens, _ = lex.run("class Main { Void main() { x = " + "a(" * 50 + "1; } }", "test_budget_failure_1")
+        parser = Parser(tokens, max_revisits=10)
+        _, err, astt, _ = parser.parse()
+        self.assertTrue(astt is None)
+        self.assertEqual(err.desc, f"expected one of ')', ',', got Token(SEMICOLON) (gave up after revisiting {parser.revisits} tokens)")
+        self.assertGreater(parser.revisits, 10)
+        self.assertGreater(parser.backtracks, 0)
+
+    def test_budget_failure_2(self):
+        # a pathological input is given up on after one pass over it, in bounded time
+        tokens, _ = lex.run(self.pathological, "test_budget_failure_2")
+        unbounded = Parser(tokens, cst=False)
+        unbounded.parse()
+
+        start = time.perf_counter()
+        parser = Parser(tokens, cst=False, max_revisits=1000)
+        _, err, _, _ = parser.parse()
+        elapsed = time.perf_counter() - start
+
+        self.assertIn("gave up after revisiting", err.desc)
+        self.assertLessEqual(parser.revisits, 1000 + len(tokens))
+        self.assertLess(parser.revisits, unbounded.revisits)
+        self.assertLess(elapsed, 5.0)
+
+class TestProfile(unittest.TestCase):
+    text = "class Main { Void main() { a.b = 1; f(a, 2); return; } } class A { Int b; Int f(Int x) { return x; } }"
+
+    def test_profile_success_1(self):
+        # profiling counts every production without changing the parse
+        tokens, _ = lex.run(self.text, "test_profile_success_1")
+        expected = Parser(tokens).parse()
+        parser = Parser(tokens, profile=True)
+        actual = parser.parse()
+        self.assertEqual(str(actual[0]), str(expected[0]))
+        self.assertEqual(str(actual[2]), str(expected[2]))
+
+        profile = parser.profile
+        self.assertEqual(profile["eat_program"].calls, 1)
+        self.assertEqual(profile["eat_classdecl"].successes, 1)
+        for stats in profile.values():
+            self.assertEqual(stats.calls, stats.successes + stats.failures, stats.name)
+        # Int f( is first tried as a field, a.b = 1 and f(a, 2) as id = Exp
+        self.assertEqual(profile["eat_vardecl"].backtracks, 1)
+        self.assertEqual(profile["eat_stmt05"].backtracks, 2)
+        self.assertEqual(profile["eat_mddecl"].revisits, 2)
+
+    def test_profile_success_2(self):
+        # the report lists the productions called, most time first
+        tokens, _ = lex.run(self.text, "test_profile_success_2")
+        parser = Parser(tokens, profile=True)
+        parser.parse()
+        rows = json.loads(parser.profile_report(as_json=True))
+        self.assertEqual(rows[0]["name"], "eat_program")
+        self.assertEqual([row["time"] for row in rows], sorted((row["time"] for row in rows), reverse=True))
+        self.assertNotIn("eat_atom03", [row["name"] for row in rows])
+
+        lines = parser.profile_report().split("\n")
+        self.assertTrue(lines[0].startswith("production"))
+        self.assertEqual(len(lines), len(rows) + 1)
+
+    def test_profile_success_3(self):
+        # a parser that is not profiling calls its productions directly
+        parser = Parser([])
+        self.assertTrue(parser.profile is None)
+        self.assertFalse(any(name.startswith("eat_") for name in vars(parser)))
+
+class TestPredictiveParser(unittest.TestCase):
+    def assertSameAst(self, text: str, filename: str):
+        tokens, err = lex.run(text, filename)
+        self.assertTrue(err is None)
+        _, expected_err, expected, _ = Parser(tokens).parse()
+        tokens, err = lex.run(text, filename)
+        _, actual_err, actual, _ = PredictiveParser(tokens).parse()
+
+        self.assertEqual(actual_err is None, expected_err is None, filename)
+        self.assertEqual(str(actual), str(expected), filename)
+
+    def test_predictive_success_1(self):
+        # same tree as the backtracking parser on every test program
+        for filename in glob.glob("test/**/*.j", recursive=True):
+            with open(filename) as f:
+                self.assertSameAst(f.read(), filename)
+
+    def test_predictive_success_2(self):
+        # BExp, SExp and AExp share their Atom prefix, the longest one is kept
+        exps = [
+            "a", "a + b", "a + b + \"s\"", "a + b * c", "a + b - c", "a.f + b < c.g() && !d",
+            "-a * 2 >= b || true", "(\"s\") + a.b(1, c)", "x && y < z || w", "new Foo().f + 1",
+            "a + b && c", "!a < b", "a == true", "1 + \"s\"",
+        ]
+        for exp in exps:
+            self.assertSameAst(f"class Main {{ Void main() {{ x = {exp}; }} }}", exp)
+
+    def test_predictive_success_3(self):
+        # id = Exp ; against Atom statements, fields against methods in a class body
+        text = "class Main { Void main() { x = 1; x.y = 2; x.y(); this.z().w = 3; } }"\
+            "class Foo { Int a; Foo b; Int c(Int d, Bool e) { return; } Void f() { return a; } }"
+        self.assertSameAst(text, "test_predictive_success_3")
+
+    def test_predictive_failure_1(self):
+        # rejected by the backtracking parser, rejected here too
+        exps = ["a < b < c", "a && b < c < d", "a +", "f(a b)", "a.", "x = 1", "(a"]
+        for exp in exps:
+            self.assertSameAst(f"class Main {{ Void main() {{ x = {exp}; }} }}", exp)
+
+    def test_predictive_failure_2(self):
+        # the error points at the unexpected token
+        tokens, _ = lex.run("class Main { Void main() { return 1 } }", "test_predictive_failure_2")
+        _, err, astt, _ = PredictiveParser(tokens).parse()
+        self.assertTrue(isinstance(err, IllegalSyntaxError))
+        self.assertTrue(err.desc.endswith("got Token(R_CURLY_BRACE)"))
+        self.assertEqual(err.error_pos.col, 37)
+
+    def test_predictive_failure_3(self):
+        # tokens after the last class are reported as the backtracking parser does
+        text = "class Main { Void main() { return; } } x"
+        for parser in (Parser, PredictiveParser):
+            tokens, _ = lex.run(text, "test_predictive_failure_3")
+            err = parser(tokens).parse()[1]
+            self.assertEqual(err.desc, "expected one of 'class', <EOF>, got Token(IDENTIFIER,x)")
+            self.assertEqual((err.error_pos.row, err.error_pos.col), (1, 40))
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)